@@ -61,6 +61,8 @@ __all__ = [
     "view_raster",
     "Window",
     "Scene",
+    "SnapshotRenderer",
+    "CameraPose",
     "Shading",
     "Situation",
 ]
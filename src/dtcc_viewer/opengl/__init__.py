@@ -2,10 +2,12 @@ from .camera import Camera
 from .window import Window
 from .wrp_pointcloud import PointCloudWrapper
 from .gl_points import GlPoints
+from .point_store import PointStore
 from .gl_mesh import GlMesh
 from .wrp_mesh import MeshWrapper
 from .action import Action
 from .scene import Scene
+from .snapshot import SnapshotRenderer, CameraPose
 from .situation import Situation
 from .gui import Gui, GuiParametersMesh, GuiParametersPC
 from .gui import GuiParametersLines, GuiParametersGlobal, GuiParametersDates
@@ -17,10 +19,13 @@ __all__ = [
     "Window",
     "PointCloudWrapper",
     "GlPoints",
+    "PointStore",
     "GlMesh",
     "MeshWrapper",
     "Action",
     "Scene",
+    "SnapshotRenderer",
+    "CameraPose",
     "Situation",
     "Gui",
     "GuiParametersGlobal",
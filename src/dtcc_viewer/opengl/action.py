@@ -1,5 +1,6 @@
 import glfw
 import time
+import numpy as np
 from dtcc_viewer.logging import info, warning
 from dtcc_viewer.opengl.camera import Camera
 from dtcc_viewer.opengl.environment import Environment
@@ -53,6 +54,17 @@ class Action:
         The y-coordinate in screen space of the picked object.
     picked_id : int
         The ID of the picked object.
+    hover_x : float
+        The x-coordinate in screen space of the cursor, used for hover picking.
+    hover_y : float
+        The y-coordinate in screen space of the cursor, used for hover picking.
+    hover_moved : bool
+        Flag indicating if the cursor or the camera has moved since the last hover pick.
+    hovered_id : int
+        The ID of the object under the cursor, -1 if there is none.
+    full_quality : bool
+        Flag to draw all objects in full quality instead of trading quality for
+        frame rate while the camera moves, e.g. when rendering snapshots.
     tic : float
         The time at which the LMB was pressed.
     toc : float
@@ -89,6 +101,13 @@ class Action:
     toc: float
     tictoc_duration: float
 
+    # Tracking the cursor for hover picking
+    hover_x: float
+    hover_y: float
+    hover_moved: bool
+    hovered_id: int
+    full_quality: bool
+
     def __init__(self, width, height):
         """Initialize the Interaction object with the provided width and height.
 
@@ -115,6 +134,11 @@ class Action:
         self.picked_x = 0
         self.picked_y = 0
         self.picked_id = -1
+        self.hover_x = 0
+        self.hover_y = 0
+        self.hover_moved = False
+        self.hovered_id = -1
+        self.full_quality = False
         self.update_zoom_selected = False
 
         self.gguip = GuiParametersGlobal()
@@ -141,6 +165,39 @@ class Action:
     def zoom_selected(self, distance_to_target, new_target):
         self.camera.zoom_selected(distance_to_target, new_target)
 
+    def get_cursor_ray(self, x: float, y: float):
+        """Get a ray through a screen position, in the coordinates of the model.
+
+        Parameters
+        ----------
+        x : float
+            Frame buffer x-coordinate.
+        y : float
+            Frame buffer y-coordinate, with the origin at the bottom.
+
+        Returns
+        -------
+        tuple
+            Ray origin on the near plane and normalized ray direction.
+        """
+        move = self.camera.get_move_matrix()
+        view = self.camera.get_view_matrix(self.gguip)
+        proj = self.camera.get_projection_matrix(self.gguip)
+
+        # pyrr matrices transform row vectors, so the product is applied left to right
+        inv_mvp = np.linalg.inv(np.array(move @ view @ proj, dtype=np.float64))
+
+        x_ndc = 2.0 * x / self.fbuf_width - 1.0
+        y_ndc = 2.0 * y / self.fbuf_height - 1.0
+        near = np.array([x_ndc, y_ndc, -1.0, 1.0]) @ inv_mvp
+        far = np.array([x_ndc, y_ndc, 1.0, 1.0]) @ inv_mvp
+        near = near[0:3] / near[3]
+        far = far[0:3] / far[3]
+
+        direction = far - near
+        direction /= np.linalg.norm(direction)
+        return near, direction
+
     def set_mouse_on_gui(self, mouse_on_gui):
         """Set the flag indicating whether the mouse cursor is over the GUI window.
 
@@ -237,6 +294,7 @@ class Action:
             The vertical scroll offset.
         """
         self.camera.process_scroll_movement(xoffset, yoffset)
+        self.hover_moved = True
 
     def mouse_input_callback(self, window, button, action, mod):
         """Callback function for handling mouse button input.
@@ -287,6 +345,11 @@ class Action:
         ypos : float
             The new y-coordinate of the mouse cursor.
         """
+        # Cursor position in frame buffer coordinates for hover picking
+        self.hover_x = (self.fbuf_width / self.win_width) * xpos
+        self.hover_y = self.fbuf_height - (self.fbuf_height / self.win_height) * ypos
+        self.hover_moved = True
+
         if not self.mouse_on_gui:
             if self.left_mbtn_pressed:
                 if self.left_first_mouse:
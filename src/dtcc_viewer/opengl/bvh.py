@@ -0,0 +1,265 @@
+import numpy as np
+from dtcc_viewer.opengl.utils import morton_codes
+
+
+class RayHit:
+    """Closest intersection between a ray and the triangles in a BVH.
+
+    Attributes
+    ----------
+    id : int
+        Id of the part that the hit triangle belongs to.
+    mesh_index : int
+        Index of the mesh that the hit triangle belongs to.
+    face : int
+        Index of the hit triangle within its mesh.
+    distance : float
+        Distance along the ray from the origin to the hit.
+    position : np.ndarray
+        Position of the hit in the coordinates of the triangles.
+    world_position : np.ndarray
+        Position of the hit in the coordinates of the original data, if known.
+    """
+
+    id: int
+    mesh_index: int
+    face: int
+    distance: float
+    position: np.ndarray
+    world_position: np.ndarray
+
+    def __init__(self, id, mesh_index, face, distance, position):
+        self.id = int(id)
+        self.mesh_index = int(mesh_index)
+        self.face = int(face)
+        self.distance = float(distance)
+        self.position = position
+        self.world_position = None
+
+
+class BVH:
+    """Bounding volume hierarchy over triangles for ray casting on the CPU.
+
+    The triangles are sorted along a Morton curve through their centroids and then
+    grouped into leaves of a fixed size. The tree is a complete binary tree stored
+    in heap order, where the children of node i are 2i + 1 and 2i + 2. This layout
+    lets the whole tree be built with numpy reductions, one level at a time, and
+    lets a ray be traversed one level at a time for all boxes it passes through.
+
+    Attributes
+    ----------
+    triangles : np.ndarray
+        Triangle corners sorted in tree order [n_triangles x 3 x 3].
+    ids : np.ndarray
+        Part id for each triangle.
+    mesh_idxs : np.ndarray
+        Index of the mesh each triangle comes from.
+    faces : np.ndarray
+        Index of each triangle within its mesh.
+    leaf_size : int
+        Max number of triangles per leaf.
+    n_leaves : int
+        Number of leaves, a power of two.
+    depth : int
+        Number of levels below the root.
+    node_mins : np.ndarray
+        Min corner of the bounding box of each node [n_nodes x 3].
+    node_maxs : np.ndarray
+        Max corner of the bounding box of each node [n_nodes x 3].
+    node_valid : np.ndarray
+        False for nodes that only hold padding to complete the tree.
+    """
+
+    triangles: np.ndarray
+    ids: np.ndarray
+    mesh_idxs: np.ndarray
+    faces: np.ndarray
+    leaf_size: int
+    n_leaves: int
+    depth: int
+    node_mins: np.ndarray
+    node_maxs: np.ndarray
+    node_valid: np.ndarray
+
+    def __init__(
+        self,
+        triangles: np.ndarray,
+        ids: np.ndarray,
+        mesh_idxs: np.ndarray = None,
+        faces: np.ndarray = None,
+        leaf_size: int = 4,
+    ):
+        """Build the tree.
+
+        Parameters
+        ----------
+        triangles : np.ndarray
+            Triangle corners [n_triangles x 3 x 3].
+        ids : np.ndarray
+            Part id for each triangle.
+        mesh_idxs : np.ndarray, optional
+            Index of the mesh each triangle comes from, zeros if None.
+        faces : np.ndarray, optional
+            Index of each triangle within its mesh, the triangle index if None.
+        leaf_size : int, optional
+            Max number of triangles per leaf (default is 4).
+        """
+        n = len(triangles)
+        if mesh_idxs is None:
+            mesh_idxs = np.zeros(n, dtype=np.int32)
+        if faces is None:
+            faces = np.arange(n, dtype=np.int64)
+
+        triangles = np.asarray(triangles, dtype=np.float32).reshape(-1, 3, 3)
+        codes = morton_codes(triangles.mean(axis=1), 10)
+        order = np.argsort(codes, kind="stable")
+
+        self.triangles = triangles[order]
+        self.ids = np.asarray(ids)[order]
+        self.mesh_idxs = np.asarray(mesh_idxs)[order]
+        self.faces = np.asarray(faces)[order]
+        self.leaf_size = max(int(leaf_size), 1)
+
+        self._build_nodes()
+
+    @property
+    def n_triangles(self) -> int:
+        """Number of triangles in the tree."""
+        return len(self.triangles)
+
+    def _build_nodes(self) -> None:
+        """Compute the bounding boxes of all nodes, from the leaves up."""
+        n = self.n_triangles
+        n_filled = max(int(np.ceil(n / self.leaf_size)), 1)
+        self.depth = int(np.ceil(np.log2(n_filled)))
+        self.n_leaves = 2**self.depth
+        n_nodes = 2 * self.n_leaves - 1
+
+        self.node_mins = np.full((n_nodes, 3), np.inf, dtype=np.float32)
+        self.node_maxs = np.full((n_nodes, 3), -np.inf, dtype=np.float32)
+        self.node_valid = np.zeros(n_nodes, dtype=bool)
+
+        first_leaf = self.n_leaves - 1
+        if n > 0:
+            starts = np.arange(0, n, self.leaf_size)
+            leaves = slice(first_leaf, first_leaf + len(starts))
+            tri_mins = self.triangles.min(axis=1)
+            tri_maxs = self.triangles.max(axis=1)
+            self.node_mins[leaves] = np.minimum.reduceat(tri_mins, starts, axis=0)
+            self.node_maxs[leaves] = np.maximum.reduceat(tri_maxs, starts, axis=0)
+            self.node_valid[leaves] = True
+
+        # Each level is reduced from the level below, children are contiguous
+        for level in range(self.depth - 1, -1, -1):
+            start, end = 2**level - 1, 2 ** (level + 1) - 1
+            c_start, c_end = end, 2 ** (level + 2) - 1
+            self.node_mins[start:end] = (
+                self.node_mins[c_start:c_end].reshape(-1, 2, 3).min(axis=1)
+            )
+            self.node_maxs[start:end] = (
+                self.node_maxs[c_start:c_end].reshape(-1, 2, 3).max(axis=1)
+            )
+            self.node_valid[start:end] = (
+                self.node_valid[c_start:c_end].reshape(-1, 2).any(axis=1)
+            )
+
+    def _hit_boxes(self, nodes, origin, inv_dir, t_max) -> np.ndarray:
+        """Slab test between the ray and the boxes of a set of nodes."""
+        t1 = (self.node_mins[nodes] - origin) * inv_dir
+        t2 = (self.node_maxs[nodes] - origin) * inv_dir
+        t_near = np.minimum(t1, t2).max(axis=1)
+        t_far = np.maximum(t1, t2).min(axis=1)
+        hit = (t_near <= t_far) & (t_far >= 0.0) & (t_near <= t_max)
+        return hit & self.node_valid[nodes]
+
+    def intersect(
+        self,
+        origin: np.ndarray,
+        direction: np.ndarray,
+        t_max: float = np.inf,
+        mesh_mask: np.ndarray = None,
+        clip_max: np.ndarray = None,
+    ) -> RayHit:
+        """Find the closest triangle hit by a ray.
+
+        Parameters
+        ----------
+        origin : np.ndarray
+            Start point of the ray.
+        direction : np.ndarray
+            Direction of the ray, normalized so that distances are lengths.
+        t_max : float, optional
+            Max distance along the ray.
+        mesh_mask : np.ndarray, optional
+            One bool per mesh index, triangles of meshes set to False are ignored.
+        clip_max : np.ndarray, optional
+            Upper bound of x, y and z for a hit to count, used for clipping planes.
+
+        Returns
+        -------
+        RayHit
+            The closest hit, or None if the ray misses.
+        """
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        if self.n_triangles == 0:
+            return None
+
+        # Avoid division by zero for rays parallel to an axis
+        safe_dir = np.where(np.abs(direction) < 1e-12, 1e-12, direction)
+        inv_dir = 1.0 / safe_dir
+
+        active = np.array([0])
+        if not self._hit_boxes(active, origin, inv_dir, t_max)[0]:
+            return None
+
+        for _ in range(self.depth):
+            children = np.concatenate((2 * active + 1, 2 * active + 2))
+            active = children[self._hit_boxes(children, origin, inv_dir, t_max)]
+            if len(active) == 0:
+                return None
+
+        # Triangles of the leaves that were hit
+        leaves = active - (self.n_leaves - 1)
+        tris = leaves[:, None] * self.leaf_size + np.arange(self.leaf_size)
+        tris = tris.ravel()
+        tris = tris[tris < self.n_triangles]
+
+        if mesh_mask is not None:
+            tris = tris[np.asarray(mesh_mask)[self.mesh_idxs[tris]]]
+
+        t = self._intersect_triangles(tris, origin, direction)
+        valid = np.isfinite(t) & (t <= t_max)
+        positions = origin + np.where(valid, t, 0.0)[:, None] * direction
+        if clip_max is not None:
+            valid &= np.all(positions <= clip_max, axis=1)
+
+        if not np.any(valid):
+            return None
+
+        idx = np.argmin(np.where(valid, t, np.inf))
+        tri = tris[idx]
+        hit = RayHit(
+            self.ids[tri], self.mesh_idxs[tri], self.faces[tri], t[idx], positions[idx]
+        )
+        return hit
+
+    def _intersect_triangles(self, tris, origin, direction) -> np.ndarray:
+        """Möller-Trumbore test for a set of triangles, inf where there is no hit."""
+        v0 = self.triangles[tris, 0].astype(np.float64)
+        e1 = self.triangles[tris, 1] - v0
+        e2 = self.triangles[tris, 2] - v0
+
+        p = np.cross(direction, e2)
+        det = np.einsum("ij,ij->i", e1, p)
+        parallel = np.abs(det) < 1e-12
+        inv_det = 1.0 / np.where(parallel, 1.0, det)
+
+        s = origin - v0
+        u = np.einsum("ij,ij->i", s, p) * inv_det
+        q = np.cross(s, e1)
+        v = (q @ direction) * inv_det
+        t = np.einsum("ij,ij->i", e2, q) * inv_det
+
+        hit = ~parallel & (u >= 0.0) & (v >= 0.0) & (u + v <= 1.0) & (t >= 0.0)
+        return np.where(hit, t, np.inf)
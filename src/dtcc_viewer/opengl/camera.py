@@ -245,6 +245,34 @@ class Camera:
         self.distance_to_target = dtt
         self.update_camera_vectors()
 
+    def set_pose(self, position: np.ndarray, target: np.ndarray) -> None:
+        """Place the camera at an explicit position looking at a target.
+
+        The pose is converted to the yaw, pitch and distance representation used
+        by the camera so that subsequent mouse navigation continues smoothly.
+
+        Parameters
+        ----------
+        position : np.ndarray
+            Camera position in scene coordinates.
+        target : np.ndarray
+            Point the camera is looking at in scene coordinates.
+        """
+        target = Vector3(np.array(target, dtype=float))
+        offset = np.array(position, dtype=float) - np.array(target, dtype=float)
+        dtt = float(np.linalg.norm(offset))
+        if dtt == 0.0:
+            warning("Camera position and target coincide, pose ignored.")
+            return
+
+        self.rotation_lock = False
+        self.target = target
+        self.distance_to_target = dtt
+        self.yaw = np.degrees(np.arctan2(offset[1], offset[0]))
+        self.pitch = np.degrees(np.arcsin(np.clip(offset[2] / dtt, -1.0, 1.0)))
+        self.pitch = float(np.clip(self.pitch, -89.99, 89.99))
+        self.update_camera_vectors()
+
     def print(self):
         info("Camera settings:")
         info(f"Camera position: {self.position}")
@@ -59,7 +59,8 @@ class DataWrapper(ABC):
         d_count : int
             Data count.
         """
-        self.row_count = math.ceil(d_count / self.max_tex_size)
+        # At least one row, so that the texture is valid without any data
+        self.row_count = max(1, math.ceil(d_count / self.max_tex_size))
         self.col_count = self.max_tex_size
         debug(f"Data matrix has {self.row_count} rows and {self.col_count} columns.")
 
@@ -272,6 +273,12 @@ class MeshDataWrapper(DataWrapper):
             val_caps = (np.min(data_res), np.max(data_res))
             return data_mat, val_caps
 
+    def _calc_val_caps(self, data: np.ndarray):
+        """Min and max of the data, zeros for a mesh without faces."""
+        if len(data) == 0:
+            return (0.0, 0.0)
+        return (np.min(data), np.max(data))
+
     def _face_data_2_new_vertex_structure(self, data: np.ndarray):
         """
         Restructure per face data to match vertex structure with 3 unique vertices per face.
@@ -325,12 +332,12 @@ class MeshDataWrapper(DataWrapper):
         if len(data) == self.f_count:
             data_res = self._face_data_2_new_vertex_structure(data)
             data_mat = self._reformat_data_for_texture(data_res)
-            val_caps = (np.min(data_res), np.max(data_res))
+            val_caps = self._calc_val_caps(data_res)
             return data_mat, val_caps
         elif len(data) == self.v_count:
             data_res = self._vertex_data_2_new_vertex_structure(data)
             data_mat = self._reformat_data_for_texture(data_res)
-            val_caps = (np.min(data_res), np.max(data_res))
+            val_caps = self._calc_val_caps(data_res)
             return data_mat, val_caps
         else:
             warning(f"Data count does not match vertex or face count.")
@@ -15,6 +15,7 @@ from dtcc_viewer.opengl.parameters import GuiParametersLines, GuiParametersGloba
 from dtcc_viewer.opengl.utils import BoundingBox
 from dtcc_viewer.opengl.wrp_linestring import LineStringWrapper
 from dtcc_viewer.opengl.gl_object import GlObject
+from dtcc_viewer.opengl.line_levels import LineLevels
 
 from dtcc_viewer.shaders.shaders_lines import (
     vertex_shader_lines,
@@ -51,6 +52,10 @@ class GlLines(GlObject):
         Number of vertices.
     n_lines : int
         Number of lines.
+    n_lines_drawn : int
+        Number of lines drawn in the current frame.
+    lod : LineLevels
+        Simplified levels packed after the full resolution indices, or None.
     bb_local : BoundingBox
         Local bounding box.
     bb_global : BoundingBox
@@ -86,6 +91,8 @@ class GlLines(GlObject):
 
     n_vertices: int  # Number of vertices
     n_lines: int  # Number of lines
+    n_lines_drawn: int  # Number of lines drawn in the current frame
+    lod: LineLevels  # Simplified levels of the lines
 
     bb_local: BoundingBox
     bb_global: BoundingBox
@@ -122,6 +129,12 @@ class GlLines(GlObject):
 
         self.n_vertices = len(self.vertices) // 6
         self.n_lines = len(self.line_indices) // 2
+        self.n_lines_drawn = self.n_lines
+
+        # All levels are drawn from one element buffer, starting with full resolution
+        self.lod = wrapper.lod
+        if self.lod is not None:
+            self.line_indices = self.lod.indices
 
         self.shader: int
         self.uniform_locs = {}
@@ -136,6 +149,8 @@ class GlLines(GlObject):
         self.texture_idx = None
 
         self.guip.color = draw_colors
+        self.guip.lod_available = self.lod is not None
+        self.guip.lod = self.lod is not None
 
     def _create_textures(self) -> None:
         """Create textures for data."""
@@ -240,12 +255,58 @@ class GlLines(GlObject):
         glUniform1f(self.uniform_locs["data_max"], self.guip.data_max)
         glUniform1i(self.uniform_locs["data_tex"], self.texture_idx)
 
-        glDrawElements(GL_LINES, len(self.line_indices), GL_UNSIGNED_INT, None)
+        (start, count) = self._get_draw_range(action)
+        self.n_lines_drawn = count // 2
+        glDrawElements(GL_LINES, count, GL_UNSIGNED_INT, ctypes.c_void_p(4 * start))
 
         self._unbind_vao()
         self._unbind_shader()
         self._unbind_data_texture()
 
+    def _get_draw_range(self, action: Action) -> tuple[int, int]:
+        """First index and index count of the level to draw.
+
+        The level is selected from the size of the simplification grid cells on
+        screen at the camera target, clamped into the bounding box, since that is
+        where the user is looking. If the point of the bounding box closest to the
+        camera is on screen and nearer, it is used instead, so lines close to the
+        camera are never drawn too coarse. That point is not used when it is off
+        screen, as it nearly always is close to the camera for oblique views.
+        """
+        self.guip.lod_level = 0
+        if self.lod is None or not self.guip.lod:
+            return 0, 2 * self.n_lines
+
+        view = action.camera.get_view_matrix(action.gguip)
+        proj = action.camera.get_projection_matrix(action.gguip)
+        mvp = view @ proj
+        bb = self.bb_local
+        bb_min = [bb.xmin, bb.ymin, bb.zmin]
+        bb_max = [bb.xmax, bb.ymax, bb.zmax]
+        position = np.array(action.camera.position, dtype=np.float64)
+        target = np.array(action.camera.target, dtype=np.float64)
+        point = np.clip(target, bb_min, bb_max)
+        closest = np.clip(position, bb_min, bb_max)
+
+        d_closest = np.linalg.norm(closest - position)
+        d_point = np.linalg.norm(point - position)
+        if d_closest < d_point and self._is_on_screen(mvp, closest):
+            point = closest
+
+        height = action.fbuf_height
+        level = self.lod.select(mvp, proj, point, height, self.guip.lod_error)
+
+        self.guip.lod_level = level
+        return int(self.lod.starts[level]), int(self.lod.counts[level])
+
+    def _is_on_screen(self, mvp: np.ndarray, point: np.ndarray) -> bool:
+        """Check if a point is in front of the camera and inside the viewport."""
+        clip = np.append(point, 1.0) @ mvp
+        if clip[3] <= 0:
+            return False
+        ndc = clip[0:2] / clip[3]
+        return bool(np.all(np.abs(ndc) <= 1.0))
+
     def _bind_shader(self) -> None:
         """Bind the shader program."""
         glUseProgram(self.shader)
@@ -8,11 +8,15 @@ from OpenGL.GL.shaders import compileProgram, compileShader
 from dtcc_viewer.opengl.action import Action
 from dtcc_viewer.opengl.wrp_mesh import MeshWrapper
 from dtcc_viewer.opengl.utils import Shading, BoundingBox
+from dtcc_viewer.opengl.utils import frustum_planes, aabbs_in_frustum, projected_sizes
 from dtcc_viewer.opengl.environment import Environment
 from dtcc_viewer.logging import info, warning
 from dtcc_viewer.opengl.parts import Parts
+from dtcc_viewer.opengl.section import CellSection
+from dtcc_viewer.opengl.wrp_isosurface import IsosurfaceWrapper
 from dtcc_viewer.opengl.data_wrapper import MeshDataWrapper
 from dtcc_viewer.opengl.gl_object import GlObject
+from dtcc_viewer.opengl.occlusion import OcclusionQueries
 
 from dtcc_viewer.opengl.parameters import (
     GuiParametersGlobal,
@@ -137,6 +141,20 @@ class GlMesh(GlObject):
         Size of model as radius
     parts : Parts
         Defines clickable mesh parts and their attributes
+    section : CellSection
+        Cells cut by the clipping planes for volume meshes, None for other meshes
+    isosurface : IsosurfaceWrapper
+        Wrapper that extracts the mesh again for new iso values, None for others
+    draw_starts : np.ndarray
+        First face of each contiguous range of visible parts, None to draw all faces
+    draw_counts : np.ndarray
+        Number of faces in each contiguous range of visible parts
+    n_faces_drawn : int
+        Number of faces that passed the culling in the last frame
+    in_view : np.ndarray
+        Parts that passed the frustum culling, None if culling is not active
+    occlusion : OcclusionQueries
+        Occlusion queries for the parts, created when occlusion culling is enabled
     """
 
     VAO_triangels: int
@@ -171,6 +189,13 @@ class GlMesh(GlObject):
     diameter_xy: float
     radius_xy: float
     parts: Parts
+    section: CellSection
+    isosurface: IsosurfaceWrapper
+    draw_starts: np.ndarray
+    draw_counts: np.ndarray
+    n_faces_drawn: int
+    in_view: np.ndarray
+    occlusion: OcclusionQueries
     cast_shadows: bool
     receive_shadows: bool
 
@@ -182,6 +207,7 @@ class GlMesh(GlObject):
         self.faces = mesh_wrapper.faces
         self.edges = mesh_wrapper.edges
         self.parts = mesh_wrapper.parts
+        self.section = mesh_wrapper.section
         self.data_wrapper = mesh_wrapper.data_wrapper
 
         # 9 data points per vertex: [x, y, z, tx, ty, nx, ny, nz, id]
@@ -194,6 +220,17 @@ class GlMesh(GlObject):
         data_mat_dict = self.data_wrapper.data_mat_dict
         data_min_max = self.data_wrapper.data_min_max
         self.guip = GuiParametersMesh(self.name, data_mat_dict, data_min_max)
+        self.guip.section_available = self.section is not None
+        self.guip.section = self.section is not None
+        self.section_ranges = None
+
+        self.isosurface = mesh_wrapper.isosurface
+        if self.isosurface is not None:
+            self.guip.iso_available = True
+            self.guip.iso_min_max = self.isosurface.fields_min_max
+            self.guip.iso_keys = list(self.guip.iso_min_max.keys())
+            self.guip.iso_idx = self.guip.iso_keys.index(self.isosurface.iso_key)
+            self.guip.iso_value = self.isosurface.iso_value
 
         self.bb_local = mesh_wrapper.bb_local
         self.bb_global = mesh_wrapper.bb_global
@@ -212,9 +249,88 @@ class GlMesh(GlObject):
         self.cast_shadows = True
         self.receive_shadows = True
 
+        self.draw_starts = None
+        self.draw_counts = None
+        self.n_faces_drawn = self.n_faces
+        self.in_view = None
+        self.occlusion = None
+
+    def update_isosurface(self) -> bool:
+        """Request a new isosurface if the user has triggered an update and swap in
+        the latest extracted surface when it is ready.
+
+        Returns
+        -------
+        bool
+            True if the mesh was replaced.
+        """
+        if self.isosurface is None:
+            return False
+
+        if self.guip.update_iso:
+            key = self.guip.iso_keys[self.guip.iso_idx]
+            self.isosurface.request(key, self.guip.iso_value)
+            self.guip.update_iso = False
+
+        self.guip.iso_busy = self.isosurface.busy
+        self.guip.iso_empty = self.isosurface.empty
+        mesh_wrapper = self.isosurface.poll()
+        if mesh_wrapper is None:
+            return False
+
+        self.replace_mesh(mesh_wrapper)
+        return True
+
+    def replace_mesh(self, mesh_wrapper: MeshWrapper) -> None:
+        """Replace the geometry and data with those of another mesh wrapper.
+
+        The shaders and the GUI settings are kept, and the data ranges of the
+        sliders are reset to the ranges of the new data.
+
+        Parameters
+        ----------
+        mesh_wrapper : MeshWrapper
+            Wrapper with the new mesh, with the same data names.
+        """
+        glDeleteVertexArrays(2, [self.VAO_edge, self.VAO_triangels])
+        glDeleteBuffers(2, [self.VBO_edge, self.EBO_edge])
+        glDeleteBuffers(2, [self.VBO_triangels, self.EBO_triangels])
+        glDeleteTextures(1, [self.data_texture])
+
+        self.vertices = mesh_wrapper.vertices
+        self.faces = mesh_wrapper.faces
+        self.edges = mesh_wrapper.edges
+        self.parts = mesh_wrapper.parts
+        self.data_wrapper = mesh_wrapper.data_wrapper
+        self.bb_local = mesh_wrapper.bb_local
+        self.n_vertices = len(self.vertices) // 9
+        self.n_faces = len(self.faces) // 3
+        self.n_edges = len(self.edges) // 2
+        self.parts.calc_geometry(self.vertices)
+
+        data_min_max = self.data_wrapper.data_min_max
+        self.guip.data_keys = list(self.data_wrapper.data_mat_dict.keys())
+        self.guip.data_idx = min(self.guip.data_idx, len(self.guip.data_keys) - 1)
+        self.guip.dict_min_max = data_min_max
+        for key, min_max in data_min_max.items():
+            self.guip.dict_sldr_val[key] = [min_max[0], min_max[1]]
+        self.guip.calc_min_max()
+
+        self.draw_starts = None
+        self.draw_counts = None
+        self.n_faces_drawn = self.n_faces
+        self.in_view = None
+        if self.occlusion is not None:
+            self.occlusion.delete()
+        self.occlusion = None
+
+        self._create_textures()
+        self._create_geometry()
+        self.guip.update_data_tex = True
+
     def get_vertex_ids(self):
-        """Get the vertex ids from the vertices array."""
-        return self.vertices[8::9]
+        """Get the vertex ids, stored as unsigned integer bits in the vertices."""
+        return self.vertices.view(np.uint32)[8::9]
 
     def get_average_vertex_position(self, indices):
         """Get the average position of a set of vertices."""
@@ -273,7 +389,7 @@ class GlMesh(GlObject):
 
         # Ids
         glEnableVertexAttribArray(3)  # 2 is the layout location for the vertex shader
-        glVertexAttribPointer(3, 1, GL_FLOAT, GL_FALSE, 36, ctypes.c_void_p(32))
+        glVertexAttribIPointer(3, 1, GL_UNSIGNED_INT, 36, ctypes.c_void_p(32))
 
         glBindVertexArray(0)
 
@@ -311,7 +427,7 @@ class GlMesh(GlObject):
 
         # Id for clickability
         glEnableVertexAttribArray(3)  # 1 is the layout location for the vertex shader
-        glVertexAttribPointer(3, 1, GL_FLOAT, GL_FALSE, 36, ctypes.c_void_p(32))
+        glVertexAttribIPointer(3, 1, GL_UNSIGNED_INT, 36, ctypes.c_void_p(32))
 
         glBindVertexArray(0)
 
@@ -363,6 +479,9 @@ class GlMesh(GlObject):
         self.uloc_line["picked_id"] = glGetUniformLocation(
             self.shader_line, "picked_id"
         )
+        self.uloc_line["hovered_id"] = glGetUniformLocation(
+            self.shader_line, "hovered_id"
+        )
 
     def _create_shader_ambient(self) -> None:
         """Create shader for ambient shading."""
@@ -404,6 +523,9 @@ class GlMesh(GlObject):
         self.uloc_ambi["picked_id"] = glGetUniformLocation(
             self.shader_ambi, "picked_id"
         )
+        self.uloc_ambi["hovered_id"] = glGetUniformLocation(
+            self.shader_ambi, "hovered_id"
+        )
 
     def _create_shader_diffuse(self) -> None:
         """Create shader for diffuse shading."""
@@ -454,6 +576,9 @@ class GlMesh(GlObject):
         self.uloc_diff["picked_id"] = glGetUniformLocation(
             self.shader_diff, "picked_id"
         )
+        self.uloc_diff["hovered_id"] = glGetUniformLocation(
+            self.shader_diff, "hovered_id"
+        )
 
     def _create_shader_shadow_map(self) -> None:
         """Create shader for rendering shadow map."""
@@ -516,6 +641,9 @@ class GlMesh(GlObject):
         self.uloc_shdw["picked_id"] = glGetUniformLocation(
             self.shader_shdw, "picked_id"
         )
+        self.uloc_shdw["hovered_id"] = glGetUniformLocation(
+            self.shader_shdw, "hovered_id"
+        )
 
     def _create_shader_normals(self) -> None:
         """Create shaders for rendering normals."""
@@ -580,6 +708,7 @@ class GlMesh(GlObject):
         glUniform1f(self.uloc_line["data_min"], self.guip.data_min)
         glUniform1f(self.uloc_line["data_max"], self.guip.data_max)
         glUniform1i(self.uloc_line["picked_id"], action.picked_id)
+        glUniform1i(self.uloc_line["hovered_id"], action.hovered_id)
         glUniform1i(self.uloc_line["data_tex"], self.texture_idx)
 
         self._lines_draw_call()
@@ -612,6 +741,7 @@ class GlMesh(GlObject):
         glUniform1f(self.uloc_ambi["data_min"], self.guip.data_min)
         glUniform1f(self.uloc_ambi["data_max"], self.guip.data_max)
         glUniform1i(self.uloc_ambi["picked_id"], action.picked_id)
+        glUniform1i(self.uloc_ambi["hovered_id"], action.hovered_id)
         glUniform1i(self.uloc_ambi["data_tex"], self.texture_idx)
 
         self.triangles_draw_call()
@@ -646,6 +776,7 @@ class GlMesh(GlObject):
         glUniform1f(self.uloc_diff["data_min"], self.guip.data_min)
         glUniform1f(self.uloc_diff["data_max"], self.guip.data_max)
         glUniform1i(self.uloc_diff["picked_id"], action.picked_id)
+        glUniform1i(self.uloc_diff["hovered_id"], action.hovered_id)
         glUniform1i(self.uloc_diff["data_tex"], self.texture_idx)
 
         view_pos = action.camera.position
@@ -682,7 +813,8 @@ class GlMesh(GlObject):
         glUniformMatrix4fv(self.uloc_shmp["lsm"], 1, GL_FALSE, lsm)
         translation = pyrr.matrix44.create_from_translation(pyrr.Vector3([0, 0, 0]))
         glUniformMatrix4fv(self.uloc_shmp["model"], 1, GL_FALSE, translation)
-        self.triangles_draw_call()
+        # Parts outside the camera view can still cast shadows into it
+        self.triangles_draw_call(cull=False)
 
     def render_shadows_pass2(
         self,
@@ -714,6 +846,7 @@ class GlMesh(GlObject):
         glUniform1f(self.uloc_shdw["data_min"], self.guip.data_min)
         glUniform1f(self.uloc_shdw["data_max"], self.guip.data_max)
         glUniform1i(self.uloc_shdw["picked_id"], action.picked_id)
+        glUniform1i(self.uloc_shdw["hovered_id"], action.hovered_id)
         glUniform1i(self.uloc_shdw["data_tex"], self.texture_idx)
 
         # Set light uniforms
@@ -774,18 +907,132 @@ class GlMesh(GlObject):
         self.triangles_draw_call()
         self._unbind_shader()
 
-    def triangles_draw_call(self):
+    def update_visibility(self, action: Action) -> None:
+        """Find the parts that are visible to the camera.
+
+        Parts with a bounding box outside the view frustum, or with a projected
+        size below the threshold in the global gui parameters, are skipped by the
+        following draw calls. With occlusion culling, parts that were hidden behind
+        other geometry according to the latest occlusion queries are skipped too.
+        The visible parts are merged into contiguous face ranges that are drawn
+        with a single glMultiDrawElements call.
+        """
+        gguip = action.gguip
+        self.draw_starts = None
+        self.draw_counts = None
+        self.in_view = None
+        self.n_faces_drawn = self.n_faces
+
+        if self.section is not None and self.guip.section:
+            self._update_section(gguip)
+            return
+
+        if not (gguip.frustum_culling or gguip.occlusion_culling):
+            return
+        if self.parts is None or self.parts.bb_mins is None:
+            return
+        if self.parts.f_count != self.n_faces:
+            return
+
+        move = action.camera.get_move_matrix()
+        view = action.camera.get_view_matrix(gguip)
+        proj = action.camera.get_projection_matrix(gguip)
+        mvp = move @ view @ proj
+
+        visible = np.ones(self.parts.count, dtype=bool)
+
+        if gguip.frustum_culling:
+            planes = frustum_planes(mvp)
+            visible &= aabbs_in_frustum(planes, self.parts.bb_mins, self.parts.bb_maxs)
+
+            if gguip.cull_size_px > 0:
+                centers = self.parts.centroids
+                sizes = projected_sizes(
+                    mvp, proj, centers, self.parts.radii, action.fbuf_height
+                )
+                visible &= sizes >= gguip.cull_size_px
+
+        self.in_view = visible
+
+        if gguip.occlusion_culling:
+            visible = visible & self._get_unoccluded(action)
+
+        self.draw_starts, self.draw_counts = self.parts.get_draw_ranges(visible)
+        self.n_faces_drawn = int(np.sum(self.draw_counts))
+
+    def _update_section(self, gguip: GuiParametersGlobal) -> None:
+        """Draw only the faces of the cells cut by the active clipping planes.
+
+        The cut cells are only updated when a plane has moved, and then only for
+        the cells between the old and the new plane position.
+        """
+        doms = self._get_clip_domains()
+        planes = [None, None, None]
+        for i in range(3):
+            if gguip.clip_bool[i]:
+                planes[i] = doms[i] * gguip.clip_dist[i]
+
+        if self.section.update(planes) or self.section_ranges is None:
+            self.section_ranges = self.section.get_draw_ranges()
+
+        (self.draw_starts, self.draw_counts) = self.section_ranges
+        self.n_faces_drawn = int(np.sum(self.draw_counts))
+
+    def _get_unoccluded(self, action: Action) -> np.ndarray:
+        """Get the parts that are not occluded according to the latest queries."""
+        if self.occlusion is None:
+            self.occlusion = OcclusionQueries(self.parts.bb_mins, self.parts.bb_maxs)
+
+        self.occlusion.collect()
+
+        # Parts outside the view have no valid result when they come back into view
+        self.occlusion.reset(~self.in_view)
+
+        # The box of a part around the camera is clipped by the near plane and
+        # may not pass any samples, so such parts are always drawn
+        cam = np.array(action.camera.position, dtype=float)
+        margin = action.camera.near_plane
+        inside = np.all(
+            (cam >= self.parts.bb_mins - margin) & (cam <= self.parts.bb_maxs + margin),
+            axis=1,
+        )
+        return self.occlusion.visible | inside
+
+    def issue_occlusion_queries(self, box: tuple) -> None:
+        """Query the visibility of the parts in view against the current depth."""
+        if self.occlusion is not None and self.in_view is not None:
+            self.occlusion.issue(self.in_view, box)
+
+    def triangles_draw_call(self, cull: bool = True):
         """Bind the vertex array object and calling draw function for triangles"""
         self._bind_vao_triangels()
-        glDrawElements(GL_TRIANGLES, len(self.faces), GL_UNSIGNED_INT, None)
+        if cull and self.draw_starts is not None:
+            self._multi_draw_call(GL_TRIANGLES, 3)
+        else:
+            glDrawElements(GL_TRIANGLES, len(self.faces), GL_UNSIGNED_INT, None)
         self._unbind_vao()
 
-    def _lines_draw_call(self):
+    def _lines_draw_call(self, cull: bool = True):
         """Bind the vertex array object and calling draw function for lines"""
         self._bind_vao_lines()
-        glDrawElements(GL_LINES, len(self.edges), GL_UNSIGNED_INT, None)
+        if cull and self.draw_starts is not None:
+            # The edges are stored face by face with 6 indices per face
+            self._multi_draw_call(GL_LINES, 6)
+        else:
+            glDrawElements(GL_LINES, len(self.edges), GL_UNSIGNED_INT, None)
         self._unbind_vao()
 
+    def _multi_draw_call(self, mode, indices_per_face: int) -> None:
+        """Draw the visible face ranges from the bound element buffer."""
+        n_ranges = len(self.draw_starts)
+        if n_ranges == 0:
+            return
+
+        counts = np.array(self.draw_counts * indices_per_face, dtype=np.int32)
+        offsets = self.draw_starts * indices_per_face * 4  # Size in bytes
+        pointers = (ctypes.c_void_p * n_ranges)(*[int(o) for o in offsets])
+        glMultiDrawElements(mode, counts, GL_UNSIGNED_INT, pointers, n_ranges)
+
     def _bind_vao_triangels(self) -> None:
         """Bind the vertex array object for triangle rendering."""
         glBindVertexArray(self.VAO_triangels)
@@ -1,17 +1,20 @@
 import math
+import ctypes
 import numpy as np
 import pyrr
 from pprint import pp
 from OpenGL.GL import *
 from OpenGL.GL.shaders import compileProgram, compileShader
 from dtcc_viewer.opengl.action import Action
-from dtcc_viewer.opengl.utils import Shading, BoundingBox, color_to_id
+from dtcc_viewer.opengl.utils import Shading, BoundingBox
 from dtcc_viewer.logging import info, warning
 from dtcc_viewer.opengl.gl_mesh import GlMesh
 from dtcc_viewer.opengl.gl_points import GlPoints
 from dtcc_viewer.opengl.gl_lines import GlLines
 from dtcc_viewer.opengl.gl_raster import GlRaster
+from dtcc_viewer.opengl.gl_volume import GlVolume
 from dtcc_viewer.opengl.gl_object import GlObject
+from dtcc_viewer.opengl.bvh import BVH, RayHit
 from dtcc_viewer.opengl.environment import Environment
 from dtcc_viewer.opengl.parameters import GuiParametersModel
 from dtcc_viewer.opengl.situation import Situation
@@ -28,6 +31,14 @@ from dtcc_viewer.shaders.shaders_mesh_picking import (
     fragment_shader_picking,
 )
 
+from dtcc_viewer.shaders.shaders_mesh_occlusion import (
+    vertex_shader_occlusion,
+    fragment_shader_occlusion,
+)
+
+# Value of id buffer pixels not covered by any mesh
+PICK_BACKGROUND = 0xFFFFFFFF
+
 
 class GlModel:
     """Holds a collection of GlObjects for rendering with multi-obj dependent features.
@@ -78,10 +89,20 @@ class GlModel:
         Uniform locations for rendering picking texture on a quad.
     uloc_pick: dict
         Uniform locations for the picking shader.
+    uloc_occl: dict
+        Uniform locations for the occlusion query shader.
     shader_shmp: int
         Shader program for rendering of the shadow map.
     shader_pick: int
         Shader program for picking.
+    shader_occl: int
+        Shader program for drawing bounding boxes in occlusion queries.
+    VBO_box: int
+        OpenGL Vertex buffer object for a unit cube used in occlusion queries.
+    EBO_box: int
+        OpenGL Element buffer object for the unit cube.
+    n_box_indices: int
+        Number of indices in the unit cube.
     shader_dbsh: int
         Shader program for debug rendering of the shadow map to a quad.
     shader_dbpi: int
@@ -100,6 +121,35 @@ class GlModel:
         GL_TEXTURE0, GL_TEXTURE1, etc.
     tex_slot_picking: int
         GL_TEXTURE0, GL_TEXTURE1, etc.
+    tex_slot_scene_depth: int
+        GL_TEXTURE0, GL_TEXTURE1, etc.
+    scene_depth_texture: int
+        Copy of the depth buffer of the scene, used to end the rays of volumes.
+    scene_depth_size: tuple
+        Width and height of the scene depth texture.
+    FBO_target: int
+        Frame buffer that the final image is drawn to, 0 for the window.
+    id_index: dict
+        Maps each pickable part id to the GlMesh and the part index it belongs to.
+    FBO_picking: int
+        Frame buffer with an integer id attachment for picking.
+    pick_texture: int
+        GL_R32UI texture holding the id of the part drawn to each pixel.
+    RBO_picking: int
+        Depth render buffer for the picking frame buffer.
+    PBO_picking: int
+        Pixel buffer that the picking region is read back into.
+    pick_radius: int
+        Half size in pixels of the region around the cursor that is drawn and read.
+    pick_fence: int
+        Sync object for the pending read back, None if no read back is pending.
+    pick_query: tuple
+        Purpose ("click" or "hover") and region of the pending read back.
+    bvh: BVH
+        Bounding volume hierarchy over the mesh triangles for hovering, clicks
+        without a picking frame buffer and headless ray casts.
+    bvh_meshes: list[GlMesh]
+        Meshes in the order of the mesh indices stored in the BVH.
     """
 
     gl_objects: list[GlObject]
@@ -114,8 +164,13 @@ class GlModel:
     uloc_dbsh: dict
     uloc_dbpi: dict
     uloc_pick: dict
+    uloc_occl: dict
     shader_shmp: int
     shader_pick: int
+    shader_occl: int
+    VBO_box: int
+    EBO_box: int
+    n_box_indices: int
     shader_dbsh: int
     shader_dbpi: int
     FBO_shadows: int
@@ -125,6 +180,20 @@ class GlModel:
     lsm: np.ndarray
     tex_slot_shadow_map: int
     tex_slot_picking: int
+    tex_slot_scene_depth: int
+    scene_depth_texture: int
+    scene_depth_size: tuple
+    FBO_target: int
+    id_index: dict
+    FBO_picking: int
+    pick_texture: int
+    RBO_picking: int
+    PBO_picking: int
+    pick_radius: int
+    pick_fence: int
+    pick_query: tuple
+    bvh: BVH
+    bvh_meshes: list[GlMesh]
 
     def __init__(
         self,
@@ -142,6 +211,17 @@ class GlModel:
         self.uloc_dbsh = {}
         self.uloc_dbpi = {}
         self.uloc_pick = {}
+        self.uloc_occl = {}
+        self.FBO_target = 0
+        self.id_index = {}
+        self.FBO_picking = None
+        self.pick_radius = 2
+        self.pick_fence = None
+        self.pick_query = None
+        self.bvh = None
+        self.bvh_meshes = []
+        self.scene_depth_texture = None
+        self.scene_depth_size = None
 
     def preprocess(self):
 
@@ -154,13 +234,124 @@ class GlModel:
         self._create_shader_picking()
         self._create_shader_debug_shadows()
         self._create_shader_debug_picking()
+        self._create_shader_occlusion()
+        self._create_occlusion_box()
         self._set_constats()
 
         for obj in self.gl_objects:
             obj.preprocess()
 
+        self._create_id_index()
+        self._create_bvh()
+
         return True
 
+    def _create_id_index(self) -> None:
+        """Create a lookup from part id to mesh and part for fast picking."""
+        self.id_index = {}
+        for obj in self.gl_objects:
+            if isinstance(obj, GlMesh) and obj.parts is not None:
+                obj.parts.calc_geometry(obj.vertices)
+                for idx, id in enumerate(obj.parts.ids):
+                    # Ids are unique after Scene.offset_mesh_part_ids, first wins
+                    self.id_index.setdefault(int(id), (obj, idx))
+
+        info(f"Picking index created for {len(self.id_index)} parts.")
+
+    def _create_bvh(self) -> None:
+        """Build a BVH over the triangles of all meshes for picking by ray casts."""
+        # Isosurfaces are extracted again when the iso value changes, so they are
+        # not part of the BVH and are picked only by the id buffer
+        meshes = self.filter_gl_type(GlMesh)
+        self.bvh_meshes = [m for m in meshes if m.isosurface is None]
+        if len(self.bvh_meshes) == 0:
+            self.bvh = None
+            return
+
+        tris, ids, mesh_idxs, faces = [], [], [], []
+        for i, mesh in enumerate(self.bvh_meshes):
+            # Vertices are [x, y, z, tx, ty, nx, ny, nz, id]
+            vertices = mesh.vertices.reshape(-1, 9)
+            face_vertices = mesh.faces.reshape(-1, 3)
+            tris.append(vertices[face_vertices, 0:3])
+            vertex_ids = mesh.get_vertex_ids()
+            ids.append(vertex_ids[face_vertices[:, 0]].astype(np.int64))
+            mesh_idxs.append(np.full(len(face_vertices), i, dtype=np.int32))
+            faces.append(np.arange(len(face_vertices), dtype=np.int64))
+
+        tris = np.concatenate(tris)
+        ids = np.concatenate(ids)
+        mesh_idxs = np.concatenate(mesh_idxs)
+        faces = np.concatenate(faces)
+        self.bvh = BVH(tris, ids, mesh_idxs, faces)
+        info(f"BVH created for {self.bvh.n_triangles} triangles.")
+
+    def raycast(self, origin: np.ndarray, direction: np.ndarray, action: Action = None):
+        """Find the closest visible mesh triangle hit by a ray.
+
+        This works without an OpenGL context, so it can be used for picking in
+        headless applications.
+
+        Parameters
+        ----------
+        origin : np.ndarray
+            Start of the ray in model coordinates.
+        direction : np.ndarray
+            Normalized ray direction.
+        action : Action, optional
+            If given, hits removed by the active clipping planes are ignored.
+
+        Returns
+        -------
+        RayHit
+            The closest hit, None if no triangle was hit.
+        """
+        if self.bvh is None:
+            return None
+
+        # Meshes drawn as a section only show some of their cells, which the BVH
+        # does not know about, so they are not hit
+        mesh_mask = np.array(
+            [m.guip.show and not m.guip.section for m in self.bvh_meshes]
+        )
+        clip_max = None
+        if action is not None:
+            doms = self._get_clip_domains()
+            gguip = action.gguip
+            clip_max = np.array(
+                [
+                    doms[i] * gguip.clip_dist[i] if gguip.clip_bool[i] else np.inf
+                    for i in range(3)
+                ]
+            )
+
+        hit = self.bvh.intersect(
+            origin, direction, mesh_mask=mesh_mask, clip_max=clip_max
+        )
+        if hit is not None:
+            hit.world_position = hit.position + self.env.bb_global.mid_pt
+        return hit
+
+    def raycast_screen(self, action: Action, x: float, y: float) -> RayHit:
+        """Cast a ray from the camera through a frame buffer position.
+
+        Parameters
+        ----------
+        action : Action
+            Holds the camera and the frame buffer size.
+        x : float
+            Frame buffer x-coordinate.
+        y : float
+            Frame buffer y-coordinate, with the origin at the bottom.
+
+        Returns
+        -------
+        RayHit
+            The closest hit, None if no triangle was hit.
+        """
+        (origin, direction) = action.get_cursor_ray(x, y)
+        return self.raycast(origin, direction, action)
+
     def filter_gl_type(self, gl_type):
         """Filter the gl_objects list by type."""
         if gl_type == GlMesh:
@@ -171,6 +362,8 @@ class GlModel:
             return [lss for lss in self.gl_objects if isinstance(lss, GlLines)]
         elif gl_type == GlRaster:
             return [rst for rst in self.gl_objects if isinstance(rst, GlRaster)]
+        elif gl_type == GlVolume:
+            return [vol for vol in self.gl_objects if isinstance(vol, GlVolume)]
         else:
             raise ValueError("Invalid gl_type")
 
@@ -181,10 +374,13 @@ class GlModel:
         self.loop_counter = 120
 
     def create_picking_fbo(self, action: Action) -> None:
-        """Create a frame buffer object for object picking."""
+        """Create a frame buffer object with an integer id attachment for picking."""
         window_w = action.fbuf_width
         window_h = action.fbuf_height
 
+        # The frame buffer is recreated when the window is resized
+        self._delete_picking_fbo()
+
         self.FBO_picking = glGenFramebuffers(1)
         glBindFramebuffer(GL_FRAMEBUFFER, self.FBO_picking)  # Bind our frame buffer
 
@@ -192,20 +388,32 @@ class GlModel:
         glActiveTexture(self.tex_slot_picking)  # Activate assigned texture slot
         glBindTexture(GL_TEXTURE_2D, self.pick_texture)
         glTexImage2D(
-            GL_TEXTURE_2D, 0, GL_RGB, window_w, window_h, 0, GL_RGB, GL_FLOAT, None
+            GL_TEXTURE_2D,
+            0,
+            GL_R32UI,
+            window_w,
+            window_h,
+            0,
+            GL_RED_INTEGER,
+            GL_UNSIGNED_INT,
+            None,
         )
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        # Integer textures can not be filtered
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
         glBindTexture(GL_TEXTURE_2D, 0)  # Unbind our texture
         glFramebufferTexture2D(
             GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.pick_texture, 0
         )
 
-        RBO = glGenRenderbuffers(1)
-        glBindRenderbuffer(GL_RENDERBUFFER, RBO)
+        self.RBO_picking = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.RBO_picking)
         glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH24_STENCIL8, window_w, window_h)
         glFramebufferRenderbuffer(
-            GL_FRAMEBUFFER, GL_DEPTH_STENCIL_ATTACHMENT, GL_RENDERBUFFER, RBO
+            GL_FRAMEBUFFER,
+            GL_DEPTH_STENCIL_ATTACHMENT,
+            GL_RENDERBUFFER,
+            self.RBO_picking,
         )
 
         if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
@@ -213,6 +421,29 @@ class GlModel:
 
         glBindFramebuffer(GL_FRAMEBUFFER, 0)  # Unbind our frame buffer
 
+        # Pixel buffer large enough for the region around the cursor
+        side = 2 * self.pick_radius + 1
+        self.PBO_picking = glGenBuffers(1)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.PBO_picking)
+        glBufferData(GL_PIXEL_PACK_BUFFER, side * side * 4, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+
+    def _delete_picking_fbo(self) -> None:
+        """Release the picking frame buffer and any read back in flight."""
+        if self.FBO_picking is None:
+            return
+
+        if self.pick_fence is not None:
+            glDeleteSync(self.pick_fence)
+            self.pick_fence = None
+            self.pick_query = None
+
+        glDeleteFramebuffers(1, [self.FBO_picking])
+        glDeleteTextures(1, [self.pick_texture])
+        glDeleteRenderbuffers(1, [self.RBO_picking])
+        glDeleteBuffers(1, [self.PBO_picking])
+        self.FBO_picking = None
+
     def _distribute_texture_slots(self) -> None:
         """Distribute texture slots to all the meshes, pointclouds, lines."""
 
@@ -226,11 +457,15 @@ class GlModel:
         self.tex_slot_picking = texture_slots[1]
         self.tex_idx_picking = 1
 
-        if len(self.gl_objects) > len(texture_slots) - 2:
+        # The third slot GL_TEXTURE2 is reserved for the scene depth under volumes
+        self.tex_slot_scene_depth = texture_slots[2]
+        self.tex_idx_scene_depth = 2
+
+        if len(self.gl_objects) > len(texture_slots) - 3:
             warning("Not enough texture slots for all rendable entities.")
             return False
 
-        next_idx = 2
+        next_idx = 3
 
         for obj in self.gl_objects:
             obj.texture_slot = texture_slots[next_idx]
@@ -385,6 +620,53 @@ class GlModel:
             self.shader_dbpi, "screenTex"
         )
 
+    def _create_shader_occlusion(self) -> None:
+        """Create shader for drawing part bounding boxes in occlusion queries."""
+
+        self.shader_occl = compileProgram(
+            compileShader(vertex_shader_occlusion, GL_VERTEX_SHADER),
+            compileShader(fragment_shader_occlusion, GL_FRAGMENT_SHADER),
+        )
+
+        glUseProgram(self.shader_occl)
+
+        for name in ["model", "view", "project"]:
+            self.uloc_occl[name] = glGetUniformLocation(self.shader_occl, name)
+        for name in ["clip_x", "clip_y", "clip_z"]:
+            self.uloc_occl[name] = glGetUniformLocation(self.shader_occl, name)
+
+    def _create_occlusion_box(self) -> None:
+        """Create a unit cube that is scaled to each bounding box in the shader."""
+        corners = np.array(
+            [[x, y, z] for z in (0, 1) for y in (0, 1) for x in (0, 1)],
+            dtype=np.float32,
+        ).flatten()
+
+        # Two triangles for each side, the winding does not matter for queries
+        indices = np.array(
+            [
+                [0, 1, 3, 0, 3, 2],  # z = 0
+                [4, 5, 7, 4, 7, 6],  # z = 1
+                [0, 1, 5, 0, 5, 4],  # y = 0
+                [2, 3, 7, 2, 7, 6],  # y = 1
+                [0, 2, 6, 0, 6, 4],  # x = 0
+                [1, 3, 7, 1, 7, 5],  # x = 1
+            ],
+            dtype=np.uint32,
+        ).flatten()
+        self.n_box_indices = len(indices)
+
+        # The buffers are shared by the vertex arrays of the occlusion queries
+        self.VBO_box = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.VBO_box)
+        glBufferData(GL_ARRAY_BUFFER, len(corners) * 4, corners, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        self.EBO_box = glGenBuffers(1)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.EBO_box)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, len(indices) * 4, indices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
     def zoom_selected(self, action: Action) -> None:
         """Zoom the camera to the selected object."""
         if self.guip.picked_cp is None or self.guip.picked_size is None:
@@ -392,9 +674,12 @@ class GlModel:
             info("Zoom selected: No object selected for zooming")
             return
 
-        # Calculate the distance to the target object
+        # Calculate the distance to the target object, which is the clicked point on
+        # the surface if it is known and the centroid of the object otherwise
         distance_to_target = 5.0 * self.guip.picked_size
         target = self.guip.picked_cp
+        if self.guip.picked_point is not None:
+            target = self.guip.picked_point
         action.zoom_selected(distance_to_target, target)
         action.update_zoom_selected = False
         info(
@@ -402,18 +687,67 @@ class GlModel:
         )
 
     def evaluate_picking(self, action: Action) -> None:
-        """Evaluate the picking texture to find the picked object."""
+        """Start a picking query for the position of the last mouse click."""
         if not action.mouse_on_gui:
-            self._draw_picking_texture(action)
-            self._evaluate_picking(action)
-        else:
-            action.picking = False
+            if self.FBO_picking is None:
+                # Without a picking frame buffer the click is resolved by a ray cast
+                hit = self.raycast_screen(action, action.picked_x, action.picked_y)
+                self._apply_picking(action, hit.id if hit is not None else -1)
+            else:
+                # A click has priority, so finish any hover query still in flight
+                self._collect_picking(action, wait=True)
+                x, y = action.picked_x, action.picked_y
+                self._request_picking(action, x, y, "click")
 
-    def _draw_picking_texture(self, action: Action) -> None:
-        """Draw the picking texture to the frame buffer."""
+        action.picking = False
 
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    def update_picking(self, action: Action) -> None:
+        """Collect finished picking queries and start a new hover query if needed.
+
+        Called once per frame. Hovering casts a ray against the BVH, which needs no
+        read back from the GPU. Isosurfaces are extracted again when the iso value
+        changes and are not in the BVH, so while one is shown hovering reads the
+        drawn ids instead. The read back of a query is asynchronous so the result
+        is normally available one frame after the query was started.
+        """
+        self._collect_picking(action, wait=False)
 
+        if not action.gguip.hover_picking:
+            action.hovered_id = -1
+            return
+
+        # No hovering while the camera is rotated or panned
+        dragging = action.left_mbtn_pressed or action.right_mbtn_pressed
+        if action.mouse_on_gui or dragging:
+            action.hovered_id = -1
+            return
+
+        if not action.hover_moved:
+            return
+
+        meshes = self.filter_gl_type(GlMesh)
+        isosurfaces = [m.isosurface is not None and m.guip.show for m in meshes]
+        if self.FBO_picking is not None and any(isosurfaces):
+            if self.pick_fence is None:
+                x, y = action.hover_x, action.hover_y
+                self._request_picking(action, x, y, "hover")
+                action.hover_moved = False
+        else:
+            hit = self.raycast_screen(action, action.hover_x, action.hover_y)
+            action.hovered_id = hit.id if hit is not None else -1
+            action.hover_moved = False
+
+    def _draw_picking_texture(self, action: Action, region: tuple = None) -> None:
+        """Draw the part ids to the picking texture.
+
+        Parameters
+        ----------
+        action : Action
+            Holds the camera and the global gui parameters.
+        region : tuple, optional
+            Scissor region (x, y, width, height) to restrict drawing to. The whole
+            texture is drawn if None.
+        """
         # Camera input
         move = action.camera.get_move_matrix()
         view = action.camera.get_view_matrix(action.gguip)
@@ -422,8 +756,15 @@ class GlModel:
         # Picking pass
         glBindFramebuffer(GL_FRAMEBUFFER, self.FBO_picking)
         glEnable(GL_DEPTH_TEST)
-        # glClearColor(1.0, 1.0, 1.0, 1.0)
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+        # Clearing is also restricted by the scissor test
+        if region is not None:
+            glEnable(GL_SCISSOR_TEST)
+            glScissor(*region)
+
+        background = np.full(4, PICK_BACKGROUND, dtype=np.uint32)
+        glClearBufferuiv(GL_COLOR, 0, background)
+        glClear(GL_DEPTH_BUFFER_BIT)
         glUseProgram(self.shader_pick)
 
         glUniformMatrix4fv(self.uloc_pick["model"], 1, GL_FALSE, move)
@@ -442,27 +783,107 @@ class GlModel:
                 if obj.guip.show:
                     obj.triangles_draw_call()
 
-    def _evaluate_picking(self, action: Action) -> None:
-        """Get picking texture color under the mouse click and compute object id."""
-        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
-        x = action.picked_x
-        y = action.picked_y
+        glDisable(GL_SCISSOR_TEST)
+
+    def _get_picking_region(self, action: Action, x: float, y: float) -> tuple:
+        """Get the region around a screen position, clamped to the frame buffer."""
+        x, y, r = int(x), int(y), self.pick_radius
+        x0 = min(max(x - r, 0), action.fbuf_width - 1)
+        y0 = min(max(y - r, 0), action.fbuf_height - 1)
+        x1 = min(x + r + 1, action.fbuf_width)
+        y1 = min(y + r + 1, action.fbuf_height)
+        return (x0, y0, max(x1 - x0, 1), max(y1 - y0, 1)), (x - x0, y - y0)
+
+    def _request_picking(self, action: Action, x: float, y: float, purpose: str):
+        """Draw the ids around a screen position and start an asynchronous read back.
+
+        Parameters
+        ----------
+        action : Action
+            Holds the camera and the global gui parameters.
+        x : float
+            Frame buffer x-coordinate.
+        y : float
+            Frame buffer y-coordinate, with the origin at the bottom.
+        purpose : str
+            "click" to select the picked part or "hover" to highlight it.
+        """
+        region, center = self._get_picking_region(action, x, y)
+        self._draw_picking_texture(action, region)
+
+        # Read back into the pixel buffer, the call returns without waiting
+        glPixelStorei(GL_PACK_ALIGNMENT, 4)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.PBO_picking)
+        glReadPixels(*region, GL_RED_INTEGER, GL_UNSIGNED_INT, ctypes.c_void_p(0))
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+
+        self.pick_fence = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        self.pick_query = (purpose, region, center)
+
+        glBindFramebuffer(GL_FRAMEBUFFER, self.FBO_target)
+
+    def _collect_picking(self, action: Action, wait: bool) -> None:
+        """Map the pixel buffer of a finished query and apply the picked id.
+
+        Parameters
+        ----------
+        action : Action
+            Receives the picked or hovered id.
+        wait : bool
+            Block until the pending query is finished instead of polling.
+        """
+        if self.pick_fence is None:
+            return
+
+        timeout_ns = 1_000_000_000 if wait else 0
+        flags = GL_SYNC_FLUSH_COMMANDS_BIT
+        status = glClientWaitSync(self.pick_fence, flags, timeout_ns)
+        if status not in (GL_ALREADY_SIGNALED, GL_CONDITION_SATISFIED):
+            if wait:
+                # Drop the query on timeout, so a new one can take its place
+                warning(f"Picking query '{self.pick_query[0]}' timed out")
+                glDeleteSync(self.pick_fence)
+                self.pick_fence = None
+                self.pick_query = None
+            return
+
+        glDeleteSync(self.pick_fence)
+        self.pick_fence = None
+        (purpose, region, center) = self.pick_query
+        self.pick_query = None
+
+        (w, h) = region[2], region[3]
+        size = w * h * 4
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, self.PBO_picking)
+        ptr = glMapBufferRange(GL_PIXEL_PACK_BUFFER, 0, size, GL_MAP_READ_BIT)
+        ids = np.frombuffer(ctypes.string_at(ptr, size), dtype=np.uint32)
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+
+        picked_id_new = self._closest_id(ids.reshape(h, w), center)
 
-        p_color = glReadPixels(x, y, 1, 1, GL_RGBA, GL_UNSIGNED_BYTE)
-        picked_id_new = color_to_id(p_color)
+        if purpose == "hover":
+            action.hovered_id = picked_id_new
+        else:
+            self._apply_picking(action, picked_id_new)
 
-        # Background color
-        p_color = np.array([p_color[0], p_color[1], p_color[2]], dtype=int)
-        b_color = np.array(np.round(np.array(action.gguip.color) * 255), dtype=int)
+    def _closest_id(self, ids: np.ndarray, center: tuple) -> int:
+        """Get the id closest to the center of the region, -1 for background."""
+        (rows, cols) = np.nonzero(ids != PICK_BACKGROUND)
+        if len(rows) == 0:
+            return -1
 
-        background_click = False
-        if np.all(b_color[0:3] == p_color[0:3]):
-            background_click = True
+        dist_sq = (cols - center[0]) ** 2 + (rows - center[1]) ** 2
+        idx = np.argmin(dist_sq)
+        return int(ids[rows[idx], cols[idx]])
 
-        if picked_id_new == action.picked_id or background_click:
+    def _apply_picking(self, action: Action, picked_id_new: int) -> None:
+        """Select the picked part, or deselect on background or a repeated click."""
+        if picked_id_new == action.picked_id or picked_id_new == -1:
             action.picked_id = -1
             self.guip.picked_id = -1
             self.guip.picked_cp = None
+            self.guip.picked_point = None
             self.guip.picked_uuid = ""
             self.guip.picked_metadata = ""
         else:
@@ -470,22 +891,27 @@ class GlModel:
             self.guip.picked_id = picked_id_new
             self._find_object_from_id(picked_id_new)
             self._find_data_from_id(picked_id_new)
+            self._find_point_from_click(action, picked_id_new)
 
-        action.picking = False
-
-        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+    def _find_point_from_click(self, action: Action, id: int) -> None:
+        """Find the exact point on the picked object under the mouse click."""
+        self.guip.picked_point = None
+        hit = self.raycast_screen(action, action.picked_x, action.picked_y)
+        if hit is not None and hit.id == id:
+            self.guip.picked_point = hit.position
 
     def _render_pick_texture(self, action: Action) -> None:
         """Render the picking texture to a quad that spans the screen for debugging."""
         self._draw_picking_texture(action)
 
-        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.FBO_target)
 
         # Apply the picking texture to the debug quad which spans th whole screen.
         glDisable(GL_DEPTH_TEST)
         glUseProgram(self.shader_dbpi)  # Use the debug picking shader
         glBindVertexArray(self.VAO_debug)
 
+        # The id texture is displayed with colors computed in the debug shader
         glActiveTexture(self.tex_slot_picking)
         glBindTexture(GL_TEXTURE_2D, self.pick_texture)
         glUniform1i(self.uloc_dbpi["screenTex"], self.tex_idx_picking)
@@ -496,15 +922,62 @@ class GlModel:
 
     def render(self, action: Action) -> None:
         """Render all gl_objects in the model."""
+        self._update_visibility(action)
         self._render_meshes(action)
+        self._render_occlusion_queries(action)
         self._render_points(action)
         self._render_lines(action)
         self._render_rasters(action)
+        self._render_volumes(action)
 
         self._update_light_position()
         self._update_data_caps()
+        self._update_isosurfaces()
         self._update_data_textures()
 
+    def _update_visibility(self, action: Action) -> None:
+        """Cull mesh parts against the camera once per frame for all passes."""
+        for obj in self.gl_objects:
+            if isinstance(obj, GlMesh) and obj.guip.show:
+                obj.update_visibility(action)
+
+    def _render_occlusion_queries(self, action: Action) -> None:
+        """Test the bounding boxes of mesh parts against the depth of this frame.
+
+        The results are collected by the meshes in a later frame. Color and depth
+        writes are disabled so the boxes leave no trace in the image.
+        """
+        if not action.gguip.occlusion_culling:
+            return
+        if self.guip.shading == Shading.PICKING:
+            return
+
+        move = action.camera.get_move_matrix()
+        view = action.camera.get_view_matrix(action.gguip)
+        proj = action.camera.get_projection_matrix(action.gguip)
+
+        glUseProgram(self.shader_occl)
+        glUniformMatrix4fv(self.uloc_occl["model"], 1, GL_FALSE, move)
+        glUniformMatrix4fv(self.uloc_occl["view"], 1, GL_FALSE, view)
+        glUniformMatrix4fv(self.uloc_occl["project"], 1, GL_FALSE, proj)
+
+        (xdom, ydom, zdom) = self._get_clip_domains()
+        glUniform1f(self.uloc_occl["clip_x"], (xdom * action.gguip.clip_dist[0]))
+        glUniform1f(self.uloc_occl["clip_y"], (ydom * action.gguip.clip_dist[1]))
+        glUniform1f(self.uloc_occl["clip_z"], (zdom * action.gguip.clip_dist[2]))
+
+        glColorMask(GL_FALSE, GL_FALSE, GL_FALSE, GL_FALSE)
+        glDepthMask(GL_FALSE)
+
+        box = (self.VBO_box, self.EBO_box, self.n_box_indices)
+        for obj in self.gl_objects:
+            if isinstance(obj, GlMesh) and obj.guip.show and obj.occlusion:
+                obj.issue_occlusion_queries(box)
+
+        glDepthMask(GL_TRUE)
+        glColorMask(GL_TRUE, GL_TRUE, GL_TRUE, GL_TRUE)
+        glUseProgram(0)
+
     def _render_meshes(self, action: Action) -> None:
         """Render meshes base of display mode."""
         self.guip.animate_light = False
@@ -559,6 +1032,47 @@ class GlModel:
                 if guip.show:
                     obj.render(action)
 
+    def _render_volumes(self, action: Action) -> None:
+        """Render volumes last, since they are blended over the scene.
+
+        The depth of the scene is copied to a texture first, so the rays through
+        the volumes end at the opaque objects.
+        """
+        volumes = [v for v in self.filter_gl_type(GlVolume) if v.guip.show]
+        if any(not v.guip.slice for v in volumes):
+            self._copy_scene_depth(action)
+
+        for obj in volumes:
+            obj.render(action, self.tex_slot_scene_depth, self.tex_idx_scene_depth)
+
+    def _copy_scene_depth(self, action: Action) -> None:
+        """Copy the depth buffer of the target frame buffer to a texture."""
+        size = (action.fbuf_width, action.fbuf_height)
+        glActiveTexture(self.tex_slot_scene_depth)
+        if self.scene_depth_size != size:
+            if self.scene_depth_texture is not None:
+                glDeleteTextures(1, [self.scene_depth_texture])
+            self.scene_depth_texture = glGenTextures(1)
+            glBindTexture(GL_TEXTURE_2D, self.scene_depth_texture)
+            glTexImage2D(
+                GL_TEXTURE_2D,
+                0,
+                GL_DEPTH_COMPONENT24,
+                size[0],
+                size[1],
+                0,
+                GL_DEPTH_COMPONENT,
+                GL_FLOAT,
+                None,
+            )
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+            self.scene_depth_size = size
+
+        # Reads from the depth buffer of the frame buffer that is bound for drawing
+        glBindTexture(GL_TEXTURE_2D, self.scene_depth_texture)
+        glCopyTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, 0, 0, size[0], size[1])
+
     def _render_wireframe(self, action: Action) -> None:
         """Render meshes in wireframe display mode."""
         for obj in self.gl_objects:
@@ -625,7 +1139,7 @@ class GlModel:
     def _render_shadows_pass2(self, action: Action) -> None:
         """Render the model with shadows by sampling the shadow map frame buffer."""
         # Second pass: Render objects with the shadow map computed in the first pass
-        glBindFramebuffer(GL_FRAMEBUFFER, 0)  # Setting default buffer
+        glBindFramebuffer(GL_FRAMEBUFFER, self.FBO_target)  # Setting target buffer
         glViewport(0, 0, action.fbuf_width, action.fbuf_height)
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
@@ -641,7 +1155,7 @@ class GlModel:
 
     def _render_debug_shadow_map(self, interaction: Action) -> None:
         """Render the shadow map to a quad for debugging."""
-        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.FBO_target)
         glViewport(0, 0, interaction.fbuf_width, interaction.fbuf_height)
         glClearColor(0.0, 0.0, 0.0, 1.0)
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
@@ -666,6 +1180,13 @@ class GlModel:
         for obj in self.gl_objects:
             obj.update_data_caps()
 
+    def _update_isosurfaces(self):
+        """Swap in new isosurfaces and point their part ids to the new parts."""
+        for obj in self.filter_gl_type(GlMesh):
+            if obj.update_isosurface():
+                for idx, id in enumerate(obj.parts.ids):
+                    self.id_index[int(id)] = (obj, idx)
+
     def _update_data_textures(self):
         """Update the data textures for visualisation."""
         for obj in self.gl_objects:
@@ -674,33 +1195,22 @@ class GlModel:
     def _find_object_from_id(self, id):
         """Find the object that has the id and set the picked object."""
         self.guip.picked_uuid = None
-        for obj in self.gl_objects:
-            if isinstance(obj, GlMesh):  # Only meshes are pickable atm
-                if obj.parts is not None:
-                    if obj.parts.id_exists(id):
-                        self.guip.picked_attributes = obj.parts.get_attributes(id)
-                        break
+        entry = self.id_index.get(int(id), None)
+        if entry is not None:
+            obj, idx = entry
+            self.guip.picked_attributes = obj.parts.get_attributes(id)
 
     def _find_data_from_id(self, id):
-        """Calculate mesh related the data for the picked object."""
-        sucess = False
-        for obj in self.gl_objects:
-            if isinstance(obj, GlMesh):
-                vertex_ids = obj.get_vertex_ids()
-                vertex_idx = np.where(vertex_ids == id)[0]
-                if len(vertex_idx) > 0:
-                    f_count = len(vertex_idx) // 3
-                    v_count = len(vertex_idx)
-                    (avrg_pt, radius) = obj.get_average_vertex_position(vertex_idx)
-                    sucess = True
-                    break
-
-        # Assign to
-        if sucess:
+        """Look up the precomputed data for the picked object."""
+        entry = self.id_index.get(int(id), None)
+
+        if entry is not None and entry[0].parts.centroids is not None:
+            obj, idx = entry
+            f_count = int(obj.parts.face_count_per_part[idx])
             self.guip.picked_mesh_face_count = f_count
-            self.guip.picked_mesh_vertex_count = v_count
-            self.guip.picked_cp = avrg_pt
-            self.guip.picked_size = radius
+            self.guip.picked_mesh_vertex_count = 3 * f_count
+            self.guip.picked_cp = obj.parts.centroids[idx]
+            self.guip.picked_size = obj.parts.radii[idx]
         else:
             self.guip.picked_cp = None
             self.guip.picked_size = None
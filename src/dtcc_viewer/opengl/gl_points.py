@@ -8,8 +8,10 @@ from OpenGL.GL.shaders import compileProgram, compileShader
 from dtcc_viewer.opengl.action import Action
 from dtcc_viewer.opengl.data_wrapper import MeshDataWrapper, PointsDataWrapper
 from dtcc_viewer.opengl.wrp_pointcloud import PointCloudWrapper
+from dtcc_viewer.opengl.wrp_point_store import PointStoreWrapper
 from dtcc_viewer.opengl.parameters import GuiParametersPC, GuiParametersGlobal
 from dtcc_viewer.opengl.utils import BoundingBox
+from dtcc_viewer.opengl.octree import PointOctree
 from dtcc_viewer.logging import info, warning
 from dtcc_viewer.opengl.gl_object import GlObject
 
@@ -24,6 +26,8 @@ from dtcc_viewer.shaders.shaders_color_maps import (
 from dtcc_viewer.shaders.shaders_points import (
     vertex_shader_pc,
     fragment_shader_pc,
+    vertex_shader_pc_sprite,
+    fragment_shader_pc_sprite,
 )
 
 
@@ -41,6 +45,31 @@ class GlPoints(GlObject):
     brighter in the center and darker at the edge to give a 3D effect which makes the
     particles look like spheres but with much fewer triangles.
 
+    Alternatively each particle is drawn as a single GL_POINTS vertex, sized in the
+    vertex shader to the projected diameter of the disc and shaped into a round,
+    shaded splat in the fragment shader. Point sprites always face the screen, so
+    they need no billboard transform.
+
+    Large point clouds come with an octree from the wrapper. Then only the nodes
+    selected for the current view and point budget are drawn, each with its own
+    instance buffer. The buffers are uploaded the first time a node is selected,
+    limited per frame, and the least recently used are deleted when the resident
+    point count grows too large.
+
+    Point clouds in an on-disk PointStore are always drawn with the octree. The
+    points of a node are then read from the store when the node is uploaded, and
+    each node gets a small data texture of its own for the current data channel,
+    since the full data texture would not fit in memory.
+
+    Point clouds with voxel levels from the wrapper, including those with an octree
+    or in a PointStore, can instead be drawn at one of the precomputed voxel
+    resolutions, selected in the GUI. Each level has its own instance buffer and
+    data texture, uploaded once, and is drawn in full.
+
+    Point clouds without an octree may be shuffled by the wrapper, so that the first
+    points are a uniform subsample. While the camera moves, only as many points as
+    fit in the frame time budget are drawn, and all points once the camera stops.
+
     Attributes
     ----------
     vertices : np.ndarray
@@ -67,12 +96,35 @@ class GlPoints(GlObject):
         Uniform locations for the shader program.
     shader : int
         Shader program.
+    uloc_sprite : dict
+        Uniform locations for the point sprite shader program.
+    shader_sprite : int
+        Shader program for drawing each point as a single GL_POINTS sprite.
     p_size : float
         Particle size.
     n_points : int
         Number of particles in point cloud.
     n_sides : int
         Number of sides for the particle mesh instance geometry.
+    octree : PointOctree
+        Octree for level of detail rendering, None to draw all points.
+    node_buffers : dict
+        VAOs for discs and sprites, the VBO and the data texture, if any, for each
+        node with its points on the GPU.
+    store_wrp : PointStoreWrapper
+        Wrapper for the on-disk store the nodes are read from, None if in memory.
+    voxel_levels : list
+        Voxel size, centroids and data wrapper for each voxel level.
+    level_buffers : list
+        VAOs for discs and sprites, the VBO and the data texture for each level.
+    node_last_used : np.ndarray
+        Frame number when each node was last drawn.
+    lod_nodes : list
+        Nodes drawn in the current frame.
+    n_points_drawn : int
+        Number of points drawn in the current frame.
+    n_progressive : int
+        Number of points drawn while the camera moves, adjusted to the frame time.
     """
 
     vertices: np.ndarray  # Vertices for single instance of the particle mesh geometry
@@ -90,21 +142,50 @@ class GlPoints(GlObject):
 
     uniform_locs = {}  # Uniform locations for the shader program
     shader: int  # Shader program
+    uloc_sprite: dict  # Uniform locations for the point sprite shader program
+    shader_sprite: int  # Shader program for point sprites
 
     p_size: float  # Particle size
     n_points: int  # Number of particles in point cloud
     n_sides: int  # Number of sides for the particle mesh instance geometry
 
+    octree: PointOctree  # Octree for level of detail, None for smaller point clouds
+    node_buffers: dict  # Node index -> (VAO, sprite VAO, VBO, texture) for nodes
+    store_wrp: PointStoreWrapper  # On-disk store to read nodes from, or None
+    voxel_levels: list  # (voxel size, centroids, data wrapper) for each level
+    level_buffers: list  # (VAO, sprite VAO, VBO, texture) for each voxel level
+    node_last_used: np.ndarray  # Frame number when each node was last drawn
+    lod_nodes: list  # Nodes drawn in the current frame
+    n_points_drawn: int  # Number of points drawn in the current frame
+    frame: int  # Frame counter for the least recently used node buffers
+    n_progressive: int  # Number of points drawn while the camera moves
+    last_camera: tuple  # View and projection matrices of the previous frame
+    last_time: float  # Time of the previous frame in seconds
+
+    # Settings for streaming of octree nodes
+    max_upload_points = 2000000  # Max points uploaded to the GPU per frame
+    resident_factor = 3  # Max points on the GPU as a multiple of the point budget
+
+    # Settings for progressive rendering
+    min_progressive = 100000  # Min points drawn while the camera moves
+
     def __init__(self, pc_wrapper: PointCloudWrapper):
         """Initialize the PointCloudGL object and set up rendering."""
 
         self.p_size = pc_wrapper.size
-        self.n_points = len(pc_wrapper.points) // 3
         self.transforms = pc_wrapper.points
         self.name = pc_wrapper.name
         self.data_wrapper = pc_wrapper.data_wrapper
 
-        self.texels = np.zeros((self.n_points, 2), dtype="float32")
+        self.store_wrp = None
+        if isinstance(pc_wrapper, PointStoreWrapper):
+            self.store_wrp = pc_wrapper
+            self.n_points = pc_wrapper.n_points
+        else:
+            self.n_points = len(pc_wrapper.points) // 3
+
+        n_texels = len(self.data_wrapper.texel_x)
+        self.texels = np.zeros((n_texels, 2), dtype="float32")
         self.texels[:, 0] = self.data_wrapper.texel_x
         self.texels[:, 1] = self.data_wrapper.texel_y
         self.texels = np.array(self.texels, dtype="float32")
@@ -117,45 +198,127 @@ class GlPoints(GlObject):
         self.bb_local = pc_wrapper.bb_local
         self.bb_global = pc_wrapper.bb_global
 
+        self.octree = pc_wrapper.octree
+        self.node_buffers = {}
+        self.lod_nodes = []
+        self.n_points_drawn = self.n_points
+        self.frame = 0
+        if self.octree is not None:
+            self.node_last_used = np.zeros(self.octree.n_nodes, dtype=np.int64)
+            self.guip.lod = True
+
+        self.n_progressive = self.n_points
+        self.last_camera = None
+        self.last_time = None
+        self.guip.progressive = pc_wrapper.shuffled
+
+        self.voxel_levels = pc_wrapper.voxel_levels
+        self.level_buffers = []
+        self.guip.voxel_sizes = [level[0] for level in self.voxel_levels]
+
+        # Sprites by default for clouds large enough to get low resolution discs
+        self.guip.sprites = self.n_points > self.low_count
+
     def render(self, action: Action) -> None:
         """Render the point cloud using provided interaction parameters."""
 
+        sprites = self.guip.sprites
+        uloc = self.uloc_sprite if sprites else self.uniform_locs
+
         self._bind_vao()
-        self._bind_shader()
+        glUseProgram(self.shader_sprite if sprites else self.shader)
         self._bind_data_texture()
 
         proj = action.camera.get_projection_matrix(action.gguip)
-        glUniformMatrix4fv(self.uniform_locs["project"], 1, GL_FALSE, proj)
+        glUniformMatrix4fv(uloc["project"], 1, GL_FALSE, proj)
 
         view = action.camera.get_view_matrix(action.gguip)
-        glUniformMatrix4fv(self.uniform_locs["view"], 1, GL_FALSE, view)
+        glUniformMatrix4fv(uloc["view"], 1, GL_FALSE, view)
 
         cam_position = action.camera.position
         cam_target = action.camera.target
         model = self._get_billboard_transform(cam_position, cam_target)
-        glUniformMatrix4fv(self.uniform_locs["model"], 1, GL_FALSE, model)
+        glUniformMatrix4fv(uloc["model"], 1, GL_FALSE, model)
 
-        self._set_clipping_uniforms(action.gguip)
+        self._set_clipping_uniforms(action.gguip, uloc)
 
-        glUniform1i(self.uniform_locs["color_by"], int(self.guip.color))
-        glUniform1i(self.uniform_locs["color_inv"], int(self.guip.invert_cmap))
-        glUniform1i(self.uniform_locs["cmap_idx"], self.guip.cmap_idx)
-        glUniform1f(self.uniform_locs["data_min"], self.guip.data_min)
-        glUniform1f(self.uniform_locs["data_max"], self.guip.data_max)
-        glUniform1i(self.uniform_locs["data_tex"], self.texture_idx)
+        glUniform1i(uloc["color_by"], int(self.guip.color))
+        glUniform1i(uloc["color_inv"], int(self.guip.invert_cmap))
+        glUniform1i(uloc["cmap_idx"], self.guip.cmap_idx)
+        glUniform1f(uloc["data_min"], self.guip.data_min)
+        glUniform1f(uloc["data_max"], self.guip.data_max)
+        glUniform1i(uloc["data_tex"], self.texture_idx)
 
         sf = self.guip.point_scale
         scale = pyrr.matrix44.create_from_scale([sf, sf, sf], dtype=np.float32)
-        glUniformMatrix4fv(self.uniform_locs["scale"], 1, GL_FALSE, scale)
+        glUniformMatrix4fv(uloc["scale"], 1, GL_FALSE, scale)
+
+        voxel_idx = 0 if action.full_quality else self.guip.voxel_idx
+        if voxel_idx > 0:
+            level = self.voxel_levels[voxel_idx - 1]
+            self.n_points_drawn = len(level[1]) // 3
+        elif self.octree is not None:
+            self._update_lod(action)
+        elif self.guip.progressive and not action.full_quality:
+            self._update_progressive(action)
+        else:
+            self.n_points_drawn = self.n_points
 
-        f_count = len(self.face_indices)
-        p_count = self.n_points
-        glDrawElementsInstanced(GL_TRIANGLES, f_count, GL_UNSIGNED_INT, None, p_count)
+        if sprites:
+            glUniform1f(uloc["p_size"], self.p_size * sf)
+            glUniform1f(uloc["vp_height"], action.fbuf_height)
+            self._draw_sprites(voxel_idx)
+        else:
+            self._draw_discs(voxel_idx)
 
         self._unbind_vao()
         self._unbind_shader()
         self._unbind_data_texture()
 
+    def _draw_discs(self, voxel_idx: int) -> None:
+        """Draw one instance of the disc or quad geometry per point."""
+        f_count = len(self.face_indices)
+        if voxel_idx > 0:
+            self._bind_buffers(self.level_buffers[voxel_idx - 1], 0)
+            p_count = self.n_points_drawn
+            glDrawElementsInstanced(
+                GL_TRIANGLES, f_count, GL_UNSIGNED_INT, None, p_count
+            )
+        elif self.octree is None:
+            p_count = self.n_points_drawn
+            glDrawElementsInstanced(
+                GL_TRIANGLES, f_count, GL_UNSIGNED_INT, None, p_count
+            )
+        else:
+            for node in self.lod_nodes:
+                self._bind_buffers(self.node_buffers[node], 0)
+                p_count = int(self.octree.counts[node])
+                glDrawElementsInstanced(
+                    GL_TRIANGLES, f_count, GL_UNSIGNED_INT, None, p_count
+                )
+
+    def _draw_sprites(self, voxel_idx: int) -> None:
+        """Draw one GL_POINTS vertex per point, sized in the vertex shader."""
+        glEnable(GL_PROGRAM_POINT_SIZE)
+        if voxel_idx > 0:
+            self._bind_buffers(self.level_buffers[voxel_idx - 1], 1)
+            glDrawArrays(GL_POINTS, 0, self.n_points_drawn)
+        elif self.octree is None:
+            glBindVertexArray(self.VAO_sprite)
+            glDrawArrays(GL_POINTS, 0, self.n_points_drawn)
+        else:
+            for node in self.lod_nodes:
+                self._bind_buffers(self.node_buffers[node], 1)
+                glDrawArrays(GL_POINTS, 0, int(self.octree.counts[node]))
+        glDisable(GL_PROGRAM_POINT_SIZE)
+
+    def _bind_buffers(self, buffers: tuple, vao_index: int) -> None:
+        """Bind the disc or sprite VAO of a node or level and its data texture."""
+        glBindVertexArray(buffers[vao_index])
+        if buffers[3] is not None:
+            glActiveTexture(self.texture_slot)
+            glBindTexture(GL_TEXTURE_2D, buffers[3])
+
     def _create_textures(self) -> None:
         """Create textures for data."""
         self._create_data_texture()
@@ -163,7 +326,9 @@ class GlPoints(GlObject):
     def _create_geometry(self) -> None:
         """Create the geometry for the point cloud."""
         self._create_single_instance()
-        self._create_multiple_instances()
+        if self.octree is None:
+            self._create_multiple_instances()
+        self._create_level_buffers()
 
     def _create_single_instance(self):
         """Create a single instance of particle mesh geometry."""
@@ -226,6 +391,229 @@ class GlPoints(GlObject):
         # two texel incices in this case.
         glVertexAttribDivisor(3, 1)
 
+        self.VAO_sprite = self._create_sprite_vao(self.transforms_VBO, self.texel_VBO)
+
+    def _create_sprite_vao(self, pos_vbo, texel_vbo, texel_offset: int = 0) -> int:
+        """Create a VAO with the positions and texels as per vertex attributes.
+
+        Used for drawing point sprites, where each point is a single vertex.
+        """
+        vao = glGenVertexArrays(1)
+        glBindVertexArray(vao)
+
+        glBindBuffer(GL_ARRAY_BUFFER, pos_vbo)
+        glEnableVertexAttribArray(2)
+        glVertexAttribPointer(2, 3, GL_FLOAT, GL_FALSE, 0, ctypes.c_void_p(0))
+
+        glBindBuffer(GL_ARRAY_BUFFER, texel_vbo)
+        glEnableVertexAttribArray(3)
+        offset = ctypes.c_void_p(texel_offset)
+        glVertexAttribPointer(3, 2, GL_FLOAT, GL_FALSE, 0, offset)
+
+        glBindVertexArray(0)
+        return vao
+
+    def _update_progressive(self, action: Action) -> None:
+        """Set the number of points to draw from the camera movement and frame time.
+
+        The count is scaled by the ratio between the frame time budget and the time
+        since the previous frame, limited to halving or doubling per frame to avoid
+        oscillation. When the camera has not moved since the previous frame all
+        points are drawn.
+        """
+        view = action.camera.get_view_matrix(action.gguip)
+        proj = action.camera.get_projection_matrix(action.gguip)
+        now = time.perf_counter()
+
+        moving = self.last_camera is not None and not (
+            np.array_equal(view, self.last_camera[0])
+            and np.array_equal(proj, self.last_camera[1])
+        )
+
+        if moving and self.last_time is not None:
+            frame_time = max(now - self.last_time, 1e-6)
+            ratio = np.clip(1e-3 * self.guip.frame_budget / frame_time, 0.5, 2.0)
+            n_points = int(self.n_progressive * ratio)
+            n_min = min(self.min_progressive, self.n_points)
+            self.n_progressive = int(np.clip(n_points, n_min, self.n_points))
+
+        self.last_camera = (view, proj)
+        self.last_time = now
+        self.n_points_drawn = self.n_progressive if moving else self.n_points
+
+    def _update_lod(self, action: Action) -> None:
+        """Select the octree nodes to draw and stream their points to the GPU."""
+        view = action.camera.get_view_matrix(action.gguip)
+        proj = action.camera.get_projection_matrix(action.gguip)
+        mvp = view @ proj
+        budget = int(self.guip.point_budget)
+        error = self.guip.lod_error
+        selected = self.octree.select(mvp, proj, action.fbuf_height, budget, error)
+
+        self.frame += 1
+        self.lod_nodes = []
+        n_uploaded = 0
+        for node in selected:
+            if node not in self.node_buffers:
+                # Nodes not uploaded this frame are drawn once they are on the GPU,
+                # unless the frame must be complete
+                full = action.full_quality
+                if n_uploaded >= self.max_upload_points and not full:
+                    continue
+                self._create_node_buffers(node)
+                n_uploaded += self.octree.counts[node]
+            self.node_last_used[node] = self.frame
+            self.lod_nodes.append(node)
+
+        self.n_points_drawn = int(np.sum(self.octree.counts[self.lod_nodes]))
+        self._delete_unused_node_buffers()
+
+    def _create_node_buffers(self, node: int) -> None:
+        """Create a VAO with the instance data for the points of an octree node."""
+        start = self.octree.starts[node]
+        count = self.octree.counts[node]
+        texture = None
+        if self.store_wrp is None:
+            positions = self.transforms[3 * start : 3 * (start + count)]
+            texels = self.texels[start : start + count]
+        else:
+            positions = self.store_wrp.get_points(start, start + count)
+            (texels, texture) = self._create_node_texture(start, count)
+
+        buffers = self._create_instance_buffers(positions, texels)
+        self.node_buffers[node] = buffers + (texture,)
+
+    def _create_level_buffers(self) -> None:
+        """Upload the centroids and averaged data of each voxel level."""
+        key = self.guip.get_current_data_name()
+        for (voxel_size, centroids, data_wrapper) in self.voxel_levels:
+            texels = np.zeros((len(centroids) // 3, 2), dtype="float32")
+            texels[:, 0] = data_wrapper.texel_x
+            texels[:, 1] = data_wrapper.texel_y
+            buffers = self._create_instance_buffers(centroids, texels)
+            texture = self._create_r32f_texture(data_wrapper.data_mat_dict[key])
+            self.level_buffers.append(buffers + (texture,))
+
+    def _create_instance_buffers(self, positions, texels) -> tuple:
+        """Create VAOs for discs and sprites with positions and texels in one VBO.
+
+        Returns
+        -------
+        tuple
+            The disc VAO, the sprite VAO and the VBO.
+        """
+        vao = glGenVertexArrays(1)
+        glBindVertexArray(vao)
+
+        # Same single instance geometry as the main VAO
+        glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.EBO)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(0))
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(12))
+
+        # Positions followed by texels in one buffer
+        vbo = glGenBuffers(1)
+        size = positions.nbytes + texels.nbytes
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        glBufferData(GL_ARRAY_BUFFER, size, None, GL_STATIC_DRAW)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, positions.nbytes, positions)
+        glBufferSubData(GL_ARRAY_BUFFER, positions.nbytes, texels.nbytes, texels)
+
+        glEnableVertexAttribArray(2)
+        glVertexAttribPointer(2, 3, GL_FLOAT, GL_FALSE, 0, ctypes.c_void_p(0))
+        glVertexAttribDivisor(2, 1)
+
+        glEnableVertexAttribArray(3)
+        offset = ctypes.c_void_p(positions.nbytes)
+        glVertexAttribPointer(3, 2, GL_FLOAT, GL_FALSE, 0, offset)
+        glVertexAttribDivisor(3, 1)
+
+        vao_sprite = self._create_sprite_vao(vbo, vbo, positions.nbytes)
+        return (vao, vao_sprite, vbo)
+
+    def _create_node_texture(self, start: int, count: int) -> tuple:
+        """Read the current data channel for a node into a texture of its own.
+
+        Returns
+        -------
+        tuple
+            Texel indices of the points in the node texture and the texture.
+        """
+        key = self.guip.get_current_data_name()
+        values = self.store_wrp.get_data(key, start, start + count)
+
+        width = min(count, self.data_wrapper.max_tex_size)
+        height = (count - 1) // width + 1
+        data = np.zeros((height, width), dtype="float32")
+        data.reshape(-1)[0:count] = values
+
+        index = np.arange(count)
+        texels = np.zeros((count, 2), dtype="float32")
+        texels[:, 0] = index % width
+        texels[:, 1] = index // width
+
+        return texels, self._create_r32f_texture(data)
+
+    def _create_r32f_texture(self, data: np.ndarray) -> int:
+        """Create a single channel float texture with one texel per matrix element."""
+        (height, width) = data.shape
+        texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexImage2D(
+            GL_TEXTURE_2D, 0, GL_R32F, width, height, 0, GL_RED, GL_FLOAT, data
+        )
+        glBindTexture(GL_TEXTURE_2D, 0)
+        return texture
+
+    def _delete_node_buffers(self, node: int) -> None:
+        """Delete the VAOs, the VBO and the data texture of a node."""
+        (vao, vao_sprite, vbo, texture) = self.node_buffers.pop(node)
+        glDeleteVertexArrays(2, [vao, vao_sprite])
+        glDeleteBuffers(1, [vbo])
+        if texture is not None:
+            glDeleteTextures(1, [texture])
+
+    def _update_data_texture(self):
+        """Update the data textures, or drop the nodes read from a store."""
+        key = self.guip.get_current_data_name()
+        for level, buffers in zip(self.voxel_levels, self.level_buffers):
+            data = level[2].data_mat_dict[key]
+            (height, width) = data.shape
+            glActiveTexture(self.texture_slot)
+            glBindTexture(GL_TEXTURE_2D, buffers[3])
+            glTexSubImage2D(
+                GL_TEXTURE_2D, 0, 0, 0, width, height, GL_RED, GL_FLOAT, data
+            )
+            glBindTexture(GL_TEXTURE_2D, 0)
+
+        if self.store_wrp is None:
+            super()._update_data_texture()
+            return
+
+        # The nodes are read again with the new data channel as they are selected
+        for node in list(self.node_buffers.keys()):
+            self._delete_node_buffers(node)
+
+    def _delete_unused_node_buffers(self) -> None:
+        """Delete the least recently used node buffers above the resident limit."""
+        limit = self.resident_factor * self.guip.point_budget
+        nodes = list(self.node_buffers.keys())
+        n_resident = int(np.sum(self.octree.counts[nodes]))
+        if n_resident <= limit:
+            return
+
+        for node in sorted(nodes, key=lambda node: self.node_last_used[node]):
+            if n_resident <= limit or self.node_last_used[node] == self.frame:
+                break
+            self._delete_node_buffers(node)
+            n_resident -= self.octree.counts[node]
+
     def _bind_vao(self) -> None:
         """Bind the Vertex Array Object (VAO)."""
         glBindVertexArray(self.VAO)
@@ -235,10 +623,19 @@ class GlPoints(GlObject):
         glBindVertexArray(0)
 
     def _create_shaders(self) -> None:
-        """Create and compile the shader program."""
+        """Create and compile the shader programs for discs and sprites."""
+        self.shader = self._compile_shader(vertex_shader_pc, fragment_shader_pc)
+        self.uniform_locs = self._get_uniform_locations(self.shader)
 
-        vertex_shader = vertex_shader_pc
-        fragment_shader = fragment_shader_pc
+        vertex_shader = vertex_shader_pc_sprite
+        fragment_shader = fragment_shader_pc_sprite
+        self.shader_sprite = self._compile_shader(vertex_shader, fragment_shader)
+        self.uloc_sprite = self._get_uniform_locations(self.shader_sprite)
+
+        glUseProgram(self.shader)
+
+    def _compile_shader(self, vertex_shader: str, fragment_shader: str) -> int:
+        """Insert the color map functions and compile a shader program."""
 
         # Insert function for color map calculations
         vertex_shader = Template(vertex_shader).substitute(
@@ -249,25 +646,32 @@ class GlPoints(GlObject):
             color_map_4=color_map_viridis,
         )
 
-        self.shader = compileProgram(
+        shader = compileProgram(
             compileShader(vertex_shader, GL_VERTEX_SHADER),
             compileShader(fragment_shader, GL_FRAGMENT_SHADER),
         )
-        glUseProgram(self.shader)
-
-        self.uniform_locs["model"] = glGetUniformLocation(self.shader, "model")
-        self.uniform_locs["view"] = glGetUniformLocation(self.shader, "view")
-        self.uniform_locs["project"] = glGetUniformLocation(self.shader, "project")
-        self.uniform_locs["color_by"] = glGetUniformLocation(self.shader, "color_by")
-        self.uniform_locs["scale"] = glGetUniformLocation(self.shader, "scale")
-        self.uniform_locs["clip_x"] = glGetUniformLocation(self.shader, "clip_x")
-        self.uniform_locs["clip_y"] = glGetUniformLocation(self.shader, "clip_y")
-        self.uniform_locs["clip_z"] = glGetUniformLocation(self.shader, "clip_z")
-        self.uniform_locs["cmap_idx"] = glGetUniformLocation(self.shader, "cmap_idx")
-        self.uniform_locs["data_min"] = glGetUniformLocation(self.shader, "data_min")
-        self.uniform_locs["data_max"] = glGetUniformLocation(self.shader, "data_max")
-        self.uniform_locs["color_inv"] = glGetUniformLocation(self.shader, "color_inv")
-        self.uniform_locs["data_tex"] = glGetUniformLocation(self.shader, "data_tex")
+        return shader
+
+    def _get_uniform_locations(self, shader: int) -> dict:
+        """Get the uniform locations, -1 for uniforms not used by the shader."""
+        names = [
+            "model",
+            "view",
+            "project",
+            "color_by",
+            "scale",
+            "clip_x",
+            "clip_y",
+            "clip_z",
+            "cmap_idx",
+            "data_min",
+            "data_max",
+            "color_inv",
+            "data_tex",
+            "p_size",
+            "vp_height",
+        ]
+        return {name: glGetUniformLocation(shader, name) for name in names}
 
     def _bind_shader(self) -> None:
         """Bind the shader program."""
@@ -428,11 +832,11 @@ class GlPoints(GlObject):
 
         return int(n_sides)
 
-    def _set_clipping_uniforms(self, gguip: GuiParametersGlobal):
+    def _set_clipping_uniforms(self, gguip: GuiParametersGlobal, uloc: dict):
         xdom = 0.5 * np.max([self.bb_local.xdom, self.bb_global.xdom])
         ydom = 0.5 * np.max([self.bb_local.ydom, self.bb_global.ydom])
         zdom = 0.5 * np.max([self.bb_local.zdom, self.bb_global.zdom])
 
-        glUniform1f(self.uniform_locs["clip_x"], (xdom * gguip.clip_dist[0]))
-        glUniform1f(self.uniform_locs["clip_y"], (ydom * gguip.clip_dist[1]))
-        glUniform1f(self.uniform_locs["clip_z"], (zdom * gguip.clip_dist[2]))
+        glUniform1f(uloc["clip_x"], (xdom * gguip.clip_dist[0]))
+        glUniform1f(uloc["clip_y"], (ydom * gguip.clip_dist[1]))
+        glUniform1f(uloc["clip_z"], (zdom * gguip.clip_dist[2]))
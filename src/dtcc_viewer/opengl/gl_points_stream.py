@@ -0,0 +1,135 @@
+import numpy as np
+from OpenGL.GL import *
+from dtcc_viewer.opengl.action import Action
+from dtcc_viewer.opengl.gl_points import GlPoints
+from dtcc_viewer.opengl.wrp_pointcloud_stream import PointCloudStreamWrapper
+from dtcc_viewer.logging import info, warning
+
+
+class GlPointsStream(GlPoints):
+    """Point cloud that fills in while it is rendered.
+
+    The instance buffers and the data texture are allocated for the capacity of the
+    stream wrapper. Each frame the chunks that have been read are appended by the
+    wrapper and only the new points are uploaded with glBufferSubData and the rows
+    of the data texture that hold them with glTexSubImage2D. When the wrapper grows
+    its capacity, the buffers and the texture are reallocated in place, so the VAOs
+    stay valid. The data caps are widened as new values arrive, unless the user has
+    moved the range sliders.
+
+    Attributes
+    ----------
+    stream : PointCloudStreamWrapper
+        Wrapper that receives the chunks.
+    caps : dict
+        Data min and max values when the sliders were last updated.
+    max_points_per_frame : int
+        Max number of points appended and uploaded per frame.
+    """
+
+    stream: PointCloudStreamWrapper
+    caps: dict
+
+    max_points_per_frame = 1000000
+
+    def __init__(self, stream: PointCloudStreamWrapper):
+        """Initialize the object with the points received so far."""
+        super().__init__(stream)
+        self.stream = stream
+        self.n_points = stream.n_points
+        self.n_points_drawn = self.n_points
+        self.caps = dict(self.data_wrapper.data_min_max)
+
+        # The final size is unknown and sprites scale to any number of points
+        self.guip.sprites = True
+
+    def render(self, action: Action) -> None:
+        """Append and upload new points before rendering."""
+        self._ingest()
+        super().render(action)
+
+    def _ingest(self) -> None:
+        """Upload the points appended to the stream since the last frame."""
+        if self.stream.finished:
+            return
+
+        start, grown = self.stream.poll(self.max_points_per_frame)
+        end = self.stream.n_points
+        if end == start:
+            return
+
+        if grown:
+            self._reallocate()
+        else:
+            self._upload_range(start, end)
+
+        self.n_points = end
+        self._widen_caps()
+
+    def _get_texels(self) -> np.ndarray:
+        """Texel indices for all points in the capacity of the stream."""
+        texels = np.zeros((self.stream.capacity, 2), dtype="float32")
+        texels[:, 0] = self.data_wrapper.texel_x
+        texels[:, 1] = self.data_wrapper.texel_y
+        return texels
+
+    def _reallocate(self) -> None:
+        """Reallocate the instance buffers and the data texture for a new capacity."""
+        self.transforms = self.stream.points
+        self.texels = self._get_texels()
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.transforms_VBO)
+        size = self.transforms.nbytes
+        glBufferData(GL_ARRAY_BUFFER, size, self.transforms, GL_DYNAMIC_DRAW)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.texel_VBO)
+        glBufferData(GL_ARRAY_BUFFER, self.texels.nbytes, self.texels, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        width = self.data_wrapper.col_count
+        height = self.data_wrapper.row_count
+        data = self.data_wrapper.data_mat_dict[self.guip.get_current_data_name()]
+
+        self._bind_data_texture()
+        glTexImage2D(
+            GL_TEXTURE_2D, 0, GL_R32F, width, height, 0, GL_RED, GL_FLOAT, data
+        )
+        self._unbind_data_texture()
+
+    def _upload_range(self, start: int, end: int) -> None:
+        """Upload the points with indices in [start, end) and their data."""
+        positions = self.transforms[3 * start : 3 * end]
+        glBindBuffer(GL_ARRAY_BUFFER, self.transforms_VBO)
+        glBufferSubData(GL_ARRAY_BUFFER, 12 * start, positions.nbytes, positions)
+
+        texels = self.texels[start:end]
+        glBindBuffer(GL_ARRAY_BUFFER, self.texel_VBO)
+        glBufferSubData(GL_ARRAY_BUFFER, 8 * start, texels.nbytes, texels)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        # Only the texture rows that hold the new points
+        width = self.data_wrapper.col_count
+        row_start = start // width
+        row_end = (end - 1) // width + 1
+        key = self.guip.get_current_data_name()
+        data = self.data_wrapper.data_mat_dict[key][row_start:row_end]
+
+        self._bind_data_texture()
+        n_rows = row_end - row_start
+        glTexSubImage2D(
+            GL_TEXTURE_2D, 0, 0, row_start, width, n_rows, GL_RED, GL_FLOAT, data
+        )
+        self._unbind_data_texture()
+
+    def _widen_caps(self) -> None:
+        """Widen the slider values to new data ranges, unless they have been moved."""
+        guip = self.guip
+        for key, (d_min, d_max) in self.data_wrapper.data_min_max.items():
+            old_min, old_max = self.caps[key]
+            if guip.dict_sldr_val[key][0] == old_min:
+                guip.dict_sldr_val[key][0] = d_min
+            if guip.dict_sldr_val[key][1] == old_max:
+                guip.dict_sldr_val[key][1] = d_max
+            self.caps[key] = (d_min, d_max)
+
+        guip.update_caps = True
@@ -1,3 +1,4 @@
+import copy
 import math
 import glfw
 import numpy as np
@@ -15,11 +16,14 @@ from dtcc_viewer.shaders.shaders_raster import (
     fragment_shader_raster_data,
     fragment_shader_raster_rgb,
     fragment_shader_raster_rgba,
+    vertex_shader_raster_terrain,
+    fragment_shader_raster_terrain,
 )
 
 from dtcc_viewer.opengl.parameters import GuiParametersRaster, GuiParametersGlobal
 from dtcc_viewer.opengl.utils import BoundingBox, RasterType
 from dtcc_viewer.opengl.wrp_raster import RasterWrapper
+from dtcc_viewer.opengl.raster_stats import RasterStats
 from dtcc_viewer.shaders.shaders_color_maps import (
     color_map_rainbow,
     color_map_inferno,
@@ -36,6 +40,16 @@ class GlRaster(GlObject):
     stores data and displays it using a color map. The RGB(A) raster displays RGB(A)
     data using the specified channels.
 
+    Data rasters can also be drawn as a terrain, with the data as heights. A small
+    grid patch is drawn as instances in rings around the camera target, like a
+    geometry clipmap, where the vertex spacing doubles for each ring. The vertices
+    are displaced in the vertex shader by sampling a mipmapped height texture, and
+    the normals are computed from differences of the heights in the fragment shader.
+    Vertices towards the outer edge of a ring are moved onto the grid of the next
+    ring, and their heights and normals are blended with those of the next mipmap
+    level, so the rings meet without cracks. The terrain resources are created the
+    first time the terrain is shown.
+
     TODO: Split the data, RGB, and RGBA rasters into separate classes with a common
     base class.
 
@@ -74,6 +88,18 @@ class GlRaster(GlObject):
         Vertex buffer object.
     EBO : int
         Element buffer object.
+    stats : RasterStats
+        Statistics and cached histogram of the data.
+    height_texture : int
+        Mipmapped float texture with the data for the terrain, None until needed.
+    shader_terrain : int
+        Shader program for the terrain.
+    uloc_terrain : dict
+        Uniform locations for the terrain shader program.
+    n_rings : int
+        Number of terrain rings needed to cover the raster.
+    z_base : float
+        Local z coordinate of zero elevation, i.e. the z offset of the scene.
     """
 
     vertices: np.ndarray
@@ -89,12 +115,21 @@ class GlRaster(GlObject):
     data_std: float
     data_range: float
     data_mean: float
+    stats: RasterStats
     rgb_texture: int
     uniform_locs: dict
     shader: int
     VAO: int
     VBO: int
     EBO: int
+    height_texture: int
+    shader_terrain: int
+    uloc_terrain: dict
+    n_rings: int
+    z_base: float
+
+    patch_cells = 32  # Number of grid cells along each side of a terrain patch
+    max_rings = 16  # Max number of terrain rings, must match the terrain shader
 
     def __init__(self, raster_w: RasterWrapper):
         """Initialize the GlRaster object and set up rendering."""
@@ -103,20 +138,25 @@ class GlRaster(GlObject):
         self.indices = raster_w.indices
         self.type = raster_w.type
         self.data = raster_w.data
-        self.data_min = np.min(self.data)
-        self.data_max = np.max(self.data)
-        self.data_std = np.std(self.data)
-        self.data_mean = np.mean(self.data)
-        self.data_range = self.data_max - self.data_min
+        self.stats = RasterStats(self.data)
+        self.data_min = self.stats.min
+        self.data_max = self.stats.max
+        self.data_std = self.stats.std
+        self.data_mean = self.stats.mean
+        self.data_range = self.stats.range
         self.data_texture = None
         self.rgb_texture = None
         self.rgba_texture = None
         self.aspect_ratio = 1.0
         self.shader = 0
         self.uniform_locs = {}
+        self.height_texture = None
         self.guip = GuiParametersRaster(raster_w.name, self.type)
-        self.bb_local = raster_w.bb_local
+        self.guip.data_min = self.data_min
+        self.guip.data_max = self.data_max
+        self.bb_local = copy.copy(raster_w.bb_local)
         self.bb_global = raster_w.bb_global
+        self.z_base = float(self.bb_local.zmin)
 
         self._get_max_texture_size()
         self._get_max_texture_slots()
@@ -180,9 +220,9 @@ class GlRaster(GlObject):
 
     def _create_data_texture(self):
         """Create texture for data storage."""
-        # Assuming data is stored in a 2D array, with width and height dimensions
-        self.width = self.data.shape[0]
-        self.height = self.data.shape[1]
+        # The data is stored row by row, with one row per texel row along y
+        self.width = self.data.shape[1]
+        self.height = self.data.shape[0]
         self.aspect_ratio = self.width / self.height
 
         # Generate texture ID
@@ -197,27 +237,30 @@ class GlRaster(GlObject):
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
 
-        # Specify the texture image data
+        # Upload the data in its own type, rows are not padded to 4 bytes
+        (internal_format, fmt, gl_type) = self._get_texture_format()
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
         glTexImage2D(
             GL_TEXTURE_2D,
             0,
-            GL_RED,
+            internal_format,
             self.width,
             self.height,
             0,
-            GL_RED,
-            GL_FLOAT,
+            fmt,
+            gl_type,
             self.data,
         )
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
 
         # Unbind the texture
         glBindTexture(GL_TEXTURE_2D, 0)
 
     def _create_rgb_texture(self):
         """Create texture for RGB data storage."""
-        # Assuming your data is stored in a 2D array named data, with width and height dimensions
-        self.width = self.data.shape[0]
-        self.height = self.data.shape[1]
+        # The data is stored row by row, with one row per texel row along y
+        self.width = self.data.shape[1]
+        self.height = self.data.shape[0]
         self.aspect_ratio = self.width / self.height
 
         # Generate texture ID
@@ -232,11 +275,12 @@ class GlRaster(GlObject):
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
 
-        # Specify the texture image data
+        # Specify the texture image data, rows are not padded to 4 bytes
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
         glTexImage2D(
             GL_TEXTURE_2D,
             0,
-            GL_RGB,
+            GL_RGB8,
             self.width,
             self.height,
             0,
@@ -244,15 +288,16 @@ class GlRaster(GlObject):
             GL_UNSIGNED_BYTE,
             self.data,
         )
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
 
         # Unbind the texture
         glBindTexture(GL_TEXTURE_2D, 0)
 
     def _create_rgba_texture(self):
         """Create texture for RGBA data storage."""
-        # Assuming your data is stored in a 2D array named data, with width and height dimensions
-        self.width = self.data.shape[0]
-        self.height = self.data.shape[1]
+        # The data is stored row by row, with one row per texel row along y
+        self.width = self.data.shape[1]
+        self.height = self.data.shape[0]
         self.aspect_ratio = self.width / self.height
 
         # Generate texture ID
@@ -267,11 +312,12 @@ class GlRaster(GlObject):
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
 
-        # Specify the texture image data
+        # Specify the texture image data, rows are not padded to 4 bytes
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
         glTexImage2D(
             GL_TEXTURE_2D,
             0,
-            GL_RGBA,
+            GL_RGBA8,
             self.width,
             self.height,
             0,
@@ -279,10 +325,39 @@ class GlRaster(GlObject):
             GL_UNSIGNED_BYTE,
             self.data,
         )
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
 
         # Unbind the texture
         glBindTexture(GL_TEXTURE_2D, 0)
 
+    def _get_texture_format(self) -> tuple:
+        """Internal format, format and type of the texture for the data type.
+
+        Data rasters use sized formats, so the values are stored as they are
+        instead of being normalized to 8 bits. Half floats use R16F and single
+        floats R32F. Unsigned 8 and 16 bit integers, e.g. classifications, use
+        R8UI and R16UI and are read with an unsigned integer sampler.
+        """
+        if self.type == RasterType.RGB:
+            return GL_RGB8, GL_RGB, GL_UNSIGNED_BYTE
+        elif self.type == RasterType.RGBA:
+            return GL_RGBA8, GL_RGBA, GL_UNSIGNED_BYTE
+
+        dtype = self.data.dtype
+        if dtype == np.uint8:
+            return GL_R8UI, GL_RED_INTEGER, GL_UNSIGNED_BYTE
+        elif dtype == np.uint16:
+            return GL_R16UI, GL_RED_INTEGER, GL_UNSIGNED_SHORT
+        elif dtype == np.float16:
+            return GL_R16F, GL_RED, GL_HALF_FLOAT
+        return GL_R32F, GL_RED, GL_FLOAT
+
+    def _get_sampler_type(self) -> str:
+        """GLSL sampler type for the data texture."""
+        if np.issubdtype(self.data.dtype, np.unsignedinteger):
+            return "usampler2D"
+        return "sampler2D"
+
     def _create_shaders(self) -> None:
         """Create and compile the shader program."""
 
@@ -301,6 +376,7 @@ class GlRaster(GlObject):
         fragment_shader = fragment_shader_raster_data
 
         fragment_shader = Template(fragment_shader).substitute(
+            sampler=self._get_sampler_type(),
             color_map_0=color_map_rainbow,
             color_map_1=color_map_inferno,
             color_map_2=color_map_black_body,
@@ -316,10 +392,6 @@ class GlRaster(GlObject):
         self.uniform_locs["data_min"] = glGetUniformLocation(self.shader, "data_min")
         self.uniform_locs["data_max"] = glGetUniformLocation(self.shader, "data_max")
 
-        # Set data based uniforms that won't change
-        glUniform1f(self.uniform_locs["data_min"], self.data_min)
-        glUniform1f(self.uniform_locs["data_max"], self.data_max)
-
     def _create_rgb_shader(self) -> None:
         glBindVertexArray(self.VAO)
         vertex_shader = vertex_shader_raster
@@ -359,14 +431,21 @@ class GlRaster(GlObject):
         glUniform1f(self.uniform_locs["asp_rat"], self.aspect_ratio)
 
     def update_data_caps(self):
-        """Update data min and max values."""
+        """Update the color range from the percentiles selected in the GUI."""
         if self.guip.update_caps:
-            self.guip.calc_data_min_max()
+            (lower, upper) = self.stats.percentiles(self.guip.percentiles)
+            self.guip.data_min = float(lower)
+            self.guip.data_max = float(upper)
             self.guip.update_caps = False
 
     def render(self, action: Action) -> None:
         """Render raster."""
         if self.type == RasterType.Data:
+            self._update_z_bounds()
+
+        if self.type == RasterType.Data and self.guip.terrain:
+            self._render_terrain(action)
+        elif self.type == RasterType.Data:
             self._render_data(action)
         elif self.type == RasterType.RGB:
             self._render_rgb(action)
@@ -386,6 +465,8 @@ class GlRaster(GlObject):
 
         glUniform1i(self.uniform_locs["color_by"], int(self.guip.color))
         glUniform1i(self.uniform_locs["cmap_idx"], self.guip.cmap_idx)
+        glUniform1f(self.uniform_locs["data_min"], self.guip.data_min)
+        glUniform1f(self.uniform_locs["data_max"], self.guip.data_max)
 
         self._draw_call()
 
@@ -418,17 +499,17 @@ class GlRaster(GlObject):
         self._render_common(action)
         self._draw_call()
 
-    def _render_common(self, action: Action):
+    def _render_common(self, action: Action, uloc: dict = None):
         """Common rendering code for all raster types."""
+        uloc = self.uniform_locs if uloc is None else uloc
         move = action.camera.get_move_matrix()
         view = action.camera.get_view_matrix(action.gguip)
         proj = action.camera.get_projection_matrix(action.gguip)
-        glUniformMatrix4fv(self.uniform_locs["model"], 1, GL_FALSE, move)
-        glUniformMatrix4fv(self.uniform_locs["view"], 1, GL_FALSE, view)
-        glUniformMatrix4fv(self.uniform_locs["project"], 1, GL_FALSE, proj)
-        glUniform1i(self.uniform_locs["color_inv"], int(self.guip.invert_cmap))
-        self._set_clipping_uniforms(action.gguip)
-        pass
+        glUniformMatrix4fv(uloc["model"], 1, GL_FALSE, move)
+        glUniformMatrix4fv(uloc["view"], 1, GL_FALSE, view)
+        glUniformMatrix4fv(uloc["project"], 1, GL_FALSE, proj)
+        glUniform1i(uloc["color_inv"], int(self.guip.invert_cmap))
+        self._set_clipping_uniforms(action.gguip, uloc)
 
     def _draw_call(self):
         """Draw call for the raster."""
@@ -437,12 +518,204 @@ class GlRaster(GlObject):
         glBindVertexArray(0)
         glUseProgram(0)
 
-    def _set_clipping_uniforms(self, gguip: GuiParametersGlobal):
+    def _set_clipping_uniforms(self, gguip: GuiParametersGlobal, uloc: dict = None):
         """Set clipping uniforms for the shader program."""
+        uloc = self.uniform_locs if uloc is None else uloc
         xdom = 0.5 * np.max([self.bb_local.xdom, self.bb_global.xdom])
         ydom = 0.5 * np.max([self.bb_local.ydom, self.bb_global.ydom])
         zdom = 0.5 * np.max([self.bb_local.zdom, self.bb_global.zdom])
 
-        glUniform1f(self.uniform_locs["clip_x"], (xdom * gguip.clip_dist[0]))
-        glUniform1f(self.uniform_locs["clip_y"], (ydom * gguip.clip_dist[1]))
-        glUniform1f(self.uniform_locs["clip_z"], (zdom * gguip.clip_dist[2]))
+        glUniform1f(uloc["clip_x"], (xdom * gguip.clip_dist[0]))
+        glUniform1f(uloc["clip_y"], (ydom * gguip.clip_dist[1]))
+        glUniform1f(uloc["clip_z"], (zdom * gguip.clip_dist[2]))
+
+    def _update_z_bounds(self) -> None:
+        """Update the z range of the local bounding box to the drawn heights."""
+        bb = self.bb_local
+        if self.guip.terrain:
+            heights = np.array([self.data_min, self.data_max], dtype=np.float64)
+            heights = self.z_base + heights * self.guip.height_scale
+            (bb.zmin, bb.zmax) = (float(heights.min()), float(heights.max()))
+        else:
+            (bb.zmin, bb.zmax) = (self.z_base, self.z_base)
+        bb.zdom = bb.zmax - bb.zmin
+
+    def _create_terrain(self) -> None:
+        """Create the height texture, the patch geometry and the terrain shader."""
+        rows, cols = self.data.shape[0:2]
+        data = np.ascontiguousarray(self.data, dtype=np.float32)
+
+        self.height_texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.height_texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexImage2D(
+            GL_TEXTURE_2D, 0, GL_R32F, cols, rows, 0, GL_RED, GL_FLOAT, data
+        )
+        glGenerateMipmap(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        # The finest ring has one vertex per cell, enough rings to cover the raster
+        self.min_spacing = max(self.bb_local.xdom / cols, self.bb_local.ydom / rows)
+        extent = max(self.bb_local.xdom, self.bb_local.ydom)
+        n_rings = np.ceil(np.log2(extent / (self.patch_cells * self.min_spacing)))
+        self.n_rings = int(np.clip(n_rings + 1, 1, self.max_rings))
+
+        self._create_terrain_geometry()
+        self._create_terrain_shader()
+        info(f"Terrain for raster '{self.name}' created with {self.n_rings} rings")
+
+    def _create_terrain_geometry(self) -> None:
+        """Create the grid patch and a buffer for the patch instances."""
+        n = self.patch_cells
+        (x, y) = np.meshgrid(np.arange(n + 1), np.arange(n + 1))
+        grid = np.column_stack((x.flatten(), y.flatten())).astype("float32")
+
+        # Two triangles for each cell
+        v0 = (np.arange(n)[None, :] + (n + 1) * np.arange(n)[:, None]).flatten()
+        cells = np.column_stack((v0, v0 + 1, v0 + n + 2, v0, v0 + n + 2, v0 + n + 1))
+        self.terrain_indices = cells.astype("uint32").flatten()
+
+        self.terrain_VAO = glGenVertexArrays(1)
+        glBindVertexArray(self.terrain_VAO)
+
+        self.terrain_VBO = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.terrain_VBO)
+        glBufferData(GL_ARRAY_BUFFER, grid.nbytes, grid, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 8, ctypes.c_void_p(0))
+
+        self.terrain_EBO = glGenBuffers(1)
+        indices = self.terrain_indices
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.terrain_EBO)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+
+        # Patch min x, min y, vertex spacing and ring for each instance
+        self.patch_VBO = glGenBuffers(1)
+        size = self.n_rings * 16 * 4 * 4
+        glBindBuffer(GL_ARRAY_BUFFER, self.patch_VBO)
+        glBufferData(GL_ARRAY_BUFFER, size, None, GL_DYNAMIC_DRAW)
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(1, 4, GL_FLOAT, GL_FALSE, 16, ctypes.c_void_p(0))
+        glVertexAttribDivisor(1, 1)
+
+        glBindVertexArray(0)
+
+    def _create_terrain_shader(self) -> None:
+        """Compile the terrain shader and get its uniform locations."""
+        fragment_shader = Template(fragment_shader_raster_terrain).substitute(
+            color_map_0=color_map_rainbow,
+            color_map_1=color_map_inferno,
+            color_map_2=color_map_black_body,
+            color_map_3=color_map_turbo,
+            color_map_4=color_map_viridis,
+        )
+        self.shader_terrain = compileProgram(
+            compileShader(vertex_shader_raster_terrain, GL_VERTEX_SHADER),
+            compileShader(fragment_shader, GL_FRAGMENT_SHADER),
+        )
+
+        names = ["model", "view", "project", "clip_x", "clip_y", "clip_z"]
+        names += ["color_by", "color_inv", "cmap_idx", "color_min", "color_max"]
+        names += ["height_tex", "raster_min", "raster_size", "z_base"]
+        names += ["height_scale", "patch_cells", "min_spacing", "ring_centers"]
+        self.uloc_terrain = {}
+        for name in names:
+            self.uloc_terrain[name] = glGetUniformLocation(self.shader_terrain, name)
+
+    def _get_terrain_patches(self, target: np.ndarray) -> tuple:
+        """Get the patches of the rings around a target point.
+
+        Each ring is a 4 x 4 grid of patches around the target. The coarsest ring
+        is centered on the target snapped to its patch size. Each finer ring is then
+        centered at the patch corner of the next coarser ring closest to the
+        target, so its square covers exactly 2 x 2 patches of that ring, which are
+        skipped. Patches outside the raster are also skipped.
+
+        Returns
+        -------
+        tuple
+            Patch min x, min y, vertex spacing and ring [n x 4] and the ring
+            centers [n_rings x 2].
+        """
+        spacing = self.min_spacing * 2.0 ** np.arange(self.n_rings)
+        patch_size = (self.patch_cells * spacing)[:, None, None]
+        target = np.asarray(target, dtype=np.float64)[0:2]
+
+        centers = np.zeros((self.n_rings, 2))
+        size = patch_size[-1, 0, 0]
+        centers[-1] = np.round(target / size) * size
+        for ring in range(self.n_rings - 2, -1, -1):
+            # The corners of the patches of the coarser ring
+            size = patch_size[ring + 1, 0, 0]
+            offset = np.round((target - centers[ring + 1]) / size) * size
+            centers[ring] = centers[ring + 1] + np.clip(offset, -size, size)
+
+        # Patch min corners for each ring [n_rings x 16 x 2]
+        offsets = np.stack(np.meshgrid(np.arange(4), np.arange(4)), axis=-1)
+        offsets = (offsets.reshape(-1, 2) - 2.0)[None, :, :]
+        mins = centers[:, None, :] + offsets * patch_size
+        maxs = mins + patch_size
+
+        bb = self.bb_local
+        inside = np.all(mins < [bb.xmax, bb.ymax], axis=2)
+        inside &= np.all(maxs > [bb.xmin, bb.ymin], axis=2)
+
+        # The next finer ring covers a square of 2 x 2 patches of the ring, with a
+        # tolerance for the rounding of the patch corners
+        eps = 1e-6 * patch_size[1:]
+        inner_min = centers[:-1, None, :] - patch_size[1:] - eps
+        inner_max = centers[:-1, None, :] + patch_size[1:] + eps
+        covered = np.all((mins[1:] >= inner_min) & (maxs[1:] <= inner_max), axis=2)
+        inside[1:] &= ~covered
+
+        (rings, index) = np.nonzero(inside)
+        patches = np.zeros((len(rings), 4), dtype="float32")
+        patches[:, 0:2] = mins[rings, index]
+        patches[:, 2] = spacing[rings]
+        patches[:, 3] = rings
+        return patches, centers
+
+    def _render_terrain(self, action: Action) -> None:
+        """Render the data raster as a terrain."""
+        if self.height_texture is None:
+            self._create_terrain()
+
+        uloc = self.uloc_terrain
+        glUseProgram(self.shader_terrain)
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D, self.height_texture)
+        glUniform1i(uloc["height_tex"], 0)
+
+        self._render_common(action, uloc)
+
+        bb = self.bb_local
+        glUniform1i(uloc["color_by"], int(self.guip.color))
+        glUniform1i(uloc["cmap_idx"], self.guip.cmap_idx)
+        glUniform1f(uloc["color_min"], self.guip.data_min)
+        glUniform1f(uloc["color_max"], self.guip.data_max)
+        glUniform2f(uloc["raster_min"], bb.xmin, bb.ymin)
+        glUniform2f(uloc["raster_size"], bb.xdom, bb.ydom)
+        glUniform1f(uloc["z_base"], self.z_base)
+        glUniform1f(uloc["height_scale"], self.guip.height_scale)
+        glUniform1f(uloc["patch_cells"], self.patch_cells)
+        glUniform1f(uloc["min_spacing"], self.min_spacing)
+
+        (patches, centers) = self._get_terrain_patches(action.camera.target)
+        centers = np.array(centers, dtype="float32")
+        glUniform2fv(uloc["ring_centers"], len(centers), centers)
+
+        glBindVertexArray(self.terrain_VAO)
+        glBindBuffer(GL_ARRAY_BUFFER, self.patch_VBO)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, patches.nbytes, patches)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        n_indices = len(self.terrain_indices)
+        glDrawElementsInstanced(
+            GL_TRIANGLES, n_indices, GL_UNSIGNED_INT, None, len(patches)
+        )
+        glBindVertexArray(0)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        glUseProgram(0)
@@ -0,0 +1,291 @@
+import numpy as np
+from string import Template
+from OpenGL.GL import *
+from dtcc_viewer.logging import info, warning, debug
+from dtcc_viewer.opengl.action import Action
+from dtcc_viewer.opengl.gl_raster import GlRaster
+from dtcc_viewer.opengl.utils import RasterType
+from dtcc_viewer.opengl.wrp_raster import RasterPyramidWrapper
+from dtcc_viewer.opengl.raster_pyramid import RasterPyramid
+
+from dtcc_viewer.shaders.shaders_raster import (
+    vertex_shader_raster_tiled,
+    fragment_shader_raster_tiled_data,
+    fragment_shader_raster_tiled_rgba,
+)
+from dtcc_viewer.shaders.shaders_color_maps import (
+    color_map_rainbow,
+    color_map_inferno,
+    color_map_black_body,
+    color_map_turbo,
+    color_map_viridis,
+)
+
+
+class GlRasterTiled(GlRaster):
+    """Raster drawn from a tiled mip pyramid with a fixed size tile cache.
+
+    All tiles share one texture array, where each layer holds one tile. For each
+    frame the pyramid selects the visible tiles with about one cell per pixel, and
+    the tiles that are not in the cache are uploaded, a limited number per frame,
+    into free layers or the least recently used ones. A selected tile that is not
+    uploaded yet is replaced by its closest cached ancestor, so the raster never
+    has holes. The root tile is uploaded first and never evicted. All tiles are
+    then drawn as instances of a unit quad in a single draw call.
+
+    The video memory used is bounded by the number of layers, independent of the
+    raster size.
+
+    Attributes
+    ----------
+    pyramid : RasterPyramid
+        Tiled mip pyramid of the raster.
+    tile_texture : int
+        Texture array with one tile in each layer.
+    n_layers : int
+        Number of layers in the texture array.
+    tile_layers : dict
+        Layer of each cached tile, with tiles as (level, row, col).
+    layer_tiles : list
+        Tile in each layer, None for free layers.
+    free_layers : list
+        Layers without a tile.
+    layer_last_used : np.ndarray
+        Frame number when each layer was last drawn.
+    n_tiles_drawn : int
+        Number of tiles drawn in the current frame.
+    """
+
+    pyramid: RasterPyramid
+    tile_texture: int
+    n_layers: int
+    tile_layers: dict
+    layer_tiles: list
+    free_layers: list
+    layer_last_used: np.ndarray
+    n_tiles_drawn: int
+    frame: int
+
+    max_layers = 256  # Max number of cached tiles, 64 MB for float tiles of 256^2
+    max_uploads = 16  # Max number of tiles uploaded per frame
+    max_error = 1.0  # Tiles with cells larger than this many pixels are refined
+
+    def __init__(self, raster_w: RasterPyramidWrapper):
+        """Initialize the GlRasterTiled object."""
+        super().__init__(raster_w)
+        self.pyramid = raster_w.pyramid
+        self.guip.terrain_available = False
+        self.tile_layers = {}
+        self.n_tiles_drawn = 0
+        self.frame = 0
+
+    def _create_textures(self) -> None:
+        """Create the texture array for the tile cache and upload the root tile."""
+        size = self.pyramid.tile_size
+        self.width = size
+        self.height = size
+        self.n_layers = min(self.max_layers, glGetIntegerv(GL_MAX_ARRAY_TEXTURE_LAYERS))
+        self.layer_tiles = [None] * self.n_layers
+        self.free_layers = list(range(self.n_layers - 1, -1, -1))
+        self.layer_last_used = np.zeros(self.n_layers, dtype=np.int64)
+
+        internal_format, fmt, gl_type = self._get_texture_format()
+        self.tile_texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, self.tile_texture)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexImage3D(
+            GL_TEXTURE_2D_ARRAY,
+            0,
+            internal_format,
+            size,
+            size,
+            self.n_layers,
+            0,
+            fmt,
+            gl_type,
+            None,
+        )
+        glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+
+        self._upload_tile(self.pyramid.root)
+        debug(f"Tile cache with {self.n_layers} layers of {size} x {size} texels")
+
+    def _create_geometry(self) -> None:
+        """Create a unit quad with one instance per tile."""
+        corners = np.array([0, 0, 1, 0, 0, 1, 1, 1], dtype="float32")
+
+        self.VAO = glGenVertexArrays(1)
+        glBindVertexArray(self.VAO)
+
+        self.VBO = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
+        glBufferData(GL_ARRAY_BUFFER, corners.nbytes, corners, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 8, ctypes.c_void_p(0))
+
+        # Tile rectangle, uv scale, layer and z for each tile instance
+        self.instance_VBO = glGenBuffers(1)
+        size = self.n_layers * 8 * 4
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_VBO)
+        glBufferData(GL_ARRAY_BUFFER, size, None, GL_DYNAMIC_DRAW)
+
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(1, 4, GL_FLOAT, GL_FALSE, 32, ctypes.c_void_p(0))
+        glVertexAttribDivisor(1, 1)
+        glEnableVertexAttribArray(2)
+        glVertexAttribPointer(2, 4, GL_FLOAT, GL_FALSE, 32, ctypes.c_void_p(16))
+        glVertexAttribDivisor(2, 1)
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindVertexArray(0)
+
+    def _create_shaders(self) -> None:
+        """Create the shader program for data or color tiles."""
+        glBindVertexArray(self.VAO)
+
+        if self.type == RasterType.Data:
+            fragment_shader = Template(fragment_shader_raster_tiled_data).substitute(
+                sampler=self._get_sampler_type(),
+                color_map_0=color_map_rainbow,
+                color_map_1=color_map_inferno,
+                color_map_2=color_map_black_body,
+                color_map_3=color_map_turbo,
+                color_map_4=color_map_viridis,
+            )
+        else:
+            fragment_shader = fragment_shader_raster_tiled_rgba
+
+        self._create_shader_common(vertex_shader_raster_tiled, fragment_shader)
+
+        if self.type == RasterType.Data:
+            for name in ["color_by", "cmap_idx", "data_min", "data_max"]:
+                self.uniform_locs[name] = glGetUniformLocation(self.shader, name)
+
+        glBindVertexArray(0)
+
+    def render(self, action: Action) -> None:
+        """Select, upload and draw the tiles for the current view."""
+        glUseProgram(self.shader)
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, self.tile_texture)
+        glUniform1i(self.uniform_locs["data_tex"], 0)
+
+        self._render_common(action)
+
+        if self.type == RasterType.Data:
+            glUniform1i(self.uniform_locs["color_by"], int(self.guip.color))
+            glUniform1i(self.uniform_locs["cmap_idx"], self.guip.cmap_idx)
+            glUniform1f(self.uniform_locs["data_min"], self.guip.data_min)
+            glUniform1f(self.uniform_locs["data_max"], self.guip.data_max)
+        else:
+            glUniform1i(self.uniform_locs["r_channel"], self.guip.channels[0])
+            glUniform1i(self.uniform_locs["g_channel"], self.guip.channels[1])
+            glUniform1i(self.uniform_locs["b_channel"], self.guip.channels[2])
+
+        tiles = self._update_tiles(action)
+        self._upload_instances(tiles)
+
+        glBindVertexArray(self.VAO)
+        glDrawArraysInstanced(GL_TRIANGLE_STRIP, 0, 4, len(tiles))
+        glBindVertexArray(0)
+        glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+        glUseProgram(0)
+
+    def _update_tiles(self, action: Action) -> list[tuple]:
+        """Select the tiles for the view and make sure they are in the cache.
+
+        Returns
+        -------
+        list[tuple]
+            Cached tiles to draw, none of which covers another.
+        """
+        move = action.camera.get_move_matrix()
+        view = action.camera.get_view_matrix(action.gguip)
+        proj = action.camera.get_projection_matrix(action.gguip)
+        mvp = move @ view @ proj
+        height = action.fbuf_height
+        selected = self.pyramid.select(
+            mvp, height, proj[1][1], self.n_layers, self.max_error
+        )
+
+        self.frame += 1
+        root = self.pyramid.root
+        self.layer_last_used[self.tile_layers[root]] = self.frame
+        drawn = set()
+        n_uploads = 0
+        for tile in selected:
+            # Fall back to the closest cached ancestor, the root is always cached
+            while tile not in self.tile_layers:
+                if n_uploads < self.max_uploads and self._upload_tile(tile):
+                    n_uploads += 1
+                    break
+                tile = self.pyramid.parent(tile)
+            self.layer_last_used[self.tile_layers[tile]] = self.frame
+            drawn.add(tile)
+
+        tiles = [tile for tile in drawn if not self._has_ancestor(tile, drawn)]
+        self.n_tiles_drawn = len(tiles)
+        return tiles
+
+    def _has_ancestor(self, tile: tuple, tiles: set) -> bool:
+        """True if any tile further up in the pyramid that covers tile is in tiles."""
+        while tile[0] < self.pyramid.n_levels - 1:
+            tile = self.pyramid.parent(tile)
+            if tile in tiles:
+                return True
+        return False
+
+    def _upload_tile(self, tile: tuple) -> bool:
+        """Upload a tile to a free or the least recently used layer.
+
+        Returns
+        -------
+        bool
+            False if all layers are in use in the current frame.
+        """
+        if len(self.free_layers) > 0:
+            layer = self.free_layers.pop()
+        else:
+            last_used = self.layer_last_used.copy()
+            last_used[self.tile_layers[self.pyramid.root]] = np.iinfo(np.int64).max
+            layer = int(np.argmin(last_used))
+            if last_used[layer] >= self.frame:
+                return False
+            del self.tile_layers[self.layer_tiles[layer]]
+
+        data = self.pyramid.get_tile(tile)
+        size = self.pyramid.tile_size
+        internal_format, fmt, gl_type = self._get_texture_format()
+
+        glBindTexture(GL_TEXTURE_2D_ARRAY, self.tile_texture)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexSubImage3D(
+            GL_TEXTURE_2D_ARRAY, 0, 0, 0, layer, size, size, 1, fmt, gl_type, data
+        )
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 4)
+
+        self.tile_layers[tile] = layer
+        self.layer_tiles[layer] = tile
+        self.layer_last_used[layer] = self.frame
+        return True
+
+    def _upload_instances(self, tiles: list[tuple]) -> None:
+        """Upload the rectangle, uv scale, layer and z of each tile to draw."""
+        if len(tiles) == 0:
+            return
+
+        levels, rows, cols = np.array(tiles).T
+        mins, maxs = self.pyramid.tile_bounds(levels, rows, cols)
+        instances = np.zeros((len(tiles), 8), dtype="float32")
+        instances[:, 0:2] = mins[:, 0:2]
+        instances[:, 2:4] = maxs[:, 0:2]
+        instances[:, 4:6] = self.pyramid.tile_uv_scale(levels, rows, cols)
+        instances[:, 6] = [self.tile_layers[tile] for tile in tiles]
+        instances[:, 7] = mins[:, 2]
+
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_VBO)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, instances.nbytes, instances)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
@@ -0,0 +1,345 @@
+import numpy as np
+import time
+from OpenGL.GL import *
+from OpenGL.GL.shaders import compileProgram, compileShader
+from string import Template
+from dtcc_viewer.opengl.action import Action
+from dtcc_viewer.logging import info, warning
+from dtcc_viewer.opengl.parameters import GuiParametersVolume, GuiParametersGlobal
+from dtcc_viewer.opengl.utils import BoundingBox
+from dtcc_viewer.opengl.wrp_grid import VolumeGridWrapper
+from dtcc_viewer.opengl.gl_object import GlObject
+
+from dtcc_viewer.shaders.shaders_volume import (
+    vertex_shader_volume,
+    fragment_shader_volume,
+)
+
+from dtcc_viewer.shaders.shaders_color_maps import (
+    color_map_rainbow,
+    color_map_inferno,
+    color_map_black_body,
+    color_map_turbo,
+    color_map_viridis,
+)
+
+
+class GlVolume(GlObject):
+    """A class for rendering the scalar fields of a volume grid using OpenGL.
+
+    The selected field is stored in a 3D texture with one texel per grid point, so
+    the memory scales with the number of grid points. The volume is drawn by ray
+    marching through the back faces of the grid bounds, mapping each sample to a
+    color with the color map and to an opacity that grows linearly over the color
+    range, composited front to back. As a cheaper mode the field is drawn on an
+    axis aligned slice through the grid, interpolated by the texture sampler.
+
+    The volume is drawn after all other objects and blended over the scene. The
+    rays end at the depth of the opaque objects, read from a copy of the depth
+    buffer, so objects inside the volume are only fogged by the volume in front of
+    them. Slices are opaque and depth tested.
+
+    Attributes
+    ----------
+    name : str
+        Name of the volume grid.
+    guip : GuiParametersVolume
+        GUI parameters for the volume.
+    fields : dict
+        Scalar fields as float32 arrays [ny x nx x nz], by name.
+    shape : tuple
+        Number of grid points along y, x and z.
+    box_min : np.ndarray
+        Min corner of the grid in local coordinates.
+    box_size : np.ndarray
+        Size of the grid along x, y and z.
+    bb_local : BoundingBox
+        Local bounding box.
+    bb_global : BoundingBox
+        Global bounding box.
+    uniform_locs : dict
+        Uniform locations for the shader program.
+    shader : int
+        Shader program.
+    VAO_box : int
+        Vertex array object for the unit cube.
+    VAO_slice : int
+        Vertex array object for the unit quad.
+    """
+
+    name: str
+    guip: GuiParametersVolume
+    fields: dict
+    shape: tuple
+    box_min: np.ndarray
+    box_size: np.ndarray
+    bb_local: BoundingBox
+    bb_global: BoundingBox
+    uniform_locs: dict
+    shader: int
+    VAO_box: int
+    VAO_slice: int
+
+    # Corners of the unit cube, with x + 2y + 4z as index
+    box_vertices = np.array(
+        [[x, y, z] for z in (0, 1) for y in (0, 1) for x in (0, 1)], dtype="float32"
+    )
+    # Triangles of the unit cube, counter clockwise seen from outside
+    box_indices = np.array(
+        [
+            [0, 2, 3],
+            [0, 3, 1],
+            [4, 5, 7],
+            [4, 7, 6],
+            [0, 1, 5],
+            [0, 5, 4],
+            [2, 6, 7],
+            [2, 7, 3],
+            [0, 4, 6],
+            [0, 6, 2],
+            [1, 3, 7],
+            [1, 7, 5],
+        ],
+        dtype="uint32",
+    )
+    slice_vertices = np.array(
+        [[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]], dtype="float32"
+    )
+    slice_indices = np.array([[0, 1, 2], [0, 2, 3]], dtype="uint32")
+
+    def __init__(self, wrapper: VolumeGridWrapper):
+        """Initialize the GlVolume object.
+
+        Parameters
+        ----------
+        wrapper : VolumeGridWrapper
+            Wrapper with the scalar fields of the volume grid.
+        """
+        self.name = wrapper.name
+        self.fields = wrapper.fields
+        self.shape = wrapper.shape
+        self.data_wrapper = None
+        self.uniform_locs = {}
+
+        self.bb_local = wrapper.bb_local
+        self.bb_global = wrapper.bb_global
+        self.box_min = np.array(
+            [self.bb_local.xmin, self.bb_local.ymin, self.bb_local.zmin],
+            dtype="float32",
+        )
+        self.box_size = np.array(
+            [self.bb_local.xdom, self.bb_local.ydom, self.bb_local.zdom],
+            dtype="float32",
+        )
+
+        self.guip = GuiParametersVolume(
+            wrapper.name, wrapper.fields, wrapper.fields_min_max
+        )
+
+        self.texture_slot = None
+        self.texture_idx = None
+
+    def _create_textures(self) -> None:
+        """Create a 3D texture for the selected field."""
+        (ny, nx, nz) = self.shape
+        max_size = glGetIntegerv(GL_MAX_3D_TEXTURE_SIZE)
+        if max(self.shape) > max_size:
+            warning(f"Volume grid {self.shape} exceeds the max 3D texture size.")
+
+        self.data_texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_3D, self.data_texture)
+        glTexParameteri(GL_TEXTURE_3D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_3D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_3D, GL_TEXTURE_WRAP_R, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_3D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_3D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+
+        # Width, height and depth follow z, x and y, the order of the grid points
+        data = self._get_field_data()
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexImage3D(
+            GL_TEXTURE_3D, 0, GL_R32F, nz, nx, ny, 0, GL_RED, GL_FLOAT, data
+        )
+        glBindTexture(GL_TEXTURE_3D, 0)
+
+    def _get_field_data(self) -> np.ndarray:
+        """Selected field with values that are not finite set to the min value."""
+        key = self.guip.get_current_data_name()
+        data = self.fields[key]
+        if not np.all(np.isfinite(data)):
+            data = np.where(np.isfinite(data), data, self.guip.dict_min_max[key][0])
+        return np.ascontiguousarray(data, dtype="float32")
+
+    def _update_data_texture(self):
+        """Upload the selected field to the 3D texture."""
+        (ny, nx, nz) = self.shape
+        tic = time.perf_counter()
+        data = self._get_field_data()
+        self._bind_data_texture()
+        glTexSubImage3D(GL_TEXTURE_3D, 0, 0, 0, 0, nz, nx, ny, GL_RED, GL_FLOAT, data)
+        self._unbind_data_texture()
+        toc = time.perf_counter()
+        info(f"Volume texture updated. Time elapsed: {toc - tic:0.4f} seconds")
+
+    def _bind_data_texture(self):
+        """Bind the 3D data texture."""
+        glActiveTexture(self.texture_slot)
+        glBindTexture(GL_TEXTURE_3D, self.data_texture)
+
+    def _unbind_data_texture(self):
+        """Unbind the 3D data texture."""
+        glActiveTexture(self.texture_slot)
+        glBindTexture(GL_TEXTURE_3D, 0)
+
+    def _create_geometry(self) -> None:
+        """Create the unit cube for ray marching and the unit quad for slices."""
+        self.VAO_box = self._create_vao(self.box_vertices, self.box_indices)
+        self.VAO_slice = self._create_vao(self.slice_vertices, self.slice_indices)
+
+    def _create_vao(self, vertices: np.ndarray, indices: np.ndarray) -> int:
+        """Create a vertex array object with positions and indices."""
+        VAO = glGenVertexArrays(1)
+        glBindVertexArray(VAO)
+
+        VBO = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, VBO)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+
+        EBO = glGenBuffers(1)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, EBO)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+
+        # Position
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 12, ctypes.c_void_p(0))
+
+        glBindVertexArray(0)
+        return VAO
+
+    def _create_shaders(self) -> None:
+        """Create and compile the shader program."""
+        fragment_shader = Template(fragment_shader_volume).substitute(
+            color_map_0=color_map_turbo,
+            color_map_1=color_map_inferno,
+            color_map_2=color_map_black_body,
+            color_map_3=color_map_rainbow,
+            color_map_4=color_map_viridis,
+        )
+
+        self.shader = compileProgram(
+            compileShader(vertex_shader_volume, GL_VERTEX_SHADER),
+            compileShader(fragment_shader, GL_FRAGMENT_SHADER),
+        )
+        glUseProgram(self.shader)
+
+        names = ["model", "view", "project", "clip_x", "clip_y", "clip_z"]
+        names += ["box_min", "box_size", "slice_axis", "slice_pos", "color_inv"]
+        names += ["cmap_idx", "data_min", "data_max", "volume_tex", "tex_size"]
+        names += ["inv_mvp", "viewport", "clip_max", "n_steps", "opacity"]
+        names += ["scene_depth"]
+        for name in names:
+            self.uniform_locs[name] = glGetUniformLocation(self.shader, name)
+
+        glUseProgram(0)
+
+    def render(self, action: Action, depth_slot: int, depth_idx: int) -> None:
+        """Render the volume by ray marching or as a slice.
+
+        Parameters
+        ----------
+        action : Action
+            The action containing camera and GUI parameters.
+        depth_slot : int
+            Texture slot with the depth of the scene, GL_TEXTURE0, GL_TEXTURE1, etc.
+        depth_idx : int
+            Index of the texture slot with the depth of the scene.
+        """
+        glUseProgram(self.shader)
+        self._bind_data_texture()
+        glUniform1i(self.uniform_locs["scene_depth"], depth_idx)
+
+        # MVP Calculations
+        move = action.camera.get_move_matrix()
+        view = action.camera.get_view_matrix(action.gguip)
+        proj = action.camera.get_projection_matrix(action.gguip)
+        glUniformMatrix4fv(self.uniform_locs["model"], 1, GL_FALSE, move)
+        glUniformMatrix4fv(self.uniform_locs["view"], 1, GL_FALSE, view)
+        glUniformMatrix4fv(self.uniform_locs["project"], 1, GL_FALSE, proj)
+
+        self._set_clipping_uniforms(action.gguip)
+
+        glUniform3fv(self.uniform_locs["box_min"], 1, self.box_min)
+        glUniform3fv(self.uniform_locs["box_size"], 1, self.box_size)
+        glUniform1i(self.uniform_locs["color_inv"], int(self.guip.invert_cmap))
+        glUniform1i(self.uniform_locs["cmap_idx"], self.guip.cmap_idx)
+        glUniform1f(self.uniform_locs["data_min"], self.guip.data_min)
+        glUniform1f(self.uniform_locs["data_max"], self.guip.data_max)
+        glUniform1i(self.uniform_locs["volume_tex"], self.texture_idx)
+        (ny, nx, nz) = self.shape
+        glUniform3f(self.uniform_locs["tex_size"], nz, nx, ny)
+
+        if self.guip.slice:
+            self._render_slice()
+        else:
+            self._render_volume(action, move @ view @ proj)
+
+        glBindVertexArray(0)
+        self._unbind_data_texture()
+        glUseProgram(0)
+
+    def _render_slice(self) -> None:
+        """Draw the field on an axis aligned slice through the grid."""
+        glUniform1i(self.uniform_locs["slice_axis"], self.guip.slice_axis)
+        glUniform1f(self.uniform_locs["slice_pos"], self.guip.slice_pos)
+        glBindVertexArray(self.VAO_slice)
+        glDrawElements(GL_TRIANGLES, self.slice_indices.size, GL_UNSIGNED_INT, None)
+
+    def _render_volume(self, action: Action, mvp: np.ndarray) -> None:
+        """Ray march the field from the back faces of the grid bounds."""
+        inv_mvp = np.linalg.inv(np.asarray(mvp, dtype="float64")).astype("float32")
+        glUniformMatrix4fv(self.uniform_locs["inv_mvp"], 1, GL_FALSE, inv_mvp)
+        (width, height) = (action.fbuf_width, action.fbuf_height)
+        glUniform2f(self.uniform_locs["viewport"], width, height)
+        glUniform1i(self.uniform_locs["slice_axis"], -1)
+        glUniform1i(self.uniform_locs["n_steps"], self.guip.n_steps)
+        glUniform1f(self.uniform_locs["opacity"], self.guip.opacity)
+
+        # Back faces give one fragment per pixel, also with the camera inside. They
+        # are not depth tested, since the part of a ray in front of an object that
+        # hides the back face is still visible. The rays end at the scene depth.
+        glEnable(GL_CULL_FACE)
+        glCullFace(GL_FRONT)
+        glDisable(GL_DEPTH_TEST)
+        glDepthMask(GL_FALSE)
+        glBlendFunc(GL_ONE, GL_ONE_MINUS_SRC_ALPHA)
+
+        glBindVertexArray(self.VAO_box)
+        glDrawElements(GL_TRIANGLES, self.box_indices.size, GL_UNSIGNED_INT, None)
+
+        glBlendFunc(GL_ONE, GL_ZERO)
+        glDepthMask(GL_TRUE)
+        glEnable(GL_DEPTH_TEST)
+        glCullFace(GL_BACK)
+        glDisable(GL_CULL_FACE)
+
+    def _set_clipping_uniforms(self, gguip: GuiParametersGlobal):
+        """Set the clipping uniforms for the shader program.
+
+        Parameters
+        ----------
+        gguip : GuiParametersGlobal
+            Global GUI parameters.
+        """
+        xdom = 0.5 * np.max([self.bb_local.xdom, self.bb_global.xdom])
+        ydom = 0.5 * np.max([self.bb_local.ydom, self.bb_global.ydom])
+        zdom = 0.5 * np.max([self.bb_local.zdom, self.bb_global.zdom])
+        clips = [xdom * gguip.clip_dist[0], ydom * gguip.clip_dist[1]]
+        clips += [zdom * gguip.clip_dist[2]]
+
+        glUniform1f(self.uniform_locs["clip_x"], clips[0])
+        glUniform1f(self.uniform_locs["clip_y"], clips[1])
+        glUniform1f(self.uniform_locs["clip_z"], clips[2])
+
+        # Planes that are not active are moved out of the way of the rays
+        clip_max = [c if on else 1e30 for (c, on) in zip(clips, gguip.clip_bool)]
+        glUniform3f(self.uniform_locs["clip_max"], *clip_max)
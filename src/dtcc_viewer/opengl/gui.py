@@ -13,6 +13,7 @@ from dtcc_viewer.opengl.gl_mesh import GlMesh
 from dtcc_viewer.opengl.gl_points import GlPoints
 from dtcc_viewer.opengl.gl_raster import GlRaster
 from dtcc_viewer.opengl.gl_lines import GlLines
+from dtcc_viewer.opengl.gl_volume import GlVolume
 from dtcc_viewer.opengl.parameters import (
     GuiParametersGlobal,
     GuiParametersObj,
@@ -20,6 +21,7 @@ from dtcc_viewer.opengl.parameters import (
     GuiParametersPC,
     GuiParametersLines,
     GuiParametersRaster,
+    GuiParametersVolume,
     GuiParametersDates,
     GuiParametersModel,
 )
@@ -218,6 +220,32 @@ class Gui:
             imgui.pop_id()
             imgui.end_child()
 
+            # Picking and culling settings
+            imgui.begin_child("Box5", 0, 58, border=True)
+            imgui.push_id("hover")
+            [changed, gguip.hover_picking] = imgui.checkbox(
+                "highlight on hover", gguip.hover_picking
+            )
+            imgui.pop_id()
+            imgui.same_line()
+            imgui.push_id("occlusion")
+            [changed, gguip.occlusion_culling] = imgui.checkbox(
+                "occlusion culling", gguip.occlusion_culling
+            )
+            imgui.pop_id()
+            imgui.push_id("culling")
+            [changed, gguip.frustum_culling] = imgui.checkbox(
+                "culling", gguip.frustum_culling
+            )
+            imgui.pop_id()
+            imgui.same_line()
+            imgui.push_id("cull_size")
+            [changed, gguip.cull_size_px] = imgui.slider_float(
+                "min size (px)", gguip.cull_size_px, 0.0, 20.0
+            )
+            imgui.pop_id()
+            imgui.end_child()
+
         self._draw_separator()
 
     def _create_clip_slider(
@@ -240,6 +268,7 @@ class Gui:
         pointclouds = model.filter_gl_type(GlPoints)
         linestrings = model.filter_gl_type(GlLines)
         rasters = model.filter_gl_type(GlRaster)
+        volumes = model.filter_gl_type(GlVolume)
 
         [expanded, visible] = imgui.collapsing_header(model.guip.name)
         if expanded:
@@ -268,6 +297,9 @@ class Gui:
             for rst in rasters:
                 self._draw_rst_gui(rst.guip, self._get_id())
 
+            for vol in volumes:
+                self._draw_vol_gui(vol.guip, self._get_id())
+
     def _get_id(self):
         """Get a unique identifier for GUI components."""
         self.id += 1
@@ -287,9 +319,12 @@ class Gui:
         """Draw GUI for mesh."""
         [expanded, visible] = imgui.collapsing_header(str(index) + " " + guip.name)
         if expanded:
-            imgui.begin_child("BoxMesh" + str(index), 0, 150, border=True)
+            height = 225 if guip.iso_available else 150
+            imgui.begin_child("BoxMesh" + str(index), 0, height, border=True)
             self._create_cbxs(index, guip)
             self._create_normals_cbx(index, guip)
+            if guip.iso_available:
+                self._create_iso_controls(index, guip)
             self._create_combo_cmaps(index, guip)
             self._create_cobmo_data(index, guip)
             self._create_range_sliders(index, guip)
@@ -297,19 +332,65 @@ class Gui:
 
         self._draw_separator()
 
+    def _create_iso_controls(self, index: int, guip: GuiParametersMesh) -> None:
+        """Create a combo box and a slider for the field and value of an isosurface."""
+        imgui.push_id("IsoCombo " + str(index))
+        key = guip.iso_keys[guip.iso_idx]
+        with imgui.begin_combo("Iso field", key) as combo:
+            if combo.opened:
+                for i, item in enumerate(guip.iso_keys):
+                    is_selected = guip.iso_idx == i
+                    if imgui.selectable(item, is_selected)[0] and not is_selected:
+                        guip.iso_idx = i
+                        guip.iso_value = float(np.mean(guip.iso_min_max[item]))
+                        guip.update_iso = True
+
+                    if is_selected:
+                        imgui.set_item_default_focus()
+        imgui.pop_id()
+
+        imgui.push_id("IsoValue" + str(index))
+        [v_min, v_max] = guip.iso_min_max[guip.iso_keys[guip.iso_idx]]
+        [changed, guip.iso_value] = imgui.slider_float(
+            "Iso value", guip.iso_value, v_min, v_max, format="%.4g"
+        )
+        if changed:
+            guip.update_iso = True
+        imgui.pop_id()
+
+        if guip.iso_busy:
+            imgui.text("Extracting isosurface...")
+        elif guip.iso_empty:
+            imgui.text("No isosurface at this value")
+
     def _draw_pc_gui(self, guip: GuiParametersPC, index: int) -> None:
         """Draw GUI for point clouds."""
         [expanded, visible] = imgui.collapsing_header(str(index) + " " + guip.name)
         if expanded:
 
-            imgui.begin_child("BoxPc" + str(index), 0, 150, border=True)
+            height = 225 if (guip.lod or guip.progressive) else 175
+            height += 25 if len(guip.voxel_sizes) > 0 else 0
+            imgui.begin_child("BoxPc" + str(index), 0, height, border=True)
             self._create_cbxs(index, guip)
+            imgui.push_id("Sprites" + str(index))
+            [changed, guip.sprites] = imgui.checkbox("point sprites", guip.sprites)
+            imgui.pop_id()
             imgui.push_id("Size" + str(index))
             [changed, guip.point_scale] = imgui.slider_float(
                 "Scale factor", guip.point_scale, 0, 10
             )
             imgui.pop_id()
 
+            if len(guip.voxel_sizes) > 0:
+                self._create_combo_voxels(index, guip)
+
+            # The sliders only apply to the full resolution point cloud
+            full = guip.voxel_idx == 0
+            if guip.lod and full:
+                self._create_lod_sliders(index, guip)
+            elif guip.progressive and full:
+                self._create_progressive_slider(index, guip)
+
             self._create_combo_cmaps(index, guip)
             self._create_cobmo_data(index, guip)
             self._create_range_sliders(index, guip)
@@ -317,15 +398,121 @@ class Gui:
 
         self._draw_separator()
 
+    def _create_combo_voxels(self, index: int, guip: GuiParametersPC) -> None:
+        """Create a combo box for selecting full resolution or a voxel level."""
+        imgui.push_id("VoxelCombo " + str(index))
+        items = ["full"] + [f"{size:.2f} m voxels" for size in guip.voxel_sizes]
+        with imgui.begin_combo("Resolution", items[guip.voxel_idx]) as combo:
+            if combo.opened:
+                for i, item in enumerate(items):
+                    is_selected = guip.voxel_idx == i
+                    if imgui.selectable(item, is_selected)[0]:
+                        guip.voxel_idx = i
+
+                    if is_selected:
+                        imgui.set_item_default_focus()
+        imgui.pop_id()
+
+    def _create_lod_sliders(self, index: int, guip: GuiParametersPC) -> None:
+        """Create sliders for the level of detail of large point clouds."""
+        imgui.push_id("Budget" + str(index))
+        budget_m = guip.point_budget / 1e6
+        [changed, budget_m] = imgui.slider_float(
+            "Point budget (M)", budget_m, 0.1, 50.0, format="%.1f"
+        )
+        if changed:
+            guip.point_budget = int(budget_m * 1e6)
+        imgui.pop_id()
+
+        imgui.push_id("LodError" + str(index))
+        [changed, guip.lod_error] = imgui.slider_float(
+            "Max spacing (px)", guip.lod_error, 0.5, 10.0
+        )
+        imgui.pop_id()
+
+    def _create_progressive_slider(self, index: int, guip: GuiParametersPC) -> None:
+        """Create a slider for the frame time budget of large point clouds."""
+        imgui.push_id("FrameBudget" + str(index))
+        [changed, guip.frame_budget] = imgui.slider_float(
+            "Frame budget (ms)", guip.frame_budget, 5.0, 100.0, format="%.0f"
+        )
+        imgui.pop_id()
+
     def _draw_ls_gui(self, guip: GuiParametersLines, index: int) -> None:
         """Draw GUI for lines."""
         [expanded, visible] = imgui.collapsing_header(str(index) + " " + guip.name)
         if expanded:
-            imgui.begin_child("BoxLines" + str(index), 0, 130, border=True)
+            height = 130
+            height += (50 if guip.lod else 25) if guip.lod_available else 0
+            imgui.begin_child("BoxLines" + str(index), 0, height, border=True)
             self._create_cbxs(index, guip)
+            if guip.lod_available:
+                self._create_line_lod_controls(index, guip)
+            self._create_combo_cmaps(index, guip)
+            self._create_cobmo_data(index, guip)
+            self._create_range_sliders(index, guip)
+            imgui.end_child()
+
+        self._draw_separator()
+
+    def _create_line_lod_controls(self, index: int, guip: GuiParametersLines) -> None:
+        """Create controls for the simplified levels of large line collections."""
+        imgui.push_id("LineLod" + str(index))
+        [changed, guip.lod] = imgui.checkbox("level of detail", guip.lod)
+        imgui.pop_id()
+
+        if guip.lod:
+            imgui.same_line()
+            imgui.text(f"level {guip.lod_level}")
+            imgui.push_id("LineLodError" + str(index))
+            [changed, guip.lod_error] = imgui.slider_float(
+                "Max error (px)", guip.lod_error, 0.5, 10.0
+            )
+            imgui.pop_id()
+
+    def _draw_vol_gui(self, guip: GuiParametersVolume, index: int) -> None:
+        """Draw GUI for volume grids."""
+        [expanded, visible] = imgui.collapsing_header(str(index) + " " + guip.name)
+        if expanded:
+            imgui.begin_child("BoxVolume" + str(index), 0, 175, border=True)
+            imgui.push_id("Show volume " + str(index))
+            [changed, guip.show] = imgui.checkbox("show", guip.show)
+            imgui.pop_id()
+            imgui.same_line()
+            imgui.push_id("Invert volume " + str(index))
+            [c, guip.invert_cmap] = imgui.checkbox("invert cmap", guip.invert_cmap)
+            imgui.pop_id()
+            imgui.same_line()
+            imgui.push_id("Slice volume " + str(index))
+            [changed, guip.slice] = imgui.checkbox("slice", guip.slice)
+            imgui.pop_id()
+
             self._create_combo_cmaps(index, guip)
             self._create_cobmo_data(index, guip)
             self._create_range_sliders(index, guip)
+
+            if guip.slice:
+                for i, axis in enumerate(["x", "y", "z"]):
+                    if i > 0:
+                        imgui.same_line()
+                    imgui.push_id("Slice axis " + axis + str(index))
+                    if imgui.radio_button(axis, guip.slice_axis == i):
+                        guip.slice_axis = i
+                    imgui.pop_id()
+                imgui.push_id("Slice position " + str(index))
+                [c, guip.slice_pos] = imgui.slider_float(
+                    "Position", guip.slice_pos, 0.0, 1.0
+                )
+                imgui.pop_id()
+            else:
+                imgui.push_id("Volume opacity " + str(index))
+                [c, guip.opacity] = imgui.slider_float(
+                    "Opacity", guip.opacity, 0.0, 1.0
+                )
+                imgui.pop_id()
+                imgui.push_id("Volume steps " + str(index))
+                [c, guip.n_steps] = imgui.slider_int("Steps", guip.n_steps, 16, 1024)
+                imgui.pop_id()
             imgui.end_child()
 
         self._draw_separator()
@@ -362,6 +549,19 @@ class Gui:
                                 imgui.set_item_default_focus()
                 imgui.pop_id()
 
+                self._create_percentile_sliders(index, guip)
+
+                if guip.terrain_available:
+                    imgui.push_id("Terrain raster " + str(index))
+                    [c, guip.terrain] = imgui.checkbox("Terrain", guip.terrain)
+                    imgui.pop_id()
+                if guip.terrain_available and guip.terrain:
+                    imgui.push_id("Height scale " + str(index))
+                    [c, guip.height_scale] = imgui.slider_float(
+                        "Height scale", guip.height_scale, 0, 10
+                    )
+                    imgui.pop_id()
+
             elif guip.type == RasterType.RGB or guip.type == RasterType.RGBA:
                 imgui.text("Active channels: ")
                 imgui.same_line()
@@ -383,6 +583,28 @@ class Gui:
                 [c, guip.channels[3]] = imgui.checkbox("A", guip.channels[3])
                 imgui.pop_id()
 
+    def _create_percentile_sliders(self, index: int, guip: GuiParametersRaster):
+        """Create sliders for the percentiles that clamp the raster color range."""
+        imgui.push_id("LowerPercentile " + str(index))
+        [changed, lower] = imgui.slider_float(
+            "Min %", guip.percentiles[0], 0.0, 100.0, "%.1f"
+        )
+        if changed:
+            guip.percentiles[0] = min(lower, guip.percentiles[1] - 0.1)
+            guip.update_caps = True
+        imgui.pop_id()
+
+        imgui.push_id("UpperPercentile " + str(index))
+        [changed, upper] = imgui.slider_float(
+            "Max %", guip.percentiles[1], 0.0, 100.0, "%.1f"
+        )
+        if changed:
+            guip.percentiles[1] = max(upper, guip.percentiles[0] + 0.1)
+            guip.update_caps = True
+        imgui.pop_id()
+
+        imgui.text(f"Color range: {guip.data_min:.3g} to {guip.data_max:.3g}")
+
     def _draw_separator(self) -> None:
         """Draw a separator between GUI elements."""
         imgui.spacing()
@@ -456,6 +678,11 @@ class Gui:
         imgui.push_id("vertex normals" + str(index))
         [changed, guip.show_vnormals] = imgui.checkbox("v-normals", guip.show_vnormals)
         imgui.pop_id()
+        if guip.section_available:
+            imgui.same_line()
+            imgui.push_id("section" + str(index))
+            [changed, guip.section] = imgui.checkbox("section", guip.section)
+            imgui.pop_id()
 
     def _create_combo_cmaps(self, index: int, guip: GuiParametersObj) -> None:
         """Create a combo box for selecting color maps."""
@@ -590,8 +817,10 @@ class Gui:
             imgui.bullet_text("OBJECT SELECTION:")
             text_0 = " - Left-click on an object to select an object."
             text_1 = " - Data attached to the selected object will be displayed under 'data'."
+            text_2 = " - Check 'highlight on hover' under 'Appearance' to highlight the object under the cursor."
             imgui.text(self.wrap_text(text_0, width))
             imgui.text(self.wrap_text(text_1, width))
+            imgui.text(self.wrap_text(text_2, width))
 
             imgui.bullet_text("VIEW OPTIONS:")
             text_0 = " - Use the gui under the 'Appearance' to set background color and clipping planes."
@@ -637,7 +866,7 @@ class Gui:
         rss: list[GlRaster],
     ) -> None:
         """Draw GUI elements for displaying model statistics."""
-        v_count, f_count, l_count = 0, 0, 0
+        v_count, f_count, l_count, d_count = 0, 0, 0, 0
         data_dict = {}
 
         for mesh in mhs:
@@ -645,16 +874,25 @@ class Gui:
             data_dict[f"'{mesh.name}' vertex count:"] = mesh.n_vertices
             v_count += mesh.n_vertices
             f_count += mesh.n_faces
+            d_count += mesh.n_faces_drawn
         for pc in pcs:
             data_dict[f"'{pc.name}' points count:"] = pc.n_points
+            if pc.octree is not None or pc.guip.progressive:
+                data_dict[f"'{pc.name}' points drawn:"] = pc.n_points_drawn
             n_particles = pc.n_points
-            n_vertices = (pc.n_sides + 1) * n_particles
-            n_faces = pc.n_sides * n_particles
+            if pc.guip.sprites:
+                n_vertices = n_particles
+                n_faces = 0
+            else:
+                n_vertices = (pc.n_sides + 1) * n_particles
+                n_faces = pc.n_sides * n_particles
             v_count += n_vertices
             f_count += n_faces
         for ls in lss:
             data_dict[f"'{ls.name}' vertex count:"] = ls.n_vertices
             data_dict[f"'{ls.name}' segment count:"] = ls.n_lines
+            if ls.lod is not None:
+                data_dict[f"'{ls.name}' segments drawn:"] = ls.n_lines_drawn
             v_count += ls.n_vertices
             l_count += ls.n_lines
         for rst in rss:
@@ -668,7 +906,7 @@ class Gui:
             data_dict[f"'{rst.name}' data range:"] = rst.data_range
 
         space_model_stats = self._calc_space(data_dict, 25, 21)
-        space_vis_stats = 75
+        space_vis_stats = 96
         padding = 55
         space_tot = space_model_stats + space_vis_stats + padding
         imgui.begin_child("ModelStats", 0, space_tot, border=True)
@@ -681,6 +919,7 @@ class Gui:
         data_dict = {}
         data_dict["Total vertex count:"] = v_count
         data_dict["Total face count:"] = f_count
+        data_dict["Drawn mesh face count:"] = d_count
         data_dict["Total line count:"] = l_count
 
         imgui.text("VISUALISATION STATS:")
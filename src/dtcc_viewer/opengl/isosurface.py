@@ -0,0 +1,221 @@
+import numpy as np
+from itertools import permutations
+from dtcc_viewer.logging import info, warning, debug
+
+# Corners of the 6 edges of a tetrahedron
+TET_EDGES = np.array([[0, 1], [0, 2], [0, 3], [1, 2], [1, 3], [2, 3]])
+
+
+def _create_case_table() -> np.ndarray:
+    """Triangles for each of the 16 cases of a tetrahedron, as edge indices.
+
+    Bit i of the case is set if corner i is above the iso value. A single corner
+    on one side gives a triangle over its three edges, two corners on each side
+    give a quad over the four crossed edges, split into two triangles. Unused
+    triangles are -1. The triangles are oriented afterwards.
+    """
+    edge_idx = {tuple(e): i for i, e in enumerate(TET_EDGES.tolist())}
+
+    def edge(a, b):
+        return edge_idx[(min(a, b), max(a, b))]
+
+    table = np.full((16, 2, 3), -1, dtype=np.int64)
+    for case in range(16):
+        above = [i for i in range(4) if case & (1 << i)]
+        below = [i for i in range(4) if not case & (1 << i)]
+        if len(above) in (1, 3):
+            (single, others) = (above, below) if len(above) == 1 else (below, above)
+            table[case, 0] = [edge(single[0], o) for o in others]
+        elif len(above) == 2:
+            (a, b), (c, d) = above, below
+            quad = [edge(a, c), edge(a, d), edge(b, d), edge(b, c)]
+            table[case, 0] = [quad[0], quad[1], quad[2]]
+            table[case, 1] = [quad[0], quad[2], quad[3]]
+    return table
+
+
+CASE_TRIANGLES = _create_case_table()
+
+# Split of a cube into 6 tetrahedra around the diagonal from corner 0 to 7, with
+# corners indexed as x + 2y + 4z. Neighbouring cubes split their shared faces the
+# same way, so the surface has no cracks.
+CUBE_TETS = np.array(
+    [
+        [0, 1 << p[0], (1 << p[0]) + (1 << p[1]), 7]
+        for p in permutations(range(3))
+    ]
+)
+
+
+class GridPoints:
+    """Coordinates of the points of a regular grid, computed when indexed.
+
+    The points are ordered with z as the fastest and y as the slowest axis, as
+    for a VolumeGrid, so a [ny x nx x nz] array of values can be flattened to
+    match the point indices.
+
+    Attributes
+    ----------
+    shape : tuple
+        Number of points along y, x and z.
+    origin : np.ndarray
+        Coordinates of the first point.
+    spacing : np.ndarray
+        Distance between the points along x, y and z.
+    """
+
+    shape: tuple
+    origin: np.ndarray
+    spacing: np.ndarray
+
+    def __init__(self, shape: tuple, origin, spacing):
+        self.shape = shape
+        self.origin = np.asarray(origin, dtype=np.float64)
+        self.spacing = np.asarray(spacing, dtype=np.float64)
+
+    def __getitem__(self, idx) -> np.ndarray:
+        (iy, ix, iz) = np.unravel_index(np.asarray(idx), self.shape)
+        grid_idx = np.stack((ix, iy, iz), axis=-1)
+        return self.origin + grid_idx * self.spacing
+
+
+def marching_tetrahedra(
+    points, tets: np.ndarray, values: np.ndarray, iso: float, fields: dict = None
+):
+    """Extract the isosurface of a field on a tetrahedral mesh.
+
+    The tetrahedra with corners on both sides of the iso value are found in
+    chunks. The surface crosses each of their edges with one corner above and one
+    at or below the iso value, at a point interpolated linearly between the
+    corners. Points on the same edge are shared between the tetrahedra, so the
+    surface is connected. The triangles are oriented to face increasing values.
+
+    Parameters
+    ----------
+    points : np.ndarray or GridPoints
+        Coordinates of the points [n x 3], indexed with arrays of point indices.
+    tets : np.ndarray
+        Point indices of the tetrahedra [m x 4].
+    values : np.ndarray
+        Value of the field at each point [n].
+    iso : float
+        Iso value of the surface.
+    fields : dict, optional
+        Fields with a value for each point [n], interpolated to the surface.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, dict]
+        Vertices [k x 3], faces [f x 3] and the interpolated fields [k].
+    """
+    values = values.reshape(-1)
+    crossing = [np.zeros(0, dtype=np.int64)]
+    chunk_size = 1000000
+    for i in range(0, len(tets), chunk_size):
+        corner_values = values[tets[i : i + chunk_size]]
+        above = corner_values > iso
+        n_above = np.count_nonzero(above, axis=1)
+        mask = (n_above > 0) & (n_above < 4)
+        mask &= np.all(np.isfinite(corner_values), axis=1)
+        crossing.append(np.flatnonzero(mask) + i)
+
+    tets = tets[np.concatenate(crossing)]
+    above = values[tets] > iso
+    cases = above @ (1 << np.arange(4))
+
+    # Triangles as the edges they cross, with the tetrahedron of each triangle
+    tri_edges = CASE_TRIANGLES[cases]
+    (tet_idx, tri_idx) = np.nonzero(tri_edges[:, :, 0] >= 0)
+    tri_edges = tri_edges[tet_idx, tri_idx]
+    tri_tets = tets[tet_idx]
+    ends = tri_tets[np.arange(len(tri_tets))[:, None, None], TET_EDGES[tri_edges]]
+
+    # One vertex for each crossed edge, shared by all triangles on the edge
+    n_points = len(values)
+    ends = np.sort(ends, axis=2).astype(np.int64)
+    keys = ends[:, :, 0] * n_points + ends[:, :, 1]
+    (edge_keys, faces) = np.unique(keys, return_inverse=True)
+    faces = faces.reshape(-1, 3)
+    (a, b) = (edge_keys // n_points, edge_keys % n_points)
+    t = (iso - values[a]) / (values[b] - values[a])
+    (pa, pb) = (points[a], points[b])
+    vertices = pa + t[:, None] * (pb - pa)
+
+    # Face increasing values, the direction from the corners below to those above
+    tri_above = above[tet_idx]
+    corners = points[tri_tets.reshape(-1)].reshape(-1, 4, 3)
+    n_above = np.count_nonzero(tri_above, axis=1)[:, None]
+    mean_above = np.einsum("ij,ijk->ik", tri_above, corners) / n_above
+    mean_below = np.einsum("ij,ijk->ik", ~tri_above, corners) / (4 - n_above)
+    tri = vertices[faces]
+    normals = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    flip = np.einsum("ij,ij->i", normals, mean_above - mean_below) < 0
+    faces[flip] = faces[flip][:, ::-1]
+
+    # Triangles collapse where the surface passes through a point on the iso value
+    faces = faces[np.any(normals != 0, axis=1)]
+
+    data = {}
+    for name, field in (fields or {}).items():
+        field = field.reshape(-1)
+        data[name] = field[a] + t * (field[b] - field[a])
+
+    debug(f"Isosurface with {len(vertices)} vertices and {len(faces)} faces")
+    return vertices, faces, data
+
+
+def marching_cubes(
+    fields: dict, key: str, iso: float, origin, spacing, chunk_size: int = 32
+):
+    """Extract the isosurface of a field on a regular grid.
+
+    The cells with corners on both sides of the iso value are found in slabs of
+    chunk_size cells along y, using the min and max corner value of each cell.
+    Only these cells are split into tetrahedra for marching_tetrahedra, which
+    avoids the ambiguous cases of the classic marching cubes table.
+
+    Parameters
+    ----------
+    fields : dict
+        Fields as arrays [ny x nx x nz], by name.
+    key : str
+        Name of the field of the surface.
+    iso : float
+        Iso value of the surface.
+    origin : array_like
+        Coordinates of the first grid point.
+    spacing : array_like
+        Distance between the grid points along x, y and z.
+    chunk_size : int, optional
+        Number of cells along y tested at a time.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, dict]
+        Vertices [k x 3], faces [f x 3] and the interpolated fields [k].
+    """
+    values = fields[key]
+    (ny, nx, nz) = values.shape
+    strides = np.array([nz, nx * nz, 1])  # Point index steps along x, y and z
+
+    # Point index offsets of the cube corners, indexed as x + 2y + 4z
+    bits = np.array([[c & 1, (c >> 1) & 1, (c >> 2) & 1] for c in range(8)])
+    corner_offsets = bits @ strides
+
+    cells = [np.zeros(0, dtype=np.int64)]
+    for y0 in range(0, ny - 1, chunk_size):
+        y1 = min(y0 + chunk_size, ny - 1)
+        slab = values[y0 : y1 + 1]
+        corners = [
+            slab[dy : dy + y1 - y0, dx : dx + nx - 1, dz : dz + nz - 1]
+            for (dx, dy, dz) in bits
+        ]
+        c_min = np.minimum.reduce(corners)
+        c_max = np.maximum.reduce(corners)
+        (iy, ix, iz) = np.nonzero((c_min <= iso) & (c_max > iso))
+        cells.append((iy + y0) * strides[1] + ix * strides[0] + iz)
+
+    cells = np.concatenate(cells)
+    tets = (cells[:, None, None] + corner_offsets[CUBE_TETS][None]).reshape(-1, 4)
+    points = GridPoints(values.shape, origin, spacing)
+    return marching_tetrahedra(points, tets, values, iso, fields)
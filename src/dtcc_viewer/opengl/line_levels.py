@@ -0,0 +1,157 @@
+import numpy as np
+from dtcc_viewer.logging import info, warning, debug
+from dtcc_viewer.opengl.utils import projected_sizes
+
+
+class LineLevels:
+    """Simplified levels of a set of line segments for level of detail rendering.
+
+    Each level is created from the previous one by grid snapping. The vertices of
+    the segments are clustered in the cells of a grid and each cell is represented
+    by one of its vertices. Segments with both ends in the same cell are removed
+    and segments between the same two cells are merged. Lines that share a vertex
+    still share it after snapping, so connected networks stay connected. The cell
+    size grows by a constant factor per level, and levels that do not remove
+    enough segments are skipped.
+
+    The levels only refer to the original vertices, so all levels are packed into
+    one index array and drawn from the same vertex buffer.
+
+    Attributes
+    ----------
+    indices : np.ndarray
+        Segment indices of all levels, starting with the full resolution.
+    starts : np.ndarray
+        Index of the first segment index of each level.
+    counts : np.ndarray
+        Number of segment indices of each level.
+    sizes : np.ndarray
+        Grid cell size of each level, 0 for the full resolution.
+    """
+
+    indices: np.ndarray
+    starts: np.ndarray
+    counts: np.ndarray
+    sizes: np.ndarray
+
+    def __init__(
+        self,
+        coords: np.ndarray,
+        indices: np.ndarray,
+        factor: float = 4.0,
+        max_levels: int = 8,
+        min_segments: int = 1000,
+    ):
+        """Create the levels.
+
+        Parameters
+        ----------
+        coords : np.ndarray
+            Vertex coordinates [n x 3].
+        indices : np.ndarray
+            Vertex indices of the full resolution segments [2 * m].
+        factor : float, optional
+            Growth of the cell size from one level to the next.
+        max_levels : int, optional
+            Max number of levels, including the full resolution.
+        min_segments : int, optional
+            No levels are created from levels with fewer segments than this.
+        """
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+        segments = np.asarray(indices, dtype=np.int64).reshape(-1, 2)
+        origin = coords.min(axis=0) if len(coords) > 0 else np.zeros(3)
+        diagonal = np.linalg.norm(np.ptp(coords, axis=0)) if len(coords) > 0 else 0
+
+        # Cells below the typical segment length would remove next to nothing
+        lengths = np.linalg.norm(np.diff(coords[segments], axis=1)[:, 0], axis=1)
+        size = 2.0 * float(np.median(lengths)) if len(lengths) > 0 else 0.0
+        size = max(size, 1e-6 * diagonal)
+
+        levels = [segments]
+        sizes = [0.0]
+        while len(levels) < max_levels and len(segments) > min_segments:
+            if size <= 0 or size > diagonal:
+                break
+            simplified = self._snap(coords, origin, segments, size)
+            if len(simplified) <= 0.75 * len(segments):
+                levels.append(simplified)
+                sizes.append(size)
+                segments = simplified
+            size *= factor
+
+        counts = np.array([2 * len(level) for level in levels], dtype=np.int64)
+        self.starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        self.counts = counts
+        self.sizes = np.array(sizes)
+        self.indices = np.concatenate([level.reshape(-1) for level in levels])
+        self.indices = self.indices.astype("uint32")
+
+        segment_counts = ", ".join(str(c // 2) for c in counts)
+        debug(f"Line levels created with {segment_counts} segments")
+
+    @property
+    def n_levels(self) -> int:
+        return len(self.sizes)
+
+    def _snap(
+        self, coords: np.ndarray, origin: np.ndarray, segments: np.ndarray, size
+    ) -> np.ndarray:
+        """Snap the segments to a grid with the given cell size."""
+        n = len(coords)
+        used = np.zeros(n, dtype=bool)
+        used[segments] = True
+        vertices = np.flatnonzero(used)
+
+        cells = np.floor((coords[vertices] - origin) / size).astype(np.int64)
+        dims = cells.max(axis=0) + 1
+        keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+        (_, first, inverse) = np.unique(keys, return_index=True, return_inverse=True)
+
+        # Replace the ends by the representatives of their cells
+        representative = np.zeros(n, dtype=np.int64)
+        representative[vertices] = vertices[first][inverse.reshape(-1)]
+        ends = representative[segments]
+        ends = ends[ends[:, 0] != ends[:, 1]]
+        ends = np.sort(ends, axis=1)
+
+        # Merge the segments between the same cells
+        keys = np.sort(ends[:, 0] * n + ends[:, 1])
+        keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+        return np.column_stack((keys // n, keys % n))
+
+    def select(
+        self,
+        mvp: np.ndarray,
+        proj: np.ndarray,
+        point: np.ndarray,
+        height: int,
+        max_error: float,
+    ) -> int:
+        """Select the coarsest level that is accurate enough at a point.
+
+        The error of a level is the on screen size of its grid cells at the point,
+        e.g. the camera target clamped into the bounding box of the lines.
+
+        Parameters
+        ----------
+        mvp : np.ndarray
+            Model view projection matrix.
+        proj : np.ndarray
+            Projection matrix.
+        point : np.ndarray
+            Point where the error is measured.
+        height : int
+            Height of the viewport in pixels.
+        max_error : float
+            Max size of the grid cells in pixels.
+
+        Returns
+        -------
+        int
+            Index of the selected level.
+        """
+        point = np.asarray(point, dtype=np.float64).reshape(1, 3)
+        # The cell size is a diameter, while projected_sizes expects a radius
+        errors = projected_sizes(mvp, proj, point, 0.5 * self.sizes, height)
+        accurate = np.flatnonzero(errors <= max_error)
+        return int(accurate[-1]) if len(accurate) > 0 else 0
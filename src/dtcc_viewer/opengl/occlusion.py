@@ -0,0 +1,185 @@
+import numpy as np
+from OpenGL.GL import *
+from dtcc_viewer.opengl.utils import morton_codes
+
+
+class OcclusionQueries:
+    """Hardware occlusion queries for the parts of a mesh.
+
+    The parts are sorted along a Morton curve through their bounding box centers
+    and split into groups of nearby parts. The bounding boxes of a group are drawn
+    against the depth buffer with one instanced draw call inside one
+    GL_ANY_SAMPLES_PASSED query, at the end of a frame, and the results are
+    collected at the start of a later frame, once the GPU has finished them. Until
+    then the results from the previous batch are used, so the CPU never waits for
+    the GPU. A part that was occluded becomes visible again at most one frame after
+    the view changes to reveal it.
+
+    The boxes are slightly inflated and tested with GL_LEQUAL, so that flat parts
+    are not hidden by their own depth.
+
+    Attributes
+    ----------
+    order : np.ndarray
+        Part indices in the order of the boxes in the instance buffer.
+    group_size : int
+        Number of parts in each group, except the last one.
+    queries : np.ndarray
+        OpenGL query object for each group.
+    pending : np.ndarray
+        True for the groups with a query that has been issued but not collected.
+    visible : np.ndarray
+        Result of the last collected query for each part.
+    last_issued : int
+        Index of the group whose query was issued last, -1 if none is pending.
+    VBO : int
+        Instance buffer with the min and max corner of each box.
+    VAO : int
+        Vertex array object for the instanced boxes, None until the first query.
+    """
+
+    order: np.ndarray
+    group_size: int
+    queries: np.ndarray
+    pending: np.ndarray
+    visible: np.ndarray
+    last_issued: int
+    VBO: int
+    VAO: int
+
+    min_group_size = 8  # Min number of parts per query
+    max_queries = 512  # Max number of queries per mesh and frame
+
+    def __init__(self, bb_mins: np.ndarray, bb_maxs: np.ndarray):
+        """Create the queries and the instance buffer for the part boxes.
+
+        Parameters
+        ----------
+        bb_mins : np.ndarray
+            Min corner of the bounding box of each part [n x 3].
+        bb_maxs : np.ndarray
+            Max corner of the bounding box of each part [n x 3].
+        """
+        n_parts = len(bb_mins)
+        codes = morton_codes(0.5 * (bb_mins + bb_maxs), 10)
+        self.order = np.argsort(codes, kind="stable")
+        self.group_size = max(self.min_group_size, -(-n_parts // self.max_queries))
+        n_groups = max(1, -(-n_parts // self.group_size))
+
+        self.queries = np.atleast_1d(glGenQueries(n_groups))
+        self.pending = np.zeros(n_groups, dtype=bool)
+        self.visible = np.ones(n_parts, dtype=bool)
+        self.last_issued = -1
+        self.VAO = None
+
+        # Inflate the boxes relative to the size of the mesh
+        diagonal = np.linalg.norm(bb_maxs.max(axis=0) - bb_mins.min(axis=0))
+        eps = 1e-4 * diagonal + 1e-6
+        boxes = np.hstack((bb_mins - eps, bb_maxs + eps))[self.order]
+        boxes = np.ascontiguousarray(boxes, dtype=np.float32)
+
+        self.VBO = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
+        glBufferData(GL_ARRAY_BUFFER, boxes.nbytes, boxes, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def collect(self) -> None:
+        """Read the results of the pending queries if they are all available."""
+        if self.last_issued < 0:
+            return
+
+        # Queries finish in the order they were issued, so checking the last is enough
+        last = int(self.queries[self.last_issued])
+        if not glGetQueryObjectuiv(last, GL_QUERY_RESULT_AVAILABLE):
+            return
+
+        for g in np.nonzero(self.pending)[0]:
+            samples = glGetQueryObjectuiv(int(self.queries[g]), GL_QUERY_RESULT)
+            parts = self.order[g * self.group_size : (g + 1) * self.group_size]
+            self.visible[parts] = samples != 0
+
+        self.pending[:] = False
+        self.last_issued = -1
+
+    def reset(self, mask: np.ndarray) -> None:
+        """Assume the masked parts are visible, e.g. parts outside the view."""
+        self.visible[mask] = True
+
+    def issue(self, mask: np.ndarray, box: tuple) -> None:
+        """Issue queries for the groups with masked parts unless a batch is pending.
+
+        Parameters
+        ----------
+        mask : np.ndarray[bool]
+            True for the parts to query.
+        box : tuple
+            Vertex buffer, element buffer and number of indices of a unit cube.
+        """
+        if self.last_issued >= 0:
+            return
+
+        # Groups with at least one masked part
+        n_groups = len(self.queries)
+        padded = np.zeros(n_groups * self.group_size, dtype=bool)
+        padded[0 : len(self.order)] = mask[self.order]
+        groups = np.flatnonzero(padded.reshape(n_groups, -1).any(axis=1))
+        if len(groups) == 0:
+            return
+
+        (VBO_box, EBO_box, n_indices) = box
+        if self.VAO is None:
+            self._create_vao(VBO_box, EBO_box)
+
+        glDepthFunc(GL_LEQUAL)
+        glBindVertexArray(self.VAO)
+        glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
+        n_parts = len(self.order)
+        for g in groups:
+            # Without a base instance in OpenGL 3.3 the instance data is offset
+            first = int(g) * self.group_size
+            count = min(self.group_size, n_parts - first)
+            offset = first * 24
+            glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(offset))
+            offset += 12
+            glVertexAttribPointer(2, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(offset))
+            glBeginQuery(GL_ANY_SAMPLES_PASSED, int(self.queries[g]))
+            glDrawElementsInstanced(
+                GL_TRIANGLES, n_indices, GL_UNSIGNED_INT, None, count
+            )
+            glEndQuery(GL_ANY_SAMPLES_PASSED)
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindVertexArray(0)
+        glDepthFunc(GL_LESS)
+
+        self.pending[groups] = True
+        self.last_issued = int(groups[-1])
+
+    def delete(self) -> None:
+        """Release the queries and buffers."""
+        glDeleteQueries(len(self.queries), self.queries)
+        glDeleteBuffers(1, [self.VBO])
+        if self.VAO is not None:
+            glDeleteVertexArrays(1, [self.VAO])
+
+    def _create_vao(self, VBO_box: int, EBO_box: int) -> None:
+        """Create a vertex array with the unit cube and the instanced boxes."""
+        self.VAO = glGenVertexArrays(1)
+        glBindVertexArray(self.VAO)
+
+        glBindBuffer(GL_ARRAY_BUFFER, VBO_box)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, EBO_box)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 12, ctypes.c_void_p(0))
+
+        # Min and max corners per instance, pointed to the group when drawn
+        glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(0))
+        glVertexAttribDivisor(1, 1)
+        glEnableVertexAttribArray(2)
+        glVertexAttribPointer(2, 3, GL_FLOAT, GL_FALSE, 24, ctypes.c_void_p(12))
+        glVertexAttribDivisor(2, 1)
+
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
@@ -0,0 +1,491 @@
+import os
+import heapq
+import numpy as np
+from dtcc_viewer.opengl.utils import frustum_planes, aabbs_in_frustum, projected_sizes
+from dtcc_viewer.opengl.utils import morton_codes
+
+
+class PointOctree:
+    """Octree with subsampled point sets per node for level of detail rendering.
+
+    Each node keeps a uniform subsample of the points inside its cell, at most one
+    point per cell of a grid with grid_res cells along each side of the node. The
+    remaining points are passed on to the children. Nodes with at most leaf_size
+    points keep all of them. Every point is stored in exactly one node, so drawing
+    a node together with its ancestors shows the points at the density of the node.
+
+    The points are sorted along a Morton curve once, which keeps the points of each
+    node and the children of each node contiguous, so the tree is built with numpy
+    operations on sorted arrays, one level at a time. The sorted codes are streamed
+    in chunks that end at grid cell boundaries. With a work directory, the codes
+    are sorted with a chunked bucket sort into memory mapped files, so the memory
+    used for the build is bounded by the chunk size rather than the point count.
+
+    Attributes
+    ----------
+    order : np.ndarray
+        Indices of the input points in node order. The points of node i are
+        order[starts[i]:starts[i] + counts[i]].
+    levels : np.ndarray
+        Depth of each node, the root is at level 0.
+    starts : np.ndarray
+        Index of the first point of each node in the reordered points.
+    counts : np.ndarray
+        Number of points in each node.
+    parents : np.ndarray
+        Index of the parent of each node, -1 for the root.
+    child_starts : np.ndarray
+        Index of the first child of each node, the children are contiguous.
+    child_counts : np.ndarray
+        Number of children of each node.
+    mins : np.ndarray
+        Min corner of the cell of each node [n_nodes x 3].
+    maxs : np.ndarray
+        Max corner of the cell of each node [n_nodes x 3].
+    spacing : np.ndarray
+        Distance between the sampled points of each node.
+    """
+
+    order: np.ndarray
+    levels: np.ndarray
+    starts: np.ndarray
+    counts: np.ndarray
+    parents: np.ndarray
+    child_starts: np.ndarray
+    child_counts: np.ndarray
+    mins: np.ndarray
+    maxs: np.ndarray
+    spacing: np.ndarray
+
+    chunk_size = 10000000  # Number of points read at a time
+    bucket_bits = 16  # Top code bits for the buckets of the sort of large clouds
+
+    _saved_arrays = [
+        "levels",
+        "starts",
+        "counts",
+        "parents",
+        "child_starts",
+        "child_counts",
+        "mins",
+        "maxs",
+        "spacing",
+    ]
+
+    def __init__(
+        self,
+        points: np.ndarray,
+        leaf_size: int = 20000,
+        grid_res: int = 128,
+        max_depth: int = 14,
+        seed: int = 0,
+        workdir: str = None,
+    ):
+        """Build the octree.
+
+        Parameters
+        ----------
+        points : np.ndarray
+            Point coordinates, flat or [n_points x 3]. Any object with a length that
+            returns [n x 3] arrays for slices is also accepted, e.g. the columns of
+            a PointStore. The points are then read in chunks and only their Morton
+            codes are kept in memory.
+        leaf_size : int, optional
+            Nodes with at most this many points are not subdivided.
+        grid_res : int, optional
+            Subsampling grid resolution per node side, rounded to a power of two.
+        max_depth : int, optional
+            Max depth of the tree, limited so that codes fit in 64 bits.
+        seed : int, optional
+            Seed for the random choice of the point sampled in each grid cell.
+        workdir : str, optional
+            Directory for memory mapped temporary files, for point clouds that do
+            not fit in memory. Only the point order file is kept.
+        """
+        if isinstance(points, np.ndarray):
+            points = points.reshape(-1, 3)
+        self.leaf_size = max(int(leaf_size), 1)
+        self.grid_bits = max(int(np.round(np.log2(max(grid_res, 1)))), 0)
+        self.max_depth = max(min(int(max_depth), 21 - self.grid_bits), 0)
+
+        mins, maxs = self._calc_bounds(points)
+        self.origin = mins
+        # Slightly larger cube so that the max coordinates fall inside the grid
+        self.size = max(float(np.max(maxs - mins)) * (1.0 + 1e-6), 1e-6)
+
+        self.workdir = workdir
+        self._build(*self._sort_codes(points), np.random.default_rng(seed))
+
+    def save(self, filename: str) -> None:
+        """Save the tree to a .npz file, without the point order if it is None."""
+        arrays = {name: getattr(self, name) for name in self._saved_arrays}
+        if self.order is not None:
+            arrays["order"] = self.order
+        settings = [self.leaf_size, self.grid_bits, self.max_depth, self.size]
+        np.savez(filename, origin=self.origin, settings=settings, **arrays)
+
+    @classmethod
+    def load(cls, filename: str) -> "PointOctree":
+        """Load a tree saved with save."""
+        tree = cls.__new__(cls)
+        with np.load(filename) as f:
+            for name in cls._saved_arrays:
+                setattr(tree, name, f[name])
+            tree.order = f["order"] if "order" in f else None
+            tree.origin = f["origin"]
+            leaf_size, grid_bits, max_depth, size = f["settings"]
+        tree.leaf_size = int(leaf_size)
+        tree.grid_bits = int(grid_bits)
+        tree.max_depth = int(max_depth)
+        tree.size = float(size)
+        return tree
+
+    @property
+    def n_nodes(self) -> int:
+        """Number of nodes in the tree."""
+        return len(self.counts)
+
+    @property
+    def n_points(self) -> int:
+        """Number of points in the tree."""
+        return int(np.sum(self.counts))
+
+    def _compact(self, x: np.ndarray) -> np.ndarray:
+        """Inverse of the bit spreading in morton_codes, keep every third bit."""
+        x = x & np.uint64(0x1249249249249249)
+        x = (x | (x >> np.uint64(2))) & np.uint64(0x10C30C30C30C30C3)
+        x = (x | (x >> np.uint64(4))) & np.uint64(0x100F00F00F00F00F)
+        x = (x | (x >> np.uint64(8))) & np.uint64(0x1F0000FF0000FF)
+        x = (x | (x >> np.uint64(16))) & np.uint64(0x1F00000000FFFF)
+        x = (x | (x >> np.uint64(32))) & np.uint64(0x1FFFFF)
+        return x
+
+    def _decode(self, codes: np.ndarray) -> np.ndarray:
+        """Cell coordinates from Morton codes [n_codes x 3]."""
+        cells = [self._compact(codes >> np.uint64(i)) for i in range(3)]
+        return np.column_stack(cells).astype(np.float64)
+
+    def _group_starts(self, keys: np.ndarray) -> np.ndarray:
+        """Index of the first element of each run of equal values in sorted keys."""
+        if len(keys) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(([0], np.flatnonzero(keys[1:] != keys[:-1]) + 1))
+
+    def _calc_bounds(self, points) -> tuple[np.ndarray, np.ndarray]:
+        """Min and max corners of the points, read in chunks."""
+        mins = np.full(3, np.inf)
+        maxs = np.full(3, -np.inf)
+        for i in range(0, len(points), self.chunk_size):
+            chunk = np.asarray(points[i : i + self.chunk_size], dtype=np.float64)
+            mins = np.minimum(mins, chunk.min(axis=0))
+            maxs = np.maximum(maxs, chunk.max(axis=0))
+        if len(points) == 0:
+            return np.zeros(3), np.zeros(3)
+        return mins, maxs
+
+    def _alloc(self, name: str, dtype, n: int) -> np.ndarray:
+        """Array for the build, memory mapped in the work directory if there is one."""
+        if self.workdir is None or n == 0:
+            return np.empty(n, dtype=dtype)
+        filename = os.path.join(self.workdir, f"octree_{name}.npy")
+        return np.lib.format.open_memmap(filename, mode="w+", dtype=dtype, shape=(n,))
+
+    def _remove(self, name: str) -> None:
+        """Remove a temporary file of the build, its arrays must be released."""
+        if self.workdir is not None:
+            filename = os.path.join(self.workdir, f"octree_{name}.npy")
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def _calc_codes(self, points, start: int, stop: int) -> np.ndarray:
+        """Morton codes at the finest grid of the points in [start, stop)."""
+        n_bits = self.max_depth + self.grid_bits
+        chunk = np.asarray(points[start:stop], dtype=np.float64)
+        return morton_codes(chunk, n_bits, self.origin, self.size)
+
+    def _sort_codes(self, points) -> tuple[np.ndarray, np.ndarray]:
+        """Morton codes of the points in sorted order, with the point indices.
+
+        Point clouds that fit in a chunk are sorted at once. Larger ones are
+        bucket sorted by the top bits of the codes: the codes are written to their
+        bucket chunk by chunk, and then each group of whole buckets that fits in a
+        chunk is sorted. The sort is stable, so equal codes keep the point order.
+        """
+        n = len(points)
+        idx_dtype = np.uint32 if n <= 2**32 else np.int64
+        codes = self._alloc("codes", np.uint64, n)
+        idx = self._alloc("idx", idx_dtype, n)
+        step = self.chunk_size
+
+        if n <= step:
+            c = self._calc_codes(points, 0, n)
+            order = np.argsort(c, kind="stable")
+            codes[:] = c[order]
+            idx[:] = order
+            return codes, idx
+
+        # Bucket of each code from its top bits
+        code_bits = 3 * (self.max_depth + self.grid_bits)
+        shift = np.uint64(max(code_bits - self.bucket_bits, 0))
+        n_buckets = 2 ** min(self.bucket_bits, code_bits)
+
+        unsorted = self._alloc("unsorted", np.uint64, n)
+        bucket_counts = np.zeros(n_buckets, dtype=np.int64)
+        for i in range(0, n, step):
+            c = self._calc_codes(points, i, i + step)
+            unsorted[i : i + len(c)] = c
+            buckets = (c >> shift).astype(np.int64)
+            bucket_counts += np.bincount(buckets, minlength=n_buckets)
+
+        # Write each chunk to the next free slots of its buckets
+        fill = np.cumsum(bucket_counts) - bucket_counts
+        bucket_ends = np.cumsum(bucket_counts)
+        for i in range(0, n, step):
+            c = np.asarray(unsorted[i : i + step])
+            buckets = (c >> shift).astype(np.int64)
+            order = np.argsort(buckets, kind="stable")
+            buckets = buckets[order]
+            chunk_counts = np.bincount(buckets, minlength=n_buckets)
+            chunk_starts = np.cumsum(chunk_counts) - chunk_counts
+            pos = fill[buckets] + np.arange(len(c)) - chunk_starts[buckets]
+            codes[pos] = c[order]
+            idx[pos] = order + i
+            fill += chunk_counts
+
+        del unsorted
+        self._remove("unsorted")
+
+        # Sort groups of whole buckets
+        start = 0
+        while start < n:
+            # As many buckets as fit in a chunk, or a single larger one
+            k = np.searchsorted(bucket_ends, start + step, side="right") - 1
+            stop = int(bucket_ends[k]) if k >= 0 else 0
+            if stop <= start:
+                k = np.searchsorted(bucket_ends, start, side="right")
+                stop = int(bucket_ends[k])
+            c = np.asarray(codes[start:stop])
+            order = np.argsort(c, kind="stable")
+            codes[start:stop] = c[order]
+            idx[start:stop] = np.asarray(idx[start:stop])[order]
+            start = stop
+
+        return codes, idx
+
+    def _chunks(self, codes: np.ndarray, shift: np.uint64):
+        """Ranges of about chunk_size sorted codes that end at whole groups.
+
+        The groups are the runs of equal codes >> shift, e.g. the grid cells of a
+        level, so a range can be longer than chunk_size by up to one group.
+        """
+        n = len(codes)
+        start = 0
+        while start < n:
+            stop = min(start + self.chunk_size, n)
+            if stop < n:
+                next_group = ((int(codes[stop - 1]) >> int(shift)) + 1) << int(shift)
+                stop = int(np.searchsorted(codes, np.uint64(next_group)))
+            yield start, stop
+            start = stop
+
+    def _count_groups(self, codes: np.ndarray, shift: np.uint64):
+        """Unique values of sorted codes >> shift and their counts, in chunks."""
+        keys, counts = [np.zeros(0, dtype=np.uint64)], [np.zeros(0, dtype=np.int64)]
+        for i in range(0, len(codes), self.chunk_size):
+            k = np.asarray(codes[i : i + self.chunk_size]) >> shift
+            starts = self._group_starts(k)
+            keys.append(k[starts])
+            counts.append(np.diff(np.append(starts, len(k))))
+
+        keys = np.concatenate(keys)
+        counts = np.concatenate(counts)
+
+        # Merge the groups that continue from one chunk into the next
+        if len(keys) == 0:
+            return keys, counts
+        starts = self._group_starts(keys)
+        return keys[starts], np.add.reduceat(counts, starts)
+
+    def _build(self, codes: np.ndarray, idx: np.ndarray, rng: np.random.Generator):
+        n_bits = self.max_depth + self.grid_bits
+
+        # Point order, filled level by level with the points stored in each node
+        self.order = self._alloc("order", idx.dtype, len(idx))
+        n_taken = 0
+        nodes_per_level, counts_per_level = [], []
+
+        # The points that are not yet stored in a node, still sorted by code
+        (rem_codes, rem_idx) = (codes, idx)
+        del codes, idx
+
+        for level in range(self.max_depth + 1):
+            if level > 0 and len(rem_codes) == 0:
+                break
+
+            node_shift = np.uint64(3 * (n_bits - level))
+            (node_codes, node_counts) = self._count_groups(rem_codes, node_shift)
+            leaf_nodes = node_counts <= self.leaf_size
+            taken_counts = np.zeros(len(node_codes), dtype=np.int64)
+
+            last = level == self.max_depth
+            n_rem = len(rem_codes) if not last else 0
+            next_codes = self._alloc(f"codes_{level % 2}", np.uint64, n_rem)
+            next_idx = self._alloc(f"idx_{level % 2}", rem_idx.dtype, n_rem)
+            n_next = 0
+
+            cell_shift = np.uint64(3 * max(n_bits - level - self.grid_bits, 0))
+            for start, stop in self._chunks(rem_codes, cell_shift):
+                c = np.asarray(rem_codes[start:stop])
+                ids = np.asarray(rem_idx[start:stop])
+                nodes = np.searchsorted(node_codes, c >> node_shift)
+
+                if last:
+                    take = np.ones(len(c), dtype=bool)
+                else:
+                    # One random point per grid cell of each node
+                    cell_starts = self._group_starts(c >> cell_shift)
+                    cell_counts = np.diff(np.append(cell_starts, len(c)))
+                    offsets = rng.random(len(cell_starts)) * cell_counts
+                    take = np.zeros(len(c), dtype=bool)
+                    take[cell_starts + offsets.astype(np.int64)] = True
+
+                    # Small nodes become leaves and keep all their points
+                    take |= leaf_nodes[nodes]
+
+                # The points stay sorted by code, so the taken points are grouped
+                # by node
+                taken_counts += np.bincount(nodes[take], minlength=len(node_codes))
+                n_take = int(np.count_nonzero(take))
+                self.order[n_taken : n_taken + n_take] = ids[take]
+                n_taken += n_take
+
+                if not last:
+                    n_keep = len(c) - n_take
+                    next_codes[n_next : n_next + n_keep] = c[~take]
+                    next_idx[n_next : n_next + n_keep] = ids[~take]
+                    n_next += n_keep
+
+            nodes_per_level.append(node_codes)
+            counts_per_level.append(taken_counts)
+            (rem_codes, rem_idx) = (next_codes[0:n_next], next_idx[0:n_next])
+            del next_codes, next_idx
+
+        del rem_codes, rem_idx
+        for name in ["codes", "idx", "codes_0", "idx_0", "codes_1", "idx_1"]:
+            self._remove(name)
+
+        self.counts = np.concatenate(counts_per_level).astype(np.int64)
+        self.starts = np.cumsum(self.counts) - self.counts
+        self._link_nodes(nodes_per_level)
+
+    def _link_nodes(self, nodes_per_level: list) -> None:
+        """Compute levels, parent and child links and the cell of each node."""
+        n_nodes = len(self.counts)
+        offsets = np.cumsum([0] + [len(codes) for codes in nodes_per_level])
+
+        self.levels = np.zeros(n_nodes, dtype=np.int32)
+        self.parents = np.full(n_nodes, -1, dtype=np.int64)
+        self.child_starts = np.zeros(n_nodes, dtype=np.int64)
+        self.child_counts = np.zeros(n_nodes, dtype=np.int64)
+        self.mins = np.zeros((n_nodes, 3), dtype=np.float64)
+        self.spacing = np.zeros(n_nodes, dtype=np.float64)
+
+        for level, codes in enumerate(nodes_per_level):
+            nodes = slice(offsets[level], offsets[level + 1])
+            cell_size = self.size / 2**level
+            self.levels[nodes] = level
+            self.mins[nodes] = self.origin + self._decode(codes) * cell_size
+            self.spacing[nodes] = cell_size / 2**self.grid_bits
+
+            if level == 0:
+                continue
+
+            # Children of a node are contiguous since the codes are sorted
+            parent_codes = codes >> np.uint64(3)
+            prev = nodes_per_level[level - 1]
+            self.parents[nodes] = (
+                np.searchsorted(prev, parent_codes) + offsets[level - 1]
+            )
+            left = np.searchsorted(parent_codes, prev, side="left")
+            right = np.searchsorted(parent_codes, prev, side="right")
+            prev_nodes = slice(offsets[level - 1], offsets[level])
+            self.child_starts[prev_nodes] = left + offsets[level]
+            self.child_counts[prev_nodes] = right - left
+
+        cell_sizes = self.size / 2.0 ** self.levels[:, None]
+        self.maxs = self.mins + cell_sizes
+
+    def select(
+        self,
+        mvp: np.ndarray,
+        proj: np.ndarray,
+        height: float,
+        budget: int,
+        max_error: float = 1.0,
+    ) -> np.ndarray:
+        """Select the nodes to draw for a camera.
+
+        The screen space error of a node is the projected spacing between its
+        points in pixels. Starting at the root, the visible node with the largest
+        error is added until the point budget is used up. The children of a node
+        are only considered if its error is larger than max_error, so the selected
+        nodes always form a connected tree from the root.
+
+        Parameters
+        ----------
+        mvp : np.ndarray
+            Model view projection matrix in the pyrr layout.
+        proj : np.ndarray
+            Projection matrix.
+        height : float
+            Height of the viewport in pixels.
+        budget : int
+            Max number of points in the selected nodes.
+        max_error : float, optional
+            Nodes with a projected spacing below this many pixels are not refined.
+
+        Returns
+        -------
+        np.ndarray
+            Indices of the selected nodes in order of decreasing error.
+        """
+        if self.n_nodes == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        in_view = aabbs_in_frustum(frustum_planes(mvp), self.mins, self.maxs)
+        centers = 0.5 * (self.mins + self.maxs)
+        errors = projected_sizes(mvp, proj, centers, self.spacing, height)
+
+        # A node around the camera has no meaningful depth, so refine it first
+        eye = self._eye(mvp)
+        inside = np.all((self.mins <= eye) & (eye <= self.maxs), axis=1)
+        errors[inside] = np.inf
+
+        selected = []
+        n_selected = 0
+        heap = [(-errors[0], 0)] if in_view[0] else []
+        while heap:
+            neg_error, i = heapq.heappop(heap)
+            if n_selected + self.counts[i] > budget:
+                break
+            selected.append(i)
+            n_selected += self.counts[i]
+            if -neg_error > max_error:
+                start = self.child_starts[i]
+                for child in range(start, start + self.child_counts[i]):
+                    if in_view[child]:
+                        heapq.heappush(heap, (-errors[child], child))
+
+        return np.array(selected, dtype=np.int64)
+
+    def _eye(self, mvp: np.ndarray) -> np.ndarray:
+        """Camera position from a perspective model view projection matrix."""
+        m = np.asarray(mvp, dtype=np.float64)
+        # The eye is the point that maps to w = 0 with x = y = 0 in clip space
+        a = m[0:3, [0, 1, 3]].T
+        b = -m[3, [0, 1, 3]]
+        try:
+            return np.linalg.solve(a, b)
+        except np.linalg.LinAlgError:
+            # Orthographic projection, the camera is not at a finite point
+            return np.full(3, np.inf)
@@ -55,6 +55,14 @@ class GuiParametersGlobal:
         Camera view type.
     update_camera : bool
         Flag to update the camera.
+    hover_picking : bool
+        Flag to highlight the object under the cursor.
+    frustum_culling : bool
+        Flag to skip drawing mesh parts outside the camera view.
+    cull_size_px : float
+        Mesh parts smaller than this on screen, in pixels, are not drawn.
+    occlusion_culling : bool
+        Flag to skip drawing mesh parts hidden behind other geometry.
     """
 
     color: list
@@ -79,6 +87,10 @@ class GuiParametersGlobal:
     camera_projection: CameraProjection
     camera_view: CameraView
     update_camera: bool
+    hover_picking: bool
+    frustum_culling: bool
+    cull_size_px: float
+    occlusion_culling: bool
 
     def __init__(self):
         """Initialize the GuiParameters object."""
@@ -106,6 +118,10 @@ class GuiParametersGlobal:
         self.axes_sf = 1.0
         self.north_sf = 1.0
         self.grid_adapt = True
+        self.hover_picking = False
+        self.frustum_culling = True
+        self.cull_size_px = 0.0
+        self.occlusion_culling = False
 
     def calc_fps(self):
         """Perform FPS calculations for the rendering loop."""
@@ -146,6 +162,8 @@ class GuiParametersModel:
         Attributes of the picked element.
     picked_cp : np.ndarray
         Picked control points.
+    picked_point : np.ndarray
+        Point on the surface of the picked element where it was clicked.
     picked_size : float
         Size of the picked element.
     """
@@ -160,6 +178,7 @@ class GuiParametersModel:
     picked_mesh_vertex_count: int
     picked_attributes: str
     picked_cp: np.ndarray
+    picked_point: np.ndarray
     picked_size: float
 
     def __init__(self, name: str, shading: Shading) -> None:
@@ -180,6 +199,7 @@ class GuiParametersModel:
         self.picked_uuid = ""
         self.picked_metadata = ""
         self.picked_cp = np.array([0.0, 0.0, 0.0], dtype=np.float32)
+        self.picked_point = None
         self.picked_size = 0.0
 
 
@@ -289,10 +309,40 @@ class GuiParametersMesh(GuiParametersObj):
         Flag to show face normals.
     show_vnormals : bool
         Flag to show vertex normals.
+    section : bool
+        Flag to only draw the cells cut by the clipping planes.
+    section_available : bool
+        Flag if the mesh has cells that can be drawn as a section.
+    iso_available : bool
+        Flag if the mesh is an isosurface that can be extracted again.
+    iso_keys : list
+        Names of the fields the isosurface can be extracted for.
+    iso_idx : int
+        Index of the field of the isosurface.
+    iso_value : float
+        Iso value of the isosurface.
+    iso_min_max : dict
+        Min and max value of each field of the isosurface.
+    update_iso : bool
+        Flag to extract the isosurface again.
+    iso_busy : bool
+        Flag if the isosurface is being extracted.
+    iso_empty : bool
+        Flag if there is no surface at the iso value.
     """
 
     show_fnormals: bool
     show_vnormals: bool
+    section: bool
+    section_available: bool
+    iso_available: bool
+    iso_keys: list
+    iso_idx: int
+    iso_value: float
+    iso_min_max: dict
+    update_iso: bool
+    iso_busy: bool
+    iso_empty: bool
 
     def __init__(self, name: str, dict_mat_data: dict, dict_min_max: dict) -> None:
         """Initialize the GuiParametersMesh object.
@@ -310,6 +360,16 @@ class GuiParametersMesh(GuiParametersObj):
         self.calc_min_max()
         self.show_fnormals = False
         self.show_vnormals = False
+        self.section = False
+        self.section_available = False
+        self.iso_available = False
+        self.iso_keys = []
+        self.iso_idx = 0
+        self.iso_value = 0.0
+        self.iso_min_max = {}
+        self.update_iso = False
+        self.iso_busy = False
+        self.iso_empty = False
 
 
 class GuiParametersPC(GuiParametersObj):
@@ -319,6 +379,22 @@ class GuiParametersPC(GuiParametersObj):
     ----------
     point_scale : float
         Scale factor for points.
+    sprites : bool
+        True to draw the points as GL_POINTS sprites instead of instanced discs.
+    lod : bool
+        True if the point cloud is drawn with an octree level of detail.
+    point_budget : int
+        Max number of points drawn per frame with level of detail.
+    lod_error : float
+        Max projected spacing in pixels between points before nodes are refined.
+    progressive : bool
+        True to draw a subsample of the shuffled points while the camera moves.
+    frame_budget : float
+        Target frame time in milliseconds for progressive rendering.
+    voxel_sizes : list[float]
+        Voxel size of each precomputed voxel level, from fine to coarse.
+    voxel_idx : int
+        Voxel level drawn, 0 for full resolution and i for voxel_sizes[i - 1].
     """
 
     def __init__(self, name: str, dict_mat_data: dict, dict_min_max: dict) -> None:
@@ -337,6 +413,14 @@ class GuiParametersPC(GuiParametersObj):
         self.set_default_values(name, dict_mat_data, dict_min_max)
         self.calc_min_max()
         self.point_scale = 1.0
+        self.sprites = False
+        self.lod = False
+        self.point_budget = 5000000
+        self.lod_error = 1.5
+        self.progressive = False
+        self.frame_budget = 33.0
+        self.voxel_sizes = []
+        self.voxel_idx = 0
 
 
 class GuiParametersLines(GuiParametersObj):
@@ -346,6 +430,14 @@ class GuiParametersLines(GuiParametersObj):
     ----------
     line_scale : float
         Scale factor for lines.
+    lod_available : bool
+        True if the lines have simplified levels.
+    lod : bool
+        True to draw the simplified level that fits the camera distance.
+    lod_error : float
+        Max size in pixels of the simplification grid cells at the camera target.
+    lod_level : int
+        Level drawn in the current frame, 0 for full resolution.
     """
 
     def __init__(self, name: str, dict_mat_data: dict, dict_min_max: dict) -> None:
@@ -363,6 +455,54 @@ class GuiParametersLines(GuiParametersObj):
         self.set_default_values(name, dict_mat_data, dict_min_max)
         self.calc_min_max()
         self.line_scale = 1.0
+        self.lod_available = False
+        self.lod = False
+        self.lod_error = 3.0
+        self.lod_level = 0
+
+
+class GuiParametersVolume(GuiParametersObj):
+    """Class representing GUI parameters for volume grids.
+
+    Attributes
+    ----------
+    slice : bool
+        True to draw a slice of the grid instead of ray marching the volume.
+    slice_axis : int
+        Axis normal to the slice, 0 for x, 1 for y and 2 for z.
+    slice_pos : float
+        Position of the slice along the axis in [0, 1].
+    opacity : float
+        Opacity of 1 % of the grid diagonal at the max value of the color range.
+    n_steps : int
+        Number of ray marching steps along the grid diagonal.
+    """
+
+    slice: bool
+    slice_axis: int
+    slice_pos: float
+    opacity: float
+    n_steps: int
+
+    def __init__(self, name: str, dict_mat_data: dict, dict_min_max: dict) -> None:
+        """Initialize the GuiParametersVolume object.
+
+        Parameters
+        ----------
+        name : str
+            Name of the volume grid.
+        dict_mat_data : dict
+            Dictionary of material data.
+        dict_min_max : dict
+            Dictionary of minimum and maximum values.
+        """
+        self.set_default_values(name, dict_mat_data, dict_min_max)
+        self.calc_min_max()
+        self.slice = False
+        self.slice_axis = 2
+        self.slice_pos = 0.5
+        self.opacity = 0.05
+        self.n_steps = 256
 
 
 class GuiParametersRaster:
@@ -388,6 +528,18 @@ class GuiParametersRaster:
         List of channels to draw.
     cmap_idx : int
         Color map index.
+    terrain : bool
+        Flag to draw a data raster as a terrain.
+    terrain_available : bool
+        Flag if the raster can be drawn as a terrain.
+    height_scale : float
+        Scale factor for the terrain heights.
+    percentiles : list
+        Lower and upper percentile of the data for the color range.
+    data_min : float
+        Data value mapped to the start of the color map.
+    data_max : float
+        Data value mapped to the end of the color map.
     """
 
     def __init__(self, name, type: RasterType) -> None:
@@ -411,6 +563,12 @@ class GuiParametersRaster:
         # 1 = draw, 0 = do not draw
         self.channels = [1, 1, 1, 1]
         self.cmap_idx = 0
+        self.terrain = False
+        self.terrain_available = type == RasterType.Data
+        self.height_scale = 1.0
+        self.percentiles = [0.0, 100.0]
+        self.data_min = 0.0  # Min value for color clamp
+        self.data_max = 1.0  # Max value for color clamp
 
     def calc_data_min_max(self):
         pass
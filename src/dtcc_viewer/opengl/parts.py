@@ -32,6 +32,14 @@ class Parts:
         Number of parts.
     f_count : int
         Total number of faces.
+    centroids : np.ndarray
+        Average vertex position for each part [n_parts x 3].
+    radii : np.ndarray
+        Distance from the centroid to the farthest vertex for each part.
+    bb_mins : np.ndarray
+        Min corner of the axis aligned bounding box for each part [n_parts x 3].
+    bb_maxs : np.ndarray
+        Max corner of the axis aligned bounding box for each part [n_parts x 3].
     """
 
     face_start_indices: np.ndarray
@@ -43,6 +51,10 @@ class Parts:
     ids_2_uuids: dict
     count: int
     f_count: int
+    centroids: np.ndarray
+    radii: np.ndarray
+    bb_mins: np.ndarray
+    bb_maxs: np.ndarray
 
     def __init__(
         self,
@@ -51,6 +63,11 @@ class Parts:
         attributes: list[dict] = None,
     ):
         self.count = len(meshes)
+        self.centroids = None
+        self.radii = None
+        self.bb_mins = None
+        self.bb_maxs = None
+        self._id_to_idx = {}
         self._process_data(meshes, uuids, attributes)
 
     def _process_data(
@@ -87,6 +104,7 @@ class Parts:
         self.face_start_indices = np.array(face_start_indices)
         self.face_end_indices = np.array(face_end_indices)
         self.ids = np.array(ids)
+        self._update_id_lookup()
 
         if attributes is not None:
             self.attributes = {key: value for key, value in zip(ids, attributes)}
@@ -95,9 +113,99 @@ class Parts:
 
     def offset_ids(self, id_offset):
         self.ids = self.ids + id_offset
+        self._update_id_lookup()
+
+    def _update_id_lookup(self):
+        """Map each id to its part index for constant time lookups."""
+        self._id_to_idx = {int(id): i for i, id in enumerate(self.ids)}
 
     def id_exists(self, id):
-        return id in self.ids
+        return int(id) in self._id_to_idx
+
+    def get_index(self, id):
+        """Get the part index for an id, or None if the id is not in this mesh."""
+        return self._id_to_idx.get(int(id), None)
+
+    def get_face_range(self, id):
+        """Get the first and last (inclusive) face index of the part with the id."""
+        idx = self.get_index(id)
+        if idx is None:
+            return None
+        return self.face_start_indices[idx], self.face_end_indices[idx]
+
+    def get_draw_ranges(self, mask: np.ndarray):
+        """Merge the face ranges of the selected parts into contiguous ranges.
+
+        Parameters
+        ----------
+        mask : np.ndarray[bool]
+            True for each part that should be drawn.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            First face index and number of faces for each contiguous range.
+        """
+        sel = np.nonzero(mask & (self.face_count_per_part > 0))[0]
+        if len(sel) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        starts = self.face_start_indices[sel]
+        ends = self.face_end_indices[sel]
+
+        # A new range begins where a part does not continue the previous one
+        new_range = np.ones(len(sel), dtype=bool)
+        new_range[1:] = starts[1:] != ends[:-1] + 1
+        first = np.nonzero(new_range)[0]
+        last = np.append(first[1:] - 1, len(sel) - 1)
+
+        return starts[first], ends[last] - starts[first] + 1
+
+    def calc_geometry(self, vertices: np.ndarray, stride: int = 9):
+        """Calculate centroid, radius and bounding box for each part.
+
+        The vertices are expected in the restructured format used for rendering
+        with 3 unique vertices per face, so that the vertices of a part are
+        stored contiguously. The calculation is done with segmented reductions
+        over all parts at once.
+
+        Parameters
+        ----------
+        vertices : np.ndarray
+            Flat vertex array where the first 3 values of each vertex are x, y, z.
+        stride : int, optional
+            Number of values per vertex (default is 9).
+        """
+        pts = vertices.reshape(-1, stride)[:, 0:3]
+        v_counts = 3 * self.face_count_per_part
+        v_starts = 3 * self.face_start_indices
+
+        if np.sum(v_counts) != len(pts):
+            warning("Parts and vertices missmatch, part geometry not calculated")
+            return
+
+        self.centroids = np.zeros((self.count, 3), dtype=float)
+        self.radii = np.zeros(self.count, dtype=float)
+        self.bb_mins = np.zeros((self.count, 3), dtype=float)
+        self.bb_maxs = np.zeros((self.count, 3), dtype=float)
+
+        # reduceat does not handle empty segments, so those are left as zeros
+        valid = v_counts > 0
+        if not np.any(valid):
+            return
+
+        starts = v_starts[valid]
+        sums = np.add.reduceat(pts, starts, axis=0, dtype=np.float64)
+        centroids = sums / v_counts[valid][:, np.newaxis]
+
+        part_of_vertex = np.repeat(np.arange(len(starts)), v_counts[valid])
+        offsets = pts - centroids.astype(pts.dtype)[part_of_vertex]
+        dists = np.linalg.norm(offsets, axis=1)
+
+        self.centroids[valid] = centroids
+        self.radii[valid] = np.maximum.reduceat(dists, starts)
+        self.bb_mins[valid] = np.minimum.reduceat(pts, starts, axis=0)
+        self.bb_maxs[valid] = np.maximum.reduceat(pts, starts, axis=0)
 
     def print(self):
         print("Parts data: ")
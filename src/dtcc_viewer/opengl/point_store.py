@@ -0,0 +1,349 @@
+import os
+import json
+import shutil
+import numpy as np
+from dtcc_viewer.opengl.octree import PointOctree
+from dtcc_viewer.opengl.utils import voxel_levels
+from dtcc_viewer.logging import info, warning
+from typing import Iterable, Iterator
+
+_COORDS = ("x", "y", "z")
+
+
+class PointColumns:
+    """Read only view of the x, y and z columns of a PointStore as [n x 3] slices."""
+
+    def __init__(self, store: "PointStore"):
+        self.store = store
+
+    def __len__(self) -> int:
+        return self.store.n_points
+
+    def __getitem__(self, index: slice) -> np.ndarray:
+        return np.column_stack([self.store.columns[c][index] for c in _COORDS])
+
+
+class PointStore:
+    """Point cloud stored on disk with one memory mapped .npy file per column.
+
+    The coordinates are stored as float64 columns x.npy, y.npy and z.npy and each
+    data channel as a float32 column. A meta.json file holds the point count, the
+    names of the data channels and cached statistics. The columns are opened with
+    mmap_mode="r", so only the slices that are read are loaded into memory.
+
+    A store is written once from an iterable of chunks, e.g. from a CSV or LAS
+    reader, without holding the whole point cloud in memory. The chunks are
+    appended to raw files and then copied behind a .npy header.
+
+    The octree for level of detail rendering and the voxel levels for previews are
+    built the first time they are needed and saved next to the columns. For the
+    octree, the columns are rewritten in node order, so that the points of a node
+    can be read as a contiguous slice. If the rewrite is interrupted while the
+    columns are swapped, the swap is completed the next time the store is opened.
+
+    Attributes
+    ----------
+    path : str
+        Directory of the store.
+    n_points : int
+        Number of points.
+    keys : list[str]
+        Names of the data channels.
+    columns : dict
+        Memory mapped column for "x", "y", "z" and each data channel name.
+    meta : dict
+        Contents of meta.json.
+    """
+
+    path: str
+    n_points: int
+    keys: list[str]
+    columns: dict
+    meta: dict
+
+    chunk_size = 5000000  # Number of points processed at a time
+
+    def __init__(self, path: str):
+        """Open an existing store.
+
+        Parameters
+        ----------
+        path : str
+            Directory of the store.
+        """
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        self.n_points = int(self.meta["n_points"])
+        self.keys = list(self.meta["keys"])
+        if self.meta.get("reordering", False):
+            warning(f"Completing an interrupted reorder of point store {path}")
+            self._swap_columns()
+        else:
+            self._open_columns()
+
+    @classmethod
+    def create(cls, path: str, chunks: Iterable) -> "PointStore":
+        """Write a new store from an iterable of chunks.
+
+        Parameters
+        ----------
+        path : str
+            Directory of the store, created if it does not exist.
+        chunks : Iterable
+            Chunks as arrays of coordinates [n x 3] or tuples with coordinates and
+            a dict of data arrays. The data channels of the first chunk are used,
+            and a store without chunks has no points and no data channels.
+
+        Returns
+        -------
+        PointStore
+            The new store, opened for reading.
+        """
+        os.makedirs(path, exist_ok=True)
+        names, files, keys = None, {}, []
+        n_points = 0
+
+        for chunk in chunks:
+            points, data = chunk if isinstance(chunk, tuple) else (chunk, {})
+            points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+            if names is None:
+                keys = list(data.keys())
+                names = list(_COORDS) + keys
+                for name in names:
+                    files[name] = open(
+                        cls._column_file(path, names, name, ".raw"), "wb"
+                    )
+
+            for i, c in enumerate(_COORDS):
+                files[c].write(np.ascontiguousarray(points[:, i]).tobytes())
+            for key in keys:
+                values = np.asarray(data[key], dtype=np.float32)
+                files[key].write(values.tobytes())
+            n_points += len(points)
+
+        # Without any chunks the store has empty coordinate columns
+        if names is None:
+            names = list(_COORDS)
+            for name in names:
+                files[name] = open(cls._column_file(path, names, name, ".raw"), "wb")
+
+        for f in files.values():
+            f.close()
+
+        for name in names:
+            dtype = np.float64 if name in _COORDS else np.float32
+            raw = cls._column_file(path, names, name, ".raw")
+            cls._write_npy(raw, raw[:-4] + ".npy", dtype, n_points)
+            os.remove(raw)
+
+        meta = {"n_points": n_points, "keys": keys, "min_max": {}, "octree": False}
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        info(f"Point store with {n_points} points written to {path}")
+        return cls(path)
+
+    @classmethod
+    def from_arrays(cls, path: str, points: np.ndarray, data: dict = None):
+        """Write a new store from arrays in memory, in chunks."""
+        points = np.asarray(points).reshape(-1, 3)
+        data = {} if data is None else data
+        step = cls.chunk_size
+
+        def chunks():
+            for i in range(0, len(points), step):
+                chunk_data = {k: v[i : i + step] for k, v in data.items()}
+                yield points[i : i + step], chunk_data
+
+        return cls.create(path, chunks())
+
+    @staticmethod
+    def _column_file(path: str, names: list, name: str, ext: str) -> str:
+        """File name for a column, data channels are numbered to avoid odd names."""
+        if name in _COORDS:
+            return os.path.join(path, name + ext)
+        return os.path.join(path, f"data_{names.index(name) - 3}{ext}")
+
+    @staticmethod
+    def _write_npy(raw: str, filename: str, dtype, n: int) -> None:
+        """Copy a raw column file behind a .npy header without loading it."""
+        header = {"descr": np.dtype(dtype).str, "fortran_order": False, "shape": (n,)}
+        with open(filename, "wb") as f:
+            np.lib.format.write_array_header_1_0(f, header)
+            with open(raw, "rb") as r:
+                shutil.copyfileobj(r, f, 64 * 1024 * 1024)
+
+    def _open_columns(self) -> None:
+        names = list(_COORDS) + self.keys
+        self.columns = {}
+        for name in names:
+            filename = self._column_file(self.path, names, name, ".npy")
+            self.columns[name] = np.load(filename, mmap_mode="r")
+
+    def _save_meta(self) -> None:
+        filename = os.path.join(self.path, "meta.json")
+        with open(filename + ".tmp", "w") as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(filename + ".tmp", filename)
+
+    @property
+    def xyz(self) -> PointColumns:
+        """The coordinates as a sliceable [n x 3] view."""
+        return PointColumns(self)
+
+    def get_points(self, start: int, stop: int) -> np.ndarray:
+        """Coordinates of the points in [start, stop) as a [n x 3] array."""
+        return self.xyz[start:stop]
+
+    def get_data(self, key: str, start: int, stop: int) -> np.ndarray:
+        """Values of a data channel, or a coordinate column, for [start, stop)."""
+        return np.asarray(self.columns[key][start:stop], dtype=np.float32)
+
+    def min_max(self, key: str) -> tuple[float, float]:
+        """Min and max value of a column, computed in chunks and cached."""
+        if key not in self.meta["min_max"]:
+            d_min, d_max = np.inf, -np.inf
+            column = self.columns[key]
+            for i in range(0, self.n_points, self.chunk_size):
+                values = column[i : i + self.chunk_size]
+                d_min = min(d_min, float(values.min()))
+                d_max = max(d_max, float(values.max()))
+            self.meta["min_max"][key] = [d_min, d_max]
+            self._save_meta()
+        return tuple(self.meta["min_max"][key])
+
+    def bounds(self) -> tuple[np.ndarray, np.ndarray]:
+        """Min and max corners of the points."""
+        min_max = [self.min_max(c) for c in _COORDS]
+        mins = np.array([mm[0] for mm in min_max])
+        maxs = np.array([mm[1] for mm in min_max])
+        return mins, maxs
+
+    def iter_chunks(self, chunk_size: int = 1000000) -> Iterator:
+        """Iterate over the points and data in chunks, e.g. for streaming."""
+        for i in range(0, self.n_points, chunk_size):
+            stop = min(i + chunk_size, self.n_points)
+            data = {key: self.get_data(key, i, stop) for key in self.keys}
+            yield self.get_points(i, stop), data
+
+    def get_octree(self) -> PointOctree:
+        """Load the octree, or build it and sort the columns in node order."""
+        filename = os.path.join(self.path, "octree.npz")
+        if self.meta.get("octree", False) and os.path.exists(filename):
+            return PointOctree.load(filename)
+
+        # The codes, point indices and order of the build are memory mapped files
+        # in the store directory, so the build does not hold them in memory
+        info(f"Building octree for point store {self.path}")
+        octree = PointOctree(self.xyz, workdir=self.path)
+        self.reorder(octree.order)
+
+        # The columns are in node order now, so the order is no longer needed
+        octree.order = None
+        order_file = os.path.join(self.path, "octree_order.npy")
+        if os.path.exists(order_file):
+            os.remove(order_file)
+        octree.save(filename)
+        self.meta["octree"] = True
+        self._save_meta()
+        return octree
+
+    def get_voxel_levels(
+        self, max_levels: int, min_points: int, max_points: int
+    ) -> list[tuple]:
+        """Load the voxel levels, or compute them in chunks and save them.
+
+        The levels are computed with voxel_levels over all columns, including the
+        coordinates, and saved to voxel_levels.npz. They are computed again if the
+        settings differ from the saved ones.
+
+        Returns
+        -------
+        list[tuple]
+            Voxel size, centroids [m x 3] and averaged columns for each level.
+        """
+        filename = os.path.join(self.path, "voxel_levels.npz")
+        settings = [max_levels, min_points, max_points]
+        if self.meta.get("voxel_levels") == settings and os.path.exists(filename):
+            return self._load_voxel_levels(filename)
+
+        info(f"Computing voxel levels for point store {self.path}")
+        (mins, maxs) = self.bounds()
+
+        chunks = lambda: self.iter_chunks(self.chunk_size)
+        levels = voxel_levels(
+            chunks, self.n_points, mins, maxs, max_levels, min_points, max_points
+        )
+
+        arrays = {}
+        for i, (voxel_size, centroids, averages) in enumerate(levels):
+            arrays[f"size_{i}"] = voxel_size
+            arrays[f"centroids_{i}"] = centroids
+            for j, key in enumerate(self.keys):
+                arrays[f"data_{i}_{j}"] = averages[key].astype(np.float32)
+        np.savez(filename, n_levels=len(levels), **arrays)
+        self.meta["voxel_levels"] = settings
+        self._save_meta()
+        return self._load_voxel_levels(filename)
+
+    def _load_voxel_levels(self, filename: str) -> list[tuple]:
+        levels = []
+        with np.load(filename) as f:
+            for i in range(int(f["n_levels"])):
+                centroids = f[f"centroids_{i}"]
+                columns = {c: centroids[:, k] for k, c in enumerate(_COORDS)}
+                for j, key in enumerate(self.keys):
+                    columns[key] = f[f"data_{i}_{j}"]
+                levels.append((float(f[f"size_{i}"]), centroids, columns))
+        return levels
+
+    def reorder(self, order: np.ndarray) -> None:
+        """Rewrite all columns in a new point order, in chunks.
+
+        Every column is first written to a temporary file. The columns are only
+        swapped once all of them are written, with meta.json marking the swap as in
+        progress, so an interrupted reorder never leaves columns in mixed order.
+        """
+        names = list(_COORDS) + self.keys
+        for name in names:
+            column = self.columns[name]
+            filename = self._column_file(self.path, names, name, ".npy")
+            out = np.lib.format.open_memmap(
+                filename[:-4] + ".tmp.npy",
+                mode="w+",
+                dtype=column.dtype,
+                shape=(self.n_points,),
+            )
+            for i in range(0, self.n_points, self.chunk_size):
+                chunk = order[i : i + self.chunk_size]
+                # Memory maps are read much faster in increasing index order
+                sorter = np.argsort(chunk)
+                out[i + sorter] = column[chunk[sorter]]
+            out.flush()
+            del out
+
+        # Release the last column, it can not be replaced while it is mapped
+        del column
+        self.meta["octree"] = False
+        self.meta["reordering"] = True
+        self._save_meta()
+        self._swap_columns()
+
+    def _swap_columns(self) -> None:
+        """Replace the columns with their reordered temporary files.
+
+        This is also called when a store is opened with a swap in progress, in
+        which case some columns may already be replaced.
+        """
+        self.columns = {}
+        names = list(_COORDS) + self.keys
+        for name in names:
+            filename = self._column_file(self.path, names, name, ".npy")
+            tmp = filename[:-4] + ".tmp.npy"
+            if os.path.exists(tmp):
+                os.replace(tmp, filename)
+
+        self.meta["reordering"] = False
+        self._save_meta()
+        self._open_columns()
@@ -0,0 +1,246 @@
+import numpy as np
+from dtcc_viewer.opengl.utils import frustum_planes, aabbs_in_frustum
+from dtcc_viewer.logging import info, warning
+
+
+class RasterPyramid:
+    """Mip pyramid of a raster, cut into tiles of a fixed size.
+
+    Level 0 is the raster itself and each following level halves the resolution by
+    averaging 2 x 2 cells, or sampling one of them for integer rasters, until a
+    single tile covers the whole raster. The tiles of a level are aligned with those
+    of the level below, so the four children of tile (row, col) are the tiles
+    (2 * row + i, 2 * col + j) one level down.
+
+    Columns run along the x-axis and rows along the y-axis, with row 0 at the min
+    y-coordinate, as for a single raster texture. Coordinates are local, with the
+    min corner of the raster at origin.
+
+    Attributes
+    ----------
+    levels : list[np.ndarray]
+        Raster data for each level, level 0 is not copied.
+    n_tiles : np.ndarray
+        Number of tile rows and columns for each level [n_levels x 2].
+    tile_size : int
+        Number of cells along each side of a tile.
+    cell_size : np.ndarray
+        Size of the level 0 cells along x and y.
+    extent : np.ndarray
+        Size of the raster along x and y.
+    origin : np.ndarray
+        Local coordinates of the min corner of the raster.
+    """
+
+    levels: list[np.ndarray]
+    n_tiles: np.ndarray
+    tile_size: int
+    cell_size: np.ndarray
+    extent: np.ndarray
+    origin: np.ndarray
+
+    chunk_rows = 2048  # Rows averaged at a time when building a level
+
+    def __init__(self, data: np.ndarray, cell_size, tile_size: int = 256):
+        """Build the pyramid.
+
+        Parameters
+        ----------
+        data : np.ndarray
+            Raster data [rows x cols] or [rows x cols x channels], may be memory
+            mapped.
+        cell_size : array_like
+            Size of the cells along x and y.
+        tile_size : int, optional
+            Number of cells along each side of a tile.
+        """
+        self.tile_size = tile_size
+        self.cell_size = np.abs(np.asarray(cell_size, dtype=np.float64)[0:2])
+        self.extent = np.array(data.shape[1::-1], dtype=np.float64) * self.cell_size
+        self.origin = np.array([-self.extent[0] / 2.0, -self.extent[1] / 2.0, 0.0])
+
+        self.levels = [data]
+        while max(self.levels[-1].shape[0:2]) > tile_size:
+            self.levels.append(self._downsample(self.levels[-1]))
+
+        shapes = np.array([level.shape[0:2] for level in self.levels])
+        self.n_tiles = (shapes + tile_size - 1) // tile_size
+        info(f"Raster pyramid with {len(self.levels)} levels created")
+
+    @property
+    def n_levels(self) -> int:
+        return len(self.levels)
+
+    @property
+    def root(self) -> tuple:
+        """The single tile of the top level."""
+        return (self.n_levels - 1, 0, 0)
+
+    def _downsample(self, data: np.ndarray) -> np.ndarray:
+        """Average 2 x 2 cells, repeating the last row and column for odd sizes.
+
+        Integer rasters, e.g. classifications, are sampled at the first cell of
+        each 2 x 2 block instead, since the mean of two class codes is not a class.
+        """
+        if np.issubdtype(data.dtype, np.integer):
+            return np.ascontiguousarray(data[::2, ::2])
+
+        rows, cols = data.shape[0:2]
+        out_shape = ((rows + 1) // 2, (cols + 1) // 2) + data.shape[2:]
+        out = np.empty(out_shape, dtype=data.dtype)
+
+        step = self.chunk_rows
+        for i in range(0, rows, step):
+            chunk = np.asarray(data[i : i + step], dtype=np.float32)
+            pad = [(0, len(chunk) % 2), (0, cols % 2)] + [(0, 0)] * (data.ndim - 2)
+            chunk = np.pad(chunk, pad, mode="edge")
+            shape = (len(chunk) // 2, 2, chunk.shape[1] // 2, 2) + chunk.shape[2:]
+            mean = chunk.reshape(shape).mean(axis=(1, 3))
+            out[i // 2 : i // 2 + len(mean)] = mean
+
+        return out
+
+    def get_tile(self, tile: tuple) -> np.ndarray:
+        """Data of a tile, padded with zeros to tile_size x tile_size cells."""
+        level, row, col = tile
+        size = self.tile_size
+        data = self.levels[level]
+        rows = slice(row * size, (row + 1) * size)
+        cols = slice(col * size, (col + 1) * size)
+        cells = data[rows, cols]
+
+        tile_data = np.zeros((size, size) + data.shape[2:], dtype=data.dtype)
+        tile_data[0 : cells.shape[0], 0 : cells.shape[1]] = cells
+        return tile_data
+
+    def parent(self, tile: tuple) -> tuple:
+        """The tile one level up that covers a tile."""
+        level, row, col = tile
+        return (level + 1, row // 2, col // 2)
+
+    def tile_bounds(self, levels, rows, cols) -> tuple[np.ndarray, np.ndarray]:
+        """Min and max corners of tiles, clipped to the raster [n x 3].
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            Min and max corners. The z-coordinates are both that of the origin.
+        """
+        tile_extent = np.outer(2.0 ** np.asarray(levels), self.cell_size)
+        tile_extent *= self.tile_size
+        index = np.column_stack((cols, rows))
+        mins = np.minimum(index * tile_extent, self.extent)
+        maxs = np.minimum((index + 1) * tile_extent, self.extent)
+
+        z = np.full((len(mins), 1), self.origin[2])
+        mins = np.hstack((mins + self.origin[0:2], z))
+        maxs = np.hstack((maxs + self.origin[0:2], z))
+        return mins, maxs
+
+    def tile_uv_scale(self, levels, rows, cols) -> np.ndarray:
+        """Fraction of each tile texture that is inside the raster along x and y."""
+        mins, maxs = self.tile_bounds(levels, rows, cols)
+        tile_extent = np.outer(2.0 ** np.asarray(levels), self.cell_size)
+        return (maxs - mins)[:, 0:2] / (tile_extent * self.tile_size)
+
+    def select(
+        self,
+        mvp: np.ndarray,
+        height: float,
+        proj_scale: float,
+        max_tiles: int,
+        max_error: float = 1.0,
+    ) -> list[tuple]:
+        """Select the visible tiles to draw for a camera.
+
+        The screen space error of a tile is the size of one of its cells in pixels
+        at the tile corner closest to the camera. Starting at the root, the tiles
+        with an error larger than max_error are replaced by their children, largest
+        error first, as long as the number of selected tiles stays within max_tiles.
+
+        Parameters
+        ----------
+        mvp : np.ndarray
+            Model view projection matrix in the pyrr layout.
+        height : float
+            Height of the viewport in pixels.
+        proj_scale : float
+            Element [1, 1] of the projection matrix.
+        max_tiles : int
+            Max number of selected tiles.
+        max_error : float, optional
+            Tiles with cells smaller than this many pixels are not refined.
+
+        Returns
+        -------
+        list[tuple]
+            Selected tiles as (level, row, col).
+        """
+        planes = frustum_planes(mvp)
+        mvp = np.asarray(mvp, dtype=np.float64)
+        selected = []
+        n_pending = 1
+        level = self.n_levels - 1
+        rows, cols = np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64)
+
+        while len(rows) > 0:
+            levels = np.full(len(rows), level)
+            mins, maxs = self.tile_bounds(levels, rows, cols)
+            in_view = aabbs_in_frustum(planes, mins, maxs)
+            n_pending -= np.count_nonzero(~in_view)
+            rows, cols = (rows[in_view], cols[in_view])
+            mins, maxs = (mins[in_view], maxs[in_view])
+
+            cell = np.max(self.cell_size) * 2.0**level
+            errors = self._cell_errors(mvp, mins, maxs, cell, height, proj_scale)
+            refine = (errors > max_error) if level > 0 else np.zeros(len(rows), bool)
+
+            # Children inside the raster of each tile that may be refined
+            n_below = self.n_tiles[level - 1] if level > 0 else np.zeros(2, int)
+            n_children = (np.minimum(2 * rows + 2, n_below[0]) - 2 * rows) * (
+                np.minimum(2 * cols + 2, n_below[1]) - 2 * cols
+            )
+
+            # Refine the largest errors first while the tile count stays in budget
+            order = np.argsort(-errors[refine], kind="stable")
+            candidates = np.flatnonzero(refine)[order]
+            growth = np.cumsum(n_children[candidates] - 1)
+            n_total = len(selected) + n_pending
+            refine[candidates[n_total + growth > max_tiles]] = False
+
+            keep = ~refine
+            selected.extend(zip([level] * int(keep.sum()), rows[keep], cols[keep]))
+            n_pending -= len(rows)
+            n_pending += int(np.sum(n_children[refine]))
+
+            rows, cols = self._children(rows[refine], cols[refine], n_below)
+            level -= 1
+
+        return [(int(l), int(r), int(c)) for (l, r, c) in selected]
+
+    def _children(self, rows: np.ndarray, cols: np.ndarray, n_tiles: np.ndarray):
+        """Rows and columns of the children of tiles that are inside the raster."""
+        child_rows = (2 * rows[:, None] + np.array([0, 0, 1, 1])).flatten()
+        child_cols = (2 * cols[:, None] + np.array([0, 1, 0, 1])).flatten()
+        inside = (child_rows < n_tiles[0]) & (child_cols < n_tiles[1])
+        return child_rows[inside], child_cols[inside]
+
+    def _cell_errors(self, mvp, mins, maxs, cell, height, proj_scale) -> np.ndarray:
+        """Size in pixels of a cell at the tile corner closest to the camera."""
+        corners = np.stack(
+            (
+                mins,
+                np.column_stack((maxs[:, 0], mins[:, 1], mins[:, 2])),
+                np.column_stack((mins[:, 0], maxs[:, 1], mins[:, 2])),
+                maxs,
+            ),
+            axis=1,
+        )
+        corners_h = np.concatenate((corners, np.ones(corners.shape[0:2] + (1,))), 2)
+        w = np.min(corners_h @ mvp[:, 3], axis=1)
+
+        # Tiles that reach behind the camera are always refined
+        errors = np.full(len(mins), np.inf)
+        front = w > 1e-9
+        errors[front] = cell * proj_scale * height / w[front]
+        return errors
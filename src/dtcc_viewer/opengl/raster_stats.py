@@ -0,0 +1,153 @@
+import numpy as np
+from dtcc_viewer.logging import info, warning, debug
+
+
+class RasterStats:
+    """Statistics and histogram of raster data, computed in chunks of rows.
+
+    The min, max, mean and standard deviation are computed in a single pass over
+    the raster, reading a limited number of rows at a time, so memory mapped
+    rasters are never loaded as a whole. The means and variances of the chunks are
+    merged with the parallel algorithm of Chan et al. Values that are not finite,
+    e.g. NaN used for no data, are ignored.
+
+    The histogram is built with a second pass the first time it is needed and then
+    cached, so percentiles can be looked up without reading the raster again.
+    Rasters with 8 or 16 bit unsigned integers get one bin per value, so their
+    percentiles are exact values. Other rasters get n_bins bins over the data range
+    and the percentiles are interpolated within the bins.
+
+    Attributes
+    ----------
+    min : float
+        Min value.
+    max : float
+        Max value.
+    mean : float
+        Mean value.
+    std : float
+        Standard deviation.
+    count : int
+        Number of finite values.
+    """
+
+    min: float
+    max: float
+    mean: float
+    std: float
+    count: int
+
+    chunk_rows = 1024  # Rows read at a time
+    n_bins = 4096  # Number of histogram bins for float data
+
+    def __init__(self, data: np.ndarray):
+        """Compute the statistics of the data.
+
+        Parameters
+        ----------
+        data : np.ndarray
+            Raster data [rows x cols] or [rows x cols x channels], may be memory
+            mapped.
+        """
+        self.data = data
+        self._hist = None
+        self._edges = None
+        self._compute()
+
+    @property
+    def range(self) -> float:
+        return self.max - self.min
+
+    def _chunks(self):
+        """Iterate over the finite values of chunks of rows as flat arrays."""
+        for i in range(0, len(self.data), self.chunk_rows):
+            chunk = np.asarray(self.data[i : i + self.chunk_rows]).reshape(-1)
+            if np.issubdtype(chunk.dtype, np.floating):
+                chunk = chunk[np.isfinite(chunk)]
+            if len(chunk) > 0:
+                yield chunk
+
+    def _compute(self) -> None:
+        """Compute min, max, mean and std in one pass, merging the chunks."""
+        (d_min, d_max) = (np.inf, -np.inf)
+        (count, mean, m2) = (0, 0.0, 0.0)
+
+        for chunk in self._chunks():
+            values = chunk.astype(np.float64)
+            n = len(values)
+            c_mean = values.mean()
+            c_m2 = np.sum((values - c_mean) ** 2)
+
+            delta = c_mean - mean
+            total = count + n
+            mean += delta * n / total
+            m2 += c_m2 + delta**2 * count * n / total
+            count = total
+
+            d_min = min(d_min, float(values.min()))
+            d_max = max(d_max, float(values.max()))
+
+        if count == 0:
+            warning("Raster has no finite values")
+            (d_min, d_max) = (0.0, 0.0)
+
+        self.count = count
+        self.min = d_min
+        self.max = d_max
+        self.mean = mean
+        self.std = np.sqrt(m2 / count) if count > 0 else 0.0
+
+    def histogram(self) -> tuple[np.ndarray, np.ndarray]:
+        """Histogram of the data, built on the first call and then cached.
+
+        Returns
+        -------
+        tuple[np.ndarray, np.ndarray]
+            Counts for each bin and the bin edges, with one more edge than bins.
+        """
+        if self._hist is not None:
+            return self._hist, self._edges
+
+        if self._is_integer():
+            n_values = int(self.max) + 1
+            self._edges = np.arange(n_values + 1, dtype=np.float64) - 0.5
+            self._hist = np.zeros(n_values, dtype=np.int64)
+            for chunk in self._chunks():
+                self._hist += np.bincount(chunk, minlength=n_values)
+        else:
+            hi = self.max if self.max > self.min else self.min + 1.0
+            self._edges = np.linspace(self.min, hi, self.n_bins + 1)
+            self._hist = np.zeros(self.n_bins, dtype=np.int64)
+            for chunk in self._chunks():
+                self._hist += np.histogram(chunk, bins=self._edges)[0]
+
+        debug(f"Raster histogram with {len(self._hist)} bins created")
+        return self._hist, self._edges
+
+    def percentiles(self, q) -> np.ndarray:
+        """Values at the given percentiles, from the cached histogram.
+
+        Parameters
+        ----------
+        q : array_like
+            Percentiles in [0, 100].
+
+        Returns
+        -------
+        np.ndarray
+            Value for each percentile, clamped to the data range.
+        """
+        (hist, edges) = self.histogram()
+        q = np.clip(np.asarray(q, dtype=np.float64), 0.0, 100.0)
+        cdf = np.concatenate(([0.0], np.cumsum(hist, dtype=np.float64)))
+        if cdf[-1] == 0:
+            return np.full(q.shape, self.min)
+
+        values = np.interp(q / 100.0 * cdf[-1], cdf, edges)
+        if self._is_integer():
+            values = np.rint(values)
+        return np.clip(values, self.min, self.max)
+
+    def _is_integer(self) -> bool:
+        """True for data with one histogram bin per value."""
+        return np.asarray(self.data[0:1]).dtype in (np.uint8, np.uint16)
@@ -5,13 +5,17 @@ from dtcc_viewer.opengl.wrp_object import ObjectWrapper
 from dtcc_viewer.opengl.wrp_mesh import MeshWrapper
 from dtcc_viewer.opengl.wrp_grid import GridWrapper, VolumeGridWrapper
 from dtcc_viewer.opengl.wrp_pointcloud import PointCloudWrapper
+from dtcc_viewer.opengl.wrp_pointcloud_stream import PointCloudStreamWrapper
+from dtcc_viewer.opengl.wrp_point_store import PointStoreWrapper
+from dtcc_viewer.opengl.point_store import PointStore
 from dtcc_viewer.opengl.wrp_linestring import LineStringWrapper, MultiLineStringWrapper
 from dtcc_viewer.opengl.wrp_geometries import GeometriesWrapper
 from dtcc_viewer.opengl.wrp_building import BuildingWrapper
 from dtcc_viewer.opengl.wrp_bounds import BoundsWrapper
-from dtcc_viewer.opengl.wrp_raster import RasterWrapper, MultiRasterWrapper
+from dtcc_viewer.opengl.wrp_raster import RasterWrapper, RasterPyramidWrapper
 from dtcc_viewer.opengl.wrp_surface import SurfaceWrapper, MultiSurfaceWrapper
 from dtcc_viewer.opengl.wrp_volume_mesh import VolumeMeshWrapper
+from dtcc_viewer.opengl.wrp_isosurface import IsosurfaceWrapper
 from dtcc_viewer.opengl.wrp_roadnetwork import RoadNetworkWrapper
 from dtcc_viewer.opengl.wrapper import Wrapper
 from dtcc_viewer.opengl.utils import BoundingBox, Shading
@@ -22,7 +26,7 @@ from dtcc_core.model import RoadNetwork, LineString, MultiLineString
 
 # from dtcc_model.roadnetwork import RoadNetwork
 from dtcc_viewer.logging import info, warning, debug
-from typing import Any
+from typing import Any, Iterable
 
 
 class Scene:
@@ -46,16 +50,21 @@ class Scene:
     bb: BoundingBox
     mts: int
 
-    def __init__(self, situation: Situation = None):
+    def __init__(self, situation: Situation = None, mts: int = None):
         """
         Initialize the Scene.
 
         This method sets up the wrappers list and retrieves the maximum texture size
-        supported by the graphics card.
+        supported by the graphics card. If a maximum texture size is given the
+        graphics card is not queried, which allows a scene to be built and
+        preprocessed without an OpenGL context, e.g. for benchmarking.
         """
         self.wrappers = []
         self.situation = situation
-        self.mts = glGetIntegerv(GL_MAX_TEXTURE_SIZE)
+        if mts is None:
+            self.mts = glGetIntegerv(GL_MAX_TEXTURE_SIZE)
+        else:
+            self.mts = mts
         debug("Max texture size: " + str(self.mts))
 
     def add_mesh(self, name: str, mesh: Mesh, data: Any = None):
@@ -170,6 +179,62 @@ class Scene:
         else:
             warning(f"Failed to add PointCould called '{name}' to the scene")
 
+    def add_pointcloud_stream(
+        self, name: str, chunks: Iterable, size: float = 0.2, capacity: int = 1000000
+    ):
+        """
+        Add a point cloud that is read in chunks while the viewer is rendering.
+
+        Parameters
+        ----------
+        name : str
+            Name of the point cloud.
+        chunks : Iterable
+            Iterable of point chunks, each an array of coordinates [n x 3], a
+            PointCloud, or a tuple with coordinates and data. The data is a dict
+            of arrays or a single array with one value per point.
+        size : float, optional
+            Size of the points in the point cloud.
+        capacity : int, optional
+            Number of points to allocate room for initially, grown as needed.
+        """
+        if chunks is None:
+            warning(f"Failed to add point cloud stream called '{name}' to the scene")
+            return
+
+        wrapper = PointCloudStreamWrapper(name, chunks, self.mts, size, capacity)
+        if wrapper.finished:
+            warning(f"Point cloud stream called '{name}' has no valid chunks")
+        else:
+            info(f"Point cloud stream called '{name}' added to scene")
+            self.wrappers.append(wrapper)
+
+    def add_pointcloud_store(self, name: str, store: Any, size: float = 0.2):
+        """
+        Add a point cloud that is read from an on-disk store as it is drawn.
+
+        Parameters
+        ----------
+        name : str
+            Name of the point cloud.
+        store : PointStore or str
+            PointStore object or the directory of a store.
+        size : float, optional
+            Size of the points in the point cloud.
+        """
+        if isinstance(store, str):
+            try:
+                store = PointStore(store)
+            except (OSError, KeyError, ValueError) as e:
+                warning(f"Failed to open point store for '{name}': {e}")
+                return
+
+        if isinstance(store, PointStore) and store.n_points > 0:
+            info(f"Point store called '{name}' added to scene")
+            self.wrappers.append(PointStoreWrapper(name, store, self.mts, size))
+        else:
+            warning(f"Failed to add point store called '{name}' to the scene")
+
     def add_linestring(self, name: str, ls: LineString, data: Any = None):
         """
         Add a line string to the scene.
@@ -250,9 +315,9 @@ class Scene:
             and isinstance(raster, Raster)
             and self.has_geom(raster, name)
         ):
-            if np.max(raster.data.shape) > max_size:
-                info(f"Multi raster called '{name}' added to scene")
-                self.wrappers.append(MultiRasterWrapper(name, raster, max_size))
+            if np.max(raster.data.shape[0:2]) > max_size:
+                info(f"Tiled raster called '{name}' added to scene")
+                self.wrappers.append(RasterPyramidWrapper(name, raster))
             else:
                 info(f"Raster called '{name}' added to scene")
                 self.wrappers.append(RasterWrapper(name, raster))
@@ -443,6 +508,8 @@ class Scene:
                     next_id = self.update_ids(wrp.mesh_ter, next_id)
                 if wrp.mesh_bld is not None:
                     next_id = self.update_ids(wrp.mesh_bld, next_id)
+                for vgrid_wrp in wrp.vgrid_wrps:
+                    next_id = self.update_iso_ids(vgrid_wrp.iso_wrp, next_id)
             elif isinstance(wrp, GeometriesWrapper):
                 for mesh_wrp in wrp.mesh_wrps:
                     next_id = self.update_ids(mesh_wrp, next_id)
@@ -455,6 +522,9 @@ class Scene:
                         next_id = self.update_ids(vmesh_wrp.mesh_vol_wrp, next_id)
                     if vmesh_wrp.mesh_env_wrp is not None:
                         next_id = self.update_ids(vmesh_wrp.mesh_env_wrp, next_id)
+                    next_id = self.update_iso_ids(vmesh_wrp.iso_wrp, next_id)
+                for vgrd_wrp in wrp.vgrd_wrps:
+                    next_id = self.update_iso_ids(vgrd_wrp.iso_wrp, next_id)
             elif isinstance(wrp, BuildingWrapper):
                 next_id = self.update_ids(wrp.mesh_wrp, next_id)
             elif isinstance(wrp, ObjectWrapper):
@@ -467,6 +537,9 @@ class Scene:
                     next_id = self.update_ids(wrp.mesh_vol_wrp, next_id)
                 if wrp.mesh_env_wrp is not None:
                     next_id = self.update_ids(wrp.mesh_env_wrp, next_id)
+                next_id = self.update_iso_ids(wrp.iso_wrp, next_id)
+            elif isinstance(wrp, VolumeGridWrapper):
+                next_id = self.update_iso_ids(wrp.iso_wrp, next_id)
 
     def update_ids(self, mesh_wrp: MeshWrapper, next_id):
         """
@@ -490,6 +563,26 @@ class Scene:
         next_id += max_id + 1
         return next_id
 
+    def update_iso_ids(self, iso_wrp: IsosurfaceWrapper, next_id):
+        """
+        Update IDs of the mesh of an isosurface.
+
+        Parameters
+        ----------
+        iso_wrp : IsosurfaceWrapper
+            Isosurface whose mesh part IDs need to be updated, or None.
+        next_id : int
+            The next ID to be assigned.
+
+        Returns
+        -------
+        int
+            The updated next ID after assigning IDs to the isosurface mesh.
+        """
+        if iso_wrp is None:
+            return next_id
+        return self.update_ids(iso_wrp.mesh_wrp, next_id)
+
     def has_geom(self, obj: Any, name: str):
         """
         Trying to catch objects without geometry.
@@ -0,0 +1,129 @@
+import numpy as np
+from dtcc_viewer.logging import info, warning, debug
+
+
+class CellSection:
+    """Cells of a volume mesh that are cut by the axis aligned clipping planes.
+
+    A cell is cut by the plane at value p along an axis if the bounding box of the
+    cell spans p. The mins and maxs of the cell boxes are sorted along each axis
+    once, so that when a plane moves only the cells with a min or max between the
+    old and the new plane position are tested again. The faces of each cell are
+    assumed to be stored together, so the cut cells map to contiguous face ranges
+    that can be drawn with a single multi draw call.
+
+    Attributes
+    ----------
+    cell_mins : np.ndarray
+        Min corner of the bounding box of each cell [n x 3].
+    cell_maxs : np.ndarray
+        Max corner of the bounding box of each cell [n x 3].
+    faces_per_cell : int
+        Number of consecutive faces for each cell.
+    planes : list
+        Current plane value along each axis, None for inactive planes.
+    axis_masks : np.ndarray
+        Cells cut by the plane along each axis [3 x n].
+    mask : np.ndarray
+        Cells cut by any of the planes.
+    """
+
+    cell_mins: np.ndarray
+    cell_maxs: np.ndarray
+    faces_per_cell: int
+    planes: list
+    axis_masks: np.ndarray
+    mask: np.ndarray
+
+    def __init__(self, cell_mins: np.ndarray, cell_maxs: np.ndarray, faces_per_cell):
+        """Sort the cell bounds along each axis.
+
+        Parameters
+        ----------
+        cell_mins : np.ndarray
+            Min corner of the bounding box of each cell [n x 3].
+        cell_maxs : np.ndarray
+            Max corner of the bounding box of each cell [n x 3].
+        faces_per_cell : int
+            Number of consecutive faces for each cell.
+        """
+        self.cell_mins = cell_mins
+        self.cell_maxs = cell_maxs
+        self.faces_per_cell = faces_per_cell
+        self.planes = [None, None, None]
+
+        n = len(cell_mins)
+        self.axis_masks = np.zeros((3, n), dtype=bool)
+        self.mask = np.zeros(n, dtype=bool)
+
+        self.min_order = np.argsort(cell_mins, axis=0).T
+        self.max_order = np.argsort(cell_maxs, axis=0).T
+        self.min_sorted = np.take_along_axis(cell_mins, self.min_order.T, 0).T
+        self.max_sorted = np.take_along_axis(cell_maxs, self.max_order.T, 0).T
+        debug(f"Section created for {n} cells")
+
+    def update(self, planes: list) -> bool:
+        """Update the cut cells for new plane values.
+
+        Parameters
+        ----------
+        planes : list
+            Plane value along each axis, None for inactive planes.
+
+        Returns
+        -------
+        bool
+            True if the cut cells may have changed.
+        """
+        # Planes in the type of the bounds, so the searches and tests agree on ties
+        planes = [None if p is None else self.cell_mins.dtype.type(p) for p in planes]
+
+        changed = False
+        for axis in range(3):
+            (old, new) = (self.planes[axis], planes[axis])
+            if old == new:
+                continue
+
+            if new is None:
+                self.axis_masks[axis] = False
+            elif old is None:
+                self.axis_masks[axis] = self._cut(axis, new, slice(None))
+            else:
+                cells = self._candidates(axis, min(old, new), max(old, new))
+                self.axis_masks[axis, cells] = self._cut(axis, new, cells)
+
+            self.planes[axis] = new
+            changed = True
+
+        if changed:
+            np.any(self.axis_masks, axis=0, out=self.mask)
+        return changed
+
+    def _cut(self, axis: int, value: float, cells) -> np.ndarray:
+        """True for the cells whose bounding box spans the plane."""
+        mins = self.cell_mins[cells, axis]
+        maxs = self.cell_maxs[cells, axis]
+        return (mins <= value) & (maxs >= value)
+
+    def _candidates(self, axis: int, lo: float, hi: float) -> np.ndarray:
+        """Cells that may change when a plane moves between lo and hi.
+
+        A cell is cut at both lo and hi if its box spans both, and at neither if
+        the box is above hi or below lo. All other cells have a min in (lo, hi] or
+        a max in [lo, hi).
+        """
+        mins = self.min_sorted[axis]
+        maxs = self.max_sorted[axis]
+        i0 = np.searchsorted(mins, lo, side="right")
+        i1 = np.searchsorted(mins, hi, side="right")
+        j0 = np.searchsorted(maxs, lo, side="left")
+        j1 = np.searchsorted(maxs, hi, side="left")
+        cells = (self.min_order[axis, i0:i1], self.max_order[axis, j0:j1])
+        return np.unique(np.concatenate(cells))
+
+    def get_draw_ranges(self) -> tuple[np.ndarray, np.ndarray]:
+        """Start and count of the face ranges of consecutive cut cells."""
+        steps = np.diff(self.mask.astype(np.int8), prepend=0, append=0)
+        starts = np.flatnonzero(steps == 1)
+        ends = np.flatnonzero(steps == -1)
+        return starts * self.faces_per_cell, (ends - starts) * self.faces_per_cell
@@ -0,0 +1,429 @@
+import os
+import time
+import ctypes
+import glfw
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from OpenGL.GL import *
+from PIL import Image
+from dtcc_viewer.logging import info, warning, debug
+from dtcc_viewer.opengl.window import Window
+from dtcc_viewer.opengl.scene import Scene
+from dtcc_viewer.opengl.gl_model import GlModel
+from dtcc_viewer.opengl.action import Action
+from dtcc_viewer.opengl.utils import CameraView, Shading
+
+
+class CameraPose:
+    """Explicit camera placement used for snapshot rendering.
+
+    Attributes
+    ----------
+    name : str
+        Name of the pose, used in the file names of the rendered images.
+    position : np.ndarray
+        Camera position [x, y, z].
+    target : np.ndarray
+        Point the camera is looking at [x, y, z].
+    world : bool
+        If True the coordinates are given in the original coordinate system of the
+        data, otherwise in the centered scene coordinate system used for rendering.
+    """
+
+    name: str
+    position: np.ndarray
+    target: np.ndarray
+    world: bool
+
+    def __init__(self, name: str, position, target, world: bool = True) -> None:
+        """Initialize the CameraPose object."""
+        self.name = name
+        self.position = np.array(position, dtype=float)
+        self.target = np.array(target, dtype=float)
+        self.world = world
+
+
+class SnapshotRenderer:
+    """Render batches of images from a scene without user interaction.
+
+    The scene is preprocessed once and then rendered for every combination of
+    camera view, data channel and shading mode. Frames are drawn to an offscreen
+    frame buffer and read back asynchronously through a ring of pixel buffer
+    objects, so that the read back of one frame overlaps with the drawing of the
+    next. Image encoding is done on worker threads.
+
+    Since the Scene queries the OpenGL context when it is created, the renderer
+    must be created before the scene is built:
+
+    >>> renderer = SnapshotRenderer(1600, 1200)
+    >>> scene = Scene()
+    >>> scene.add_city("City", city)
+    >>> renderer.preprocess(scene)
+    >>> renderer.render_batch([CameraView.TOP, CameraView.FRONT], out_dir="images")
+    >>> renderer.close()
+
+    Attributes
+    ----------
+    window : Window
+        Hidden window providing the OpenGL context.
+    model : GlModel
+        Model created from the scene.
+    action : Action
+        Action holding the camera and the global parameters.
+    width : int
+        Width of the rendered images in pixels.
+    height : int
+        Height of the rendered images in pixels.
+    n_buffers : int
+        Number of pixel buffer objects in the read back ring.
+    FBO : int
+        Offscreen frame buffer object.
+    RBO_color : int
+        Color render buffer attached to the frame buffer.
+    RBO_depth : int
+        Depth and stencil render buffer attached to the frame buffer.
+    PBOs : list[int]
+        Pixel buffer objects used for asynchronous read back.
+    bb_mid_pt : np.ndarray
+        Mid point of the scene in the original coordinate system.
+    """
+
+    window: Window
+    model: GlModel
+    action: Action
+    width: int
+    height: int
+    n_buffers: int
+    FBO: int
+    RBO_color: int
+    RBO_depth: int
+    PBOs: list[int]
+    bb_mid_pt: np.ndarray
+
+    def __init__(
+        self, width: int = 1600, height: int = 1200, n_buffers: int = 2, n_writers=2
+    ) -> None:
+        """Initialize the renderer and create a hidden window for the context.
+
+        Parameters
+        ----------
+        width : int, optional
+            Width of the rendered images in pixels (default is 1600).
+        height : int, optional
+            Height of the rendered images in pixels (default is 1200).
+        n_buffers : int, optional
+            Number of frames that can be in flight during read back (default is 2).
+        n_writers : int, optional
+            Number of threads used to encode and write images (default is 2).
+        """
+        self.width = width
+        self.height = height
+        self.n_buffers = max(1, n_buffers)
+        self.window = Window(width, height, visible=False)
+        self.model = None
+        self.action = self.window.action
+        # Snapshots are single frames, so they must not be partially drawn
+        self.action.full_quality = True
+        self.PBOs = []
+        self.FBO = None
+        self.bb_mid_pt = np.zeros(3)
+
+        self._pending = deque()
+        self._writer = ThreadPoolExecutor(max_workers=max(1, n_writers))
+        self._futures = []
+        self._frame_count = 0
+
+    def preprocess(self, scene: Scene) -> bool:
+        """Preprocess the scene and create the OpenGL resources for rendering.
+
+        Parameters
+        ----------
+        scene : Scene
+            The scene to render. It is only preprocessed once.
+
+        Returns
+        -------
+        bool
+            True if the preprocessing succeeded.
+        """
+        if scene.wrappers is None or len(scene.wrappers) == 0:
+            warning("Scene has no objects to render. Snapshots aborted!")
+            return False
+
+        if not scene.preprocess_drawing():
+            warning("Scene preprocessing failed. Snapshots aborted!")
+            return False
+
+        if not self.window._preprocess_model(scene):
+            warning("Model preprocessing failed. Snapshots aborted!")
+            return False
+
+        self.model = self.window.model
+        self.bb_mid_pt = np.array(scene.bb.mid_pt, dtype=float)
+
+        # Images have a fixed size independent of the window framebuffer
+        self.action.update_window_size(
+            self.width, self.height, self.width, self.height
+        )
+
+        self._create_fbo()
+        self._create_pbos()
+        self.model.FBO_target = self.FBO
+
+        glEnable(GL_DEPTH_TEST)
+        glEnable(GL_BLEND)
+        glDepthFunc(GL_LESS)
+
+        return True
+
+    def render_batch(
+        self,
+        views: list = None,
+        data_keys: list[str] = None,
+        shadings: list[Shading] = None,
+        out_dir: str = ".",
+        prefix: str = "snapshot",
+        ext: str = "png",
+    ) -> list[str]:
+        """Render one image for each combination of view, data channel and shading.
+
+        Parameters
+        ----------
+        views : list[CameraView | CameraPose], optional
+            Camera views to render. Defaults to the perspective preset.
+        data_keys : list[str], optional
+            Names of data channels to color by. Objects lacking a channel keep
+            their current one. Defaults to the current channel of each object.
+        shadings : list[Shading], optional
+            Shading modes for meshes. Defaults to the current model shading.
+        out_dir : str, optional
+            Directory where the images are written (default is ".").
+        prefix : str, optional
+            Prefix for the image file names (default is "snapshot").
+        ext : str, optional
+            Image file extension, which decides the format (default is "png").
+
+        Returns
+        -------
+        list[str]
+            Paths to the written images.
+        """
+        if self.model is None:
+            warning("Renderer has no model, call preprocess before rendering.")
+            return []
+
+        views = views if views else [CameraView.PERSPECTIVE]
+        data_keys = data_keys if data_keys else [None]
+        shadings = shadings if shadings else [self.model.guip.shading]
+        self._check_data_keys(data_keys)
+
+        os.makedirs(out_dir, exist_ok=True)
+        paths = []
+        tic = time.perf_counter()
+
+        # Data texture updates are the most expensive state change, so the data
+        # channel is varied in the outer loop and the camera in the inner loop.
+        for key in data_keys:
+            self._set_data_channel(key)
+            for shading in shadings:
+                self.model.guip.shading = shading
+                for view in views:
+                    self._set_camera(view)
+                    self._render_frame()
+                    name = self._get_file_name(prefix, view, key, shading, ext)
+                    path = os.path.join(out_dir, name)
+                    self._start_readback(path)
+                    paths.append(path)
+
+        self._flush()
+        toc = time.perf_counter()
+        info(f"Rendered {len(paths)} snapshots in {toc - tic:0.2f} seconds.")
+        return paths
+
+    def close(self) -> None:
+        """Finish pending writes and release the OpenGL resources."""
+        self._flush()
+        self._writer.shutdown(wait=True)
+        if self.PBOs:
+            glDeleteBuffers(len(self.PBOs), self.PBOs)
+            self.PBOs = []
+        if self.FBO is not None:
+            glDeleteFramebuffers(1, [self.FBO])
+            glDeleteRenderbuffers(2, [self.RBO_color, self.RBO_depth])
+            self.FBO = None
+        glfw.terminate()
+
+    def _create_fbo(self) -> None:
+        """Create the offscreen frame buffer that the images are drawn to."""
+        self.FBO = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.FBO)
+
+        self.RBO_color = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.RBO_color)
+        glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, self.width, self.height)
+        glFramebufferRenderbuffer(
+            GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, self.RBO_color
+        )
+
+        self.RBO_depth = glGenRenderbuffers(1)
+        glBindRenderbuffer(GL_RENDERBUFFER, self.RBO_depth)
+        glRenderbufferStorage(
+            GL_RENDERBUFFER, GL_DEPTH24_STENCIL8, self.width, self.height
+        )
+        glFramebufferRenderbuffer(
+            GL_FRAMEBUFFER, GL_DEPTH_STENCIL_ATTACHMENT, GL_RENDERBUFFER, self.RBO_depth
+        )
+
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            warning("Framebuffer for snapshots is incomplete")
+
+        glBindRenderbuffer(GL_RENDERBUFFER, 0)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def _create_pbos(self) -> None:
+        """Create the ring of pixel buffer objects used for read back."""
+        size = self.width * self.height * 4
+        self.PBOs = list(np.atleast_1d(glGenBuffers(self.n_buffers)))
+        for pbo in self.PBOs:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+            glBufferData(GL_PIXEL_PACK_BUFFER, size, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+
+    def _check_data_keys(self, data_keys: list[str]) -> None:
+        """Warn about data channels that no object in the model has."""
+        all_keys = set()
+        for obj in self.model.gl_objects:
+            all_keys.update(getattr(obj.guip, "data_keys", []))
+
+        for key in data_keys:
+            if key is not None and key not in all_keys:
+                warning(f"No object in the scene has a data channel called '{key}'.")
+
+    def _set_data_channel(self, key: str) -> None:
+        """Select the data channel for all objects that have it."""
+        if key is None:
+            return
+
+        for obj in self.model.gl_objects:
+            keys = getattr(obj.guip, "data_keys", None)
+            if keys is None or key not in keys:
+                continue
+            idx = keys.index(key)
+            if obj.guip.data_idx != idx:
+                obj.guip.data_idx = idx
+                obj.guip.update_caps = True
+                obj.guip.update_data_tex = True
+
+            # Applied immediately since the model updates textures after drawing
+            obj.update_data_caps()
+            obj.update_data_texture()
+
+    def _set_camera(self, view) -> None:
+        """Set the camera from a preset view or an explicit pose."""
+        camera = self.action.camera
+        camera.reset_init_camera()
+        if isinstance(view, CameraPose):
+            position = view.position
+            target = view.target
+            if view.world:
+                position = position - self.bb_mid_pt
+                target = target - self.bb_mid_pt
+            camera.set_pose(position, target)
+        elif isinstance(view, CameraView):
+            self.action.gguip.camera_view = view
+            self.action.update_view()
+        else:
+            warning(f"Camera view of type {type(view)} is not supported.")
+
+    def _render_frame(self) -> None:
+        """Draw the model, grid and axes to the offscreen frame buffer."""
+        glBindFramebuffer(GL_FRAMEBUFFER, self.FBO)
+        glViewport(0, 0, self.width, self.height)
+
+        color = self.action.gguip.color
+        glClearColor(color[0], color[1], color[2], color[3])
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+
+        self.window._clipping_planes()
+
+        if self.model.guip.show:
+            self.model.render(self.action)
+
+        self.window.gl_grid.render(self.action)
+        self.window.gl_axes.render(self.action)
+        self.window.gl_north.render(self.action)
+
+    def _start_readback(self, path: str) -> None:
+        """Queue an asynchronous read back of the current frame into a PBO."""
+        pbo = self.PBOs[self._frame_count % self.n_buffers]
+        self._frame_count += 1
+
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, self.FBO)
+        glReadBuffer(GL_COLOR_ATTACHMENT0)
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+        glReadPixels(
+            0, 0, self.width, self.height, GL_RGBA, GL_UNSIGNED_BYTE, ctypes.c_void_p(0)
+        )
+        fence = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        glBindFramebuffer(GL_READ_FRAMEBUFFER, 0)
+
+        self._pending.append((pbo, fence, path))
+
+        # The oldest PBO is about to be reused, collect its pixels first
+        if len(self._pending) >= self.n_buffers:
+            self._finish_readback()
+
+    def _finish_readback(self) -> None:
+        """Map the oldest pending PBO and hand its pixels to a writer thread."""
+        pbo, fence, path = self._pending.popleft()
+        size = self.width * self.height * 4
+
+        timeout_ns = 1000000000
+        while True:
+            status = glClientWaitSync(fence, GL_SYNC_FLUSH_COMMANDS_BIT, timeout_ns)
+            if status != GL_TIMEOUT_EXPIRED:
+                break
+            debug("Waiting for snapshot read back to complete.")
+        glDeleteSync(fence)
+
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, pbo)
+        ptr = glMapBufferRange(GL_PIXEL_PACK_BUFFER, 0, size, GL_MAP_READ_BIT)
+        pixels = np.frombuffer(ctypes.string_at(ptr, size), dtype=np.uint8)
+        glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+
+        # OpenGL has the origin in the lower left corner, images in the upper left
+        image = pixels.reshape(self.height, self.width, 4)[::-1, :, :3]
+        self._futures.append(self._writer.submit(self._write_image, image, path))
+
+    def _flush(self) -> None:
+        """Collect all pending frames and wait for the writers to finish."""
+        while len(self._pending) > 0:
+            self._finish_readback()
+
+        for future in self._futures:
+            future.result()
+        self._futures = []
+
+    def _write_image(self, image: np.ndarray, path: str) -> None:
+        """Encode and write a single image to disk."""
+        Image.fromarray(np.ascontiguousarray(image)).save(path)
+        debug(f"Snapshot written to {path}")
+
+    def _get_file_name(self, prefix, view, key, shading: Shading, ext: str) -> str:
+        """Compose a file name from the parameters of a snapshot."""
+        if isinstance(view, CameraPose):
+            view_name = view.name
+        else:
+            view_name = CameraView(view).name.lower()
+
+        parts = [prefix, view_name]
+        if key is not None:
+            parts.append(key)
+        parts.append(Shading(shading).name.lower())
+        name = "_".join(parts)
+        name = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+        return f"{name}.{ext}"
@@ -10,7 +10,11 @@ from dtcc_core.model import (
     VolumeMesh,
     LineString,
     MultiLineString,
+    City,
+    Building,
+    Terrain,
 )
+from dtcc_core.model.object.object import GeometryType
 from shapely.geometry import Point
 from shapely.geometry import LineString as ShapelyLineString
 from dtcc_viewer.utils import Direction
@@ -135,6 +139,25 @@ class BoundingBox:
         max_pt = np.array([self.xmax, self.ymax, self.zmax])
         self.size = np.linalg.norm(max_pt - min_pt)
 
+    def expand(self, vertices: np.ndarray):
+        """Grow the bounding box to include more vertices, given as a flat array."""
+        if len(vertices) == 0:
+            return
+        self.xmin = min(self.xmin, vertices[0::3].min())
+        self.xmax = max(self.xmax, vertices[0::3].max())
+        self.ymin = min(self.ymin, vertices[1::3].min())
+        self.ymax = max(self.ymax, vertices[1::3].max())
+        self.zmin = min(self.zmin, vertices[2::3].min())
+        self.zmax = max(self.zmax, vertices[2::3].max())
+
+        self.xdom = self.xmax - self.xmin
+        self.ydom = self.ymax - self.ymin
+        self.zdom = self.zmax - self.zmin
+
+        self.calc_mid_point()
+        self.calc_center_vec()
+        self.calc_size()
+
     def print(self):
         print("Bounds: ")
         print([self.xmin, self.xmax, self.ymin, self.ymax, self.zmin, self.zmax])
@@ -151,6 +174,274 @@ class BoundingBox:
 # ---------- load CityJSON helper functions --------#
 
 
+def frustum_planes(mvp: np.ndarray) -> np.ndarray:
+    """Extract the six frustum planes from a model view projection matrix.
+
+    The matrix is expected in the pyrr layout, which transforms row vectors, so the
+    planes are combinations of its columns. Each plane is returned as (a, b, c, d)
+    with the inside of the frustum where a*x + b*y + c*z + d >= 0.
+    """
+    m = np.asarray(mvp, dtype=np.float64)
+    planes = np.array(
+        [
+            m[:, 3] + m[:, 0],  # Left
+            m[:, 3] - m[:, 0],  # Right
+            m[:, 3] + m[:, 1],  # Bottom
+            m[:, 3] - m[:, 1],  # Top
+            m[:, 3] + m[:, 2],  # Near
+            m[:, 3] - m[:, 2],  # Far
+        ]
+    )
+    return planes
+
+
+def aabbs_in_frustum(planes: np.ndarray, mins: np.ndarray, maxs: np.ndarray):
+    """Test which axis aligned bounding boxes are inside or intersect a frustum.
+
+    For each plane only the box corner furthest along the plane normal is tested,
+    a box is culled if that corner is outside any of the planes. Boxes close to the
+    frustum corners may be kept even if they are outside, which is safe for culling.
+    """
+    normals = planes[:, 0:3]
+    # Corner of each box furthest in the direction of each plane normal
+    corners = np.where(normals[None, :, :] > 0, maxs[:, None, :], mins[:, None, :])
+    dists = np.einsum("bpi,pi->bp", corners, normals) + planes[:, 3]
+    return np.all(dists >= 0.0, axis=1)
+
+
+def projected_sizes(
+    mvp: np.ndarray, proj: np.ndarray, centers: np.ndarray, radii: np.ndarray, height
+):
+    """Approximate on screen diameter in pixels of spheres.
+
+    Works for both perspective and orthographic projections since the depth scaling
+    comes from the w component of the clip space position, which is 1 for the latter.
+    """
+    centers_h = np.column_stack((centers, np.ones(len(centers))))
+    w = np.abs(centers_h @ np.asarray(mvp, dtype=np.float64)[:, 3])
+    scale = np.asarray(proj, dtype=np.float64)[1, 1]
+    return radii * scale * height / np.maximum(w, 1e-9)
+
+
+def _spread_bits(x: np.ndarray) -> np.ndarray:
+    """Insert two zero bits between each of the lowest 21 bits."""
+    x = x.astype(np.uint64) & np.uint64(0x1FFFFF)
+    x = (x | (x << np.uint64(32))) & np.uint64(0x1F00000000FFFF)
+    x = (x | (x << np.uint64(16))) & np.uint64(0x1F0000FF0000FF)
+    x = (x | (x << np.uint64(8))) & np.uint64(0x100F00F00F00F00F)
+    x = (x | (x << np.uint64(4))) & np.uint64(0x10C30C30C30C30C3)
+    x = (x | (x << np.uint64(2))) & np.uint64(0x1249249249249249)
+    return x
+
+
+def morton_codes(points: np.ndarray, bits: int, lo=None, size=None) -> np.ndarray:
+    """Morton codes of points on a grid with 2^bits cells along each axis.
+
+    The points are quantized to the cells of a box and the bits of the x, y and z
+    cell coordinates are interleaved, with x in the lowest bit. Points outside the
+    box are clamped to the cells on its boundary.
+
+    Parameters
+    ----------
+    points : np.ndarray
+        Point coordinates [n x 3].
+    bits : int
+        Bits per axis, at most 21.
+    lo : array_like, optional
+        Min corner of the box, the min corner of the points if None.
+    size : array_like, optional
+        Size of the box, scalar or per axis, the extent of the points if None.
+
+    Returns
+    -------
+    np.ndarray
+        Codes as uint64 [n].
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.uint64)
+
+    lo = points.min(axis=0) if lo is None else np.asarray(lo, dtype=np.float64)
+    if size is None:
+        size = points.max(axis=0) - lo
+    size = np.maximum(np.asarray(size, dtype=np.float64), 1e-12)
+
+    res = 2**bits
+    cells = np.clip(np.floor((points - lo) / size * res), 0, res - 1)
+    cells = cells.astype(np.uint32)
+    codes = _spread_bits(cells[:, 0])
+    codes |= _spread_bits(cells[:, 1]) << np.uint64(1)
+    codes |= _spread_bits(cells[:, 2]) << np.uint64(2)
+    return codes
+
+
+def voxel_downsample(points: np.ndarray, voxel_size: float, data: dict = None):
+    """Replace the points in each cell of a voxel grid by their centroid.
+
+    The cell of each point is hashed to a single integer key and the occupied cells
+    are found with np.unique. Centroids and data averages are then computed for all
+    cells at once with np.bincount, weighted by the coordinates or the data values.
+
+    Parameters
+    ----------
+    points : np.ndarray
+        Point coordinates [n x 3].
+    voxel_size : float
+        Side length of the voxels.
+    data : dict, optional
+        Data arrays with one value per point, averaged over each voxel.
+
+    Returns
+    -------
+    tuple[np.ndarray, dict]
+        Centroids [m x 3] and the averaged data arrays.
+    """
+    points = np.asarray(points).reshape(-1, 3)
+    data = {} if data is None else data
+    if len(points) == 0:
+        return points.copy(), {key: np.asarray(v)[0:0] for key, v in data.items()}
+
+    cells = np.floor((points - points.min(axis=0)) / voxel_size).astype(np.int64)
+    dims = cells.max(axis=0) + 1
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    (_, inverse, counts) = np.unique(keys, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+
+    centroids = np.empty((len(counts), 3), dtype=np.float64)
+    for i in range(3):
+        centroids[:, i] = np.bincount(inverse, weights=points[:, i]) / counts
+
+    averages = {}
+    for key, values in data.items():
+        averages[key] = np.bincount(inverse, weights=values) / counts
+
+    return centroids, averages
+
+
+def voxel_downsample_chunks(chunks, voxel_sizes: list, lo) -> list[tuple]:
+    """Voxel downsample chunks of points at several voxel sizes in one pass.
+
+    Like voxel_downsample, but the voxel grids start at a common min corner, so
+    that the sums over the points of a voxel can be accumulated over chunks. The
+    sums of each chunk are merged into those of the earlier chunks, which keeps the
+    memory bounded by the chunk size and the number of occupied voxels.
+
+    Parameters
+    ----------
+    chunks : Iterable
+        Tuples with point coordinates [n x 3] and a dict of data arrays [n].
+    voxel_sizes : list
+        Side length of the voxels of each grid.
+    lo : array_like
+        Min corner of all points.
+
+    Returns
+    -------
+    list[tuple[np.ndarray, dict]]
+        Centroids [m x 3] and the averaged data arrays for each voxel size.
+    """
+    lo = np.asarray(lo, dtype=np.float64)
+    grids = [None] * len(voxel_sizes)  # (keys, counts, sums) for each voxel size
+    names = None
+
+    for points, data in chunks:
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        names = list(data.keys()) if names is None else names
+        columns = [np.asarray(data[n], dtype=np.float64) for n in names]
+        values = np.column_stack([points] + columns)
+
+        for i, voxel_size in enumerate(voxel_sizes):
+            cells = np.floor((points - lo) / voxel_size).astype(np.int64)
+            # Cells are below 2^21 along each axis for the voxel level sizes
+            keys = (cells[:, 0] << 42) | (cells[:, 1] << 21) | cells[:, 2]
+            if grids[i] is not None:
+                (old_keys, old_counts, old_sums) = grids[i]
+                keys = np.concatenate((old_keys, keys))
+                counts = np.concatenate((old_counts, np.ones(len(points))))
+                sums = np.vstack((old_sums, values))
+            else:
+                (counts, sums) = (np.ones(len(points)), values)
+
+            (keys, inverse) = np.unique(keys, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            merged = np.empty((len(keys), sums.shape[1]), dtype=np.float64)
+            for j in range(sums.shape[1]):
+                merged[:, j] = np.bincount(inverse, weights=sums[:, j])
+            grids[i] = (keys, np.bincount(inverse, weights=counts), merged)
+
+    levels = []
+    for grid in grids:
+        if grid is None:
+            levels.append((np.zeros((0, 3)), {n: np.zeros(0) for n in names or []}))
+            continue
+        (_, counts, sums) = grid
+        means = sums / counts[:, None]
+        averages = {n: means[:, 3 + j] for j, n in enumerate(names)}
+        levels.append((means[:, 0:3], averages))
+    return levels
+
+
+def voxel_levels(
+    chunks_factory, n_points: int, lo, hi, max_levels: int, min_points: int, max_points
+) -> list[tuple]:
+    """Voxel downsampled levels of a point cloud, from fine to coarse.
+
+    The first voxel size is twice the mean point spacing, estimated from the
+    largest face of the bounding box as if the points cover a surface, as is the
+    case for most scans. It is doubled until the estimated number of voxels is at
+    most max_points, so that even the finest level of a very large point cloud is
+    small enough to draw at once. A few more sizes, each twice the last, are then
+    downsampled in one pass over the chunks. Levels with fewer than min_points
+    points, or more than half the points of the previous level, are dropped.
+
+    Parameters
+    ----------
+    chunks_factory : Callable
+        Returns an iterable over tuples with points [n x 3] and a data dict.
+    n_points : int
+        Number of points.
+    lo : array_like
+        Min corner of the points.
+    hi : array_like
+        Max corner of the points.
+    max_levels : int
+        Max number of levels.
+    min_points : int
+        Min number of points of a level.
+    max_points : int
+        Max estimated number of points of the finest level.
+
+    Returns
+    -------
+    list[tuple]
+        Voxel size, centroids [m x 3] and averaged data for each level.
+    """
+    size = np.asarray(hi, dtype=np.float64) - np.asarray(lo, dtype=np.float64)
+    area = max(size[0] * size[1], size[0] * size[2], size[1] * size[2])
+    spacing = np.sqrt(area / max(n_points, 1))
+    if spacing <= 0:
+        return []
+
+    voxel_size = 2.0 * spacing
+    while area / voxel_size**2 > max_points or np.max(size) / voxel_size >= 2**21:
+        voxel_size *= 2.0
+
+    # Extra sizes in case some are dropped, e.g. for volumetric point clouds
+    voxel_sizes = [voxel_size * 2**i for i in range(max_levels + 2)]
+    downsampled = voxel_downsample_chunks(chunks_factory(), voxel_sizes, lo)
+
+    levels = []
+    n_last = n_points
+    for voxel_size, (centroids, averages) in zip(voxel_sizes, downsampled):
+        if len(centroids) < min_points or len(levels) == max_levels:
+            break
+        elif len(centroids) > n_last // 2:
+            continue
+        n_last = len(centroids)
+        levels.append((voxel_size, centroids, averages))
+    return levels
+
+
 def rodrigues_rotation_matrix(a, b):
     a = a / np.linalg.norm(a)
     b = b / np.linalg.norm(b)
@@ -561,6 +852,118 @@ def double_sine_wave_surface(x_range, y_range, n_x, n_y, freq_x, freq_y):
     return X, Y, Z
 
 
+def grid_surface_mesh(X: np.ndarray, Y: np.ndarray, Z: np.ndarray) -> Mesh:
+    """Triangulate a structured grid of points, e.g. from double_sine_wave_surface.
+
+    Parameters
+    ----------
+    X, Y, Z : np.ndarray
+        Coordinate arrays of shape [n_y x n_x] as returned by np.meshgrid.
+
+    Returns
+    -------
+    Mesh
+        Mesh with two triangles per grid cell.
+    """
+    n_y, n_x = X.shape
+    vertices = np.column_stack((X.ravel(), Y.ravel(), Z.ravel()))
+
+    # Lower left corner index of every cell
+    i, j = np.meshgrid(np.arange(n_x - 1), np.arange(n_y - 1))
+    v0 = (j * n_x + i).ravel()
+    v1 = v0 + 1
+    v2 = v0 + n_x
+    v3 = v2 + 1
+
+    faces = np.empty((2 * len(v0), 3), dtype=int)
+    faces[0::2] = np.column_stack((v0, v1, v3))
+    faces[1::2] = np.column_stack((v0, v3, v2))
+    return Mesh(vertices=vertices, faces=faces)
+
+
+def create_synthetic_city(
+    n_x: int,
+    n_y: int,
+    spacing: float = 30.0,
+    footprint: float = 15.0,
+    height_range: tuple = (5.0, 40.0),
+    terrain_resolution: float = 10.0,
+    seed: Optional[int] = None,
+) -> City:
+    """Create a city with a regular grid of box shaped buildings on a wavy terrain.
+
+    The city is intended for testing and benchmarking where real city models are
+    not available or too large to ship with the repository.
+
+    Parameters
+    ----------
+    n_x : int
+        Number of buildings in the x-direction.
+    n_y : int
+        Number of buildings in the y-direction.
+    spacing : float, optional
+        Distance between building centers (default is 30.0).
+    footprint : float, optional
+        Side length of the square building footprints (default is 15.0).
+    height_range : tuple, optional
+        Min and max building heights (default is (5.0, 40.0)).
+    terrain_resolution : float, optional
+        Distance between terrain grid points (default is 10.0).
+    seed : int, optional
+        Seed for reproducible building heights.
+
+    Returns
+    -------
+    City
+        City with n_x * n_y LOD1 buildings and a terrain mesh.
+    """
+    rng = np.random.default_rng(seed)
+    x_max = n_x * spacing
+    y_max = n_y * spacing
+
+    # Terrain with a gentle double sine wave, amplitude 2 m
+    n_tx = max(2, int(x_max / terrain_resolution) + 1)
+    n_ty = max(2, int(y_max / terrain_resolution) + 1)
+    freq = 2.0 * np.pi / (4.0 * spacing)
+    X, Y, Z = double_sine_wave_surface((0, x_max), (0, y_max), n_tx, n_ty, freq, freq)
+    terrain = Terrain()
+    terrain.add_geometry(grid_surface_mesh(X, Y, Z), GeometryType.MESH)
+
+    heights = rng.uniform(height_range[0], height_range[1], n_x * n_y)
+    half = footprint / 2.0
+    corners = np.array([[-half, -half], [half, -half], [half, half], [-half, half]])
+
+    buildings = []
+    for idx in range(n_x * n_y):
+        cx = (idx % n_x + 0.5) * spacing
+        cy = (idx // n_x + 0.5) * spacing
+        ground = np.sin(freq * cx) + np.sin(freq * cy)
+        roof = ground + heights[idx]
+        xy = corners + np.array([cx, cy])
+
+        surfaces = [Surface(vertices=np.column_stack((xy, np.full(4, roof))))]
+        for k in range(4):
+            a, b = xy[k], xy[(k + 1) % 4]
+            wall = np.array(
+                [
+                    [a[0], a[1], ground],
+                    [b[0], b[1], ground],
+                    [b[0], b[1], roof],
+                    [a[0], a[1], roof],
+                ]
+            )
+            surfaces.append(Surface(vertices=wall))
+
+        building = Building()
+        building.add_geometry(MultiSurface(surfaces=surfaces), GeometryType.LOD1)
+        buildings.append(building)
+
+    city = City()
+    city.add_terrain(terrain)
+    city.add_buildings(buildings)
+    return city
+
+
 def create_cylinder_2(p, w, radius, height, num_segments=20):
 
     w = w / np.linalg.norm(w)
@@ -8,8 +8,11 @@ from dtcc_viewer.logging import info, warning, debug
 from dtcc_viewer.opengl.parameters import GuiParametersGlobal
 from dtcc_viewer.opengl.action import Action
 from dtcc_viewer.opengl.gl_points import GlPoints
+from dtcc_viewer.opengl.gl_points_stream import GlPointsStream
 from dtcc_viewer.opengl.gl_lines import GlLines
 from dtcc_viewer.opengl.gl_raster import GlRaster
+from dtcc_viewer.opengl.gl_raster_tiled import GlRasterTiled
+from dtcc_viewer.opengl.gl_volume import GlVolume
 from dtcc_viewer.opengl.gl_object import GlObject
 from dtcc_viewer.opengl.gl_grid import GlGrid
 from dtcc_viewer.opengl.gl_axes import GlAxes
@@ -29,10 +32,13 @@ from dtcc_viewer.opengl.wrp_mesh import MeshWrapper
 from dtcc_viewer.opengl.wrp_grid import GridWrapper, VolumeGridWrapper
 from dtcc_viewer.opengl.wrp_linestring import LineStringWrapper, MultiLineStringWrapper
 from dtcc_viewer.opengl.wrp_pointcloud import PointCloudWrapper
+from dtcc_viewer.opengl.wrp_pointcloud_stream import PointCloudStreamWrapper
+from dtcc_viewer.opengl.wrp_point_store import PointStoreWrapper
 from dtcc_viewer.opengl.wrp_surface import SurfaceWrapper, MultiSurfaceWrapper
-from dtcc_viewer.opengl.wrp_raster import RasterWrapper, MultiRasterWrapper
+from dtcc_viewer.opengl.wrp_raster import RasterWrapper, RasterPyramidWrapper
 from dtcc_viewer.opengl.wrp_building import BuildingWrapper
 from dtcc_viewer.opengl.wrp_volume_mesh import VolumeMeshWrapper
+from dtcc_viewer.opengl.wrp_isosurface import IsosurfaceWrapper
 from dtcc_viewer.opengl.wrp_roadnetwork import RoadNetworkWrapper
 
 
@@ -89,7 +95,7 @@ class Window:
     time: float
     time_acum: float
 
-    def __init__(self, width: int, height: int):
+    def __init__(self, width: int, height: int, visible: bool = True):
         """Initialize the OpenGL rendering window and setting up default parameters.
 
         Parameters
@@ -98,6 +104,9 @@ class Window:
             The width of the window in pixels.
         height : int
             The height of the window in pixels.
+        visible : bool, optional
+            Show the window on screen. A hidden window still provides an OpenGL
+            context and is used for offscreen rendering (default is True).
         """
         self.win_width = width
         self.win_height = height
@@ -114,6 +123,7 @@ class Window:
         glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, 3)
         glfw.window_hint(glfw.OPENGL_FORWARD_COMPAT, True)
         glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
+        glfw.window_hint(glfw.VISIBLE, visible)
         self.window = glfw.create_window(
             self.win_width, self.win_height, "DTCC Viewer", None, None
         )  # Create window
@@ -122,14 +132,15 @@ class Window:
             glfw.terminate()
             raise Exception("glfw window can not be created!")
 
-        # Calculate screen position for window
-        primary_monitor = glfw.get_primary_monitor()
-        mode = glfw.get_video_mode(primary_monitor)
+        # Calculate screen position for window, hidden windows may lack a monitor
+        if visible:
+            primary_monitor = glfw.get_primary_monitor()
+            mode = glfw.get_video_mode(primary_monitor)
 
-        x_pos = (mode.size.width - self.win_width) // 2
-        y_pos = (mode.size.height - self.win_height) // 2
+            x_pos = (mode.size.width - self.win_width) // 2
+            y_pos = (mode.size.height - self.win_height) // 2
 
-        glfw.set_window_pos(self.window, x_pos, y_pos)
+            glfw.set_window_pos(self.window, x_pos, y_pos)
 
         # Calls can be made after the contex is made current
         glfw.make_context_current(self.window)
@@ -181,8 +192,12 @@ class Window:
                     self.gl_objects.append(GlMesh(wrapper.mesh_ter))
                 for grid_wrp in wrapper.grid_wrps:
                     self.gl_objects.append(GlLines(grid_wrp.lines_wrp))
+                    self._add_grid_fields(grid_wrp)
                 for vgrid_wrp in wrapper.vgrid_wrps:
                     self.gl_objects.append(GlLines(vgrid_wrp.lines_wrp))
+                    if len(vgrid_wrp.fields) > 0:
+                        self.gl_objects.append(GlVolume(vgrid_wrp))
+                    self._add_isosurface(vgrid_wrp.iso_wrp)
                 for pc_wrp in wrapper.pc_wrps:
                     self.gl_objects.append(GlPoints(pc_wrp))
 
@@ -204,10 +219,15 @@ class Window:
                 for mesh_wrp in wrapper.vmesh_wrps:
                     self.gl_objects.append(GlMesh(mesh_wrp.mesh_vol_wrp))
                     self.gl_objects.append(GlMesh(mesh_wrp.mesh_env_wrp))
+                    self._add_isosurface(mesh_wrp.iso_wrp)
                 for grd_wrp in wrapper.grd_wrps:
                     self.gl_objects.append(GlLines(grd_wrp.lines_wrp, False))
+                    self._add_grid_fields(grd_wrp)
                 for vgrd_wrp in wrapper.vgrd_wrps:
                     self.gl_objects.append(GlLines(vgrd_wrp.lines_wrp, False))
+                    if len(vgrd_wrp.fields) > 0:
+                        self.gl_objects.append(GlVolume(vgrd_wrp))
+                    self._add_isosurface(vgrd_wrp.iso_wrp)
 
             elif isinstance(wrapper, MeshWrapper):
                 self.gl_objects.append(GlMesh(wrapper))
@@ -239,26 +259,36 @@ class Window:
             elif isinstance(wrapper, PointCloudWrapper):
                 self.gl_objects.append(GlPoints(wrapper))
 
+            elif isinstance(wrapper, PointCloudStreamWrapper):
+                self.gl_objects.append(GlPointsStream(wrapper))
+
+            elif isinstance(wrapper, PointStoreWrapper):
+                self.gl_objects.append(GlPoints(wrapper))
+
             elif isinstance(wrapper, GridWrapper):
                 if wrapper.lines_wrp is not None:
                     self.gl_objects.append(GlLines(wrapper.lines_wrp, False))
+                self._add_grid_fields(wrapper)
 
             elif isinstance(wrapper, VolumeGridWrapper):
                 if wrapper.lines_wrp is not None:
                     self.gl_objects.append(GlLines(wrapper.lines_wrp, False))
+                if len(wrapper.fields) > 0:
+                    self.gl_objects.append(GlVolume(wrapper))
+                self._add_isosurface(wrapper.iso_wrp)
 
             elif isinstance(wrapper, VolumeMeshWrapper):
                 if wrapper.mesh_vol_wrp is not None:
                     self.gl_objects.append(GlMesh(wrapper.mesh_vol_wrp))
                 if wrapper.mesh_env_wrp is not None:
                     self.gl_objects.append(GlMesh(wrapper.mesh_env_wrp))
+                self._add_isosurface(wrapper.iso_wrp)
+
+            elif isinstance(wrapper, RasterPyramidWrapper):
+                self.gl_objects.append(GlRasterTiled(wrapper))
 
             elif isinstance(wrapper, RasterWrapper):
                 self.gl_objects.append(GlRaster(wrapper))
-
-            elif isinstance(wrapper, MultiRasterWrapper):
-                for raster_wrp in wrapper.raster_wrappers:
-                    self.gl_objects.append(GlRaster(raster_wrp))
             else:
                 warning(f"Wrapper type {type(wrapper)} not supported!")
 
@@ -286,6 +316,18 @@ class Window:
 
         return True
 
+    def _add_grid_fields(self, grid_wrp: GridWrapper):
+        """Add the fields of a grid as rasters, with only the first one shown."""
+        for i, field_wrp in enumerate(grid_wrp.field_wrps):
+            gl_raster = GlRaster(field_wrp)
+            gl_raster.guip.show = i == 0
+            self.gl_objects.append(gl_raster)
+
+    def _add_isosurface(self, iso_wrp: IsosurfaceWrapper):
+        """Add the isosurface of a volume field as a mesh, even if it is empty."""
+        if iso_wrp is not None:
+            self.gl_objects.append(GlMesh(iso_wrp.mesh_wrp))
+
     def render(self, scene: Scene):
         """Render single or multiple objects.
 
@@ -345,6 +387,9 @@ class Window:
             if self.action.picking:
                 self.model.evaluate_picking(self.action)
 
+            # Collect picking results and update the object under the cursor
+            self.model.update_picking(self.action)
+
             # Render the model
             if self.model.guip.show:
                 self.model.render(self.action)
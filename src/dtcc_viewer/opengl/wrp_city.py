@@ -50,9 +50,9 @@ class CityWrapper(Wrapper):
     bb_global: BoundingBox = None
     mesh_bld: MeshWrapper = None
     mesh_ter: MeshWrapper = None
-    grid_wrps: list[GridWrapper] = []
-    vgrid_wrps: list[VolumeGridWrapper] = []
-    pc_wrps: list[PointCloudWrapper] = []
+    grid_wrps: list[GridWrapper]
+    vgrid_wrps: list[VolumeGridWrapper]
+    pc_wrps: list[PointCloudWrapper]
 
     def __init__(self, name: str, city: City, mts: int, view_pointcloud=False) -> None:
         """Initialize the MeshData object.
@@ -68,6 +68,9 @@ class CityWrapper(Wrapper):
         """
         self.name = name
         self.dict_data = {}
+        self.grid_wrps = []
+        self.vgrid_wrps = []
+        self.pc_wrps = []
 
         # Read the city model and generate the mesh geometry for buildings and terrain
         (mesh_t, parts_t) = self._get_terrain_mesh(city)
@@ -1,40 +1,111 @@
 import numpy as np
 from dtcc_viewer.utils import *
-from dtcc_viewer.opengl.utils import BoundingBox
+from dtcc_viewer.opengl.utils import BoundingBox, RasterType
 from dtcc_viewer.logging import info, warning
 from shapely.geometry import LineString, Point, MultiLineString
 from dtcc_viewer.opengl.wrp_linestring import LineStringWrapper, MultiLineStringWrapper
 from dtcc_viewer.opengl.wrp_pointcloud import PointCloudWrapper
 from dtcc_viewer.opengl.wrp_lines import LinesWrapper
+from dtcc_viewer.opengl.wrp_raster import RasterWrapper
+from dtcc_viewer.opengl.wrp_isosurface import IsosurfaceWrapper
+from dtcc_viewer.opengl.isosurface import marching_cubes
 from dtcc_viewer.opengl.wrapper import Wrapper
 from dtcc_core.model import Grid, VolumeGrid
 from typing import Any
 
 
+class GridFieldWrapper(RasterWrapper):
+    """Wrapper for rendering a scalar field of a grid as a raster texture.
+
+    The values are stored as a single channel raster with one texel per grid point,
+    so the field can be drawn by GlRaster on a single quad. The quad extends half a
+    grid spacing beyond the bounds, so each grid point is at the center of a texel.
+    """
+
+    def __init__(self, name: str, values: np.ndarray, grid: Grid, mts: int) -> None:
+        """Initialize the GridFieldWrapper object.
+
+        Parameters
+        ----------
+        name : str
+            Name of the field.
+        values : np.ndarray
+            Value for each grid point, in the order of the grid coordinates.
+        grid : Grid
+            Grid with the field.
+        mts : int
+            Max texture size.
+        """
+        self.name = name
+        self.dict_data = {}
+        self.type = RasterType.Data
+
+        (nx, ny) = (grid.width + 1, grid.height + 1)
+        data = np.asarray(values).reshape(ny, nx)
+        step = int(np.ceil(max(nx, ny) / mts))
+        if step > 1:
+            warning(f"Grid field '{name}' exceeds the max texture size. Subsampled.")
+            data = data[::step, ::step]
+
+        self.data = np.ascontiguousarray(data, dtype=self._get_texture_dtype(data))
+
+        # Edges of the quad, half a texel spacing outside the first and last texel
+        bounds = grid.bounds
+        dx = step * (bounds.xmax - bounds.xmin) / max(grid.width, 1)
+        dy = step * (bounds.ymax - bounds.ymin) / max(grid.height, 1)
+        (rows, cols) = self.data.shape
+        xs = [bounds.xmin - dx / 2.0, bounds.xmin + (cols - 0.5) * dx]
+        ys = [bounds.ymin - dy / 2.0, bounds.ymin + (rows - 0.5) * dy]
+
+        corners = np.array([[0, 0], [1, 0], [0, 1], [1, 0], [0, 1], [1, 1]])
+        vertices = np.zeros((6, 5), dtype="float32")
+        vertices[:, 0] = np.take(xs, corners[:, 0])
+        vertices[:, 1] = np.take(ys, corners[:, 1])
+        vertices[:, 3:5] = corners
+        self._create_raster_mesh(None, vertices.flatten())
+
+
 class GridWrapper(Wrapper):
-    """Wrapper for rendering a volume grid with lines.
+    """Wrapper for rendering a grid and its scalar fields.
+
+    Each scalar field is drawn as a raster texture on a single quad. The grid
+    itself is drawn with lines between all grid points if it is small and has no
+    fields, otherwise as a sparse outline with a limited number of grid lines.
 
     Attributes
     ----------
     name : str
         Name of the line strings collection.
-    lss_wrp : LineStringsWrapper
-        LineStringWrapper for line strings.
+    lines_wrp : LinesWrapper
+        Lines between the grid points or a sparse outline of the grid.
+    field_wrps : list[GridFieldWrapper]
+        Raster wrappers for the scalar fields.
     """
 
     name: str
     lines_wrp: LinesWrapper
+    field_wrps: list[GridFieldWrapper]
+
+    max_line_points = 100000  # Max number of grid points connected with lines
+    max_outline_lines = 32  # Max number of outline lines along each axis
 
     def __init__(self, name: str, grid: Grid, mts: int) -> None:
         """Initialize a line string wrapper object."""
         self.name = name
-        vertices, indices = self._connect_grid_points(grid)
-        data_dict = self._get_fields_data(grid)
-        self.lines_wrp = LinesWrapper(name, vertices, indices, mts, data_dict)
+        self.field_wrps = self._get_field_wrappers(grid, mts)
+
+        n_points = (grid.width + 1) * (grid.height + 1)
+        if len(self.field_wrps) == 0 and n_points <= self.max_line_points:
+            vertices, indices = self._connect_grid_points(grid)
+        else:
+            vertices, indices = self._connect_outline(grid)
+        self.lines_wrp = LinesWrapper(name, vertices, indices, mts)
 
     def preprocess_drawing(self, bb_global: BoundingBox):
         if self.lines_wrp is not None:
             self.lines_wrp.preprocess_drawing(bb_global)
+        for field_wrp in self.field_wrps:
+            field_wrp.preprocess_drawing(bb_global)
 
     def get_vertex_positions(self):
         vertices = np.array([])
@@ -76,53 +147,147 @@ class GridWrapper(Wrapper):
 
         return vertices, indices
 
-    def _get_fields_data(self, grid: Grid) -> dict:
-        data_dict = {}
-        for i, field in enumerate(grid.fields):
-            if field.dim == 1:
-                data_dict[field.name] = field.values
-                info(f"Field {i} has been added to the data dictionary")
+    def _connect_outline(self, grid: Grid):
+        """Connect the bounds and every n:th grid line along each axis."""
+        bounds = grid.bounds
+        xs = self._get_outline_values(bounds.xmin, bounds.xmax, grid.width)
+        ys = self._get_outline_values(bounds.ymin, bounds.ymax, grid.height)
+
+        # Lines along the y-axis for each x-value, then along the x-axis
+        starts = [[x, bounds.ymin] for x in xs] + [[bounds.xmin, y] for y in ys]
+        ends = [[x, bounds.ymax] for x in xs] + [[bounds.xmax, y] for y in ys]
+        n_lines = len(starts)
+
+        vertices = np.zeros((2 * n_lines, 3))
+        vertices[0::2, 0:2] = starts
+        vertices[1::2, 0:2] = ends
+        indices = np.arange(2 * n_lines, dtype="uint32").reshape(n_lines, 2)
+        return vertices, indices
+
+    def _get_outline_values(self, vmin: float, vmax: float, n_cells: int):
+        """Coordinates of every n:th grid line, including both bounds."""
+        step = int(np.ceil(max(n_cells, 1) / (self.max_outline_lines - 1)))
+        idxs = np.append(np.arange(0, n_cells, step), n_cells)
+        return vmin + idxs * (vmax - vmin) / max(n_cells, 1)
+
+    def _get_field_wrappers(self, grid: Grid, mts: int) -> list[GridFieldWrapper]:
+        field_wrps = []
+        n_points = (grid.width + 1) * (grid.height + 1)
+        for field in grid.fields:
+            values = np.asarray(field.values)
+            if field.dim == 1 and values.size == n_points:
+                field_name = f"{self.name} {field.name}"
+                field_wrps.append(GridFieldWrapper(field_name, values, grid, mts))
+                info(f"Field called {field.name} has been added as a raster")
             elif field.dim != 1:
                 warning("Viewer only supports scalar fields in current implementation")
                 warning(f"Field '{field.name}' has dimension != 1. Skipping.")
+            else:
+                warning(f"Field '{field.name}' does not match the grid. Skipping.")
 
-        return data_dict
+        return field_wrps
 
 
 class VolumeGridWrapper(Wrapper):
-    """Wrapper for rendering a volume grid with lines.
+    """Wrapper for rendering a volume grid and its scalar fields.
+
+    The fields are kept as 3D arrays in the order of the grid points, to be drawn
+    as 3D textures by ray marching or as slices. Lines between the grid points are
+    only created for small grids, larger grids are outlined by their bounds.
 
     Attributes
     ----------
     name : str
         Name of the line strings collection.
-    lss_wrp : LineStringsWrapper
-        LineStringWrapper for line strings.
+    lines_wrp : LinesWrapper
+        Lines between the grid points, or the edges of the bounds for large grids.
+    fields : dict
+        Scalar fields as float32 arrays [ny x nx x nz], by name.
+    fields_min_max : dict
+        Min and max value of each field, by name.
+    shape : tuple
+        Number of grid points along y, x and z.
+    corners : np.ndarray
+        Corners of the grid bounds [8 x 3].
+    origin : np.ndarray
+        Coordinates of the first grid point.
+    spacing : np.ndarray
+        Distance between the grid points along x, y and z.
+    iso_wrp : IsosurfaceWrapper
+        Isosurface of the fields, None for grids without fields.
+    bb_local : BoundingBox
+        Local bounding box of the grid.
+    bb_global : BoundingBox
+        Global bounding box for the entire scene.
     """
 
     name: str
     lines_wrp: LinesWrapper
+    fields: dict
+    fields_min_max: dict
+    shape: tuple
+    corners: np.ndarray
+    origin: np.ndarray
+    spacing: np.ndarray
+    iso_wrp: IsosurfaceWrapper
+    bb_local: BoundingBox
+    bb_global: BoundingBox
+
+    max_line_points = 100000  # Max number of grid points connected with lines
 
     def __init__(self, name: str, volume_grid: VolumeGrid, mts: int) -> None:
         """Initialize a line string wrapper object."""
         self.name = name
-        # mls = self._create_gridlines(volume_grid)
-        vertices, indices = self._connect_grid_points(volume_grid)
-        data_dict = self._get_fields_data(volume_grid)
+        nx = volume_grid.width + 1
+        ny = volume_grid.height + 1
+        nz = volume_grid.depth + 1
+        self.shape = (ny, nx, nz)
+        self.fields, self.fields_min_max = self._get_volume_fields(volume_grid)
+
+        bounds = volume_grid.bounds
+        self.corners = np.array(
+            [
+                [x, y, z]
+                for z in (bounds.zmin, bounds.zmax)
+                for y in (bounds.ymin, bounds.ymax)
+                for x in (bounds.xmin, bounds.xmax)
+            ],
+            dtype="float64",
+        )
+        self.origin = np.array([bounds.xmin, bounds.ymin, bounds.zmin])
+        self.spacing = (self.corners[7] - self.corners[0]) / np.maximum(
+            [nx - 1, ny - 1, nz - 1], 1
+        )
+
+        self.iso_wrp = None
+        if len(self.fields) > 0:
+            self.iso_wrp = IsosurfaceWrapper(
+                f"{name} isosurface", self._extract_isosurface, self.fields_min_max, mts
+            )
+
+        if nx * ny * nz <= self.max_line_points:
+            vertices, indices = self._connect_grid_points(volume_grid)
+            data_dict = self._get_fields_data(volume_grid)
+        else:
+            vertices, indices = self._connect_corners()
+            data_dict = None
         self.lines_wrp = LinesWrapper(name, vertices, indices, mts, data_dict)
 
     def preprocess_drawing(self, bb_global: BoundingBox):
+        self.bb_global = bb_global
+        self.corners += bb_global.center_vec
+        self.bb_local = BoundingBox(self.corners.flatten())
         if self.lines_wrp is not None:
             self.lines_wrp.preprocess_drawing(bb_global)
+        if self.iso_wrp is not None:
+            self.iso_wrp.preprocess_drawing(bb_global)
 
     def get_vertex_positions(self):
-        vertices = np.array([])
+        return self.corners.flatten()
 
-        if self.lines_wrp is not None:
-            vertex_pos = self.lines_wrp.get_vertex_positions()
-            vertices = np.concatenate((vertices, vertex_pos), axis=0)
-
-        return vertices
+    def _extract_isosurface(self, key: str, value: float):
+        """Extract the isosurface of a field by marching cubes."""
+        return marching_cubes(self.fields, key, value, self.origin, self.spacing)
 
     def _connect_grid_points(self, volume_grid: VolumeGrid):
         """Connect the points in the grid with lines."""
@@ -160,6 +325,36 @@ class VolumeGridWrapper(Wrapper):
         indices = np.array(indices, dtype="uint32")
         return coords, indices
 
+    def _connect_corners(self):
+        """Connect the corners of the bounds with lines."""
+        indices = [[0, 1], [2, 3], [4, 5], [6, 7], [0, 2], [1, 3]]
+        indices += [[4, 6], [5, 7], [0, 4], [1, 5], [2, 6], [3, 7]]
+        return self.corners.copy(), np.array(indices, dtype="uint32")
+
+    def _get_volume_fields(self, volume_grid: VolumeGrid) -> tuple[dict, dict]:
+        """Scalar fields and the magnitude of vector fields as 3D arrays."""
+        fields = {}
+        n_points = int(np.prod(self.shape))
+        for field in volume_grid.fields:
+            values = np.asarray(field.values, dtype="float32")
+            if field.dim == 1 and values.size == n_points:
+                fields[field.name] = values.reshape(self.shape)
+            elif field.dim == 3 and values.size == 3 * n_points:
+                magnitude = np.linalg.norm(values.reshape(n_points, 3), axis=1)
+                fields[field.name + " magnitude"] = magnitude.reshape(self.shape)
+            else:
+                warning(f"Field '{field.name}' does not match the grid. Skipping.")
+
+        min_max = {}
+        for key, values in fields.items():
+            finite = values[np.isfinite(values)]
+            if finite.size > 0:
+                min_max[key] = [float(finite.min()), float(finite.max())]
+            else:
+                min_max[key] = [0.0, 0.0]
+            info(f"Field called {key} has been added as a volume")
+        return fields, min_max
+
     def _get_fields_data(self, volume_grid: VolumeGrid) -> dict:
         data_dict = {}
         for i, field in enumerate(volume_grid.fields):
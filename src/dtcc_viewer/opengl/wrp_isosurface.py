@@ -0,0 +1,162 @@
+import threading
+import numpy as np
+from typing import Callable
+from dtcc_core.model import Mesh
+from dtcc_viewer.logging import info, warning, debug
+from dtcc_viewer.opengl.utils import BoundingBox
+from dtcc_viewer.opengl.wrapper import Wrapper
+from dtcc_viewer.opengl.wrp_mesh import MeshWrapper
+
+
+class IsosurfaceWrapper(Wrapper):
+    """Wrapper for an isosurface of a scalar field, extracted as a mesh.
+
+    The first surface is extracted when the wrapper is created. When another iso
+    value or field is requested, the surface is extracted again in a background
+    thread, and the new mesh wrapper is returned by poll when it is ready. Only the
+    latest request is kept while a surface is being extracted.
+
+    Attributes
+    ----------
+    name : str
+        Name of the isosurface.
+    mesh_wrp : MeshWrapper
+        Mesh wrapper for the latest surface, without faces if the surface is empty.
+    fields_min_max : dict
+        Min and max value of each field, by name.
+    iso_key : str
+        Name of the field of the latest surface.
+    iso_value : float
+        Iso value of the latest surface.
+    busy : bool
+        True while a surface is being extracted.
+    empty : bool
+        True if there is no surface at the latest requested iso value.
+    bb_global : BoundingBox
+        Global bounding box for the entire scene.
+    """
+
+    name: str
+    mesh_wrp: MeshWrapper
+    fields_min_max: dict
+    iso_key: str
+    iso_value: float
+    busy: bool
+    empty: bool
+    bb_global: BoundingBox
+
+    def __init__(
+        self, name: str, extract: Callable, fields_min_max: dict, mts: int
+    ) -> None:
+        """Extract the first surface at the mid value of the first field.
+
+        Parameters
+        ----------
+        name : str
+            Name of the isosurface.
+        extract : Callable
+            Function of a field name and an iso value that returns the vertices,
+            faces and interpolated fields of the surface.
+        fields_min_max : dict
+            Min and max value of each field, by name.
+        mts : int
+            Max texture size for the data.
+        """
+        self.name = name
+        self.extract = extract
+        self.fields_min_max = fields_min_max
+        self.mts = mts
+        self.bb_global = None
+        self.busy = False
+        self.id_offset = 0
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._request = None
+        self._result = None
+
+        self.iso_key = list(fields_min_max.keys())[0]
+        self.iso_value = float(np.mean(fields_min_max[self.iso_key]))
+        self.mesh_wrp = self._create_mesh_wrapper(self.iso_key, self.iso_value)
+        self.empty = len(self.mesh_wrp.faces) == 0
+
+    def preprocess_drawing(self, bb_global: BoundingBox):
+        self.bb_global = bb_global
+        self.mesh_wrp.preprocess_drawing(bb_global)
+
+    def get_vertex_positions(self):
+        return self.mesh_wrp.get_vertex_positions()
+
+    def _create_mesh_wrapper(self, key: str, value: float) -> MeshWrapper:
+        """Extract the surface and wrap it as a mesh, which may have no faces.
+
+        An empty surface is still wrapped, so that the mesh and its controls exist
+        and another iso value can be selected.
+        """
+        (vertices, faces, data) = self.extract(key, value)
+        if len(faces) == 0:
+            info(f"No isosurface for '{key}' at {value:.4g}")
+            vertices = np.zeros((0, 3))
+            faces = np.zeros((0, 3), dtype=np.int64)
+            data = {name: np.zeros(0) for name in data}
+        else:
+            info(f"Isosurface for '{key}' at {value:.4g} with {len(faces)} faces")
+
+        mesh = Mesh(vertices=vertices, faces=faces)
+        mesh_wrp = MeshWrapper(self.name, mesh, self.mts, data)
+        mesh_wrp.isosurface = self
+        return mesh_wrp
+
+    def request(self, key: str, value: float) -> None:
+        """Extract the surface for a field and iso value in a background thread.
+
+        Parameters
+        ----------
+        key : str
+            Name of the field.
+        value : float
+            Iso value.
+        """
+        # Recomputed surfaces keep the picking id given to the first surface
+        self.id_offset = int(np.min(self.mesh_wrp.parts.ids))
+
+        with self._lock:
+            self._request = (key, value)
+            self.busy = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Handle requests until there are no more."""
+        while True:
+            with self._lock:
+                request = self._request
+                self._request = None
+                if request is None:
+                    self._thread = None
+                    self.busy = False
+                    return
+
+            (key, value) = request
+            try:
+                mesh_wrp = self._create_mesh_wrapper(key, value)
+                mesh_wrp.parts.offset_ids(self.id_offset)
+                mesh_wrp.update_ids_from_parts()
+                mesh_wrp.preprocess_drawing(self.bb_global)
+            except Exception as e:
+                warning(f"Isosurface extraction failed: {e}")
+                continue
+
+            with self._lock:
+                (self.iso_key, self.iso_value) = (key, value)
+                self.empty = len(mesh_wrp.faces) == 0
+                self._result = mesh_wrp
+
+    def poll(self) -> MeshWrapper:
+        """Get the latest extracted surface, None if there is no new surface."""
+        with self._lock:
+            (result, self._result) = (self._result, None)
+        if result is not None:
+            self.mesh_wrp = result
+        return result
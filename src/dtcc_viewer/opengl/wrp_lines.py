@@ -6,6 +6,7 @@ from shapely.geometry import LineString, MultiLineString
 from dtcc_viewer.opengl.data_wrapper import LinesDataWrapper
 from dtcc_viewer.opengl.data_wrapper import PointsDataWrapper
 from dtcc_viewer.opengl.wrapper import Wrapper
+from dtcc_viewer.opengl.line_levels import LineLevels
 from typing import Any
 
 
@@ -37,6 +38,7 @@ class LinesWrapper(Wrapper):
     name: str
     bb_local: BoundingBox
     bb_global: BoundingBox
+    lod: LineLevels = None
 
     def __init__(
         self,
@@ -5,6 +5,7 @@ from dtcc_viewer.logging import info, warning
 
 from dtcc_viewer.opengl.data_wrapper import LinesDataWrapper
 from dtcc_viewer.opengl.wrapper import Wrapper
+from dtcc_viewer.opengl.line_levels import LineLevels
 from dtcc_core.model import LineString, MultiLineString
 from typing import Any
 
@@ -40,6 +41,7 @@ class LineStringWrapper(Wrapper):
     name: str
     bb_local: BoundingBox
     bb_global: BoundingBox
+    lod: LineLevels = None
 
     def __init__(self, name: str, ls: LineString, mts: int, data: Any = None) -> None:
         """Initialize a line string wrapper object."""
@@ -122,6 +124,53 @@ class LineStringWrapper(Wrapper):
             self.data_wrapper.add_data("Vertex Y", self.vertices[1::6])
 
 
+def _concatenate_linestrings(linestrings: list) -> tuple[np.ndarray, np.ndarray]:
+    """Concatenate the vertices of line strings into one ragged array.
+
+    Line strings with 2D vertices get z = 0 and line strings with other numbers
+    of columns are skipped with a warning.
+
+    Parameters
+    ----------
+    linestrings : list[LineString]
+        Line strings to concatenate.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray]
+        Vertices of all line strings [n x 3] and the offset of the first vertex of
+        each line string, with the total vertex count appended [m + 1].
+    """
+    arrays = [np.asarray(ls.vertices) for ls in linestrings]
+    arrays = [a for a in arrays if a.ndim == 2 and len(a) > 0]
+    counts = np.array([len(a) for a in arrays], dtype=np.int64)
+    n_cols = np.array([a.shape[1] for a in arrays], dtype=np.int64)
+
+    if np.any((n_cols != 2) & (n_cols != 3)):
+        warning("Invalid number of columns in line string vertices")
+        keep = (n_cols == 2) | (n_cols == 3)
+        arrays = [a for a, k in zip(arrays, keep) if k]
+        (counts, n_cols) = (counts[keep], n_cols[keep])
+
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    coords = np.zeros((offsets[-1], 3), dtype=np.float64)
+    if len(arrays) == 0:
+        return coords, offsets
+
+    if np.all(n_cols == 3):
+        coords[:] = np.concatenate(arrays)
+    else:
+        # Copy the 2D and 3D line strings separately into their vertex ranges
+        vertex_cols = np.repeat(n_cols, counts)
+        for n in (2, 3):
+            group = [a for a, c in zip(arrays, n_cols) if c == n]
+            if len(group) > 0:
+                coords[vertex_cols == n, 0:n] = np.concatenate(group)
+
+    return coords, offsets
+
+
 class MultiLineStringWrapper(Wrapper):
     """Wrapper for rendering a list of LineString.
 
@@ -143,6 +192,8 @@ class MultiLineStringWrapper(Wrapper):
         Local bounding box for the line strings.
     bb_global : BoundingBox
         Global bounding box for the entire scene.
+    lod : LineLevels
+        Simplified levels of the segments, None for small collections.
     """
 
     data_wrapper: LinesDataWrapper
@@ -151,6 +202,9 @@ class MultiLineStringWrapper(Wrapper):
     name: str
     bb_local: BoundingBox
     bb_global: BoundingBox
+    lod: LineLevels = None
+
+    lod_min_segments = 100000  # Collections this large get simplified levels
 
     def __init__(
         self,
@@ -158,14 +212,33 @@ class MultiLineStringWrapper(Wrapper):
         mls: MultiLineString,
         mts: int,
         data: Any = None,
+        zero_z: bool = False,
     ) -> None:
-        """Initialize a line string wrapper object."""
+        """Initialize a line string wrapper object.
+
+        Parameters
+        ----------
+        name : str
+            Name of the line strings collection.
+        mls : MultiLineString
+            MultiLineString to be visualised.
+        mts : int
+            Max texture size for the data.
+        data : Any, optional
+            Additional data (dict or array) for color calculation.
+        zero_z : bool, optional
+            Set the z coordinate of all vertices to zero, by default False.
+        """
         self.name = name
         self.mts = mts
 
-        v_count = self._get_vertex_count(mls)
-        self.data_wrapper = LinesDataWrapper(v_count, self.mts)
-        self._restructure_multilinestring(mls)
+        (coords, offsets) = _concatenate_linestrings(mls.linestrings)
+        if zero_z:
+            coords[:, 2] = 0.0
+
+        self.data_wrapper = LinesDataWrapper(len(coords), self.mts)
+        self._restructure_multilinestring(coords, offsets)
+        self._create_levels(coords)
         self._append_data(data)
 
     def preprocess_drawing(self, bb_global: BoundingBox):
@@ -189,53 +262,35 @@ class MultiLineStringWrapper(Wrapper):
             recenter_vec_tiled = np.tile(recenter_vec, v_count)
             self.vertices += recenter_vec_tiled
 
-    def _get_segment_count(self, mls: MultiLineString):
-        total_count = 0
-        for line_string in mls.linestrings:
-            total_count += len(line_string.vertices) - 1
-        return total_count
-
-    def _get_vertex_count(self, mls: MultiLineString):
-        total_count = 0
-        for line_string in mls.linestrings:
-            total_count += len(line_string.vertices)
-        return total_count
+    def _restructure_multilinestring(self, coords: np.ndarray, offsets: np.ndarray):
+        """Connect the concatenated line string vertices by segments.
 
-    def _restructure_multilinestring(self, mls: MultiLineString):
-        l_count_tot = self._get_segment_count(mls)
-        v_count_tot = self._get_vertex_count(mls)
-        indices = np.zeros([l_count_tot, 2], dtype=int)
+        The segment indices are created for all line strings at once from the
+        offset of the first vertex of each line string.
+        """
+        # Each vertex starts a segment, except the last vertex of each line string
+        v_count = len(coords)
+        starts = np.ones(v_count, dtype=bool)
+        starts[offsets[1:] - 1] = False
+        starts = np.flatnonzero(starts)
+        indices = np.column_stack((starts, starts + 1))
 
         # vertices = [x, y, z, tx, ty, id, x, y, z ...]
-        vertices = np.zeros([v_count_tot, 6], dtype=float)
-
-        idx1 = 0
-        idx2 = 0
-        for ls in mls.linestrings:  # Loop over the LineStrings
-            l_count = len(ls.vertices) - 1  # Line segegment count
-            v_count = len(ls.vertices)  # Vertex count
-            indices1 = np.arange(idx1, idx1 + l_count, dtype=int)
-            indices2 = np.arange(idx1 + 1, idx1 + l_count + 1, dtype=int)
-            indices[idx2 : (idx2 + l_count), 0] = indices1
-            indices[idx2 : (idx2 + l_count), 1] = indices2
-
-            if ls.vertices.shape[1] == 2:
-                vertices[idx1 : (idx1 + v_count), 0:2] = ls.vertices[:, 0:2]
-            elif ls.vertices.shape[1] == 3:
-                vertices[idx1 : (idx1 + v_count), 0:3] = ls.vertices[:, 0:3]
-            else:
-                warning("Invalid number of columns in line string vertices")
-
-            idx1 += v_count
-            idx2 += l_count
+        vertices = np.zeros([v_count, 6], dtype="float32")
+        vertices[:, 0:3] = coords
+        vertices[:, 3] = self.data_wrapper.texel_x
+        vertices[:, 4] = self.data_wrapper.texel_y
 
-        indices = indices.flatten()
-        vertices = vertices.flatten()
-        vertices[3::6] = self.data_wrapper.texel_x
-        vertices[4::6] = self.data_wrapper.texel_y
+        self.vertices = vertices.flatten()
+        self.indices = np.array(indices, dtype="uint32").flatten()
 
-        self.vertices = np.array(vertices, dtype="float32")
-        self.indices = np.array(indices, dtype="uint32")
+    def _create_levels(self, coords: np.ndarray):
+        """Create simplified levels of the segments for large collections."""
+        if len(self.indices) // 2 < self.lod_min_segments:
+            return
+
+        self.lod = LineLevels(coords, self.indices)
+        info(f"{self.lod.n_levels} line levels created for '{self.name}'")
 
     def _append_data(self, data: Any = None):
         """Generate colors for the point cloud based on the provided data."""
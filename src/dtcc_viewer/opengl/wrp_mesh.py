@@ -3,6 +3,7 @@ from dtcc_core.model import Mesh
 from dtcc_viewer.utils import *
 from dtcc_viewer.opengl.utils import BoundingBox
 from dtcc_viewer.opengl.parts import Parts
+from dtcc_viewer.opengl.section import CellSection
 from dtcc_viewer.opengl.data_wrapper import MeshDataWrapper
 from dtcc_viewer.logging import info, warning, debug
 from dtcc_viewer.opengl.wrapper import Wrapper
@@ -36,6 +37,10 @@ class MeshWrapper(Wrapper):
         Bounding box for this mesh.
     bb_global: BoundingBox
         Bounding box all objects in the entire scene.
+    section : CellSection
+        Cells cut by the clipping planes, for meshes with the faces of volume cells.
+    isosurface : Wrapper
+        Isosurface wrapper that extracted the mesh, for isosurface meshes.
     """
 
     vertices: np.ndarray
@@ -46,6 +51,8 @@ class MeshWrapper(Wrapper):
     bb_global: BoundingBox = None
     parts: Parts = None
     data_wrapper: MeshDataWrapper = None
+    section: CellSection = None
+    isosurface: Wrapper = None
 
     def __init__(
         self,
@@ -90,7 +97,11 @@ class MeshWrapper(Wrapper):
     def preprocess_drawing(self, bb_global: BoundingBox):
         self.bb_global = bb_global
         self._move_mesh_to_origin(self.bb_global)
-        self.bb_local = BoundingBox(self.get_vertex_positions())
+        positions = self.get_vertex_positions()
+        if len(positions) == 0:
+            # A mesh without faces, e.g. an empty isosurface, is a point at the origin
+            positions = np.zeros(3)
+        self.bb_local = BoundingBox(positions)
         self._reformat_mesh()
 
     def _append_data(
@@ -185,11 +196,8 @@ class MeshWrapper(Wrapper):
         self.edges = new_edges
 
     def _move_mesh_to_origin(self, bb: BoundingBox):
-        # [x, y, z, tx, ty, nx, ny ,nz, id]
-        v_count = len(self.vertices) // 9
-        recenter_vec = np.concatenate((bb.center_vec, [0, 0, 0, 0, 0, 0]), axis=0)
-        recenter_vec = np.tile(recenter_vec, v_count)
-        self.vertices += recenter_vec
+        # [x, y, z, tx, ty, nx, ny ,nz, id], only the positions are moved
+        self.vertices.reshape(-1, 9)[:, 0:3] += bb.center_vec
 
     def _move_mesh_to_zero_z(self, bb: BoundingBox):
         self.vertices[2::9] -= bb.zmin
@@ -205,7 +213,10 @@ class MeshWrapper(Wrapper):
     def _reformat_mesh(self):
         """Reformat the mesh data arrays for OpenGL compatibility."""
         # Making sure the datatypes are aligned with opengl types
-        self.vertices = np.array(self.vertices, dtype="float32")
+        if self.vertices.dtype != np.float32:
+            ids = self.get_vertex_ids()
+            self.vertices = np.array(self.vertices, dtype="float32")
+            self._set_vertex_ids(ids)
         self.edges = np.array(self.edges, dtype="uint32")
         self.faces = np.array(self.faces, dtype="uint32")
 
@@ -231,7 +242,7 @@ class MeshWrapper(Wrapper):
         else:
             # Replace default id with submesh id in the vertices
             debug("Replacing default face ids with parts ids in the vertices")
-            self.vertices[8::9] = ids_in_vertex_shape
+            self._set_vertex_ids(ids_in_vertex_shape)
 
     def _create_default_mesh_parts(self, mesh):
         self.parts = Parts([mesh], ["Default"])
@@ -241,7 +252,25 @@ class MeshWrapper(Wrapper):
 
         # New vertex structure with 3 unique vertices per face
         vertex_ids = np.repeat(face_ids, 3)
-        self.vertices[8::9] = vertex_ids
+        self._set_vertex_ids(vertex_ids)
+
+    def get_vertex_ids(self) -> np.ndarray:
+        """Get the picking id of each vertex."""
+        if self.vertices.dtype == np.float32:
+            return self.vertices.view(np.uint32)[8::9].copy()
+        return self.vertices[8::9].astype(np.uint32)
+
+    def _set_vertex_ids(self, ids: np.ndarray):
+        """Set the picking id of each vertex.
+
+        In the single precision vertices uploaded to OpenGL the ids are stored as
+        the bits of unsigned 32 bit integers, which are read as integer attributes,
+        since single precision floats only hold integers up to 2^24 exactly.
+        """
+        if self.vertices.dtype == np.float32:
+            self.vertices.view(np.uint32)[8::9] = ids
+        else:
+            self.vertices[8::9] = ids
 
     def _get_fields_data(self, mesh: Mesh):
         data_dict = {}
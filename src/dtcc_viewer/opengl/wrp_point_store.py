@@ -0,0 +1,128 @@
+import numpy as np
+from dtcc_viewer.opengl.utils import BoundingBox
+from dtcc_viewer.opengl.data_wrapper import PointsDataWrapper
+from dtcc_viewer.opengl.wrapper import Wrapper
+from dtcc_viewer.opengl.point_store import PointStore
+from dtcc_viewer.opengl.octree import PointOctree
+from dtcc_viewer.logging import info, warning
+
+
+class PointStoreWrapper(Wrapper):
+    """Point cloud backed by an on-disk PointStore, drawn out of core.
+
+    The points are never loaded as a whole. The bounding box and the data caps come
+    from the cached statistics of the store. The point cloud is always drawn with
+    an octree, and the renderer reads the points and data values of each node from
+    the memory mapped columns when the node is first selected. Voxel levels from
+    the store can be selected as a preview instead.
+
+    Attributes
+    ----------
+    store : PointStore
+        Store with the points and data channels.
+    data_wrapper : PointsDataWrapper
+        Data channel names and caps, the data matrices are single row placeholders.
+    data_columns : dict
+        Column in the store for each data channel name.
+    n_points : int
+        Number of points.
+    move_vec : np.ndarray
+        Vector that moves the stored coordinates to the scene coordinates.
+    octree : PointOctree
+        Octree with nodes that refer to contiguous slices of the store.
+    voxel_levels : list
+        Voxel downsampled versions of the point cloud, from fine to coarse, as
+        tuples with the voxel size, the centroids and a PointsDataWrapper with the
+        averaged data.
+    """
+
+    store: PointStore
+    data_wrapper: PointsDataWrapper
+    data_columns: dict
+    n_points: int
+    size: float
+    name: str
+    move_vec: np.ndarray
+    bb_local: BoundingBox
+    bb_global: BoundingBox
+    octree: PointOctree
+    voxel_levels: list
+
+    max_voxel_levels = 3  # Each level has about a quarter of the points of the last
+    min_voxel_points = 10000  # No levels coarser than this are created
+    max_voxel_level_points = 5000000  # Finest voxel level
+
+    def __init__(self, name: str, store: PointStore, mts: int, size: float = 0.2):
+        """Initialize the wrapper.
+
+        Parameters
+        ----------
+        name : str
+            Name of the point cloud.
+        store : PointStore
+            Store with the points.
+        mts : int
+            Max texture size.
+        size : float, optional
+            Particle size in meters (default is 0.2 m).
+        """
+        self.name = name
+        self.store = store
+        self.size = size
+        self.mts = mts
+        self.n_points = store.n_points
+        self.points = None
+        self.octree = None
+        self.shuffled = False
+        self.voxel_levels = []
+        self._create_data_wrapper()
+
+    def preprocess_drawing(self, bb_global: BoundingBox):
+        self.bb_global = bb_global
+        self.move_vec = np.array(bb_global.center_vec, dtype=np.float64)
+        self.bb_local = BoundingBox(
+            self.get_vertex_positions() + np.tile(self.move_vec, 2)
+        )
+        self.octree = self.store.get_octree()
+        self._create_voxel_levels()
+
+    def get_vertex_positions(self):
+        """Get the min and max corners of the points as a flat array."""
+        mins, maxs = self.store.bounds()
+        return np.concatenate((mins, maxs))
+
+    def get_points(self, start: int, stop: int) -> np.ndarray:
+        """Moved coordinates of the points in [start, stop) as a flat float32 array."""
+        points = self.store.get_points(start, stop) + self.move_vec
+        return points.astype(np.float32).flatten()
+
+    def get_data(self, key: str, start: int, stop: int) -> np.ndarray:
+        """Values of a data channel for the points in [start, stop)."""
+        return self.store.get_data(self.data_columns[key], start, stop)
+
+    def _create_voxel_levels(self):
+        """Wrap the voxel levels of the store, moved to the scene coordinates."""
+        levels = self.store.get_voxel_levels(
+            self.max_voxel_levels, self.min_voxel_points, self.max_voxel_level_points
+        )
+        for voxel_size, centroids, columns in levels:
+            level_dw = PointsDataWrapper(len(centroids), self.mts)
+            for key, column in self.data_columns.items():
+                level_dw.add_data(key, columns[column])
+
+            centroids = (centroids + self.move_vec).astype("float32").flatten()
+            self.voxel_levels.append((voxel_size, centroids, level_dw))
+            info(f"Voxel level with {len(centroids) // 3} points for '{self.name}'")
+
+    def _create_data_wrapper(self):
+        """Register the data channels with their caps, without loading any data."""
+        self.data_wrapper = PointsDataWrapper(1, self.mts)
+        if len(self.store.keys) > 0:
+            self.data_columns = {key: key for key in self.store.keys}
+        else:
+            self.data_columns = {"Vertex Z": "z", "Vertex X": "x", "Vertex Y": "y"}
+
+        dw = self.data_wrapper
+        for key, column in self.data_columns.items():
+            dw.data_mat_dict[key] = np.zeros((dw.row_count, dw.col_count), "float32")
+            dw.data_min_max[key] = self.store.min_max(column)
@@ -1,9 +1,10 @@
 import numpy as np
 from dtcc_core.model import PointCloud, Mesh
 from dtcc_viewer.utils import *
-from dtcc_viewer.opengl.utils import BoundingBox
+from dtcc_viewer.opengl.utils import BoundingBox, voxel_levels
 from dtcc_viewer.opengl.data_wrapper import MeshDataWrapper, PointsDataWrapper
 from dtcc_viewer.opengl.wrapper import Wrapper
+from dtcc_viewer.opengl.octree import PointOctree
 from dtcc_viewer.logging import info, warning
 from typing import Any
 
@@ -25,6 +26,20 @@ class PointCloudWrapper(Wrapper):
         Average point of the point cloud for recentering in the format [1 x 3].
     name : str
         Name of the point cloud data.
+    octree : PointOctree
+        Octree for level of detail rendering, None for smaller point clouds.
+    lod_min_points : int
+        Point clouds with at least this many points get an octree.
+    shuffled : bool
+        True if the points are in random order for progressive rendering.
+    progressive_min_points : int
+        Point clouds with at least this many points and no octree are shuffled.
+    voxel_levels : list
+        Voxel downsampled versions of the point cloud, from fine to coarse, as
+        tuples with the voxel size, the centroids and a PointsDataWrapper with the
+        averaged data.
+    voxel_min_points : int
+        Point clouds with at least this many points get voxel levels.
     """
 
     data_wrapper: MeshDataWrapper
@@ -34,6 +49,17 @@ class PointCloudWrapper(Wrapper):
     name: str
     bb_local: BoundingBox
     bb_global: BoundingBox
+    octree: PointOctree
+    shuffled: bool
+    voxel_levels: list
+
+    lod_min_points = 2000000  # Point clouds this large are drawn with an octree
+    progressive_min_points = 500000  # Smaller clouds are drawn in full every frame
+    voxel_min_points = 1000000  # Point clouds this large get voxel levels
+    max_voxel_levels = 3  # Each level has about a quarter of the points of the last
+    min_voxel_points = 10000  # No levels coarser than this are created
+    max_voxel_level_points = 5000000  # Finest voxel level of very large clouds
+    voxel_chunk_size = 5000000  # Points downsampled at a time
 
     def __init__(
         self,
@@ -69,6 +95,9 @@ class PointCloudWrapper(Wrapper):
         self.data_dict = {}
         self.n_points = len(pc.points)
         self.points = np.array(pc.points, dtype="float64").flatten()
+        self.octree = None
+        self.shuffled = False
+        self.voxel_levels = []
         fields = self._get_fields_data(pc)
         self._append_data(pc, fields, data)
 
@@ -77,6 +106,9 @@ class PointCloudWrapper(Wrapper):
         self._move_pc_to_origin(self.bb_global)
         self.bb_local = BoundingBox(self.points)
         self._reformat_pc()
+        self._create_voxel_levels()
+        self._create_octree()
+        self._shuffle_points()
 
     def get_vertex_positions(self):
         return self.points
@@ -130,3 +162,81 @@ class PointCloudWrapper(Wrapper):
     def _reformat_pc(self):
         """Flatten the point cloud data arrays for further processing."""
         self.points = np.array(self.points, dtype="float32")
+
+    def _create_voxel_levels(self):
+        """Precompute voxel downsampled versions of large point clouds.
+
+        The levels are computed in chunks with voxel_levels, also for point clouds
+        with an octree, where they are a fixed preview next to the level of detail.
+        """
+        if self.n_points < self.voxel_min_points:
+            return
+
+        bb = self.bb_local
+        lo = [bb.xmin, bb.ymin, bb.zmin]
+        hi = [bb.xmax, bb.ymax, bb.zmax]
+        points = self.points.reshape(-1, 3)
+        data = {}
+        for key, data_mat in self.data_wrapper.data_mat_dict.items():
+            data[key] = data_mat.reshape(-1)[0 : self.n_points]
+
+        step = self.voxel_chunk_size
+
+        def chunks():
+            for i in range(0, self.n_points, step):
+                chunk_data = {k: v[i : i + step] for k, v in data.items()}
+                yield points[i : i + step], chunk_data
+
+        levels = voxel_levels(
+            chunks,
+            self.n_points,
+            lo,
+            hi,
+            self.max_voxel_levels,
+            self.min_voxel_points,
+            self.max_voxel_level_points,
+        )
+        for voxel_size, centroids, averages in levels:
+            level_dw = PointsDataWrapper(len(centroids), self.mts)
+            for key, values in averages.items():
+                level_dw.add_data(key, values)
+
+            centroids = centroids.astype("float32").flatten()
+            self.voxel_levels.append((voxel_size, centroids, level_dw))
+            info(f"Voxel level with {len(centroids) // 3} points for '{self.name}'")
+
+    def _create_octree(self):
+        """Build an octree for large point clouds and sort the points by node.
+
+        The texel indices are sorted along with the points, so each point still
+        looks up its own values in the data texture.
+        """
+        if self.n_points < self.lod_min_points:
+            return
+
+        self.octree = PointOctree(self.points)
+        self._reorder_points(self.octree.order)
+        info(f"Octree with {self.octree.n_nodes} nodes created for '{self.name}'")
+
+    def _shuffle_points(self):
+        """Shuffle the points once so that any prefix is a uniform subsample.
+
+        This lets the renderer draw only the first points while the camera moves.
+        Point clouds with an octree are already sorted by node and are skipped.
+        """
+        if self.octree is not None or self.n_points < self.progressive_min_points:
+            return
+
+        order = np.random.default_rng(0).permutation(self.n_points)
+        self._reorder_points(order)
+        self.shuffled = True
+
+    def _reorder_points(self, order: np.ndarray):
+        """Reorder the points together with their texel indices.
+
+        The data channels are stored in the data texture and looked up through the
+        texel indices, so reordering the indices reorders all channels at once.
+        """
+        self.points = self.points.reshape(-1, 3)[order].flatten()
+        self.data_wrapper.texel_x = self.data_wrapper.texel_x[order]
+        self.data_wrapper.texel_y = self.data_wrapper.texel_y[order]
@@ -0,0 +1,251 @@
+import queue
+import threading
+import numpy as np
+from dtcc_core.model import PointCloud
+from dtcc_viewer.opengl.utils import BoundingBox
+from dtcc_viewer.opengl.data_wrapper import PointsDataWrapper
+from dtcc_viewer.opengl.wrapper import Wrapper
+from dtcc_viewer.logging import info, warning
+from typing import Any, Iterable
+
+
+class PointCloudStreamWrapper(Wrapper):
+    """Point cloud that is read in chunks while the viewer is already rendering.
+
+    The chunks come from an iterable, e.g. a generator that reads a CSV or LAS file,
+    and are read on a background thread into a bounded queue. The renderer takes
+    chunks from the queue once per frame and appends them to arrays with room for
+    more points, so that only the new points have to be uploaded to the GPU. When
+    the arrays are full their capacity is doubled. The local bounding box and the
+    data min and max values are updated with each chunk.
+
+    A chunk is either an array of coordinates [n_points x 3], a PointCloud, or a
+    tuple with an array of coordinates and data, where the data is a dict of arrays
+    or a single array. The data channels of the first chunk are used for all chunks.
+    The first chunk is read when the wrapper is created, since the bounding box of
+    the scene, and thereby the initial camera, is computed before rendering starts.
+
+    Attributes
+    ----------
+    data_wrapper : PointsDataWrapper
+        Data matrices and texel indices for the current capacity.
+    points : np.ndarray
+        Moved point coordinates, flat with room for capacity points.
+    n_points : int
+        Number of points appended so far.
+    capacity : int
+        Number of points the arrays have room for.
+    size : float
+        Particle size in meters.
+    name : str
+        Name of the point cloud.
+    finished : bool
+        True once all chunks have been read and appended.
+    octree : None
+        Streamed point clouds have no octree.
+    shuffled : bool
+        Streamed point clouds are not shuffled.
+    voxel_levels : list
+        Streamed point clouds have no voxel levels.
+    """
+
+    data_wrapper: PointsDataWrapper
+    points: np.ndarray
+    n_points: int
+    capacity: int
+    size: float
+    name: str
+    bb_local: BoundingBox
+    bb_global: BoundingBox
+    finished: bool
+
+    max_queued = 64  # Max number of chunks read ahead of the renderer
+
+    def __init__(
+        self,
+        name: str,
+        chunks: Iterable,
+        mts: int,
+        size: float = 0.2,
+        capacity: int = 1000000,
+    ) -> None:
+        """Initialize the wrapper and start reading chunks in the background.
+
+        Parameters
+        ----------
+        name : str
+            Name of the point cloud.
+        chunks : Iterable
+            Iterable of point chunks.
+        mts : int
+            Max texture size.
+        size : float, optional
+            Particle size in meters (default is 0.2 m).
+        capacity : int, optional
+            Initial number of points to allocate room for.
+        """
+        self.name = name
+        self.size = size
+        self.mts = mts
+        self.n_points = 0
+        self.capacity = max(int(capacity), 1)
+        self.finished = False
+        self.octree = None
+        self.shuffled = False
+        self.voxel_levels = []
+        self.bb_local = None
+        self.queue = queue.Queue(maxsize=self.max_queued)
+
+        iterator = iter(chunks)
+        self.first_chunk = None
+        for chunk in iterator:
+            self.first_chunk = self._format_chunk(chunk)
+            if self.first_chunk is not None:
+                break
+
+        if self.first_chunk is None:
+            self.finished = True
+            return
+
+        self._create_data_wrapper(self.first_chunk[1])
+        self.thread = threading.Thread(
+            target=self._read_chunks, args=(iterator,), daemon=True
+        )
+        self.thread.start()
+
+    def preprocess_drawing(self, bb_global: BoundingBox):
+        self.bb_global = bb_global
+        self.move_vec = np.array(bb_global.center_vec, dtype=np.float64)
+        self.points = np.zeros(3 * self.capacity, dtype=np.float32)
+        self._append(*self.first_chunk)
+        self.first_chunk = None
+
+    def get_vertex_positions(self):
+        """Get the positions of the first chunk, the only points known in advance."""
+        if self.first_chunk is None:
+            return np.array([])
+        return self.first_chunk[0].flatten()
+
+    def poll(self, max_points: int) -> tuple[int, bool]:
+        """Append the chunks that have been read, up to about max_points points.
+
+        Returns
+        -------
+        tuple[int, bool]
+            Index of the first appended point and True if the capacity was grown.
+        """
+        start = self.n_points
+        grown = False
+        while not self.finished and self.n_points - start < max_points:
+            try:
+                chunk = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is None:
+                self.finished = True
+                info(f"Streaming of '{self.name}' finished, {self.n_points} points.")
+                break
+            grown |= self._append(*chunk)
+
+        return start, grown
+
+    def _read_chunks(self, iterator) -> None:
+        """Read the remaining chunks into the queue, runs on a background thread."""
+        try:
+            for chunk in iterator:
+                chunk = self._format_chunk(chunk)
+                if chunk is not None:
+                    self.queue.put(chunk)
+        except Exception as e:
+            warning(f"Reading point chunks for '{self.name}' failed: {e}")
+        self.queue.put(None)
+
+    def _format_chunk(self, chunk: Any):
+        """Get the coordinates [n x 3] and a data dict from a chunk, None if invalid."""
+        data = None
+        if isinstance(chunk, PointCloud):
+            points = chunk.points
+            data = {f.name: f.values for f in chunk.fields if f.dim == 1}
+        elif isinstance(chunk, tuple) and len(chunk) == 2:
+            points, data = chunk
+        else:
+            points = chunk
+
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim != 2 or points.shape[1] != 3:
+            warning(f"Point chunk for '{self.name}' is not [n x 3], skipping.")
+            return None
+
+        if isinstance(data, np.ndarray):
+            data = {"Data": data}
+        data = {} if data is None else data
+
+        for key, values in data.items():
+            if len(values) != len(points):
+                warning(f"Data '{key}' does not match the point count, skipping.")
+                return None
+
+        return points, data
+
+    def _create_data_wrapper(self, data: dict) -> None:
+        """Create empty data matrices for the data channels of the first chunk."""
+        self.data_wrapper = PointsDataWrapper(self.capacity, self.mts)
+        self.vertex_data = len(data) == 0
+        keys = ["Vertex Z", "Vertex X", "Vertex Y"] if self.vertex_data else data
+        dw = self.data_wrapper
+        for key in keys:
+            dw.data_mat_dict[key] = np.zeros((dw.row_count, dw.col_count), "float32")
+            dw.data_min_max[key] = (np.inf, -np.inf)
+
+    def _append(self, points: np.ndarray, data: dict) -> bool:
+        """Append a chunk, return True if the arrays had to grow."""
+        n = len(points)
+        if n == 0:
+            return False
+
+        grown = self.n_points + n > self.capacity
+        if grown:
+            self._grow(self.n_points + n)
+
+        if self.vertex_data:
+            data = {"Vertex Z": points[:, 2], "Vertex X": points[:, 0]}
+            data["Vertex Y"] = points[:, 1]
+
+        i0, i1 = (self.n_points, self.n_points + n)
+        local = (points + self.move_vec).astype(np.float32).flatten()
+        self.points[3 * i0 : 3 * i1] = local
+
+        dw = self.data_wrapper
+        for key, data_mat in dw.data_mat_dict.items():
+            values = np.asarray(data.get(key, np.zeros(n)), dtype=np.float32)
+            data_mat.reshape(-1)[i0:i1] = values
+            d_min, d_max = dw.data_min_max[key]
+            dw.data_min_max[key] = (min(d_min, values.min()), max(d_max, values.max()))
+
+        self.n_points = i1
+        if self.bb_local is None:
+            self.bb_local = BoundingBox(local)
+        else:
+            self.bb_local.expand(local)
+
+        return grown
+
+    def _grow(self, n_required: int) -> None:
+        """Double the capacity, or more if needed, keeping the appended points."""
+        n = self.n_points
+        self.capacity = max(2 * self.capacity, n_required)
+        points = np.zeros(3 * self.capacity, dtype=np.float32)
+        points[0 : 3 * n] = self.points[0 : 3 * n]
+        self.points = points
+
+        # Texel indices only depend on the point index, so the old ones still hold
+        dw = self.data_wrapper
+        dw.p_count = self.capacity
+        dw._calc_matrix_format(self.capacity)
+        dw._calc_texel_indices(self.capacity)
+        for key, data_mat in dw.data_mat_dict.items():
+            new_mat = np.zeros((dw.row_count, dw.col_count), dtype="float32")
+            new_mat.reshape(-1)[0:n] = data_mat.reshape(-1)[0:n]
+            dw.data_mat_dict[key] = new_mat
+
+        info(f"Point capacity for '{self.name}' grown to {self.capacity}.")
@@ -53,18 +53,12 @@ class RoadNetworkWrapper(Wrapper):
         self.name = name
         self.data_wrapper = None
         mls = roadnetwork.multilinestrings
-        self.set_zero_z(mls)
-        self.mls_wrp = MultiLineStringWrapper(name, mls, mts, data)
+        self.mls_wrp = MultiLineStringWrapper(name, mls, mts, data, zero_z=True)
 
     def preprocess_drawing(self, bb_global: BoundingBox):
         if self.mls_wrp is not None:
             self.mls_wrp.preprocess_drawing(bb_global)
 
-    def set_zero_z(self, mls: MultiLineString):
-        for ls in mls.linestrings:
-            if ls.vertices.shape[1] == 3:
-                ls.vertices[:, 2] = 0.0
-
     def get_vertex_positions(self):
         if self.mls_wrp is not None:
             return self.mls_wrp.get_vertex_positions()
@@ -1,10 +1,13 @@
 import numpy as np
 from dtcc_viewer.utils import *
-from dtcc_viewer.logging import info, warning
+from dtcc_viewer.logging import info, warning, debug
 from dtcc_viewer.opengl.wrapper import Wrapper
 from dtcc_core.model import VolumeMesh, Mesh
 from dtcc_viewer.opengl.utils import BoundingBox
 from dtcc_viewer.opengl.wrp_mesh import MeshWrapper
+from dtcc_viewer.opengl.section import CellSection
+from dtcc_viewer.opengl.wrp_isosurface import IsosurfaceWrapper
+from dtcc_viewer.opengl.isosurface import marching_tetrahedra
 from typing import Any
 
 
@@ -13,36 +16,71 @@ class VolumeMeshWrapper(Wrapper):
     name: str
     mesh_vol_wrp: MeshWrapper = None
     mesh_env_wrp: MeshWrapper = None
+    iso_wrp: IsosurfaceWrapper = None
+
+    chunk_size = 500000  # Number of cells processed at a time
 
     def __init__(self, name: str, volume_mesh: VolumeMesh, mts: int) -> None:
         """Initialize a SurfaceWrapper object."""
         self.name = name
         mesh_vol = self._create_mesh(volume_mesh)
         data_dict = self._calc_mesh_quality(volume_mesh)
+        self._calc_cell_bounds(volume_mesh)
         mesh_env = self._extract_mesh_envelope(mesh_vol)
         self.mesh_vol_wrp = MeshWrapper(name, mesh_vol, mts, data_dict)
 
         if mesh_env is not None:
             self.mesh_env_wrp = MeshWrapper("volume mesh envelop", mesh_env, mts)
 
+        self.vertices = np.asarray(volume_mesh.vertices, dtype=np.float64)
+        self.cells = np.asarray(volume_mesh.cells)
+        self.fields = self._get_vertex_fields(volume_mesh)
+        if len(self.fields) > 0:
+            min_max = {k: [np.nanmin(v), np.nanmax(v)] for k, v in self.fields.items()}
+            self.iso_wrp = IsosurfaceWrapper(
+                f"{name} isosurface", self._extract_isosurface, min_max, mts
+            )
+
     def preprocess_drawing(self, bb_global: BoundingBox):
         if self.mesh_vol_wrp is not None:
             self.mesh_vol_wrp.preprocess_drawing(bb_global)
+            move = np.array(bb_global.center_vec, dtype=np.float32)
+            mins = self.cell_mins + move
+            maxs = self.cell_maxs + move
+            self.mesh_vol_wrp.section = CellSection(mins, maxs, 4)
 
         if self.mesh_env_wrp is not None:
             self.mesh_env_wrp.preprocess_drawing(bb_global)
 
+        if self.iso_wrp is not None:
+            self.iso_wrp.preprocess_drawing(bb_global)
+
     def get_vertex_positions(self):
         return self.mesh_vol_wrp.get_vertex_positions()
 
+    def _get_vertex_fields(self, volume_mesh: VolumeMesh) -> dict:
+        """Scalar fields with a value for each vertex, for isosurfaces."""
+        fields = {}
+        for field in getattr(volume_mesh, "fields", []):
+            values = np.asarray(field.values, dtype=np.float64).reshape(-1)
+            if field.dim == 1 and len(values) == len(self.vertices):
+                fields[field.name] = values
+            else:
+                debug(f"Field '{field.name}' is not a vertex field. Skipping.")
+        return fields
+
+    def _extract_isosurface(self, key: str, value: float):
+        """Extract the isosurface of a vertex field by marching tetrahedra."""
+        (points, tets, values) = (self.vertices, self.cells, self.fields[key])
+        return marching_tetrahedra(points, tets, values, value, self.fields)
+
     def _create_mesh(self, volume_mesh: VolumeMesh) -> Mesh:
         vertices = volume_mesh.vertices
-        faces = np.zeros((volume_mesh.cells.shape[0] * 4, 3), dtype=int)
-        for i, cell in enumerate(volume_mesh.cells):
-            faces[i * 4 + 0, :] = np.array([cell[0], cell[2], cell[1]])
-            faces[i * 4 + 1, :] = np.array([cell[0], cell[1], cell[3]])
-            faces[i * 4 + 2, :] = np.array([cell[0], cell[3], cell[2]])
-            faces[i * 4 + 3, :] = np.array([cell[3], cell[2], cell[1]])
+        cells = np.asarray(volume_mesh.cells)
+
+        # Four faces per cell, wound to face outwards for positively oriented cells
+        face_corners = np.array([[0, 2, 1], [0, 1, 3], [0, 3, 2], [3, 2, 1]])
+        faces = cells[:, face_corners].reshape(-1, 3).astype(int)
 
         info(f"Mesh with {len(vertices)} vertices and {len(faces)} faces created.")
         return Mesh(vertices=vertices, faces=faces)
@@ -72,51 +110,97 @@ class VolumeMeshWrapper(Wrapper):
         occurrences = counts[inv]
         return (occurrences == 1).ravel()
 
+    def _calc_cell_bounds(self, volume_mesh: VolumeMesh):
+        """Calculate the bounding box of each cell, for the section view."""
+        cells = np.asarray(volume_mesh.cells)
+        vertices = np.asarray(volume_mesh.vertices, dtype=np.float32)
+        self.cell_mins = np.zeros((len(cells), 3), dtype=np.float32)
+        self.cell_maxs = np.zeros((len(cells), 3), dtype=np.float32)
+        for i in range(0, len(cells), self.chunk_size):
+            corners = vertices[cells[i : i + self.chunk_size]]
+            self.cell_mins[i : i + len(corners)] = corners.min(axis=1)
+            self.cell_maxs[i : i + len(corners)] = corners.max(axis=1)
+
     def _calc_mesh_quality(self, volume_mesh: VolumeMesh):
+        """Calculate quality metrics for all cells, repeated for the 4 cell faces."""
+        cells = np.asarray(volume_mesh.cells)
+        vertices = np.asarray(volume_mesh.vertices, dtype=np.float64)
+        n_cells = len(cells)
+
         data_dict = {}
-        aspect_ratios = np.zeros(volume_mesh.cells.shape[0])
-        cell_volume = np.zeros(volume_mesh.cells.shape[0])
-
-        for i, cell in enumerate(volume_mesh.cells):
-            v0 = volume_mesh.vertices[cell[0]]
-            v1 = volume_mesh.vertices[cell[1]]
-            v2 = volume_mesh.vertices[cell[2]]
-            v3 = volume_mesh.vertices[cell[3]]
-            (aspect_ratio, volume) = self._tet_aspect_ratio(v0, v1, v2, v3)
-            aspect_ratios[i] = aspect_ratio
-            cell_volume[i] = volume
-
-        data_dict["Aspect Ratio (R/r)"] = np.repeat(aspect_ratios, 4)
-        data_dict["Volume"] = np.repeat(cell_volume, 4)
+        for i in range(0, n_cells, self.chunk_size):
+            quality = self._tet_quality(vertices[cells[i : i + self.chunk_size]])
+            for name, values in quality.items():
+                if name not in data_dict:
+                    data_dict[name] = np.zeros(n_cells * 4)
+                data_dict[name][i * 4 : i * 4 + len(values) * 4] = np.repeat(values, 4)
         info("Volume mesh quality metrics calculated.")
         return data_dict
 
-    def _tet_volume(self, v0, v1, v2, v3):
-        """
-        Calculate the volume of a tetrahedron.
+    def _tet_quality(self, tets: np.ndarray) -> dict:
+        """Quality metrics for tetrahedra, computed for all cells at once.
+
+        Parameters
+        ----------
+        tets : np.ndarray
+            Corner coordinates of the tetrahedra [n x 4 x 3].
+
+        Returns
+        -------
+        dict
+            Aspect ratio as the circumradius over the inradius, volume, min
+            dihedral angle in degrees, ratio of the longest to the shortest edge and
+            the min scaled Jacobian over the corners. Degenerate cells get inf or
+            nan for the ratios.
         """
-        return np.abs(np.dot((v3 - v0), np.cross(v1 - v0, v2 - v0))) / 6.0
-
-    def _tet_aspect_ratio(self, v0, v1, v2, v3):
-        # Compute the edge lengths
-
-        a = np.linalg.norm(v0 - v1)
-        b = np.linalg.norm(v0 - v2)
-        c = np.linalg.norm(v0 - v3)
-        d = np.linalg.norm(v1 - v2)
-        e = np.linalg.norm(v1 - v3)
-        f = np.linalg.norm(v2 - v3)
-
-        # Compute the tet volume
-        volume = np.abs(np.dot(np.cross(v1 - v0, v2 - v0), v3 - v0)) / 6.0
-
-        # Compute the radius of the circumscribed sphere
-        R = np.sqrt((a * b * c * d * e * f) / (2 * volume)) / 2.0
-
-        # Compute the radius of the inscribed sphere
-        r = (3 * volume) / (a * b * c + a * d * e + b * d * f + c * e * f)
-
-        # Compute the aspect ratio
-        aspect_ratio = R / r
-
-        return aspect_ratio, volume
+        (v0, v1, v2, v3) = (tets[:, 0], tets[:, 1], tets[:, 2], tets[:, 3])
+
+        # Edges 01, 02, 03, 12, 13, 23 and their lengths
+        edges = np.stack((v1 - v0, v2 - v0, v3 - v0, v2 - v1, v3 - v1, v3 - v2), 1)
+        lengths = np.linalg.norm(edges, axis=2)
+        (l01, l02, l03, l12, l13, l23) = lengths.T
+
+        det = np.einsum("ij,ij->i", np.cross(v1 - v0, v2 - v0), v3 - v0)
+        volume = np.abs(det) / 6.0
+
+        # Outward normals of the faces opposite to each corner
+        normals = np.stack(
+            (
+                np.cross(v2 - v1, v3 - v1),
+                np.cross(v3 - v0, v2 - v0),
+                np.cross(v1 - v0, v3 - v0),
+                np.cross(v2 - v0, v1 - v0),
+            ),
+            1,
+        )
+        normals *= np.sign(det)[:, None, None]
+        areas = np.linalg.norm(normals, axis=2) / 2.0
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Circumradius from the products of the opposite edge lengths
+            (p, q, r) = (l01 * l23, l02 * l13, l03 * l12)
+            prod = (p + q + r) * (p + q - r) * (p - q + r) * (-p + q + r)
+            circumradius = np.sqrt(np.maximum(prod, 0.0)) / (24.0 * volume)
+            inradius = 3.0 * volume / areas.sum(axis=1)
+
+            # The dihedral angle at an edge is pi minus the angle between the
+            # outward normals of the two faces that share it
+            unit = normals / (2.0 * areas[:, :, None])
+            pairs = np.array([[2, 3], [1, 3], [1, 2], [0, 3], [0, 2], [0, 1]])
+            cos = np.einsum("ijk,ijk->ij", unit[:, pairs[:, 0]], unit[:, pairs[:, 1]])
+            dihedral = np.pi - np.arccos(np.clip(cos, -1.0, 1.0))
+
+            # Scaled Jacobian at each corner, 1 for a regular tet
+            corner_edges = np.array([[0, 1, 2], [0, 3, 4], [1, 3, 5], [2, 4, 5]])
+            corner_lengths = np.prod(lengths[:, corner_edges], axis=2)
+            jacobian = np.min(np.sqrt(2.0) * det[:, None] / corner_lengths, axis=1)
+
+            quality = {
+                "Aspect Ratio (R/r)": circumradius / inradius,
+                "Volume": volume,
+                "Min Dihedral Angle": np.degrees(np.min(dihedral, axis=1)),
+                "Edge Ratio": lengths.max(axis=1) / lengths.min(axis=1),
+                "Scaled Jacobian": jacobian,
+            }
+
+        return quality
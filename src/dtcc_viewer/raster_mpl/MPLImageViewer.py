@@ -1,14 +1,36 @@
 import matplotlib.pyplot as plt
 import numpy as np
+from .tiled_image import TiledImage
 
 
 class MPLImageViewer:
-    def __init__(self, image):
+    """Image viewer for notebooks that only draws the visible part of an image.
+
+    The image is drawn from a TiledImage, so only the tiles in view are read, at
+    about one image pixel per screen pixel. The drawn pixels are updated after
+    each pan, zoom and resize.
+    """
+
+    def __init__(self, image, tile_size: int = 256):
+        if not hasattr(image, "shape"):
+            image = np.asarray(image)
+        self.tiles = TiledImage(image, tile_size)
+        (rows, cols) = image.shape[0:2]
+
         self.fig, self.ax = plt.subplots()
-        self.ax.imshow(image, cmap="gray")
+        self.im = self.ax.imshow(
+            np.zeros((1, 1) + image.shape[2:], dtype=image.dtype),
+            cmap="gray",
+            vmin=self.tiles.vmin,
+            vmax=self.tiles.vmax,
+            interpolation="nearest",
+        )
+        self.ax.set_xlim(0, cols)
+        self.ax.set_ylim(rows, 0)
         self.ax.set_title("Raster")
         self.ax.set_xticks([])
         self.ax.set_yticks([])
+        self._update_image()
 
         self.start_x = None
         self.start_y = None
@@ -16,6 +38,26 @@ class MPLImageViewer:
         self.fig.canvas.mpl_connect("button_press_event", self.on_button_press)
         self.fig.canvas.mpl_connect("motion_notify_event", self.on_move)
         self.fig.canvas.mpl_connect("scroll_event", self.on_mousewheel)
+        self.fig.canvas.mpl_connect("resize_event", self.on_resize)
+
+    def _update_image(self):
+        """Draw the tiles that cover the current view at screen resolution."""
+        (x0, x1) = self.ax.get_xlim()
+        (y1, y0) = self.ax.get_ylim()
+        width = self.ax.get_window_extent().width
+        scale = width / max(abs(x1 - x0), 1e-9)
+        (pixels, extent) = self.tiles.render(x0, x1, y0, y1, scale)
+        if pixels is None:
+            return
+
+        # The extent is (left, right, bottom, top) with the rows running downwards
+        (left, right, top, bottom) = extent
+        self.im.set_data(pixels)
+        self.im.set_extent((left, right, bottom, top))
+
+    def on_resize(self, event):
+        self._update_image()
+        self.fig.canvas.draw_idle()
 
     def on_button_press(self, event):
         if event.button == 1:
@@ -34,6 +76,7 @@ class MPLImageViewer:
             self.ax.set_ylim(ylim[0] + dy, ylim[1] + dy)
             self.start_x = x
             self.start_y = y
+            self._update_image()
             self.fig.canvas.draw()
 
     def on_mousewheel(self, event):
@@ -52,6 +95,7 @@ class MPLImageViewer:
         self.ax.set_ylim(
             ylim[0] * scale + (1 - scale) * y, ylim[1] * scale + (1 - scale) * y
         )
+        self._update_image()
         self.fig.canvas.draw()
 
     def show(self):
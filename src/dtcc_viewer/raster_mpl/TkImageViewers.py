@@ -1,37 +1,98 @@
 import tkinter as tk
+import numpy as np
 from PIL import Image, ImageTk
+from .tiled_image import TiledImage
 
 
 class TkImageViewer:
-    def __init__(self, master, pil_image):
+    """Image viewer that resamples the visible part of an image to the canvas.
+
+    The image is drawn from a TiledImage, so only the tiles in view are read, at
+    about one image pixel per screen pixel. After each pan, zoom and resize the
+    visible tiles are resampled to the canvas size and drawn as a single image.
+    """
+
+    max_canvas_size = (1024, 768)  # Max initial canvas width and height
+
+    def __init__(self, master, pil_image, tile_size: int = 256):
         self.master = master
-        self.image = pil_image
-        self.photo = ImageTk.PhotoImage(self.image)
-        self.canvas = tk.Canvas(
-            self.master, width=self.image.width, height=self.image.height
-        )
-        self.canvas.pack()
-        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.photo)
+        if isinstance(pil_image, Image.Image):
+            pil_image = np.asarray(pil_image)
+        self.tiles = TiledImage(pil_image, tile_size)
+        (rows, cols) = pil_image.shape[0:2]
+
+        # Fit the whole image in the canvas
+        width = min(cols, self.max_canvas_size[0])
+        height = min(rows, self.max_canvas_size[1])
+        self.scale = min(width / cols, height / rows)
+        self.offset_x = 0.0
+        self.offset_y = 0.0
+
+        self.canvas = tk.Canvas(self.master, width=width, height=height)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.photo = None
+        self.image_item = self.canvas.create_image(0, 0, anchor=tk.NW)
         self.canvas.bind("<ButtonPress-1>", self.on_button_press)
         self.canvas.bind("<B1-Motion>", self.on_move)
         self.canvas.bind("<MouseWheel>", self.on_mousewheel)
         self.canvas.bind("<Button-4>", self.on_mousewheel)
         self.canvas.bind("<Button-5>", self.on_mousewheel)
         self.canvas.bind("<Configure>", self.on_resize)
-        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
 
         self.start_x = None
         self.start_y = None
+        self._redraw(width, height)
+
+    def _redraw(self, width: int = None, height: int = None):
+        """Resample the tiles in view to the canvas and draw them."""
+        width = width or self.canvas.winfo_width()
+        height = height or self.canvas.winfo_height()
+        x1 = self.offset_x + width / self.scale
+        y1 = self.offset_y + height / self.scale
+        (pixels, extent) = self.tiles.render(
+            self.offset_x, x1, self.offset_y, y1, self.scale
+        )
+        if pixels is None:
+            self.canvas.itemconfig(self.image_item, image="")
+            return
+
+        (left, right, top, bottom) = extent
+        size = (
+            max(1, int(round((right - left) * self.scale))),
+            max(1, int(round((bottom - top) * self.scale))),
+        )
+        image = self._to_pil(pixels).resize(size, Image.NEAREST)
+        self.photo = ImageTk.PhotoImage(image)
+        self.canvas.itemconfig(self.image_item, image=self.photo)
+        self.canvas.coords(
+            self.image_item,
+            (left - self.offset_x) * self.scale,
+            (top - self.offset_y) * self.scale,
+        )
+
+    def _to_pil(self, pixels: np.ndarray) -> Image.Image:
+        """Convert pixels to a PIL image, scaling single channels to 8 bits."""
+        is_color = pixels.ndim == 3 and pixels.shape[2] in (3, 4)
+        if is_color and pixels.dtype == np.uint8:
+            return Image.fromarray(pixels)
+
+        values = pixels if pixels.ndim == 2 else pixels[:, :, 0]
+        (vmin, vmax) = (self.tiles.vmin, self.tiles.vmax)
+        scaled = (values.astype(np.float32) - vmin) * (255.0 / max(vmax - vmin, 1e-9))
+        scaled = np.nan_to_num(np.clip(scaled, 0.0, 255.0))
+        return Image.fromarray(scaled.astype(np.uint8), mode="L")
 
     def on_button_press(self, event):
-        self.start_x = self.canvas.canvasx(event.x)
-        self.start_y = self.canvas.canvasy(event.y)
+        self.start_x = event.x
+        self.start_y = event.y
 
     def on_move(self, event):
-        if self.start_x and self.start_y:
-            x = self.canvas.canvasx(event.x)
-            y = self.canvas.canvasy(event.y)
-            self.canvas.scan_dragto(-x + self.start_x, -y + self.start_y, gain=1)
+        if self.start_x is not None and self.start_y is not None:
+            self.offset_x -= (event.x - self.start_x) / self.scale
+            self.offset_y -= (event.y - self.start_y) / self.scale
+            self.start_x = event.x
+            self.start_y = event.y
+            self._redraw()
 
     def on_mousewheel(self, event):
         scale = 1.0
@@ -39,13 +100,17 @@ class TkImageViewer:
             scale /= 1.2
         if event.num == 4 or event.delta == 120:
             scale *= 1.2
-        x = self.canvas.canvasx(event.x)
-        y = self.canvas.canvasy(event.y)
-        self.canvas.scale("all", x, y, scale, scale)
+
+        # Zoom around the image point under the cursor
+        x = self.offset_x + event.x / self.scale
+        y = self.offset_y + event.y / self.scale
+        self.scale *= scale
+        self.offset_x = x - event.x / self.scale
+        self.offset_y = y - event.y / self.scale
+        self._redraw()
 
     def on_resize(self, event):
-        w, h = event.width, event.height
-        self.canvas.config(width=w, height=h)
+        self._redraw(event.width, event.height)
 
 
 # root = tk.Tk()
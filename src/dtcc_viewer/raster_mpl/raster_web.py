@@ -21,3 +21,9 @@ def view(raster: Raster, show_in_browser=False):
     if is_notebook():
         img = raster.data
         viewer = MPLImageViewer(img)
+    else:
+        import tkinter as tk
+
+        root = tk.Tk()
+        viewer = TkImageViewer(root, raster.data)
+        root.mainloop()
@@ -0,0 +1,147 @@
+import numpy as np
+from collections import OrderedDict
+
+
+class TiledImage:
+    """Overview pyramid of a large image, read tile by tile with an LRU cache.
+
+    Level 0 is the image itself and level k samples every 2^k-th pixel along each
+    axis, until the whole image fits in one tile. Tiles are only read when a view
+    needs them, by slicing the source with a stride, so a memory mapped image can
+    be opened without reading it and only the visible tiles are loaded. The most
+    recently used tiles are kept in a cache of a fixed size.
+
+    Pixels are sampled rather than averaged, which keeps classification values
+    intact and avoids a pass over the whole image when it is opened.
+
+    Attributes
+    ----------
+    data : np.ndarray
+        Image [rows x cols] or [rows x cols x channels], may be memory mapped.
+    tile_size : int
+        Number of pixels along each side of a tile.
+    n_levels : int
+        Number of levels in the pyramid.
+    vmin : float
+        Min value of the top level, used to scale single channel images.
+    vmax : float
+        Max value of the top level, used to scale single channel images.
+    """
+
+    data: np.ndarray
+    tile_size: int
+    n_levels: int
+    vmin: float
+    vmax: float
+
+    def __init__(self, data: np.ndarray, tile_size: int = 256, max_tiles: int = 256):
+        """Create the pyramid without reading the image.
+
+        Parameters
+        ----------
+        data : np.ndarray
+            Image [rows x cols] or [rows x cols x channels].
+        tile_size : int, optional
+            Number of pixels along each side of a tile.
+        max_tiles : int, optional
+            Max number of cached tiles.
+        """
+        self.data = data
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self._cache = OrderedDict()
+
+        size = max(data.shape[0:2])
+        self.n_levels = 1 + max(0, int(np.ceil(np.log2(size / tile_size))))
+
+        top = self.get_tile(self.n_levels - 1, 0, 0)
+        finite = top[np.isfinite(top)] if top.dtype.kind == "f" else top
+        self.vmin = float(finite.min()) if finite.size > 0 else 0.0
+        self.vmax = float(finite.max()) if finite.size > 0 else 1.0
+
+    @property
+    def shape(self) -> tuple:
+        return self.data.shape
+
+    def level_shape(self, level: int) -> tuple:
+        """Number of rows and columns of a level."""
+        step = 2**level
+        rows, cols = self.data.shape[0:2]
+        return ((rows + step - 1) // step, (cols + step - 1) // step)
+
+    def get_tile(self, level: int, row: int, col: int) -> np.ndarray:
+        """Pixels of a tile, read from the image the first time it is needed."""
+        key = (level, row, col)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        step = 2**level
+        span = self.tile_size * step
+        rows = slice(row * span, (row + 1) * span, step)
+        cols = slice(col * span, (col + 1) * span, step)
+        tile = np.array(self.data[rows, cols])
+
+        self._cache[key] = tile
+        if len(self._cache) > self.max_tiles:
+            self._cache.popitem(last=False)
+        return tile
+
+    def get_level(self, scale: float) -> int:
+        """Finest level with at least one image pixel per screen pixel.
+
+        Parameters
+        ----------
+        scale : float
+            Number of screen pixels per image pixel.
+        """
+        if scale <= 0:
+            return self.n_levels - 1
+        level = int(np.floor(np.log2(max(1.0, 1.0 / scale))))
+        return min(level, self.n_levels - 1)
+
+    def render(self, x0: float, x1: float, y0: float, y1: float, scale: float):
+        """Mosaic of the tiles that cover a window of the image.
+
+        Parameters
+        ----------
+        x0, x1 : float
+            Column range of the window in level 0 pixels.
+        y0, y1 : float
+            Row range of the window in level 0 pixels.
+        scale : float
+            Number of screen pixels per image pixel.
+
+        Returns
+        -------
+        tuple[np.ndarray, tuple]
+            Pixels of the mosaic and its extent as (x0, x1, y0, y1) in level 0
+            pixels, or None and an empty extent if the window is outside the image.
+        """
+        level = self.get_level(scale)
+        step = 2**level
+        rows, cols = self.level_shape(level)
+        size = self.tile_size
+
+        # Pixel range of the window in the level, clipped to the image
+        c0 = int(np.clip(np.floor(min(x0, x1) / step), 0, cols))
+        c1 = int(np.clip(np.ceil(max(x0, x1) / step), 0, cols))
+        r0 = int(np.clip(np.floor(min(y0, y1) / step), 0, rows))
+        r1 = int(np.clip(np.ceil(max(y0, y1) / step), 0, rows))
+        if c1 <= c0 or r1 <= r0:
+            return None, ()
+
+        out = np.empty((r1 - r0, c1 - c0) + self.data.shape[2:], self.data.dtype)
+        for tr in range(r0 // size, (r1 - 1) // size + 1):
+            for tc in range(c0 // size, (c1 - 1) // size + 1):
+                tile = self.get_tile(level, tr, tc)
+                (tr0, tc0) = (tr * size, tc * size)
+                (a0, a1) = (max(r0, tr0), min(r1, tr0 + tile.shape[0]))
+                (b0, b1) = (max(c0, tc0), min(c1, tc0 + tile.shape[1]))
+                out[a0 - r0 : a1 - r0, b0 - c0 : b1 - c0] = tile[
+                    a0 - tr0 : a1 - tr0, b0 - tc0 : b1 - tc0
+                ]
+
+        extent = (c0 * step, min(c1 * step, self.shape[1]), r0 * step)
+        extent += (min(r1 * step, self.shape[0]),)
+        return out, extent
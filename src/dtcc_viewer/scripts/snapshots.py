@@ -0,0 +1,140 @@
+"""Command line interface for batch rendering of snapshots.
+
+Example
+-------
+dtcc-viewer-snapshots city.json --views top front perspective \\
+    --shading diffuse shadows_static --data "Vertex Z" --out images
+"""
+
+import os
+import argparse
+import numpy as np
+from dtcc_viewer.logging import info, warning
+from dtcc_viewer.opengl.snapshot import SnapshotRenderer, CameraPose
+from dtcc_viewer.opengl.scene import Scene
+from dtcc_viewer.opengl.utils import CameraView, Shading
+
+MESH_EXTENSIONS = [".obj", ".ply", ".stl", ".vtk", ".vtu", ".gltf", ".glb", ".pb"]
+PC_EXTENSIONS = [".las", ".laz", ".csv"]
+CITY_EXTENSIONS = [".json"]
+RASTER_EXTENSIONS = [".tif", ".tiff"]
+
+
+def _parse_pose(text: str, index: int) -> CameraPose:
+    """Parse a pose on the form 'x,y,z:tx,ty,tz' or 'name=x,y,z:tx,ty,tz'."""
+    name = f"pose{index}"
+    if "=" in text:
+        name, text = text.split("=", 1)
+    try:
+        position, target = text.split(":")
+        position = [float(v) for v in position.split(",")]
+        target = [float(v) for v in target.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid camera pose: '{text}'")
+    if len(position) != 3 or len(target) != 3:
+        raise argparse.ArgumentTypeError(f"Invalid camera pose: '{text}'")
+    return CameraPose(name, position, target)
+
+
+def _add_file_to_scene(scene: Scene, path: str) -> bool:
+    """Load a file and add it to the scene based on its extension."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    ext = os.path.splitext(path)[1].lower()
+
+    # Imports are deferred since loading dtcc_core.io is slow
+    if ext in MESH_EXTENSIONS:
+        from dtcc_core.io import meshes
+
+        scene.add_mesh(name, meshes.load_mesh(path))
+    elif ext in PC_EXTENSIONS:
+        from dtcc_core.io import pointcloud
+
+        scene.add_pointcloud(name, pointcloud.load(path))
+    elif ext in CITY_EXTENSIONS:
+        from dtcc_core import io
+
+        scene.add_city(name, io.load_cityjson(path))
+    elif ext in RASTER_EXTENSIONS:
+        from dtcc_core.io import load_raster
+
+        scene.add_raster(name, load_raster(path))
+    else:
+        warning(f"File type '{ext}' is not supported, '{path}' skipped.")
+        return False
+    return True
+
+
+def _create_parser() -> argparse.ArgumentParser:
+    view_names = [v.name.lower() for v in CameraView]
+    shading_names = [s.name.lower() for s in Shading]
+
+    parser = argparse.ArgumentParser(
+        description="Render batches of snapshots of a scene from multiple views."
+    )
+    parser.add_argument("files", nargs="+", help="Files to add to the scene.")
+    parser.add_argument(
+        "--views",
+        nargs="*",
+        default=[],
+        choices=view_names,
+        help="Camera view presets to render.",
+    )
+    parser.add_argument(
+        "--pose",
+        action="append",
+        default=[],
+        help="Explicit camera pose in data coordinates, 'name=x,y,z:tx,ty,tz'.",
+    )
+    parser.add_argument(
+        "--data", nargs="*", default=[], help="Names of data channels to color by."
+    )
+    parser.add_argument(
+        "--shading",
+        nargs="*",
+        default=[],
+        choices=shading_names,
+        help="Shading modes for meshes.",
+    )
+    parser.add_argument("--size", nargs=2, type=int, default=[1600, 1200])
+    parser.add_argument("--out", default="snapshots", help="Output directory.")
+    parser.add_argument("--prefix", default="snapshot", help="File name prefix.")
+    parser.add_argument("--format", default="png", help="Image file format.")
+    parser.add_argument(
+        "--buffers", type=int, default=2, help="Frames in flight during read back."
+    )
+    return parser
+
+
+def main(argv: list[str] = None) -> int:
+    parser = _create_parser()
+    args = parser.parse_args(argv)
+
+    views = [CameraView[name.upper()] for name in args.views]
+    views += [_parse_pose(p, i) for i, p in enumerate(args.pose)]
+    shadings = [Shading[name.upper()] for name in args.shading]
+
+    # The renderer creates the OpenGL context which the scene needs
+    width, height = args.size
+    renderer = SnapshotRenderer(width, height, n_buffers=args.buffers)
+    scene = Scene()
+
+    loaded = [_add_file_to_scene(scene, f) for f in args.files]
+    if not np.any(loaded):
+        warning("No files could be loaded.")
+        renderer.close()
+        return 1
+
+    if not renderer.preprocess(scene):
+        renderer.close()
+        return 1
+
+    paths = renderer.render_batch(
+        views, args.data, shadings, args.out, args.prefix, args.format
+    )
+    renderer.close()
+    info(f"{len(paths)} images written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -48,10 +48,28 @@ out vec4 FragColor;
   
 in vec2 TexCoords;
 
-uniform sampler2D screenTex;
+uniform usampler2D screenTex;
+
+// Background pixels hold the largest unsigned int
+const uint background = 0xFFFFFFFFu;
 
 void main()
 { 
-    FragColor = texture(screenTex, TexCoords);
+    ivec2 size = textureSize(screenTex, 0);
+    uint id = texelFetch(screenTex, ivec2(TexCoords * vec2(size)), 0).r;
+
+    if(id == background)
+    {
+        FragColor = vec4(0.0, 0.0, 0.0, 1.0);
+    }
+    else
+    {
+        // Scramble the bits so that neighbouring ids get distinct colors
+        uint h = id * 2654435761u;
+        float r = float((h >> 0) & 0xFFu) / 255.0;
+        float g = float((h >> 8) & 0xFFu) / 255.0;
+        float b = float((h >> 16) & 0xFFu) / 255.0;
+        FragColor = vec4(r, g, b, 1.0);
+    }
 }
 """
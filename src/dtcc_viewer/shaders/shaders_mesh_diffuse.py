@@ -4,7 +4,7 @@ vertex_shader_diffuse = """
 layout(location = 0) in vec3 a_position; 
 layout(location = 1) in vec2 a_texel;
 layout(location = 2) in vec3 a_normal;
-layout(location = 3) in float a_id;
+layout(location = 3) in uint a_id;
 
 uniform mat4 model;
 uniform mat4 view;
@@ -20,6 +20,7 @@ uniform float data_max;
 uniform int cmap_idx;
 uniform int data_idx;
 uniform int picked_id;
+uniform int hovered_id;
 
 uniform sampler2D data_tex;
 
@@ -60,6 +61,10 @@ void main()
     {
         v_color = vec3(1.0, 0.0, 1.0);
     }
+    else if(hovered_id == id_int)
+    {
+        v_color = vec3(1.0, 0.6, 1.0);
+    }
     else if(color_by == 1)
     {
         // Calculate the colors using the shader colormaps
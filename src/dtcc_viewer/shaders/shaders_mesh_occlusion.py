@@ -0,0 +1,46 @@
+vertex_shader_occlusion = """
+# version 330 core
+
+// Corners of a unit cube with coordinates 0 or 1
+layout(location = 0) in vec3 a_position;
+// Bounding box of the part, per instance
+layout(location = 1) in vec3 a_bb_min;
+layout(location = 2) in vec3 a_bb_max;
+
+uniform mat4 model;
+uniform mat4 view;
+uniform mat4 project;
+uniform float clip_x;
+uniform float clip_y;
+uniform float clip_z;
+
+void main()
+{
+    // Scale the unit cube to the bounding box of the part
+    vec3 position = mix(a_bb_min, a_bb_max, a_position);
+
+    vec4 clippingPlane1 = vec4(-1, 0, 0, clip_x);
+	vec4 clippingPlane2 = vec4(0, -1, 0, clip_y);
+	vec4 clippingPlane3 = vec4(0, 0, -1, clip_z);
+
+    vec4 world_pos = model * vec4(position, 1.0);
+
+    gl_ClipDistance[0] = dot(world_pos, clippingPlane1);
+    gl_ClipDistance[1] = dot(world_pos, clippingPlane2);
+    gl_ClipDistance[2] = dot(world_pos, clippingPlane3);
+
+    gl_Position = project * view * world_pos;
+}
+"""
+
+fragment_shader_occlusion = """
+# version 330 core
+
+// Nothing is written since color and depth writes are masked during the queries
+out vec4 color;
+
+void main()
+{
+    color = vec4(1.0);
+}
+"""
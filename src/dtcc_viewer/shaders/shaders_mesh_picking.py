@@ -5,7 +5,7 @@ vertex_shader_picking = """
 layout(location = 0) in vec3 a_position; 
 layout(location = 1) in vec2 a_texel;
 layout(location = 2) in vec3 a_normal;
-layout(location = 3) in float a_id;
+layout(location = 3) in uint a_id;
 
 // Values that stay constant for the whole mesh.
 uniform mat4 model;
@@ -15,15 +15,8 @@ uniform float clip_x;
 uniform float clip_y;
 uniform float clip_z;
 
-out vec3 v_color;
-
-//Convert id to color
-vec3 id_to_color(int id) {
-    float r = float((id & 0x000000FF) >> 0) / 255.0;
-    float g = float((id & 0x0000FF00) >> 8) / 255.0;
-    float b = float((id & 0x00FF0000) >> 16) / 255.0;
-    return vec3(r, g, b);
-}
+// The id is passed on unchanged to the integer id buffer
+flat out uint v_id;
 
 void main()
 {
@@ -41,8 +34,7 @@ void main()
 
     gl_Position = project * view * world_pos;
 
-    highp int id_int = int(a_id);
-    v_color = id_to_color(id_int);
+    v_id = a_id;
 }
 """
 
@@ -50,13 +42,13 @@ fragment_shader_picking = """
 # version 330 core
 
 // Input from vertex shader
-in vec3 v_color;
+flat in uint v_id;
 
-// Ouput data
-out vec4 color;
+// Ouput data, written to a GL_R32UI color attachment
+layout(location = 0) out uint frag_id;
 
 void main()
 {
-    color =  vec4(v_color, 1.0);
+    frag_id = v_id;
 }
 """
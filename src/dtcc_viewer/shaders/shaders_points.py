@@ -104,3 +104,115 @@ void main()
     out_color = vec4(v_color, 1.0);
 }
 """
+
+# Vertex shader for the particles drawn as point sprites, one vertex per particle
+
+vertex_shader_pc_sprite = """
+# version 330 core
+
+layout(location = 2) in vec3 a_offset;          //Data per vertex
+layout(location = 3) in vec2 a_texel;           //Data per vertex
+
+uniform mat4 project;
+uniform mat4 view;
+uniform int color_by;
+uniform int color_inv;
+
+uniform float clip_x;
+uniform float clip_y;
+uniform float clip_z;
+
+uniform float data_min; 
+uniform float data_max;
+uniform int cmap_idx;
+
+uniform float p_size;       // Radius of the particles in world units
+uniform float vp_height;    // Height of the viewport in pixels
+
+uniform sampler2D data_tex;
+
+$color_map_0
+$color_map_1
+$color_map_2
+$color_map_3
+$color_map_4
+
+out vec3 v_color;
+void main()
+{   
+    ivec2 texel_coords = ivec2(a_texel);
+    vec4 data_from_texture = texelFetch(data_tex, texel_coords, 0);
+    float data = data_from_texture.r;
+
+    vec4 clippingPlane1 = vec4(-1, 0, 0, clip_x);
+	vec4 clippingPlane2 = vec4(0, -1, 0, clip_y);
+	vec4 clippingPlane3 = vec4(0, 0, -1, clip_z);
+    
+    vec4 final_pos = vec4(a_offset, 1.0);
+    
+    gl_ClipDistance[0] = dot(final_pos, clippingPlane1);
+    gl_ClipDistance[1] = dot(final_pos, clippingPlane2);
+    gl_ClipDistance[2] = dot(final_pos, clippingPlane3);
+
+    gl_Position = project * view * final_pos;
+
+    // Projected diameter in pixels of a disc with radius p_size facing the camera,
+    // w is 1 for orthographic projections
+    gl_PointSize = max(p_size * project[1][1] * vp_height / gl_Position.w, 1.0);
+
+    v_color = vec3(1.0);
+
+    if(color_by == 1)
+    {   
+        // Calculate the colors using the shader colormaps
+
+        if(cmap_idx == 0)
+        {
+            v_color = turbo(data);
+        }
+        else if(cmap_idx == 1)
+        {
+            v_color = inferno(data);
+        }
+        else if(cmap_idx == 2)
+        {
+            v_color = black_body(data);
+        }
+        else if(cmap_idx == 3)
+        {
+            v_color = rainbow(data);
+        }
+        else if(cmap_idx == 4)
+        {
+            v_color = viridis(data);
+        }
+
+        if(color_inv == 1)
+        {
+            v_color = vec3(1.0) - v_color;
+        }
+    }
+}
+"""
+
+# Fragment shader for the particles drawn as point sprites
+
+fragment_shader_pc_sprite = """
+# version 330 core
+in vec3 v_color;
+out vec4 out_color;
+void main()
+{
+    // Position within the sprite with the center at the origin and radius 1
+    vec2 p = 2.0 * gl_PointCoord - vec2(1.0);
+    float r2 = dot(p, p);
+    if(r2 > 1.0)
+    {
+        discard;
+    }
+
+    // White in the center and grey at the edge, same as the disc geometry
+    float shade = 1.0 - 0.5 * sqrt(r2);
+    out_color = vec4(v_color * shade, 1.0);
+}
+"""
@@ -46,7 +46,7 @@ uniform int color_by;
 uniform int color_inv;
 uniform int cmap_idx;
 
-uniform sampler2D data_texture;
+uniform ${sampler} data_texture;
 uniform float data_min;
 uniform float data_max;
 
@@ -58,8 +58,9 @@ $color_map_4
 
 void main()
 {
-    // Sample the data texture at the current texture coordinates
-    vec4 value = texture(data_texture, tex_coords);
+    // Sample the raw data value and normalize it with the data range
+    float value = float(texture(data_texture, tex_coords).r);
+    value = clamp((value - data_min) / max(data_max - data_min, 1e-9), 0.0, 1.0);
 
     // Magenta as default color
     vec3 color = vec3(1.0, 0.0, 1.0); 
@@ -67,23 +68,23 @@ void main()
     if (color_by == 1) {
     
         if (cmap_idx == 0) {
-            color = turbo(value.r);
+            color = turbo(value);
         } 
         else if (cmap_idx == 1) 
         {
-            color = inferno(value.r);
+            color = inferno(value);
         } 
         else if (cmap_idx == 2) 
         {
-            color = black_body(value.r);
+            color = black_body(value);
         } 
         else if (cmap_idx == 3) 
         {
-            color = rainbow(value.r);
+            color = rainbow(value);
         } 
         else if (cmap_idx == 4) 
         {
-            color = viridis(value.r);
+            color = viridis(value);
         }
         if(color_inv == 1)
         {
@@ -196,3 +197,268 @@ void main()
 }
 
 """
+
+
+vertex_shader_raster_tiled = """
+#version 330 core
+layout (location = 0) in vec2 a_corner;
+layout (location = 1) in vec4 a_rect;       // Tile min x, min y, max x, max y
+layout (location = 2) in vec4 a_tile;       // Tile u scale, v scale, layer and z
+
+uniform mat4 model;
+uniform mat4 project;
+uniform mat4 view;
+uniform float clip_x;
+uniform float clip_y;
+uniform float clip_z;
+
+out vec3 tex_coords;
+
+void main()
+{
+    vec4 clippingPlane1 = vec4(-1, 0, 0, clip_x);
+	vec4 clippingPlane2 = vec4(0, -1, 0, clip_y);
+	vec4 clippingPlane3 = vec4(0, 0, -1, clip_z);
+
+    vec2 position = mix(a_rect.xy, a_rect.zw, a_corner);
+    vec4 world_pos = model * vec4(position, a_tile.w, 1.0);
+
+    gl_ClipDistance[0] = dot(world_pos, clippingPlane1);
+    gl_ClipDistance[1] = dot(world_pos, clippingPlane2);
+    gl_ClipDistance[2] = dot(world_pos, clippingPlane3);
+
+    gl_Position = project * view * world_pos;
+
+    // Partial tiles at the edges of the raster only use part of the tile texture
+    tex_coords = vec3(a_corner * a_tile.xy, a_tile.z);
+}
+"""
+
+
+fragment_shader_raster_tiled_data = """
+#version 330 core
+
+in vec3 tex_coords;
+out vec4 frag_color;
+
+uniform int color_by;
+uniform int color_inv;
+uniform int cmap_idx;
+
+uniform ${sampler}Array data_texture;
+uniform float data_min;
+uniform float data_max;
+
+$color_map_0
+$color_map_1
+$color_map_2
+$color_map_3
+$color_map_4
+
+void main()
+{
+    // The tiles hold the raw data values, normalized here with the data range
+    float value = float(texture(data_texture, tex_coords).r);
+    value = clamp((value - data_min) / max(data_max - data_min, 1e-9), 0.0, 1.0);
+
+    vec3 color = vec3(1.0, 1.0, 1.0);
+
+    if (color_by == 1)
+    {
+        if (cmap_idx == 0)
+            color = turbo(value);
+        else if (cmap_idx == 1)
+            color = inferno(value);
+        else if (cmap_idx == 2)
+            color = black_body(value);
+        else if (cmap_idx == 3)
+            color = rainbow(value);
+        else if (cmap_idx == 4)
+            color = viridis(value);
+
+        if (color_inv == 1)
+            color = vec3(1.0) - color;
+    }
+
+    frag_color = vec4(color, 1.0);
+}
+"""
+
+
+fragment_shader_raster_tiled_rgba = """
+#version 330 core
+
+in vec3 tex_coords;
+out vec4 frag_color;
+
+uniform sampler2DArray data_texture;
+uniform int color_inv;
+uniform int r_channel;
+uniform int g_channel;
+uniform int b_channel;
+
+void main()
+{
+    vec4 value = texture(data_texture, tex_coords);
+    vec3 channels = vec3(r_channel, g_channel, b_channel);
+    vec3 color = value.rgb * channels;
+
+    if (color_inv == 1)
+    {
+        color = vec3(1.0) - color;
+    }
+
+    // RGB tiles are sampled with alpha 1.0
+    frag_color = vec4(color, value.a);
+}
+"""
+
+
+vertex_shader_raster_terrain = """
+#version 330 core
+layout (location = 0) in vec2 a_grid;       // Vertex index along x and y in the patch
+layout (location = 1) in vec4 a_patch;      // Patch min x, min y, vertex spacing, level
+
+uniform mat4 model;
+uniform mat4 project;
+uniform mat4 view;
+uniform float clip_x;
+uniform float clip_y;
+uniform float clip_z;
+
+uniform sampler2D height_tex;
+uniform vec2 raster_min;
+uniform vec2 raster_size;
+uniform float z_base;
+uniform float height_scale;
+uniform float patch_cells;
+uniform vec2 ring_centers[16];
+
+out vec2 position;
+out vec2 tex_coords;
+out float morph;
+flat out float lod;
+
+void main()
+{
+    vec4 clippingPlane1 = vec4(-1, 0, 0, clip_x);
+	vec4 clippingPlane2 = vec4(0, -1, 0, clip_y);
+	vec4 clippingPlane3 = vec4(0, 0, -1, clip_z);
+
+    float spacing = a_patch.z;
+    int level = int(a_patch.w);
+    vec2 xy = a_patch.xy + a_grid * spacing;
+
+    // Move odd vertices onto the grid of the next ring towards the outer edge of
+    // the ring, so that the edge vertices match those of the coarser ring.
+    vec2 d = abs(xy - ring_centers[level]) / (2.0 * patch_cells * spacing);
+    morph = clamp((max(d.x, d.y) - 0.75) / 0.2, 0.0, 1.0);
+    xy -= mod(a_grid, 2.0) * spacing * morph;
+
+    // Vertices outside the raster collapse onto its edges
+    xy = clamp(xy, raster_min, raster_min + raster_size);
+    position = xy;
+    tex_coords = (xy - raster_min) / raster_size;
+    lod = a_patch.w;
+
+    // Heights are blended towards the next level along with the positions
+    float h_fine = textureLod(height_tex, tex_coords, lod).r;
+    float h_coarse = textureLod(height_tex, tex_coords, lod + 1.0).r;
+    float height = mix(h_fine, h_coarse, morph);
+    float z = z_base + height * height_scale;
+    vec4 world_pos = model * vec4(xy, z, 1.0);
+
+    gl_ClipDistance[0] = dot(world_pos, clippingPlane1);
+    gl_ClipDistance[1] = dot(world_pos, clippingPlane2);
+    gl_ClipDistance[2] = dot(world_pos, clippingPlane3);
+
+    gl_Position = project * view * world_pos;
+}
+"""
+
+
+fragment_shader_raster_terrain = """
+#version 330 core
+
+in vec2 position;
+in vec2 tex_coords;
+in float morph;
+flat in float lod;
+out vec4 frag_color;
+
+uniform int color_by;
+uniform int color_inv;
+uniform int cmap_idx;
+
+uniform sampler2D height_tex;
+uniform vec2 raster_size;
+uniform float height_scale;
+uniform float color_min;
+uniform float color_max;
+uniform float patch_cells;
+uniform float min_spacing;
+uniform vec2 ring_centers[16];
+
+$color_map_0
+$color_map_1
+$color_map_2
+$color_map_3
+$color_map_4
+
+const vec3 light_dir = normalize(vec3(0.4, 0.3, 0.85));
+
+vec2 get_slope(float level)
+{
+    vec2 step = exp2(level) / vec2(textureSize(height_tex, 0));
+    float h_l = textureLod(height_tex, tex_coords - vec2(step.x, 0.0), level).r;
+    float h_r = textureLod(height_tex, tex_coords + vec2(step.x, 0.0), level).r;
+    float h_d = textureLod(height_tex, tex_coords - vec2(0.0, step.y), level).r;
+    float h_u = textureLod(height_tex, tex_coords + vec2(0.0, step.y), level).r;
+    vec2 dist = 2.0 * step * raster_size;
+    return vec2(h_r - h_l, h_u - h_d) / dist;
+}
+
+void main()
+{
+    // The area covered by the next finer ring is drawn by that ring
+    if (lod > 0.5)
+    {
+        vec2 d = abs(position - ring_centers[int(lod) - 1]);
+        if (max(d.x, d.y) < patch_cells * min_spacing * exp2(lod))
+            discard;
+    }
+
+    // Normal from central differences of the heights at the level of the ring,
+    // blended towards the next level like the heights
+    vec2 slope_fine = get_slope(lod);
+    vec2 slope_coarse = get_slope(lod + 1.0);
+    vec2 slope = mix(slope_fine, slope_coarse, morph) * height_scale;
+    vec3 normal = normalize(vec3(-slope, 1.0));
+    float diffuse = max(dot(normal, light_dir), 0.0);
+
+    float height = textureLod(height_tex, tex_coords, 0.0).r;
+    float value = (height - color_min) / max(color_max - color_min, 1e-9);
+    value = clamp(value, 0.0, 1.0);
+
+    vec3 color = vec3(1.0, 1.0, 1.0);
+
+    if (color_by == 1)
+    {
+        if (cmap_idx == 0)
+            color = turbo(value);
+        else if (cmap_idx == 1)
+            color = inferno(value);
+        else if (cmap_idx == 2)
+            color = black_body(value);
+        else if (cmap_idx == 3)
+            color = rainbow(value);
+        else if (cmap_idx == 4)
+            color = viridis(value);
+
+        if (color_inv == 1)
+            color = vec3(1.0) - color;
+    }
+
+    frag_color = vec4(color * (0.35 + 0.65 * diffuse), 1.0);
+}
+"""
@@ -0,0 +1,167 @@
+vertex_shader_volume = """
+#version 330 core
+layout (location = 0) in vec3 a_position;   // Corner of the unit cube or quad
+
+uniform mat4 model;
+uniform mat4 project;
+uniform mat4 view;
+uniform float clip_x;
+uniform float clip_y;
+uniform float clip_z;
+uniform vec3 box_min;       // Min corner of the grid
+uniform vec3 box_size;      // Size of the grid along x, y and z
+uniform int slice_axis;     // -1 to ray march the grid, 0, 1, 2 for a slice
+uniform float slice_pos;    // Position of the slice in [0, 1]
+
+out vec3 grid_pos;          // Position in the grid in [0, 1]
+
+void main()
+{
+    vec3 p = a_position;
+    if (slice_axis == 0) {
+        p = vec3(slice_pos, a_position.x, a_position.y);
+    }
+    else if (slice_axis == 1) {
+        p = vec3(a_position.x, slice_pos, a_position.y);
+    }
+    else if (slice_axis == 2) {
+        p = vec3(a_position.x, a_position.y, slice_pos);
+    }
+
+    vec4 world_pos = model * vec4(box_min + p * box_size, 1.0);
+
+    // The cube is not clipped, the rays are clipped in the fragment shader instead
+    vec4 clippingPlane1 = vec4(-1, 0, 0, clip_x);
+    vec4 clippingPlane2 = vec4(0, -1, 0, clip_y);
+    vec4 clippingPlane3 = vec4(0, 0, -1, clip_z);
+    bool slice = (slice_axis >= 0);
+    gl_ClipDistance[0] = slice ? dot(world_pos, clippingPlane1) : 1.0;
+    gl_ClipDistance[1] = slice ? dot(world_pos, clippingPlane2) : 1.0;
+    gl_ClipDistance[2] = slice ? dot(world_pos, clippingPlane3) : 1.0;
+
+    gl_Position = project * view * world_pos;
+    grid_pos = p;
+}
+"""
+
+
+fragment_shader_volume = """
+#version 330 core
+
+in vec3 grid_pos;
+out vec4 frag_color;
+
+uniform int color_inv;
+uniform int cmap_idx;
+uniform float data_min;
+uniform float data_max;
+
+uniform sampler3D volume_tex;
+uniform vec3 tex_size;      // Number of grid points along z, x and y
+uniform vec3 box_min;
+uniform vec3 box_size;
+uniform mat4 inv_mvp;       // Inverse of the model view projection matrix
+uniform vec2 viewport;      // Width and height of the viewport
+uniform vec3 clip_max;      // Clipping planes, the volume is kept below
+uniform int slice_axis;
+uniform int n_steps;        // Number of steps along the diagonal of the grid
+uniform float opacity;      // Opacity of 1 % of the diagonal at the max value
+uniform sampler2D scene_depth;  // Depth of the opaque objects of the scene
+
+$color_map_0
+$color_map_1
+$color_map_2
+$color_map_3
+$color_map_4
+
+vec3 get_color(float value)
+{
+    if (color_inv == 1) {
+        value = 1.0 - value;
+    }
+
+    if (cmap_idx == 0) {
+        return turbo(value);
+    }
+    else if (cmap_idx == 1) {
+        return inferno(value);
+    }
+    else if (cmap_idx == 2) {
+        return black_body(value);
+    }
+    else if (cmap_idx == 3) {
+        return rainbow(value);
+    }
+    else if (cmap_idx == 4) {
+        return viridis(value);
+    }
+    return vec3(1.0, 0.0, 1.0);
+}
+
+float sample_volume(vec3 p)
+{
+    // The texture is stored with z as the fastest axis, and the grid points are
+    // at the texel centers so the values are interpolated between the points
+    vec3 t = vec3(p.z, p.x, p.y);
+    t = (t * (tex_size - 1.0) + 0.5) / tex_size;
+    float value = texture(volume_tex, t).r;
+    return clamp((value - data_min) / max(data_max - data_min, 1e-9), 0.0, 1.0);
+}
+
+void main()
+{
+    if (slice_axis >= 0) {
+        frag_color = vec4(get_color(sample_volume(grid_pos)), 1.0);
+        return;
+    }
+
+    // Ray through the pixel from the near to the far plane, in grid coordinates
+    vec2 ndc = 2.0 * gl_FragCoord.xy / viewport - 1.0;
+    vec4 near = inv_mvp * vec4(ndc, -1.0, 1.0);
+    vec4 far = inv_mvp * vec4(ndc, 1.0, 1.0);
+    vec3 origin = (near.xyz / near.w - box_min) / box_size;
+    vec3 dir = (far.xyz / far.w - box_min) / box_size - origin;
+
+    // Intersect the ray with the grid below the clipping planes
+    vec3 upper = min(vec3(1.0), (clip_max - box_min) / box_size);
+    vec3 t0 = (vec3(0.0) - origin) / dir;
+    vec3 t1 = (upper - origin) / dir;
+    vec3 t_lo = min(t0, t1);
+    vec3 t_hi = max(t0, t1);
+    float t_enter = max(max(max(t_lo.x, t_lo.y), t_lo.z), 0.0);
+    float t_exit = min(min(min(t_hi.x, t_hi.y), t_hi.z), 1.0);
+
+    // End the ray at the closest opaque object, the unprojected scene point is on
+    // the same ray, so its parameter is found by projecting on the ray direction
+    float depth = texelFetch(scene_depth, ivec2(gl_FragCoord.xy), 0).r;
+    vec4 scene = inv_mvp * vec4(ndc, 2.0 * depth - 1.0, 1.0);
+    vec3 scene_pos = (scene.xyz / scene.w - box_min) / box_size;
+    float t_scene = dot(scene_pos - origin, dir) / dot(dir, dir);
+    t_exit = min(t_exit, t_scene);
+    if (t_exit <= t_enter) {
+        discard;
+    }
+
+    // Steps of the same length for all rays, with the opacity of each step
+    // corrected for the step length
+    float diag = length(box_size);
+    float len = length(dir * box_size) * (t_exit - t_enter);
+    int n = clamp(int(ceil(len / diag * float(n_steps))), 1, 2 * n_steps);
+    float step_scale = 100.0 * len / (diag * float(n));
+
+    // Composite front to back with premultiplied alpha
+    vec4 acc = vec4(0.0);
+    for (int i = 0; i < n; i++) {
+        float t = t_enter + (float(i) + 0.5) / float(n) * (t_exit - t_enter);
+        float value = sample_volume(origin + t * dir);
+        float alpha = 1.0 - pow(1.0 - min(opacity * value, 0.999), step_scale);
+        acc.rgb += (1.0 - acc.a) * alpha * get_color(value);
+        acc.a += (1.0 - acc.a) * alpha;
+        if (acc.a > 0.99) {
+            break;
+        }
+    }
+
+    frag_color = acc;
+}
+"""
@@ -0,0 +1,340 @@
+"""Benchmarks for the CPU side preprocessing of the viewer.
+
+The wrappers and the scene are built from synthetic inputs at several scales and
+timed without any OpenGL context, by passing a fixed max texture size (mts) to the
+wrappers and the Scene. Peak memory is measured with tracemalloc in a separate
+run so that the tracing overhead does not affect the timings.
+
+Results can be saved as a JSON baseline and later runs compared against it:
+
+    python bench_preprocessing.py --scales small medium --save
+    python bench_preprocessing.py --scales small medium --check --tolerance 0.25
+
+The check exits with a non-zero code if any case is slower or uses more memory
+than the baseline by more than the tolerance.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import numpy as np
+from datetime import datetime
+from shapely.geometry import Point
+
+from dtcc_core.model import MultiLineString
+from dtcc_viewer.opengl.scene import Scene
+from dtcc_viewer.opengl.wrp_mesh import MeshWrapper
+from dtcc_viewer.opengl.wrp_pointcloud import PointCloudWrapper
+from dtcc_viewer.opengl.wrp_linestring import MultiLineStringWrapper
+from dtcc_viewer.opengl.wrp_volume_mesh import VolumeMeshWrapper
+from dtcc_viewer.opengl.wrp_city import CityWrapper
+from dtcc_viewer.opengl.bvh import BVH
+from dtcc_viewer.opengl.octree import PointOctree
+from dtcc_viewer.opengl.raster_pyramid import RasterPyramid
+from dtcc_viewer.opengl.raster_stats import RasterStats
+from dtcc_viewer.opengl.utils import (
+    BoundingBox,
+    create_sphere_mesh,
+    create_tetrahedral_cube_mesh,
+    create_ls_circle,
+    mesh_to_pointcloud,
+    double_sine_wave_surface,
+    grid_surface_mesh,
+    create_synthetic_city,
+    voxel_downsample,
+)
+
+MTS = 16384  # Typical GL_MAX_TEXTURE_SIZE, used instead of querying the GPU
+
+BASELINE_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baselines", "preprocessing.json"
+)
+
+# Input sizes for each benchmark case and scale
+SCALES = {
+    "small": {
+        "sphere": 100,
+        "sine": 200,
+        "points": 100_000,
+        "circles": (100, 100),
+        "tets": 10,
+        "city": (10, 10),
+    },
+    "medium": {
+        "sphere": 300,
+        "sine": 600,
+        "points": 1_000_000,
+        "circles": (1000, 200),
+        "tets": 20,
+        "city": (30, 30),
+    },
+    "large": {
+        "sphere": 700,
+        "sine": 1500,
+        "points": 5_000_000,
+        "circles": (5000, 200),
+        "tets": 35,
+        "city": (60, 60),
+    },
+}
+
+
+def _preprocess(wrapper):
+    """Run the same preprocessing steps as Scene.preprocess_drawing on a wrapper."""
+    bb = BoundingBox(wrapper.get_vertex_positions())
+    wrapper.preprocess_drawing(bb)
+    return wrapper
+
+
+# ---------- Benchmark cases --------#
+#
+# Each case takes the scale parameters, creates its input and returns a tuple
+# with a callable that does the work to be measured and a description of the
+# input size. Input generation is not part of the measurement.
+
+
+def case_mesh_sphere(p: dict):
+    mesh = create_sphere_mesh(Point(0, 0, 0), 10.0, p["sphere"], p["sphere"])
+    run = lambda: _preprocess(MeshWrapper("sphere", mesh, MTS))
+    return run, {"faces": len(mesh.faces)}
+
+
+def case_mesh_sine(p: dict):
+    n = p["sine"]
+    X, Y, Z = double_sine_wave_surface((0, 100), (0, 100), n, n, 0.3, 0.2)
+    mesh = grid_surface_mesh(X, Y, Z)
+    data = {"height": mesh.vertices[:, 2], "x": mesh.vertices[:, 0]}
+    run = lambda: _preprocess(MeshWrapper("sine", mesh, MTS, data))
+    return run, {"faces": len(mesh.faces)}
+
+
+def case_bvh(p: dict):
+    mesh = create_sphere_mesh(Point(0, 0, 0), 10.0, p["sphere"], p["sphere"])
+    wrapper = _preprocess(MeshWrapper("sphere", mesh, MTS))
+    vertices = wrapper.vertices.reshape(-1, 9)
+    tris = vertices[wrapper.faces.reshape(-1, 3), 0:3]
+    # The id slot holds unsigned integer bits, as read by GlMesh.get_vertex_ids
+    vertex_ids = wrapper.vertices.view(np.uint32)[8::9]
+    ids = vertex_ids[wrapper.faces[0::3]].astype(np.int64)
+    run = lambda: BVH(tris, ids)
+    return run, {"faces": len(tris)}
+
+
+def case_pointcloud(p: dict):
+    mesh = create_sphere_mesh(Point(0, 0, 0), 10.0, 50, 50)
+    pc = mesh_to_pointcloud(mesh, p["points"], seed=1)
+    run = lambda: _preprocess(PointCloudWrapper("pc", pc, MTS, 0.2))
+    return run, {"points": len(pc.points)}
+
+
+def case_octree(p: dict):
+    mesh = create_sphere_mesh(Point(0, 0, 0), 10.0, 50, 50)
+    pc = mesh_to_pointcloud(mesh, p["points"], seed=1)
+    points = np.array(pc.points, dtype=np.float32)
+    run = lambda: PointOctree(points, leaf_size=5000)
+    return run, {"points": len(points)}
+
+
+def case_voxel(p: dict):
+    mesh = create_sphere_mesh(Point(0, 0, 0), 10.0, 50, 50)
+    pc = mesh_to_pointcloud(mesh, p["points"], seed=1)
+    points = np.array(pc.points, dtype=np.float32)
+    data = {"z": points[:, 2]}
+    run = lambda: voxel_downsample(points, 0.1, data)
+    return run, {"points": len(points)}
+
+
+def case_raster_pyramid(p: dict):
+    side = 2 * int(np.sqrt(p["points"]))
+    data = np.random.default_rng(1).random((side, side), dtype=np.float32)
+    run = lambda: RasterPyramid(data, (1.0, 1.0), 256)
+    return run, {"cells": data.size}
+
+
+def case_raster_stats(p: dict):
+    side = 2 * int(np.sqrt(p["points"]))
+    data = np.random.default_rng(1).random((side, side), dtype=np.float32)
+    run = lambda: RasterStats(data).percentiles([2.0, 98.0])
+    return run, {"cells": data.size}
+
+
+def case_multilinestring(p: dict):
+    n_circles, n_segments = p["circles"]
+    side = int(np.ceil(np.sqrt(n_circles)))
+    lss = []
+    for i in range(n_circles):
+        center = Point(50.0 * (i % side), 50.0 * (i // side), 0.0)
+        lss.append(create_ls_circle(center, 20.0, n_segments))
+    mls = MultiLineString(linestrings=lss)
+    run = lambda: _preprocess(MultiLineStringWrapper("mls", mls, MTS))
+    return run, {"linestrings": n_circles, "vertices": n_circles * (n_segments + 1)}
+
+
+def case_volume_mesh(p: dict):
+    n = p["tets"]
+    vmesh = create_tetrahedral_cube_mesh(n, n, n, 10.0)
+    run = lambda: _preprocess(VolumeMeshWrapper("vmesh", vmesh, MTS))
+    return run, {"cells": len(vmesh.cells)}
+
+
+def case_city(p: dict):
+    n_x, n_y = p["city"]
+    city = create_synthetic_city(n_x, n_y, seed=1)
+    run = lambda: _preprocess(CityWrapper("city", city, MTS))
+    return run, {"buildings": n_x * n_y}
+
+
+def case_scene(p: dict):
+    sphere = create_sphere_mesh(Point(0, 0, 0), 10.0, p["sphere"], p["sphere"])
+    pc = mesh_to_pointcloud(sphere, p["points"], seed=1)
+    n_segments = p["circles"][1]
+    lss = [create_ls_circle(Point(0, 0, i), 20.0, n_segments) for i in range(10)]
+    mls = MultiLineString(linestrings=lss)
+    vmesh = create_tetrahedral_cube_mesh(p["tets"], p["tets"], p["tets"], 10.0)
+
+    def run():
+        scene = Scene(mts=MTS)
+        scene.add_mesh("sphere", sphere)
+        scene.add_pointcloud("pc", pc)
+        scene.add_multilinestring("mls", mls)
+        scene.add_volume_mesh("vmesh", vmesh)
+        scene.preprocess_drawing()
+        return scene
+
+    size = {"faces": len(sphere.faces), "points": len(pc.points)}
+    size["cells"] = len(vmesh.cells)
+    return run, size
+
+
+CASES = {
+    "mesh_sphere": case_mesh_sphere,
+    "mesh_sine": case_mesh_sine,
+    "bvh": case_bvh,
+    "pointcloud": case_pointcloud,
+    "octree": case_octree,
+    "voxel": case_voxel,
+    "raster_pyramid": case_raster_pyramid,
+    "raster_stats": case_raster_stats,
+    "multilinestring": case_multilinestring,
+    "volume_mesh": case_volume_mesh,
+    "city": case_city,
+    "scene": case_scene,
+}
+
+
+# ---------- Measurement --------#
+
+
+def measure_time(run, repeat: int) -> float:
+    """Best wall clock time in seconds over a number of repetitions."""
+    timings = []
+    for _ in range(repeat):
+        tic = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - tic)
+    return min(timings)
+
+
+def measure_memory(run) -> float:
+    """Peak memory allocated during a single run in MB."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def run_benchmarks(cases: list[str], scales: list[str], repeat: int) -> dict:
+    results = {}
+    for scale in scales:
+        for case in cases:
+            key = f"{case}/{scale}"
+            run, size = CASES[case](SCALES[scale])
+            seconds = measure_time(run, repeat)
+            peak_mb = measure_memory(run)
+            results[key] = {"time": seconds, "peak_mb": peak_mb, "size": size}
+            print(f"{key:<28} {seconds:10.4f} s {peak_mb:10.1f} MB   {size}")
+    return results
+
+
+def load_baseline(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: dict) -> None:
+    """Merge the results into the baseline file, keeping cases not rerun."""
+    baseline = load_baseline(path)
+    baseline.setdefault("results", {}).update(results)
+    baseline["meta"] = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    print(f"Baseline saved to {path}")
+
+
+def check_regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Compare results with the baseline and list the regressions."""
+    regressions = []
+    reference = baseline.get("results", {})
+    for key, res in results.items():
+        ref = reference.get(key)
+        if ref is None:
+            print(f"{key:<28} no baseline")
+            continue
+        if ref["size"] != res["size"]:
+            print(f"{key:<28} input size differs from baseline, skipped")
+            continue
+        for metric in ["time", "peak_mb"]:
+            ratio = res[metric] / max(ref[metric], 1e-9)
+            if ratio > 1.0 + tolerance:
+                regressions.append(f"{key} {metric}: {ratio:.2f}x baseline")
+    return regressions
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", nargs="*", default=list(CASES), choices=CASES)
+    parser.add_argument("--scales", nargs="*", default=["small"], choices=SCALES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save", action="store_true", help="Save as baseline.")
+    parser.add_argument("--check", action="store_true", help="Compare to baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.cases, args.scales, args.repeat)
+
+    if args.check:
+        baseline = load_baseline(args.baseline)
+        if not baseline:
+            print(f"No baseline found at {args.baseline}")
+            return 1
+        regressions = check_regressions(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regressions found.")
+
+    if args.save:
+        save_baseline(args.baseline, results)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import numpy as np
+from dtcc_viewer.opengl.isosurface import (
+    CUBE_TETS,
+    marching_cubes,
+    marching_tetrahedra,
+)
+
+RADIUS = 1.0137
+SPACING = 0.1
+ORIGIN = np.array([-1.5, -1.5, -1.5])
+
+
+def _sphere_grid():
+    """Distance to a sphere on a [ny x nx x nz] grid, as for a VolumeGrid."""
+    n = 31
+    (y, x, z) = np.meshgrid(*[ORIGIN[0] + SPACING * np.arange(n)] * 3, indexing="ij")
+    return np.sqrt(x**2 + y**2 + z**2) - RADIUS, np.stack((x, y, z), axis=-1)
+
+
+def _grid_tets(shape):
+    """Split every cell of a grid into tetrahedra, as in marching_cubes."""
+    (ny, nx, nz) = shape
+    strides = np.array([nz, nx * nz, 1])
+    bits = np.array([[c & 1, (c >> 1) & 1, (c >> 2) & 1] for c in range(8)])
+    (iy, ix, iz) = np.meshgrid(
+        np.arange(ny - 1), np.arange(nx - 1), np.arange(nz - 1), indexing="ij"
+    )
+    cells = (iy * strides[1] + ix * strides[0] + iz).reshape(-1)
+    return (cells[:, None, None] + (bits @ strides)[CUBE_TETS][None]).reshape(-1, 4)
+
+
+def _check_sphere(vertices, faces):
+    assert len(faces) > 0
+    radii = np.linalg.norm(vertices, axis=1)
+    assert np.all(np.abs(radii - RADIUS) < SPACING)
+
+    # Closed and consistently oriented: each directed edge is used exactly once
+    # and its reverse is used by the neighbouring face
+    edges = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    (directed, counts) = np.unique(edges, axis=0, return_counts=True)
+    assert np.all(counts == 1)
+    reverse = {tuple(e) for e in directed[:, ::-1].tolist()}
+    assert reverse == {tuple(e) for e in directed.tolist()}
+
+    # Facing outwards, which gives a positive volume close to the sphere's
+    tri = vertices[faces]
+    normals = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    assert np.all(np.einsum("ij,ij->i", normals, tri.mean(axis=1)) > 0)
+    volume = np.einsum("ij,ij->i", tri[:, 0], np.cross(tri[:, 1], tri[:, 2])).sum()
+    sphere_volume = 4.0 / 3.0 * np.pi * RADIUS**3
+    assert abs(volume / 6.0 - sphere_volume) < 0.02 * sphere_volume
+
+
+def test_marching_cubes_sphere():
+    (values, _) = _sphere_grid()
+    fields = {"distance": values}
+    (vertices, faces, data) = marching_cubes(
+        fields, "distance", 0.0, ORIGIN, [SPACING] * 3, chunk_size=7
+    )
+    _check_sphere(vertices, faces)
+    assert np.allclose(data["distance"], 0.0, atol=1e-6)
+
+
+def test_marching_tetrahedra_sphere():
+    (values, points) = _sphere_grid()
+    tets = _grid_tets(values.shape)
+    (vertices, faces, _) = marching_tetrahedra(points.reshape(-1, 3), tets, values, 0.0)
+    _check_sphere(vertices, faces)
+
+
+def test_no_crossing():
+    (values, points) = _sphere_grid()
+    tets = _grid_tets(values.shape)
+    (vertices, faces, data) = marching_tetrahedra(
+        points.reshape(-1, 3), tets, values, 10.0, {"distance": values}
+    )
+    assert vertices.shape == (0, 3)
+    assert faces.shape == (0, 3)
+    assert len(data["distance"]) == 0
+
+    fields = {"distance": values}
+    (vertices, faces, _) = marching_cubes(fields, "distance", -10.0, ORIGIN, [1] * 3)
+    assert vertices.shape == (0, 3)
+    assert faces.shape == (0, 3)
+
+
+def test_marching_cubes_without_cells():
+    # A single layer of points along y has no cells
+    fields = {"distance": np.zeros((1, 4, 4))}
+    (vertices, faces, _) = marching_cubes(fields, "distance", 0.0, ORIGIN, [1] * 3)
+    assert vertices.shape == (0, 3)
+    assert faces.shape == (0, 3)
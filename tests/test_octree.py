@@ -0,0 +1,44 @@
+import os
+import numpy as np
+from dtcc_viewer.opengl.octree import PointOctree
+
+
+def _points(n=20000):
+    # Points on a wavy surface with some duplicates, as in a scan
+    rng = np.random.default_rng(2)
+    xy = rng.random((n, 2)) * 100.0
+    z = np.sin(xy[:, 0] / 10.0) * 5.0
+    points = np.column_stack((xy, z))
+    points[0:100] = points[100:200]
+    return points
+
+
+def test_octree_stores_each_point_once():
+    points = _points()
+    tree = PointOctree(points, leaf_size=500, grid_res=8)
+    assert np.array_equal(np.sort(tree.order), np.arange(len(points)))
+    assert tree.n_points == len(points)
+
+    # Each point is inside the cell of its node
+    nodes = np.repeat(np.arange(tree.n_nodes), tree.counts)
+    p = points[tree.order]
+    assert np.all(p >= tree.mins[nodes] - 1e-9)
+    assert np.all(p <= tree.maxs[nodes] + 1e-9)
+
+
+def test_chunked_build_matches_in_memory_build(tmp_path, monkeypatch):
+    points = _points()
+    tree = PointOctree(points, leaf_size=500, grid_res=8)
+
+    # Chunks much smaller than the cloud, sorted in buckets on disk
+    monkeypatch.setattr(PointOctree, "chunk_size", 1500)
+    monkeypatch.setattr(PointOctree, "bucket_bits", 6)
+    chunked = PointOctree(points, leaf_size=500, grid_res=8, workdir=str(tmp_path))
+
+    assert np.array_equal(np.asarray(chunked.order), tree.order)
+    assert np.array_equal(chunked.counts, tree.counts)
+    assert np.array_equal(chunked.parents, tree.parents)
+    assert np.allclose(chunked.mins, tree.mins)
+
+    # Only the point order is kept in the work directory
+    assert os.listdir(tmp_path) == ["octree_order.npy"]
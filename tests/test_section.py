@@ -0,0 +1,46 @@
+import numpy as np
+from dtcc_viewer.opengl.section import CellSection
+
+
+def _brute_force_mask(section: CellSection, planes: list) -> np.ndarray:
+    mask = np.zeros(len(section.cell_mins), dtype=bool)
+    for axis, plane in enumerate(planes):
+        if plane is not None:
+            value = section.cell_mins.dtype.type(plane)
+            mask |= section._cut(axis, value, slice(None))
+    return mask
+
+
+def test_section_update_matches_brute_force():
+    rng = np.random.default_rng(1)
+    n = 500
+
+    # Bounds on a coarse lattice, so that many cells share their mins and maxs
+    corners = rng.integers(0, 20, size=(n, 2, 3)) * 0.25
+    cell_mins = corners.min(axis=1).astype(np.float32)
+    cell_maxs = corners.max(axis=1).astype(np.float32)
+    section = CellSection(cell_mins, cell_maxs, 4)
+    bounds = np.concatenate([cell_mins, cell_maxs])
+
+    planes = [None, None, None]
+    for _ in range(500):
+        axis = rng.integers(0, 3)
+        choice = rng.integers(0, 4)
+        if choice == 0:
+            planes[axis] = None
+        elif choice == 1:
+            planes[axis] = float(rng.choice(bounds[:, axis]))  # Tie with a bound
+        elif choice == 2:
+            planes[axis] = float(rng.uniform(-1.0, 6.0))
+        else:
+            planes[axis] = float(rng.integers(-1, 22) * 0.25)
+
+        section.update(list(planes))
+        assert np.array_equal(section.mask, _brute_force_mask(section, planes))
+
+    # Faces of the cut cells are drawn as ranges of consecutive cells
+    (starts, counts) = section.get_draw_ranges()
+    drawn = np.zeros(4 * n, dtype=bool)
+    for start, count in zip(starts, counts):
+        drawn[start : start + count] = True
+    assert np.array_equal(drawn, np.repeat(section.mask, 4))
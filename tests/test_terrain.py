@@ -0,0 +1,33 @@
+import numpy as np
+from types import SimpleNamespace
+from dtcc_viewer.opengl.gl_raster import GlRaster
+
+
+def _terrain(n_rings: int, extent: float) -> GlRaster:
+    raster = GlRaster.__new__(GlRaster)
+    raster.n_rings = n_rings
+    raster.min_spacing = 0.25
+    raster.bb_local = SimpleNamespace(
+        xmin=-extent, xmax=extent, ymin=-extent, ymax=extent
+    )
+    return raster
+
+
+def test_terrain_rings_cover_each_point_once():
+    raster = _terrain(4, 1000.0)
+    rng = np.random.default_rng(4)
+    targets = [(6.0, 2.0), (0.0, 0.0), (-37.3, 81.9)] + list(rng.random((5, 2)) * 50)
+
+    for target in targets:
+        (patches, centers) = raster._get_terrain_patches(np.array([*target, 0.0]))
+        size = raster.patch_cells * patches[:, 2]
+
+        # Sample the square of the coarsest ring, away from patch edges
+        half = 2.0 * raster.patch_cells * raster.min_spacing * 2 ** (raster.n_rings - 1)
+        samples = centers[-1] + (rng.random((5000, 2)) - 0.5) * 2.0 * half * 0.999
+        inside = np.all(
+            (samples[:, None, :] > patches[None, :, 0:2])
+            & (samples[:, None, :] < patches[None, :, 0:2] + size[None, :, None]),
+            axis=2,
+        )
+        assert np.all(np.sum(inside, axis=1) == 1)
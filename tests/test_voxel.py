@@ -0,0 +1,21 @@
+import numpy as np
+from dtcc_viewer.opengl.utils import voxel_downsample, voxel_downsample_chunks
+
+
+def test_chunked_voxel_downsample_matches_voxel_downsample():
+    rng = np.random.default_rng(3)
+    points = rng.random((10000, 3)) * [100.0, 50.0, 10.0]
+    data = {"z": points[:, 2].copy(), "i": rng.random(len(points))}
+    lo = points.min(axis=0)
+
+    def chunks():
+        for i in range(0, len(points), 1234):
+            yield points[i : i + 1234], {k: v[i : i + 1234] for k, v in data.items()}
+
+    sizes = [2.0, 4.0]
+    levels = voxel_downsample_chunks(chunks(), sizes, lo)
+    for size, (centroids, averages) in zip(sizes, levels):
+        (expected, expected_averages) = voxel_downsample(points, size, data)
+        assert np.allclose(centroids, expected)
+        for key in data:
+            assert np.allclose(averages[key], expected_averages[key])